@@ -4,10 +4,15 @@
 Claude分析結果を直接システムに追加
 """
 
-import json
 import os
+import sys
 from datetime import datetime
 
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.sentiment.claude_sentiment_analyzer import ClaudeSentimentAnalyzer
+
 # Claude分析結果
 analysis_result = {
     "sentiment_score": 0.3,
@@ -22,28 +27,11 @@ analysis_result = {
 news_text = "3 things you need to know about Trump's nominee for the Fed"
 
 def add_sentiment_to_cache():
-    """感情分析結果をキャッシュに追加"""
-    cache_file = "sentiment_cache.json"
-    
-    # 既存キャッシュ読み込み
-    if os.path.exists(cache_file):
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            cache = json.load(f)
-    else:
-        cache = {}
-    
-    # ニュースハッシュ生成
-    news_hash = str(hash(news_text.strip()))
-    
-    # 分析結果追加
-    analysis_result['news_text'] = news_text
-    analysis_result['added_timestamp'] = datetime.now().isoformat()
-    
-    cache[news_hash] = analysis_result
-    
-    # 保存
-    with open(cache_file, 'w', encoding='utf-8') as f:
-        json.dump(cache, f, ensure_ascii=False, indent=2)
+    """感情分析結果をキャッシュに追加（追記ログ経由、他の書き込み処理と同じ）"""
+    analyzer = ClaudeSentimentAnalyzer("sentiment_cache.json")
+    if not analyzer.add_sentiment_analysis(news_text, analysis_result):
+        return
+    cache = analyzer.sentiment_cache
     
     print(f"感情分析データ追加完了:")
     print(f"  ニュース: {news_text}")
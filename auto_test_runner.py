@@ -7,9 +7,12 @@
 import pandas as pd
 import numpy as np
 import os
+import pickle
 import sys
+import time
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Callable
+from multiprocessing import Pool, cpu_count
+from typing import Dict, List, Optional, Tuple, Callable, Union
 
 # プロジェクトのルートディレクトリをPythonパスに追加
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -18,6 +21,8 @@ from src.data.auto_data_collector import AutoDataCollector
 from src.data.enhanced_data_manager import EnhancedDataManager
 from quick_test_helper import QuickTestHelper
 from src.backtest.trade_executor import TradeExecutor
+from src.backtest.result_cache import CachedBacktestResult, result_snapshot
+from src.data.shared_frame import SharedFrame, attach_frame
 from src.utils.logger import Logger
 
 class AutoTestRunner:
@@ -29,6 +34,7 @@ class AutoTestRunner:
     2. 戦略テストの自動実行
     3. 結果の自動保存・比較
     4. テスト履歴の管理
+    5. 戦略・データが変わっていないテストの結果キャッシュ
     """
     
     def __init__(self, base_dir: str = None):
@@ -41,6 +47,7 @@ class AutoTestRunner:
         self.data_collector = AutoDataCollector(base_dir)
         self.data_manager = EnhancedDataManager(base_dir)
         self.test_helper = QuickTestHelper()
+        self.result_cache = self.test_helper.result_cache
         
         # ログ設定
         log_dir = os.path.join(self.base_dir, 'logs', 'auto_test')
@@ -101,10 +108,14 @@ class AutoTestRunner:
                          timeframe: str = '15min',
                          additional_timeframes: List[str] = None,
                          years: List[int] = None,
-                         auto_save: bool = True) -> Tuple[TradeExecutor, Dict]:
+                         auto_save: bool = True,
+                         use_cache: bool = True) -> Tuple[Union[TradeExecutor, CachedBacktestResult], Dict]:
         """
         戦略テストを自動実行
         
+        戦略（関数のソース・設定）・エンジン・データのいずれも変わっていない場合は
+        データの読み込みと戦略の実行を省略し、キャッシュした結果を返す。
+        
         Parameters
         ----------
         strategy_func : Callable
@@ -121,11 +132,13 @@ class AutoTestRunner:
             テスト年
         auto_save : bool, default True
             結果を自動保存するか
+        use_cache : bool, default True
+            結果キャッシュを使うか（乱数など戦略のソース以外で結果が変わる場合はFalse）
             
         Returns
         -------
-        Tuple[TradeExecutor, Dict]
-            (エグゼキューター, 統計情報) のタプル
+        Tuple[TradeExecutor or CachedBacktestResult, Dict]
+            (エグゼキューター（キャッシュ使用時はキャッシュした結果）, 統計情報) のタプル
         """
         self.logger.log_info("=" * 60)
         self.logger.log_info(f"戦略テスト開始: {test_name}")
@@ -138,6 +151,14 @@ class AutoTestRunner:
             
         self.ensure_latest_data(required_timeframes, years)
         
+        # 結果キャッシュの確認
+        cache_key = None
+        if use_cache:
+            cache_key = self.test_helper.result_key(strategy_func, strategy_config, timeframe, additional_timeframes)
+            cached = self.result_cache.load(cache_key)
+            if cached is not None:
+                return self._use_cached_result(cached, test_name, strategy_config, auto_save)
+        
         # STEP 2: テスト環境セットアップ
         print(f"\n[TEST] 戦略テスト実行: {test_name}")
         
@@ -176,11 +197,40 @@ class AutoTestRunner:
             )
             self.logger.log_info(f"結果保存完了: {save_path}")
         
+        if cache_key:
+            self.result_cache.store(cache_key, executor, test_name, strategy_config)
+            self.logger.log_info(f"結果キャッシュ保存: {cache_key[:12]}")
+        
         self.logger.log_info("=" * 60)
         
         return executor, stats
     
-    def compare_strategy_results(self, test_names: List[str]) -> pd.DataFrame:
+    def _use_cached_result(self,
+                           cached: CachedBacktestResult,
+                           test_name: str,
+                           strategy_config: Dict,
+                           auto_save: bool) -> Tuple[CachedBacktestResult, Dict]:
+        """キャッシュした結果を表示・保存して返す"""
+        stats = cached.get_statistics()
+        self.logger.log_info(f"結果キャッシュ使用: {cached.key[:12]}（{cached.meta['created']}）")
+        self.logger.log_info(f"テスト完了 - 総損益: {stats['total_pnl']:,.0f}円")
+        
+        print(f"\n[CACHE] 戦略・データに変更がないためキャッシュした結果を使用: {test_name}")
+        print("[RESULTS] テスト結果:")
+        self.test_helper.quick_performance_summary(cached)
+        
+        if auto_save:
+            save_path = self.test_helper.save_quick_results(cached, test_name, strategy_config)
+            self.logger.log_info(f"結果保存完了: {save_path}")
+        
+        self.result_cache.register(test_name, cached.key)
+        self.logger.log_info("=" * 60)
+        
+        return cached, stats
+    
+    def compare_strategy_results(self,
+                                 test_names: List[str],
+                                 statistics: Dict[str, Dict] = None) -> pd.DataFrame:
         """
         複数戦略の結果を比較
         
@@ -188,6 +238,8 @@ class AutoTestRunner:
         ----------
         test_names : List[str]
             比較するテスト名リスト
+        statistics : Dict[str, Dict], optional
+            {テスト名: 統計情報}（指定したテストは保存済みの結果を読まない）
             
         Returns
         -------
@@ -197,22 +249,17 @@ class AutoTestRunner:
         comparison_data = []
         
         for test_name in test_names:
+            # 結果キャッシュの統計（なければ保存済みのstatistics.json）
+            stats = (statistics or {}).get(test_name) or self.result_cache.statistics(test_name)
             result_file = f"results/{test_name}/statistics.json"
             
-            if os.path.exists(result_file):
+            if stats is None and os.path.exists(result_file):
                 import json
                 with open(result_file, 'r') as f:
                     stats = json.load(f)
-                
-                comparison_data.append({
-                    'Test Name': test_name,
-                    'Total PnL (JPY)': stats.get('total_pnl', 0),
-                    'Return (%)': stats.get('total_return', 0),
-                    'Win Rate (%)': stats.get('win_rate', 0),
-                    'Max DD (%)': stats.get('max_drawdown', 0),
-                    'Profit Factor': stats.get('profit_factor', 0),
-                    'Total Trades': stats.get('total_trades', 0)
-                })
+            
+            if stats is not None:
+                comparison_data.append(self._comparison_row(test_name, stats))
         
         if comparison_data:
             df = pd.DataFrame(comparison_data)
@@ -226,9 +273,24 @@ class AutoTestRunner:
             print("[WARNING] 比較対象のテスト結果が見つかりません")
             return pd.DataFrame()
     
+    @staticmethod
+    def _comparison_row(test_name: str, stats: Dict) -> Dict:
+        """比較テーブルの1行"""
+        return {
+            'Test Name': test_name,
+            'Total PnL (JPY)': stats.get('total_pnl', 0),
+            'Return (%)': stats.get('total_return', 0),
+            'Win Rate (%)': stats.get('win_rate', 0),
+            'Max DD (%)': stats.get('max_drawdown', 0),
+            'Profit Factor': stats.get('profit_factor', 0),
+            'Total Trades': stats.get('total_trades', 0)
+        }
+    
     def run_test_series(self, 
                        test_series: List[Dict],
-                       series_name: str = "test_series") -> Dict[str, Dict]:
+                       series_name: str = "test_series",
+                       parallel: bool = False,
+                       max_workers: int = None) -> Dict[str, Dict]:
         """
         一連のテストを自動実行
         
@@ -238,6 +300,10 @@ class AutoTestRunner:
             テスト設定リスト
         series_name : str, default "test_series"
             シリーズ名
+        parallel : bool, default False
+            テストを並列実行するか（データは1回だけ読み込んで共有メモリで各プロセスに渡す）
+        max_workers : int, optional
+            並列実行のプロセス数（デフォルト: CPU数とテスト数の小さい方）
             
         Returns
         -------
@@ -251,24 +317,212 @@ class AutoTestRunner:
         print(f"\n[SERIES] テストシリーズ実行: {series_name}")
         print(f"   テスト数: {len(test_series)}")
         
-        results = {}
-        
-        for i, test_config in enumerate(test_series, 1):
-            print(f"\n--- テスト {i}/{len(test_series)} ---")
+        if parallel:
+            results = self._run_test_series_parallel(test_series, max_workers)
+        else:
+            results = {}
             
-            executor, stats = self.run_strategy_test(**test_config)
-            results[test_config['test_name']] = stats
+            for i, test_config in enumerate(test_series, 1):
+                print(f"\n--- テスト {i}/{len(test_series)} ---")
+                
+                executor, stats = self.run_strategy_test(**test_config)
+                results[test_config['test_name']] = stats
         
         # シリーズ結果比較
         print(f"\n{'='*50}")
         print(f"{series_name} 完了")
         print(f"{'='*50}")
         
-        self.compare_strategy_results(list(results.keys()))
+        self.compare_strategy_results(list(results.keys()), results)
         
         self.logger.log_info(f"テストシリーズ完了: {series_name}")
         
         return results
+    
+    def _run_test_series_parallel(self, test_series: List[Dict], max_workers: int = None) -> Dict[str, Dict]:
+        """
+        一連のテストを並列実行
+        
+        1. 全テストに必要な時間足・年のデータを1回だけ確保
+        2. キャッシュした結果があるテストは実行しない
+        3. テスト環境（基本 / 複数時間足）ごとにデータを1回だけ読み込み、共有メモリに配置
+        4. プロセスプールで戦略を実行し、完了したテストから順に比較テーブルに出力
+        
+        Parameters
+        ----------
+        test_series : List[Dict]
+            テスト設定リスト（run_strategy_testの引数）
+        max_workers : int, optional
+            プロセス数
+            
+        Returns
+        -------
+        Dict[str, Dict]
+            {テスト名: 統計情報}（戦略実行でエラーになったテストは含まない）
+        """
+        # STEP 1: 最新データ収集（全テスト分をまとめて1回）
+        required_timeframes = []
+        years = set()
+        for test_config in test_series:
+            timeframes = [test_config.get('timeframe', '15min')] + list(test_config.get('additional_timeframes') or [])
+            required_timeframes.extend(timeframe for timeframe in timeframes if timeframe not in required_timeframes)
+            if years is not None:
+                years = years | set(test_config['years']) if test_config.get('years') else None
+        self.ensure_latest_data(required_timeframes, sorted(years) if years else None)
+        
+        print(f"\n[PARALLEL] {'Test Name':<30} {'Total PnL (JPY)':>16} {'Return (%)':>10} {'Win Rate (%)':>12}"
+              f" {'Max DD (%)':>10} {'PF':>6} {'Trades':>7} {'Time (s)':>9}")
+        results = {}
+        
+        # STEP 2: キャッシュ確認・テスト環境ごとに分類
+        pending = {}  # テスト環境 -> [(テスト設定, キャッシュのキー)]
+        for test_config in test_series:
+            timeframe = test_config.get('timeframe', '15min')
+            additional_timeframes = test_config.get('additional_timeframes')
+            cache_key = None
+            if test_config.get('use_cache', True):
+                cache_key = self.test_helper.result_key(test_config['strategy_func'],
+                                                        test_config.get('strategy_config'),
+                                                        timeframe, additional_timeframes)
+                cached = self.result_cache.load(cache_key)
+                if cached is not None:
+                    self._collect_series_result(results, test_config, cached, 0.0, cached=True)
+                    continue
+            
+            environment = ('enhanced', timeframe, tuple(additional_timeframes)) if additional_timeframes else ('basic',)
+            pending.setdefault(environment, []).append((test_config, cache_key))
+        
+        if not pending:
+            return results
+        
+        # STEP 3: テスト環境ごとにデータを1回だけ読み込み、共有メモリに配置
+        shared_frames = []
+        tasks = []
+        try:
+            for environment, configs in pending.items():
+                if environment[0] == 'enhanced':
+                    data, executor, metadata = self.test_helper.setup_enhanced_backtest(
+                        timeframe=environment[1],
+                        additional_timeframes=list(environment[2])
+                    )
+                else:
+                    data, executor, metadata = self.test_helper.setup_basic_backtest()
+                
+                shared = SharedFrame(data)
+                shared_frames.append(shared)
+                self.logger.log_info(f"共有メモリにデータを配置: {environment} "
+                                     f"{len(data)} 行, {shared.nbytes / 1024 ** 2:.1f}MB")
+                
+                settings = {
+                    'spec': shared.spec,
+                    'metadata': metadata,
+                    'executor': {
+                        'initial_balance': executor.initial_balance,
+                        'spread_pips': executor.spread_pips,
+                        'commission_per_lot': executor.commission_per_lot,
+                        'max_positions': executor.max_positions,
+                        'margin_rate': executor.margin_rate
+                    }
+                }
+                tasks.extend((test_config, cache_key, settings) for test_config, cache_key in configs)
+            
+            # STEP 4: プロセスプールで実行（プロセスに渡せない戦略関数はこのプロセスで実行）
+            remote = {task[0]['test_name']: task for task in tasks if self._picklable(task[0])}
+            local = [task for task in tasks if not self._picklable(task[0])]
+            workers = max(1, min(max_workers or cpu_count(), len(remote)))
+            self.logger.log_info(f"並列実行: {len(remote)} テスト / {workers} プロセス"
+                                 f"（プロセス内実行 {len(local)} テスト）")
+            
+            with Pool(processes=workers) as pool:
+                completed = pool.imap_unordered(_run_series_test,
+                                                [self._task_payload(task) for task in remote.values()])
+                for task in local:
+                    self._handle_series_output(results, task, _run_series_test(self._task_payload(task)))
+                for output in completed:
+                    self._handle_series_output(results, remote[output[0]], output)
+        finally:
+            for shared in shared_frames:
+                shared.close()
+        
+        return results
+    
+    @staticmethod
+    def _picklable(test_config: Dict) -> bool:
+        """テスト設定を子プロセスに渡せるか（ラムダ・ローカル関数の戦略は渡せない）"""
+        try:
+            pickle.dumps(test_config['strategy_func'])
+            return True
+        except Exception:
+            return False
+    
+    @staticmethod
+    def _task_payload(task: Tuple) -> Tuple[Dict, Dict]:
+        """子プロセスに渡す (戦略の設定, テスト環境)"""
+        test_config, cache_key, settings = task
+        return ({'test_name': test_config['test_name'],
+                 'strategy_func': test_config['strategy_func'],
+                 'strategy_config': test_config.get('strategy_config')}, settings)
+    
+    def _handle_series_output(self, results: Dict[str, Dict], task: Tuple, output: Tuple):
+        """並列実行の1テストの結果を保存・出力"""
+        test_config, cache_key, settings = task
+        test_name, snapshot, error, elapsed = output
+        
+        if error is not None:
+            self.logger.log_error(f"戦略実行エラー: {test_name}: {error}")
+            print(f"[ERROR] {test_name}: 戦略実行エラー: {error}")
+            return
+        
+        arrays, meta = snapshot
+        if cache_key:
+            self.result_cache.store_snapshot(cache_key, arrays, meta)
+        result = CachedBacktestResult.from_snapshot(cache_key or '', arrays, meta)
+        self._collect_series_result(results, test_config, result, elapsed)
+    
+    def _collect_series_result(self, results: Dict[str, Dict], test_config: Dict,
+                               result: CachedBacktestResult, elapsed: float, cached: bool = False):
+        """テスト結果を記録し、比較テーブルの1行として出力"""
+        test_name = test_config['test_name']
+        stats = result.get_statistics()
+        results[test_name] = stats
+        
+        if test_config.get('auto_save', True):
+            save_path = self.test_helper.save_quick_results(result, test_name, test_config.get('strategy_config'))
+            self.logger.log_info(f"結果保存完了: {save_path}")
+        if cached:
+            self.result_cache.register(test_name, result.key)
+        self.logger.log_info(f"テスト完了: {test_name} - 総損益: {stats['total_pnl']:,.0f}円"
+                             f"{'（キャッシュ）' if cached else ''}")
+        
+        row = self._comparison_row(test_name, stats)
+        print(f"[PARALLEL] {test_name:<30} {row['Total PnL (JPY)']:>16,.0f} {row['Return (%)']:>10.2f}"
+              f" {row['Win Rate (%)']:>12.1f} {row['Max DD (%)']:>10.2f} {row['Profit Factor']:>6.2f}"
+              f" {row['Total Trades']:>7d} {'cache' if cached else f'{elapsed:.1f}':>9}")
+
+def _run_series_test(payload: Tuple[Dict, Dict]) -> Tuple[str, Optional[Tuple[Dict, Dict]], Optional[str], float]:
+    """
+    並列実行の1テスト（子プロセスで実行）
+    
+    Parameters
+    ----------
+    payload : Tuple[Dict, Dict]
+        (戦略の設定, テスト環境（共有メモリのspec・メタデータ・TradeExecutorの引数）)
+        
+    Returns
+    -------
+    Tuple
+        (テスト名, 結果の保存形式（result_snapshot）, エラー, 実行時間)
+    """
+    test_config, settings = payload
+    start = time.perf_counter()
+    try:
+        data = attach_frame(settings['spec'])
+        executor = TradeExecutor(**settings['executor'])
+        test_config['strategy_func'](data, executor, dict(settings['metadata']))
+        snapshot = result_snapshot(executor, test_config['test_name'], test_config['strategy_config'])
+        return test_config['test_name'], snapshot, None, time.perf_counter() - start
+    except Exception as e:
+        return test_config['test_name'], None, f"{type(e).__name__}: {e}", time.perf_counter() - start
 
 # 便利関数
 def auto_test(strategy_func: Callable,
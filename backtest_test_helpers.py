@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+バックテストのテスト用の共通部品
+
+高速化前の実装を再現した参照モデル（LegacyPosition / LegacyBarEngine / LegacyExecutor）と、
+シグナル列付きの合成データ（make_signal_data）。各テスト（test_position_book.py・
+test_simulation_kernel.py・test_trade_event_log.py）はここから読み込み、
+比較の基準が食い違わないようにする。
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.backtest.position import PositionStatus
+
+
+class LegacyPosition:
+    """従来のPosition（属性辞書とpd.Timestampを持つオブジェクト）"""
+
+    def __init__(self, entry_time, direction, entry_price, sl_price, tp_price, strategy, lot_size=0.01):
+        self.entry_time = entry_time
+        self.direction = direction
+        self.entry_price = entry_price
+        self.sl_price = sl_price
+        self.tp_price = tp_price
+        self.strategy = strategy
+        self.lot_size = lot_size
+        self.exit_time = None
+        self.exit_price = None
+        self.status = PositionStatus.OPEN
+        self.profit_pips = None
+        self.profit_jpy = None
+
+    def close_position(self, exit_time, exit_price, status):
+        self.exit_time = exit_time
+        self.exit_price = exit_price
+        self.status = status
+        self.profit_pips = (exit_price - self.entry_price) * self.direction * 100
+        pip_value = 0.01 * 1000 * self.lot_size
+        self.profit_jpy = self.profit_pips * pip_value
+
+    def calculate_profit(self, current_price):
+        return (current_price - self.entry_price) * self.direction * 100 * (0.01 * 1000 * self.lot_size)
+
+    def to_dict(self):
+        return {
+            'エントリー時間': self.entry_time,
+            '決済時間': self.exit_time,
+            '取引方向': "買い" if self.direction == 1 else "売り",
+            'エントリー価格': self.entry_price,
+            '決済価格': self.exit_price,
+            '損益(pips)': self.profit_pips,
+            '損益(円)': self.profit_jpy,
+            '決済理由': self.status.value if self.status else None,
+            '戦略': self.strategy,
+            'ロットサイズ': self.lot_size
+        }
+
+
+class LegacyBarEngine:
+    """
+    従来のバーごとのループ（BacktestEngine / CustomBacktestEngine / EnhancedBacktestEngineの処理）
+
+    lot_rule: 'fixed'（BacktestEngine）, 'position_size'（ルートのCustomBacktestEngine）,
+              'win_rate'（EnhancedBacktestEngine）
+    """
+
+    def __init__(self, data, initial_balance, lot_size, max_positions, spread_pips=0.2, lot_rule='fixed',
+                 increased_lot_size=0.02, win_rate_threshold=80.0, strategy_instance=None):
+        self.data = data.copy()
+        self.balance = initial_balance
+        self.lot_size = lot_size
+        self.max_positions = max_positions
+        self.spread_pips = spread_pips
+        self.lot_rule = lot_rule
+        self.increased_lot_size = increased_lot_size
+        self.win_rate_threshold = win_rate_threshold
+        self.strategy_instance = strategy_instance
+        self.open_positions = []
+        self.closed_positions = []
+        self.equity_curve = []
+        self.ignored_signals = 0
+        self.position_limit_reached_count = 0
+        self.total_trades = 0
+        self.total_wins = 0
+        self.current_win_rate = 0.0
+
+    def run(self):
+        for i in range(len(self.data)):
+            current_time = self.data.index[i]
+            current_bar = self.data.iloc[i]
+
+            self._check_positions_for_exit(current_time, current_bar)
+
+            if len(self.open_positions) >= self.max_positions:
+                self.position_limit_reached_count += 1
+
+            if current_bar['signal'] != 0:
+                if len(self.open_positions) < self.max_positions:
+                    self._open_new_position(current_time, current_bar)
+                else:
+                    self.ignored_signals += 1
+
+            unrealized_profit = sum([pos.calculate_profit(self.data.loc[current_time, 'Close'])
+                                     for pos in self.open_positions])
+            self.equity_curve.append({
+                'time': current_time,
+                'balance': self.balance,
+                'equity': self.balance + unrealized_profit,
+                'open_positions': len(self.open_positions),
+                'win_rate': self.current_win_rate
+            })
+        return self
+
+    def _check_positions_for_exit(self, current_time, current_bar):
+        positions_to_remove = []
+        for position in self.open_positions:
+            if position.direction == 1:
+                if current_bar['High'] >= position.tp_price:
+                    position.close_position(current_time, position.tp_price, PositionStatus.CLOSED_TAKE_PROFIT)
+                    positions_to_remove.append(position)
+                elif current_bar['Low'] <= position.sl_price:
+                    position.close_position(current_time, position.sl_price, PositionStatus.CLOSED_STOP_LOSS)
+                    positions_to_remove.append(position)
+            else:
+                if current_bar['Low'] <= position.tp_price:
+                    position.close_position(current_time, position.tp_price, PositionStatus.CLOSED_TAKE_PROFIT)
+                    positions_to_remove.append(position)
+                elif current_bar['High'] >= position.sl_price:
+                    position.close_position(current_time, position.sl_price, PositionStatus.CLOSED_STOP_LOSS)
+                    positions_to_remove.append(position)
+
+        for position in positions_to_remove:
+            self.balance += position.profit_jpy
+            self.total_trades += 1
+            if position.status == PositionStatus.CLOSED_TAKE_PROFIT:
+                self.total_wins += 1
+            self.open_positions.remove(position)
+            self.closed_positions.append(position)
+            if self.strategy_instance is not None:
+                self.strategy_instance.update_consecutive_stats(position.profit_pips > 0, None)
+
+        if self.total_trades > 0:
+            self.current_win_rate = (self.total_wins / self.total_trades) * 100
+
+    def _open_new_position(self, current_time, current_bar):
+        entry_price = current_bar['entry_price']
+        if current_bar['signal'] == 1:
+            entry_price += self.spread_pips * 0.01 / 2
+        else:
+            entry_price -= self.spread_pips * 0.01 / 2
+
+        lot_size = self.lot_size
+        if self.lot_rule == 'position_size' and 'position_size' in current_bar:
+            lot_size = current_bar['position_size']
+        elif self.lot_rule == 'win_rate':
+            increased = self.current_win_rate >= self.win_rate_threshold
+            lot_size = self.increased_lot_size if increased else self.lot_size
+            if 'position_size' in current_bar and not pd.isna(current_bar['position_size']):
+                lot_size = current_bar['position_size'] * 2 if increased else current_bar['position_size']
+
+        self.open_positions.append(LegacyPosition(current_time, current_bar['signal'], entry_price,
+                                                  current_bar['sl_price'], current_bar['tp_price'],
+                                                  current_bar['strategy'], lot_size))
+
+
+class LegacyExecutor:
+    """従来のTradeExecutor（保有ポジションを辞書で持ち、全件を合計する）"""
+
+    def __init__(self, initial_balance, max_positions, spread_pips=0.2, margin_rate=1.0):
+        self.initial_balance = initial_balance
+        self.balance = initial_balance
+        self.max_positions = max_positions
+        self.spread_pips = spread_pips
+        self.margin_rate = margin_rate
+        self.positions = {}
+        self.next_position_id = 1
+        self.closed = []
+
+    def can_open_position(self, lot_size, price):
+        if len(self.positions) >= self.max_positions:
+            return False
+        required_margin = lot_size * 100000 * price * self.margin_rate
+        used_margin = sum(pos[4] for pos in self.positions.values()) * 100000 * price * self.margin_rate
+        if used_margin + required_margin > self.initial_balance * 0.80:
+            return False
+        return self.balance - used_margin >= required_margin
+
+    def open_position(self, signal, price, lot_size, stop_loss_pips, take_profit_pips):
+        if signal == 0 or not self.can_open_position(lot_size, price):
+            return None
+        entry_price = price + self.spread_pips / 100 if signal == 1 else price - self.spread_pips / 100
+        stop_loss = entry_price - signal * stop_loss_pips / 100
+        take_profit = entry_price + signal * take_profit_pips / 100
+        self.positions[self.next_position_id] = (signal, entry_price, stop_loss, take_profit, lot_size)
+        self.next_position_id += 1
+        return self.next_position_id - 1
+
+    def _close(self, position_id, price, reason):
+        signal, entry_price, _, _, lot_size = self.positions.pop(position_id)
+        pnl_pips = (price - entry_price) * 100 if signal == 1 else (entry_price - price) * 100
+        pnl_amount = pnl_pips * lot_size * 1000
+        self.balance += pnl_amount
+        self.closed.append((position_id, reason, pnl_amount))
+
+    def check_positions(self, price):
+        for position_id, (signal, _, stop_loss, take_profit, _) in list(self.positions.items()):
+            if (price >= take_profit) if signal == 1 else (price <= take_profit):
+                self._close(position_id, price, 'tp')
+            elif (price <= stop_loss) if signal == 1 else (price >= stop_loss):
+                self._close(position_id, price, 'sl')
+
+
+def make_signal_data(n: int, seed: int = 0, position_size=None, signals=(0, 0, 0, 0, 0, 1, -1),
+                     stops=None, strategies=('bollinger_rsi', 'tokyo_london')) -> pd.DataFrame:
+    """
+    シグナル列（signal, entry_price, sl_price, tp_price, strategy）を持つ15分足
+
+    signals: シグナルを選ぶ値（0の割合でシグナルの頻度が決まる）
+    stops: (損切り幅, 利確幅)の固定値（省略時は行ごとにランダム）
+    strategies: 戦略名を選ぶ値（1つの場合は全行同じ）
+    position_size: position_size列の値を選ぶ値（省略時は列なし）
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2024-01-01', periods=n, freq='15min')
+    close = 150 + np.cumsum(rng.normal(0, 0.03, n))
+    spread = np.abs(rng.normal(0, 0.03, n))
+    signal = rng.choice(list(signals), n)
+    if stops is None:
+        sl = rng.uniform(0.05, 0.2, n)
+        tp = rng.uniform(0.05, 0.3, n)
+    else:
+        sl, tp = stops
+    data = pd.DataFrame({
+        'Open': close, 'High': close + spread, 'Low': close - spread, 'Close': close,
+        'signal': signal, 'entry_price': close,
+        'sl_price': close - signal * sl, 'tp_price': close + signal * tp,
+        'strategy': strategies[0] if len(strategies) == 1 else rng.choice(list(strategies), n)
+    }, index=index)
+    if position_size is not None:
+        data['position_size'] = rng.choice(position_size, n)
+    return data
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+MT5実稼働ループのレイテンシベンチマーク
+
+MT5転送パッケージの実稼働スクリプト（mt5_main.py）を、記録済みの15分足を1本ずつ返す
+スタブMT5モジュールで動かし、run_strategyの1サイクル
+    get_market_data → create_features → predict_signal → execute_trade
+の段階ごとのレイテンシ（p50/p99）とメモリ使用量を計測する。
+メモリ使用量はセットアップ完了時点（再生前）からの増加分を予算と比較する（ライブラリの
+読み込み分を含むプロセス全体のRSSは参考として表示する）。
+合計レイテンシのp99またはメモリ使用量が予算を超えた場合は終了コード1で終了するので、
+VPSへのデプロイ前の回帰チェックに使える。
+
+使い方:
+    python benchmark_mt5_live_loop.py --cycles 500 --budget-ms 50
+"""
+
+import argparse
+import gc
+import importlib
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from collections import namedtuple
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from model_transfer_system import ModelTransferSystem
+
+STAGES = ['get_market_data', 'create_features', 'predict_signal', 'execute_trade', 'total']
+
+# MT5のcopy_rates_from_posが返す構造化配列の型
+RATE_DTYPE = np.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+    ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8')
+])
+
+AccountInfo = namedtuple('AccountInfo', ['login', 'balance'])
+Tick = namedtuple('Tick', ['time', 'bid', 'ask'])
+OrderResult = namedtuple('OrderResult', ['retcode', 'comment', 'price', 'volume'])
+
+
+def load_recorded_bars(year: int, spread_points: int = 3) -> np.ndarray:
+    """記録済み15分足をMT5のレート配列の形式で読み込む"""
+    path = f"data/processed/15min/{year}/USDJPY_15min_{year}.csv"
+    df = pd.read_csv(path, index_col='Datetime', parse_dates=True)
+
+    rates = np.zeros(len(df), dtype=RATE_DTYPE)
+    rates['time'] = df.index.asi8 // 10**9
+    rates['open'] = df['Open'].to_numpy()
+    rates['high'] = df['High'].to_numpy()
+    rates['low'] = df['Low'].to_numpy()
+    rates['close'] = df['Close'].to_numpy()
+    rates['tick_volume'] = df['Volume'].fillna(0).to_numpy().astype(np.uint64)
+    rates['spread'] = spread_points
+    return rates
+
+
+class ReplayMT5:
+    """
+    記録済みの足を再生するスタブMT5モジュール
+
+    MetaTrader5パッケージのうち実稼働スクリプトが使う関数・定数だけを持つ。
+    advance()を呼ぶたびに最新足が1本進む。
+    """
+
+    TIMEFRAME_M15 = 15
+    ORDER_TYPE_BUY = 0
+    ORDER_TYPE_SELL = 1
+    TRADE_ACTION_DEAL = 1
+    ORDER_TIME_GTC = 0
+    ORDER_FILLING_IOC = 1
+    TRADE_RETCODE_DONE = 10009
+
+    def __init__(self, rates: np.ndarray, start: int):
+        self.rates = rates
+        self.cursor = start
+        self.orders: List[dict] = []
+
+    def advance(self):
+        self.cursor += 1
+
+    def as_module(self) -> types.ModuleType:
+        """import MetaTrader5 として登録できるモジュールを作る"""
+        module = types.ModuleType('MetaTrader5')
+        for name in dir(self):
+            if name.isupper() or name in ('initialize', 'shutdown', 'account_info',
+                                          'copy_rates_from_pos', 'symbol_info_tick', 'order_send'):
+                setattr(module, name, getattr(self, name))
+        return module
+
+    def initialize(self, *args, **kwargs) -> bool:
+        return True
+
+    def shutdown(self):
+        pass
+
+    def account_info(self):
+        return AccountInfo(login=0, balance=3000000.0)
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        end = self.cursor - start_pos
+        return self.rates[max(0, end - count):end].copy()
+
+    def symbol_info_tick(self, symbol):
+        bar = self.rates[self.cursor - 1]
+        half_spread = bar['spread'] * 0.001 / 2
+        return Tick(time=int(bar['time']), bid=bar['close'] - half_spread, ask=bar['close'] + half_spread)
+
+    def order_send(self, request):
+        self.orders.append(request)
+        return OrderResult(retcode=self.TRADE_RETCODE_DONE, comment='Request executed',
+                           price=request['price'], volume=request['volume'])
+
+
+def build_package(path: str):
+    """ベンチマーク用のMT5転送パッケージを作成（モデル・感情データ・設定・スクリプト）"""
+    system = ModelTransferSystem(path)
+    os.makedirs(path, exist_ok=True)
+    system.extract_trained_models()
+    system.transfer_sentiment_data()
+    system.transfer_configurations()
+    system.generate_mt5_scripts()
+
+
+def load_live_strategy(package_path: str, stub: ReplayMT5):
+    """スタブMT5を登録して実稼働スクリプトを読み込み、戦略を初期化する"""
+    sys.modules['MetaTrader5'] = stub.as_module()
+    sys.path.insert(0, package_path)
+    os.chdir(package_path)
+
+    module = importlib.import_module('mt5_main')
+
+    # ログはファイル出力のみ残す（ファイル書き込みのコストは計測に含める）
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if type(handler) is logging.StreamHandler:
+            root.removeHandler(handler)
+
+    strategy = module.MT5EnhancedTrinity()
+    if not strategy.initialize_mt5():
+        raise RuntimeError("スタブMT5の初期化に失敗しました")
+    return strategy
+
+
+def run_cycles(strategy, stub: ReplayMT5, cycles: int) -> Dict[str, List[float]]:
+    """
+    run_strategyの1サイクル（待機を除く）をcycles回実行し、段階ごとの時間を記録する
+
+    predict_signalは内部でcreate_featuresを呼ぶため、create_featuresの時間を差し引いて
+    予測部分だけをpredict_signalとして記録する。
+    """
+    timings = {stage: [] for stage in STAGES}
+    create_features = strategy.create_features
+
+    def timed_create_features(data):
+        start = time.perf_counter()
+        features = create_features(data)
+        timings['create_features'].append(time.perf_counter() - start)
+        return features
+
+    strategy.create_features = timed_create_features
+    threshold = strategy.config['strategy']['confidence_threshold']
+
+    try:
+        for _ in range(cycles):
+            stub.advance()
+            cycle_start = time.perf_counter()
+
+            data = strategy.get_market_data()
+            after_data = time.perf_counter()
+
+            prediction, confidence = strategy.predict_signal(data)
+            after_predict = time.perf_counter()
+
+            if confidence > threshold:
+                strategy.execute_trade(prediction, confidence)
+                timings['execute_trade'].append(time.perf_counter() - after_predict)
+
+            cycle_end = time.perf_counter()
+            timings['get_market_data'].append(after_data - cycle_start)
+            timings['predict_signal'].append(after_predict - after_data - timings['create_features'][-1])
+            timings['total'].append(cycle_end - cycle_start)
+    finally:
+        strategy.create_features = create_features
+
+    return timings
+
+
+def process_rss_mb() -> float:
+    """プロセスの現在のメモリ使用量（RSS, MB）。取得できない場合はNaN"""
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss / 1024 / 1024
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        return float('nan')
+
+
+def measure_memory(strategy, stub: ReplayMT5, cycles: int, baseline_rss_mb: float) -> Dict[str, float]:
+    """
+    メモリ使用量（ループ中のPythonヒープのピークと、セットアップ後からのRSSの増加）
+
+    RSSにはインタプリタやpandas・scikit-learn等のライブラリの読み込み分が含まれるため、
+    予算の判定にはセットアップ完了時点（再生前）からの増加分を使う。
+    """
+    gc.collect()
+    tracemalloc.start()
+    run_cycles(strategy, stub, cycles)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rss_mb = process_rss_mb()
+    return {
+        'loop_peak_mb': peak / 1024 / 1024,
+        'baseline_rss_mb': baseline_rss_mb,
+        'rss_mb': rss_mb,
+        'rss_growth_mb': rss_mb - baseline_rss_mb
+    }
+
+
+def summarize(timings: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    """段階ごとのp50/p99/最大（ミリ秒）"""
+    summary = {}
+    for stage in STAGES:
+        values = np.array(timings[stage]) * 1000
+        if len(values) == 0:
+            continue
+        summary[stage] = {
+            'calls': len(values),
+            'p50': float(np.percentile(values, 50)),
+            'p99': float(np.percentile(values, 99)),
+            'max': float(values.max())
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MT5実稼働ループのレイテンシを計測します')
+    parser.add_argument('--year', type=int, default=2024, help='再生する15分足の年')
+    parser.add_argument('--cycles', type=int, default=500, help='計測するサイクル数')
+    parser.add_argument('--warmup', type=int, default=20, help='計測前に実行するサイクル数')
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help='1サイクルの合計レイテンシ（p99）の予算（省略時はmt5_config.jsonのlatency_budget_ms）')
+    parser.add_argument('--memory-budget-mb', type=float, default=None,
+                        help='再生中のメモリ使用量の増加の予算（省略時はmt5_config.jsonのmax_memory_mb）')
+    parser.add_argument('--package', default=None,
+                        help='計測するMT5転送パッケージ（省略時は一時ディレクトリに作成）')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("MT5実稼働ループ レイテンシベンチマーク")
+    print("=" * 60)
+
+    cwd = os.getcwd()
+    rates = load_recorded_bars(args.year)
+    package_path = os.path.abspath(args.package) if args.package else tempfile.mkdtemp(prefix='mt5_bench_')
+
+    try:
+        if args.package is None:
+            build_package(package_path)
+
+        stub = ReplayMT5(rates, start=200)
+        strategy = load_live_strategy(package_path, stub)
+        gc.collect()
+        baseline_rss_mb = process_rss_mb()
+
+        cycles = min(args.cycles, len(rates) - stub.cursor - args.warmup)
+        run_cycles(strategy, stub, args.warmup)
+        stub.orders.clear()
+        timings = run_cycles(strategy, stub, cycles)
+        orders = len(stub.orders)
+        memory = measure_memory(strategy, stub, min(100, len(rates) - stub.cursor), baseline_rss_mb)
+
+        budget_ms = args.budget_ms or strategy.config['system'].get('latency_budget_ms', 50)
+        memory_budget_mb = args.memory_budget_mb or strategy.config['strategy'].get('max_memory_mb', 300)
+    finally:
+        os.chdir(cwd)
+        logging.shutdown()
+        if args.package is None:
+            shutil.rmtree(package_path, ignore_errors=True)
+
+    summary = summarize(timings)
+
+    print(f"\n再生データ: {args.year}年 15分足  サイクル数: {cycles}  注文数: {orders}")
+    print(f"\n{'段階':18s} {'回数':>6s} {'p50(ms)':>10s} {'p99(ms)':>10s} {'最大(ms)':>10s}")
+    print("-" * 58)
+    for stage, stats in summary.items():
+        print(f"{stage:18s} {stats['calls']:6d} {stats['p50']:10.3f} {stats['p99']:10.3f} {stats['max']:10.3f}")
+
+    # 予算の判定はループによる増加分（RSSが取得できない場合はヒープのピーク）
+    memory_used_mb = memory['rss_growth_mb']
+    if memory_used_mb != memory_used_mb:
+        memory_used_mb = memory['loop_peak_mb']
+
+    print(f"\nループ中のヒープピーク: {memory['loop_peak_mb']:.2f}MB")
+    print(f"再生中のメモリ使用量の増加: {memory_used_mb:.1f}MB")
+    if memory['rss_mb'] == memory['rss_mb']:
+        print(f"（参考）プロセスのメモリ使用量: セットアップ後 {memory['baseline_rss_mb']:.1f}MB → "
+              f"再生後 {memory['rss_mb']:.1f}MB（ライブラリの読み込み分を含む）")
+
+    failures = []
+    if summary['total']['p99'] > budget_ms:
+        failures.append(f"合計レイテンシp99 {summary['total']['p99']:.2f}ms > 予算 {budget_ms:.2f}ms")
+    if memory_used_mb > memory_budget_mb:
+        failures.append(f"メモリ使用量の増加 {memory_used_mb:.1f}MB > 予算 {memory_budget_mb:.1f}MB")
+
+    print("\n" + "=" * 60)
+    if failures:
+        for failure in failures:
+            print(f"❌ 予算超過: {failure}")
+    else:
+        print(f"✅ 予算内（レイテンシp99 ≤ {budget_ms:.1f}ms, メモリの増加 ≤ {memory_budget_mb:.0f}MB）")
+    print("=" * 60)
+
+    return not failures
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
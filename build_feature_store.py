@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+特徴量ストア作成
+処理済み価格データから全特徴量セットを計算し、data/features/{timeframe}/{year} に保存する
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.data.feature_store import FeatureStore
+from src.strategies.feature_pipeline import FEATURE_SETS
+
+
+def load_price_data(timeframe: str, years) -> pd.DataFrame:
+    """指定した年の価格データを連結して読み込む"""
+    frames = []
+    for year in years:
+        path = f"data/processed/{timeframe}/{year}/USDJPY_{timeframe}_{year}.csv"
+        if not os.path.exists(path):
+            print(f"データなし: {path}")
+            continue
+        df = pd.read_csv(path, index_col='Datetime', parse_dates=True)
+        frames.append(df[['Open', 'High', 'Low', 'Close', 'Volume']])
+
+    data = pd.concat(frames).sort_index()
+    return data[~data.index.duplicated(keep='last')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ML学習用の特徴量ストアを作成します')
+    parser.add_argument('--timeframe', default='15min', help='時間足（例：15min）')
+    parser.add_argument('--years', type=int, nargs='+', default=[2022, 2023, 2024, 2025],
+                        help='対象の年（連続した年を指定。先頭の年から始まるデータにのみ使われる）')
+    parser.add_argument('--feature-sets', nargs='+', default=list(FEATURE_SETS),
+                        choices=list(FEATURE_SETS), help='保存する特徴量セット')
+    parser.add_argument('--root', default='data/features', help='保存先ディレクトリ')
+    args = parser.parse_args()
+
+    data = load_price_data(args.timeframe, args.years)
+    print(f"価格データ: {len(data)}行 ({data.index[0]} - {data.index[-1]})")
+
+    start = time.time()
+    FeatureStore(args.root, args.timeframe).materialize(data, args.feature_sets)
+    print(f"特徴量ストア作成完了: {time.time() - start:.1f}秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,9 @@ import numpy as np
 from typing import Dict, List, Optional, Tuple
 import datetime
 from src.backtest.position import Position, PositionStatus
+from src.backtest.position_book import PositionBook, PositionSequence
+from src.backtest.simulation_kernel import FixedLotSizing, SimulationKernel
+from src.backtest.trade_event_log import TradeEventLog
 
 class CustomBacktestEngine:
     """
@@ -13,7 +16,8 @@ class CustomBacktestEngine:
 
     def __init__(self, data: pd.DataFrame, initial_balance: float = 200000,
                  lot_size: float = 0.01, max_positions: int = 3,
-                 spread_pips: float = 0.2, strategy_instance=None):
+                 spread_pips: float = 0.2, strategy_instance=None,
+                 event_log: Optional[TradeEventLog] = None):
         """
         初期化
 
@@ -31,6 +35,8 @@ class CustomBacktestEngine:
             スプレッド（pips）
         strategy_instance : object, default None
             戦略インスタンス（パターン統計更新用）
+        event_log : TradeEventLog, optional
+            新規注文・決済の記録先
         """
         self.data = data.copy()
         self.initial_balance = initial_balance
@@ -39,12 +45,14 @@ class CustomBacktestEngine:
         self.max_positions = max_positions
         self.spread_pips = spread_pips
         self.strategy_instance = strategy_instance
+        self.event_log = event_log
 
+        self.position_book = PositionBook()
         self.open_positions = []
-        self.closed_positions = []
+        self.closed_positions = PositionSequence(self.position_book, Position.from_row)
 
         self.equity_curve = []
-        self.trade_history = []
+        self.trade_history = PositionSequence(self.position_book, self._trade_log_from_row)
 
     def run(self) -> Dict:
         """
@@ -55,17 +63,16 @@ class CustomBacktestEngine:
         Dict
             バックテスト結果の要約
         """
-        
-        for i in range(len(self.data)):
-            current_time = self.data.index[i]
-            current_bar = self.data.iloc[i]
-
-            self._check_positions_for_exit(current_time, current_bar)
+        # 共通のシミュレーションカーネルで全バーを処理（position_size列があればそのロットサイズ）
+        kernel = SimulationKernel(self.position_book, self.balance, self.max_positions,
+                                  FixedLotSizing(self.lot_size))
+        if self.strategy_instance is not None:
+            kernel.close_listeners.append(self._on_position_closed)
+        kernel.set_event_log(self.event_log)
+        self.equity_curve = kernel.run(self.data, self.spread_pips)
 
-            if current_bar['signal'] != 0 and len(self.open_positions) < self.max_positions:
-                self._open_new_position(current_time, current_bar)
-
-            self._record_equity(current_time)
+        self.balance = kernel.balance
+        self.open_positions = [Position.from_row(self.position_book, row) for row in kernel.open]
 
         total_trades = len(self.closed_positions)
         wins = sum(1 for pos in self.closed_positions if pos.profit_pips > 0)
@@ -112,107 +119,31 @@ class CustomBacktestEngine:
         
         return results
 
-    def _check_positions_for_exit(self, current_time: pd.Timestamp, current_bar: pd.Series):
+    def _on_position_closed(self, row: int, status: int):
         """
-        ポジションの決済条件を確認する
+        決済したポジションの結果を戦略のパターン統計に反映する
 
         Parameters
         ----------
-        current_time : pd.Timestamp
-            現在の時間
-        current_bar : pd.Series
-            現在の価格データ
-        """
-        bid = current_bar['Close'] - self.spread_pips * 0.01 / 2
-        ask = current_bar['Close'] + self.spread_pips * 0.01 / 2
-
-        positions_to_remove = []
-
-        for position in self.open_positions:
-            if position.direction == 1:
-                if current_bar['High'] >= position.tp_price:
-                    position.close_position(current_time, position.tp_price, PositionStatus.CLOSED_TAKE_PROFIT)
-                    positions_to_remove.append(position)
-                    self.balance += position.profit_jpy
-                elif current_bar['Low'] <= position.sl_price:
-                    position.close_position(current_time, position.sl_price, PositionStatus.CLOSED_STOP_LOSS)
-                    positions_to_remove.append(position)
-                    self.balance += position.profit_jpy
-
-            else:
-                if current_bar['Low'] <= position.tp_price:
-                    position.close_position(current_time, position.tp_price, PositionStatus.CLOSED_TAKE_PROFIT)
-                    positions_to_remove.append(position)
-                    self.balance += position.profit_jpy
-                elif current_bar['High'] >= position.sl_price:
-                    position.close_position(current_time, position.sl_price, PositionStatus.CLOSED_STOP_LOSS)
-                    positions_to_remove.append(position)
-                    self.balance += position.profit_jpy
-
-        for position in positions_to_remove:
-            self.closed_positions.append(position)
-            self.open_positions.remove(position)
-            self.trade_history.append(self._create_trade_log(position))
+        row : int
+            ポジションブックの行番号
+        status : int
+            決済理由のコード
+        """
+        position = Position.from_row(self.position_book, row)
+        strategy_instance = self._get_strategy_instance(position.strategy)
+        if strategy_instance and hasattr(strategy_instance, 'update_consecutive_stats'):
+            entry_time = position.entry_time
+            pattern_types = None
             
-            if hasattr(position, 'strategy') and hasattr(position, 'entry_time'):
-                strategy_instance = self._get_strategy_instance(position.strategy)
-                if strategy_instance and hasattr(strategy_instance, 'update_consecutive_stats'):
-                    entry_time = position.entry_time
-                    pattern_types = None
-                    
-                    if hasattr(strategy_instance, 'active_trade_patterns') and entry_time in strategy_instance.active_trade_patterns:
-                        pattern_types = strategy_instance.active_trade_patterns.pop(entry_time)
-                        
-                    strategy_instance.update_consecutive_stats(position.profit_pips > 0, pattern_types)
-
-    def _open_new_position(self, current_time: pd.Timestamp, current_bar: pd.Series):
-        """
-        新規ポジションを開く
-
-        Parameters
-        ----------
-        current_time : pd.Timestamp
-            現在の時間
-        current_bar : pd.Series
-            現在の価格データ
-        """
-        entry_price = current_bar['entry_price']
-        if current_bar['signal'] == 1:  # 買いの場合はaskを使用
-            entry_price += self.spread_pips * 0.01 / 2
-        else:  # 売りの場合はbidを使用
-            entry_price -= self.spread_pips * 0.01 / 2
-
-        position = Position(
-            entry_time=current_time,
-            direction=current_bar['signal'],
-            entry_price=entry_price,
-            sl_price=current_bar['sl_price'],
-            tp_price=current_bar['tp_price'],
-            strategy=current_bar['strategy'],
-            lot_size=self.lot_size if 'position_size' not in current_bar else current_bar['position_size']
-        )
-
-        self.open_positions.append(position)
-
-    def _record_equity(self, current_time: pd.Timestamp):
-        """
-        資産推移を記録する
-
-        Parameters
-        ----------
-        current_time : pd.Timestamp
-            現在の時間
-        """
-        unrealized_profit = sum([pos.calculate_profit(self.data.loc[current_time, 'Close']) for pos in self.open_positions])
-
-        equity = self.balance + unrealized_profit
-
-        self.equity_curve.append({
-            'time': current_time,
-            'balance': self.balance,
-            'equity': equity,
-            'open_positions': len(self.open_positions)
-        })
+            if hasattr(strategy_instance, 'active_trade_patterns') and entry_time in strategy_instance.active_trade_patterns:
+                pattern_types = strategy_instance.active_trade_patterns.pop(entry_time)
+                
+            strategy_instance.update_consecutive_stats(position.profit_pips > 0, pattern_types)
+
+    def _trade_log_from_row(self, book: PositionBook, row: int) -> Dict:
+        """ブックの行のトレードログ（trade_historyの要素）"""
+        return self._create_trade_log(Position.from_row(book, row))
 
     def _create_trade_log(self, position: Position) -> Dict:
         """
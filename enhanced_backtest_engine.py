@@ -4,6 +4,9 @@ import math
 from typing import Dict, List, Optional, Tuple
 import datetime
 from src.backtest.position import Position, PositionStatus
+from src.backtest.position_book import PositionBook, PositionSequence
+from src.backtest.simulation_kernel import SimulationKernel, WinRateLotSizing
+from src.backtest.trade_event_log import TradeEventLog
 
 class EnhancedBacktestEngine:
     """
@@ -15,7 +18,7 @@ class EnhancedBacktestEngine:
     def __init__(self, data: pd.DataFrame, initial_balance: float = 1000000,
                  base_lot_size: float = 0.01, max_positions: int = 5,
                  spread_pips: float = 0.2, win_rate_threshold: float = 80.0,
-                 increased_lot_size: float = 0.02):
+                 increased_lot_size: float = 0.02, event_log: Optional[TradeEventLog] = None):
         """
         初期化
 
@@ -35,6 +38,8 @@ class EnhancedBacktestEngine:
             ロットサイズを増加させる勝率の閾値（%）
         increased_lot_size : float, default 0.02
             勝率が閾値を超えた場合のロットサイズ
+        event_log : TradeEventLog, optional
+            新規注文・決済の記録先
         """
         self.data = data.copy()
         self.initial_balance = initial_balance
@@ -44,12 +49,14 @@ class EnhancedBacktestEngine:
         self.max_positions = max_positions
         self.spread_pips = spread_pips
         self.win_rate_threshold = win_rate_threshold
+        self.event_log = event_log
 
+        self.position_book = PositionBook()
         self.open_positions = []
-        self.closed_positions = []
+        self.closed_positions = PositionSequence(self.position_book, Position.from_row)
 
         self.equity_curve = []
-        self.trade_history = []
+        self.trade_history = PositionSequence(self.position_book, self._trade_log_from_row)
         
         self.total_trades = 0
         self.total_wins = 0
@@ -66,20 +73,18 @@ class EnhancedBacktestEngine:
         Dict
             バックテスト結果の要約
         """
-        
-        for i in range(len(self.data)):
-            current_time = self.data.index[i]
-            current_bar = self.data.iloc[i]
-
-            self._check_positions_for_exit(current_time, current_bar)
-
-            if len(self.open_positions) >= self.max_positions:
-                self.position_limit_reached_count += 1
-            
-            if current_bar['signal'] != 0 and len(self.open_positions) < self.max_positions:
-                self._open_new_position(current_time, current_bar)
-
-            self._record_equity(current_time)
+        # 共通のシミュレーションカーネルで全バーを処理（勝率に応じたロットサイズ）
+        sizing = WinRateLotSizing(self.base_lot_size, self.increased_lot_size, self.win_rate_threshold)
+        kernel = SimulationKernel(self.position_book, self.balance, self.max_positions, sizing)
+        kernel.set_event_log(self.event_log)
+        self.equity_curve = kernel.run(self.data, self.spread_pips)
+
+        self.balance = kernel.balance
+        self.open_positions = [Position.from_row(self.position_book, row) for row in kernel.open]
+        self.position_limit_reached_count += kernel.limit_reached_bars
+        self.total_trades = sizing.total_trades
+        self.total_wins = sizing.total_wins
+        self.current_win_rate = sizing.win_rate
 
         total_trades = len(self.closed_positions)
         wins = sum(1 for pos in self.closed_positions if pos.profit_pips > 0)
@@ -140,113 +145,9 @@ class EnhancedBacktestEngine:
         
         return results
 
-    def _check_positions_for_exit(self, current_time: pd.Timestamp, current_bar: pd.Series):
-        """
-        ポジションの決済条件を確認する
-
-        Parameters
-        ----------
-        current_time : pd.Timestamp
-            現在の時間
-        current_bar : pd.Series
-            現在の価格データ
-        """
-        bid = current_bar['Close'] - self.spread_pips * 0.01 / 2
-        ask = current_bar['Close'] + self.spread_pips * 0.01 / 2
-
-        positions_to_remove = []
-
-        for position in self.open_positions:
-            if position.direction == 1:
-                if current_bar['High'] >= position.tp_price:
-                    position.close_position(current_time, position.tp_price, PositionStatus.CLOSED_TAKE_PROFIT)
-                    positions_to_remove.append(position)
-                    self.balance += position.profit_jpy
-                    self.total_trades += 1
-                    self.total_wins += 1
-                elif current_bar['Low'] <= position.sl_price:
-                    position.close_position(current_time, position.sl_price, PositionStatus.CLOSED_STOP_LOSS)
-                    positions_to_remove.append(position)
-                    self.balance += position.profit_jpy
-                    self.total_trades += 1
-
-            else:
-                if current_bar['Low'] <= position.tp_price:
-                    position.close_position(current_time, position.tp_price, PositionStatus.CLOSED_TAKE_PROFIT)
-                    positions_to_remove.append(position)
-                    self.balance += position.profit_jpy
-                    self.total_trades += 1
-                    self.total_wins += 1
-                elif current_bar['High'] >= position.sl_price:
-                    position.close_position(current_time, position.sl_price, PositionStatus.CLOSED_STOP_LOSS)
-                    positions_to_remove.append(position)
-                    self.balance += position.profit_jpy
-                    self.total_trades += 1
-
-        for position in positions_to_remove:
-            self.closed_positions.append(position)
-            self.open_positions.remove(position)
-            self.trade_history.append(self._create_trade_log(position))
-            
-        if self.total_trades > 0:
-            self.current_win_rate = (self.total_wins / self.total_trades) * 100
-
-    def _open_new_position(self, current_time: pd.Timestamp, current_bar: pd.Series):
-        """
-        新規ポジションを開く
-
-        Parameters
-        ----------
-        current_time : pd.Timestamp
-            現在の時間
-        current_bar : pd.Series
-            現在の価格データ
-        """
-        entry_price = current_bar['entry_price']
-        if current_bar['signal'] == 1:  # 買いの場合はaskを使用
-            entry_price += self.spread_pips * 0.01 / 2
-        else:  # 売りの場合はbidを使用
-            entry_price -= self.spread_pips * 0.01 / 2
-            
-        lot_size = self.increased_lot_size if self.current_win_rate >= self.win_rate_threshold else self.base_lot_size
-        
-        if 'position_size' in current_bar and not pd.isna(current_bar['position_size']):
-            lot_size = current_bar['position_size']
-            if self.current_win_rate >= self.win_rate_threshold:
-                lot_size = lot_size * 2  # 0.01 -> 0.02
-
-        position = Position(
-            entry_time=current_time,
-            direction=current_bar['signal'],
-            entry_price=entry_price,
-            sl_price=current_bar['sl_price'],
-            tp_price=current_bar['tp_price'],
-            strategy=current_bar['strategy'],
-            lot_size=lot_size
-        )
-
-        self.open_positions.append(position)
-
-    def _record_equity(self, current_time: pd.Timestamp):
-        """
-        資産推移を記録する
-
-        Parameters
-        ----------
-        current_time : pd.Timestamp
-            現在の時間
-        """
-        unrealized_profit = sum([pos.calculate_profit(self.data.loc[current_time, 'Close']) for pos in self.open_positions])
-
-        equity = self.balance + unrealized_profit
-
-        self.equity_curve.append({
-            'time': current_time,
-            'balance': self.balance,
-            'equity': equity,
-            'open_positions': len(self.open_positions),
-            'win_rate': self.current_win_rate
-        })
+    def _trade_log_from_row(self, book: PositionBook, row: int) -> Dict:
+        """ブックの行のトレードログ（trade_historyの要素）"""
+        return self._create_trade_log(Position.from_row(book, row))
 
     def _create_trade_log(self, position: Position) -> Dict:
         """
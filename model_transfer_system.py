@@ -6,7 +6,6 @@
 
 import pandas as pd
 import numpy as np
-import pickle
 import json
 import os
 import shutil
@@ -19,6 +18,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.strategies.enhanced_trinity_ml_strategy import EnhancedTrinityMLStrategy
 from src.sentiment.claude_sentiment_analyzer import ClaudeSentimentAnalyzer
+from src.utils import model_artifact
+from src.utils.model_artifact import artifact_size, save_model_artifact
 
 class ModelTransferSystem:
     """
@@ -118,30 +119,36 @@ class ModelTransferSystem:
             strategy.train_lightweight_model(sample_data)
             
             if strategy.is_trained:
-                # 学習済みモデル保存
-                model_data = {
-                    'model': strategy.model,
-                    'scaler_X': strategy.scaler_X,
-                    'scaler_y': strategy.scaler_y,
-                    'feature_names': strategy.feature_names,
-                    'training_score': strategy.training_score,
-                    'prediction_accuracy': strategy.prediction_accuracy,
-                    'confidence_threshold': strategy.confidence_threshold,
-                    'trained_at': datetime.now().isoformat()
-                }
+                # 学習済みモデルを成果物形式で保存（MT5側でscikit-learnなしに読み込める）
+                model_dir = f"{self.mt5_target_path}/trained_model"
+                save_model_artifact(
+                    model_dir,
+                    strategy.model,
+                    scaler_X=strategy.scaler_X,
+                    scaler_y=strategy.scaler_y,
+                    feature_names=strategy.feature_names,
+                    metadata={
+                        'training_score': strategy.training_score,
+                        'prediction_accuracy': strategy.prediction_accuracy,
+                        'confidence_threshold': strategy.confidence_threshold,
+                        'trained_at': datetime.now().isoformat()
+                    }
+                )
                 
-                # Pickle形式で保存
-                model_file = f"{self.mt5_target_path}/trained_model.pkl"
-                with open(model_file, 'wb') as f:
-                    pickle.dump(model_data, f)
+                # 読み込み用モジュールを同梱
+                shutil.copy(model_artifact.__file__, f"{self.mt5_target_path}/model_artifact.py")
                 
                 model_info['files'].append({
-                    'filename': 'trained_model.pkl',
-                    'type': 'scikit-learn_model',
-                    'size_mb': os.path.getsize(model_file) / 1024 / 1024,
+                    'filename': 'trained_model/',
+                    'type': 'model_artifact',
+                    'size_mb': artifact_size(model_dir) / 1024 / 1024,
                     'accuracy': strategy.prediction_accuracy,
                     'training_score': strategy.training_score
                 })
+                model_info['files'].append({
+                    'filename': 'model_artifact.py',
+                    'type': 'model_loader'
+                })
                 
                 print(f"    ✅ 学習済みモデル保存完了")
                 print(f"       精度: {strategy.prediction_accuracy:.1%}")
@@ -174,6 +181,8 @@ class ModelTransferSystem:
             target_file = f"{self.mt5_target_path}/sentiment_cache.json"
             
             if os.path.exists(source_file):
+                # 追記ログ（sentiment_cache.jsonl）の分をスナップショットに統合してから転送
+                ClaudeSentimentAnalyzer(source_file).compact_sentiment_cache()
                 shutil.copy2(source_file, target_file)
                 
                 with open(source_file, 'r', encoding='utf-8') as f:
@@ -291,7 +300,8 @@ class ModelTransferSystem:
                     'mt5_compatible': True,
                     'memory_optimized': True,
                     'error_handling': True,
-                    'logging': True
+                    'logging': True,
+                    'latency_budget_ms': 50  # 1サイクルの処理時間の上限（benchmark_mt5_live_loop.py）
                 }
             }
             
@@ -335,7 +345,6 @@ MT5 Enhanced Trinity ML Strategy - 実稼働版
 """
 
 import MetaTrader5 as mt5
-import pickle
 import json
 import pandas as pd
 import numpy as np
@@ -343,6 +352,8 @@ from datetime import datetime, timedelta
 import time
 import logging
 
+from model_artifact import ModelArtifact
+
 # ログ設定
 logging.basicConfig(
     level=logging.INFO,
@@ -357,9 +368,9 @@ class MT5EnhancedTrinity:
     """MT5 Enhanced Trinity ML Strategy"""
     
     def __init__(self):
-        # 学習済みモデル読み込み
-        with open('trained_model.pkl', 'rb') as f:
-            self.model_data = pickle.load(f)
+        # 学習済みモデル読み込み（成果物形式・各モデルは最初の予測時に読み込まれる）
+        self.model = ModelArtifact('trained_model')
+        self.model_data = self.model.metadata
         
         # 設定読み込み
         with open('mt5_config.json', 'r', encoding='utf-8') as f:
@@ -410,10 +421,7 @@ class MT5EnhancedTrinity:
         
         # モデル予測
         X = features.iloc[-1:].values
-        X_scaled = self.model_data['scaler_X'].transform(X)
-        
-        prediction_scaled = self.model_data['model'].predict(X_scaled)[0]
-        prediction = self.model_data['scaler_y'].inverse_transform([[prediction_scaled]])[0, 0]
+        prediction = self.model.predict(X)[0]
         
         # 感情分析統合
         sentiment_boost = self.get_sentiment_boost()
@@ -8,7 +8,7 @@ import pandas as pd
 import numpy as np
 import os
 import sys
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple, Union
 from datetime import datetime
 
 # プロジェクトのルートディレクトリをPythonパスに追加
@@ -16,6 +16,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from src.data.enhanced_data_manager import EnhancedDataManager, get_backtest_data
 from src.backtest.trade_executor import TradeExecutor
+from src.backtest.result_cache import BacktestResultCache, CachedBacktestResult, data_manifest, result_key
 from src.utils.logger import Logger
 
 class QuickTestHelper:
@@ -38,6 +39,9 @@ class QuickTestHelper:
             'commission_per_lot': 0,
             'max_positions': 10
         }
+        
+        # 戦略・データが変わっていないテストの結果キャッシュ
+        self.result_cache = BacktestResultCache()
     
     def get_test_data(self, 
                      timeframe: str = '15min',
@@ -158,14 +162,53 @@ class QuickTestHelper:
         
         return filtered_data, executor, metadata
     
-    def quick_performance_summary(self, executor: TradeExecutor) -> Dict:
+    def result_key(self,
+                   strategy_func: Callable,
+                   strategy_config: Dict = None,
+                   timeframe: str = '15min',
+                   additional_timeframes: List[str] = None) -> str:
+        """
+        テスト結果のキャッシュのキーを計算
+        
+        戦略のソースと設定・エンジンのソース・読み込むデータファイルのマニフェスト・
+        テスト環境の設定から計算するため、いずれかが変わるとキーも変わる。
+        
+        Parameters
+        ----------
+        strategy_func : Callable
+            戦略実行関数
+        strategy_config : Dict, optional
+            戦略設定
+        timeframe : str, default '15min'
+            メイン時間足
+        additional_timeframes : List[str], optional
+            追加時間足（指定時はsetup_enhanced_backtest、省略時はsetup_basic_backtestの環境）
+            
+        Returns
+        -------
+        str
+            キャッシュのキー
+        """
+        if additional_timeframes:
+            settings = {'setup': 'enhanced', 'timeframes': [timeframe] + list(additional_timeframes)}
+        else:
+            settings = {'setup': 'basic', 'timeframes': [self.default_config['timeframe']]}
+        settings['config'] = self.default_config
+        
+        # get_test_dataが読み込むファイル（既存ファイルの確認のみ）
+        years = self.default_config['years']
+        data_files = self.data_manager.auto_collector.prepare_strategy_data(settings['timeframes'], years)
+        
+        return result_key(strategy_func, strategy_config, data_manifest(data_files, years), settings)
+    
+    def quick_performance_summary(self, executor: Union[TradeExecutor, CachedBacktestResult]) -> Dict:
         """
         クイックパフォーマンスサマリー表示
         
         Parameters
         ----------
-        executor : TradeExecutor
-            実行済みのトレードエグゼキューター
+        executor : TradeExecutor or CachedBacktestResult
+            実行済みのトレードエグゼキューター（またはキャッシュした結果）
             
         Returns
         -------
@@ -222,7 +265,7 @@ class QuickTestHelper:
         return dirs
     
     def save_quick_results(self, 
-                          executor: TradeExecutor,
+                          executor: Union[TradeExecutor, CachedBacktestResult],
                           test_name: str,
                           strategy_config: Dict = None) -> str:
         """
@@ -230,8 +273,8 @@ class QuickTestHelper:
         
         Parameters
         ----------
-        executor : TradeExecutor
-            実行済みのトレードエグゼキューター
+        executor : TradeExecutor or CachedBacktestResult
+            実行済みのトレードエグゼキューター（またはキャッシュした結果）
         test_name : str
             テスト名
         strategy_config : Dict, optional
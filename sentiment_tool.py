@@ -193,6 +193,7 @@ class SentimentTool:
         
         try:
             import shutil
+            self.analyzer.compact_sentiment_cache()
             shutil.copy(self.analyzer.sentiment_cache_path, filename)
             print(f"✅ データを {filename} にエクスポートしました")
         except Exception as e:
@@ -8,6 +8,9 @@ from ..strategies.support_resistance_strategy import SupportResistanceStrategy
 from ..strategies.bollinger_rsi_enhanced import BollingerRsiEnhancedStrategy
 from ..strategies.bollinger_rsi_enhanced_mt import BollingerRsiEnhancedMTStrategy
 from .position import Position, PositionStatus
+from .position_book import PositionBook, PositionSequence
+from .simulation_kernel import FixedLotSizing, SimulationKernel, SizingRule
+from .trade_event_log import TradeEventLog
 
 class BacktestEngine:
     """
@@ -16,7 +19,7 @@ class BacktestEngine:
 
     def __init__(self, data: pd.DataFrame, initial_balance: float = 200000,
                  lot_size: float = 0.01, max_positions: int = 3,
-                 spread_pips: float = 0.2):
+                 spread_pips: float = 0.2, event_log: Optional[TradeEventLog] = None):
         """
         初期化
 
@@ -32,6 +35,8 @@ class BacktestEngine:
             同時に保有できる最大ポジション数
         spread_pips : float, default 0.2
             スプレッド（pips）
+        event_log : TradeEventLog, optional
+            新規注文・決済・無視したシグナルの記録先
         """
         self.data = data.copy()
         self.initial_balance = initial_balance
@@ -40,12 +45,16 @@ class BacktestEngine:
         self.max_positions = max_positions
         self.spread_pips = spread_pips
 
+        # ポジションは列指向のブックに格納し、決済済みポジションは行番号の列として参照する
+        self.position_book = PositionBook()
         self.open_positions = []
-        self.closed_positions = []
+        self.closed_positions = PositionSequence(self.position_book, Position.from_row)
 
         self.equity_curve = []
-        self.trade_history = []
+        self.trade_history = PositionSequence(self.position_book, self._trade_log_from_row)
         self.ignored_signals = 0  # 無視されたシグナルのカウンター
+        self.event_log = event_log
+        self.kernel: Optional[SimulationKernel] = None
 
     def run(self, strategies=None) -> pd.DataFrame:
         """
@@ -94,113 +103,42 @@ class BacktestEngine:
                 elif strategy == 'bollinger_rsi_enhanced_mt':
                     self.data = bollinger_rsi_enhanced_mt.generate_signals(self.data, year=int(self.data.index[0].year))
 
-        for i in range(len(self.data)):
-            current_time = self.data.index[i]
-            current_bar = self.data.iloc[i]
+        self._simulate()
 
-            self._check_positions_for_exit(current_time, current_bar)
-
-            if current_bar['signal'] != 0:
-                if len(self.open_positions) < self.max_positions:
-                    self._open_new_position(current_time, current_bar)
-                else:
-                    self.ignored_signals += 1
-
-            self._record_equity(current_time)
-
-        history_df = pd.DataFrame([pos.to_dict() for pos in self.closed_positions])
+        history_df = Position.to_frame(self.position_book, self.closed_positions.row_array())
         return history_df
 
-    def _check_positions_for_exit(self, current_time: pd.Timestamp, current_bar: pd.Series):
-        """
-        ポジションの決済条件を確認する
-
-        Parameters
-        ----------
-        current_time : pd.Timestamp
-            現在の時間
-        current_bar : pd.Series
-            現在の価格データ
+    def _simulate(self, sizing: Optional[SizingRule] = None) -> SimulationKernel:
         """
-        bid = current_bar['Close'] - self.spread_pips * 0.01 / 2
-        ask = current_bar['Close'] + self.spread_pips * 0.01 / 2
+        シグナル列に従って全バーを処理する（共通のシミュレーションカーネルで実行）
 
-        positions_to_remove = []
-
-        for position in self.open_positions:
-            if position.direction == 1:
-                if current_bar['High'] >= position.tp_price:
-                    position.close_position(current_time, position.tp_price, PositionStatus.CLOSED_TAKE_PROFIT)
-                    positions_to_remove.append(position)
-                    self.balance += position.profit_jpy
-                elif current_bar['Low'] <= position.sl_price:
-                    position.close_position(current_time, position.sl_price, PositionStatus.CLOSED_STOP_LOSS)
-                    positions_to_remove.append(position)
-                    self.balance += position.profit_jpy
-
-            else:
-                if current_bar['Low'] <= position.tp_price:
-                    position.close_position(current_time, position.tp_price, PositionStatus.CLOSED_TAKE_PROFIT)
-                    positions_to_remove.append(position)
-                    self.balance += position.profit_jpy
-                elif current_bar['High'] >= position.sl_price:
-                    position.close_position(current_time, position.sl_price, PositionStatus.CLOSED_STOP_LOSS)
-                    positions_to_remove.append(position)
-                    self.balance += position.profit_jpy
-
-        for position in positions_to_remove:
-            self.closed_positions.append(position)
-            self.open_positions.remove(position)
-            self.trade_history.append(self._create_trade_log(position))
-
-    def _open_new_position(self, current_time: pd.Timestamp, current_bar: pd.Series):
-        """
-        新規ポジションを開く
+        各バーで、保有ポジションの決済（高値・安値でTP/SLを判定し、TP/SLの価格で決済）→
+        シグナルがあれば新規注文（エントリー価格にスプレッドの半分を加減）→ 資産の記録、の順に処理する。
 
         Parameters
         ----------
-        current_time : pd.Timestamp
-            現在の時間
-        current_bar : pd.Series
-            現在の価格データ
-        """
-        entry_price = current_bar['entry_price']
-        if current_bar['signal'] == 1:  # 買いの場合はaskを使用
-            entry_price += self.spread_pips * 0.01 / 2
-        else:  # 売りの場合はbidを使用
-            entry_price -= self.spread_pips * 0.01 / 2
-
-        position = Position(
-            entry_time=current_time,
-            direction=current_bar['signal'],
-            entry_price=entry_price,
-            sl_price=current_bar['sl_price'],
-            tp_price=current_bar['tp_price'],
-            strategy=current_bar['strategy'],
-            lot_size=self.lot_size
-        )
-
-        self.open_positions.append(position)
-
-    def _record_equity(self, current_time: pd.Timestamp):
-        """
-        資産推移を記録する
-
-        Parameters
-        ----------
-        current_time : pd.Timestamp
-            現在の時間
-        """
-        unrealized_profit = sum([pos.direction * (self.data.loc[current_time, 'Close'] - pos.entry_price) * 100 * 0.01 * 1000 * pos.lot_size for pos in self.open_positions])
+        sizing : SizingRule, optional
+            ロットサイズのルール（省略時はself.lot_sizeで固定）
 
-        equity = self.balance + unrealized_profit
-
-        self.equity_curve.append({
-            'time': current_time,
-            'balance': self.balance,
-            'equity': equity,
-            'open_positions': len(self.open_positions)
-        })
+        Returns
+        -------
+        SimulationKernel
+            実行後のカーネル
+        """
+        kernel = SimulationKernel(self.position_book, self.balance, self.max_positions,
+                                  sizing or FixedLotSizing(self.lot_size, use_position_size=False))
+        kernel.set_event_log(self.event_log)
+        self.equity_curve = kernel.run(self.data, self.spread_pips)
+
+        self.kernel = kernel
+        self.balance = kernel.balance
+        self.ignored_signals += kernel.ignored_signals
+        self.open_positions = [Position.from_row(self.position_book, row) for row in kernel.open]
+        return kernel
+
+    def _trade_log_from_row(self, book: PositionBook, row: int) -> Dict:
+        """ブックの行のトレードログ（trade_historyの要素）"""
+        return self._create_trade_log(Position.from_row(book, row))
 
     def _create_trade_log(self, position: Position) -> Dict:
         """
@@ -1,9 +1,11 @@
+import logging
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional, Tuple, Any
 import datetime
 from .backtest_engine import BacktestEngine
 from .position import Position, PositionStatus
+from .trade_event_log import TradeEventLog
 from src.utils.logger import Logger
 
 class CustomBacktestEngine(BacktestEngine):
@@ -18,6 +20,8 @@ class CustomBacktestEngine(BacktestEngine):
         import os
         os.makedirs(log_dir, exist_ok=True)
         self.logger = Logger(log_dir)
+        # シグナル・決済はバッファ付きのイベントログに記録し、INFOが有効な場合だけまとめて出力する
+        self.event_log = TradeEventLog(self.logger.logger, logging.INFO)
 
     def run(self, strategies=None) -> Dict[str, Any]:
         """
@@ -33,24 +37,10 @@ class CustomBacktestEngine(BacktestEngine):
         Dict[str, Any]
             バックテスト結果（トレード履歴、エクイティカーブ、月別パフォーマンス）
         """
-        for i in range(len(self.data)):
-            current_time = self.data.index[i]
-            current_bar = self.data.iloc[i]
-
-            self._check_positions_for_exit(current_time, current_bar)
-
-            if current_bar['signal'] != 0:
-                self.logger.log_info(f"シグナル検出: {current_time}, 値: {current_bar['signal']}, 必要なカラム: entry_price={current_bar.get('entry_price', 'なし')}, sl_price={current_bar.get('sl_price', 'なし')}, tp_price={current_bar.get('tp_price', 'なし')}, strategy={current_bar.get('strategy', 'なし')}")
-                if len(self.open_positions) < self.max_positions:
-                    self._open_new_position(current_time, current_bar)
-                else:
-                    self.ignored_signals += 1
-                    self.logger.log_info(f"ポジション上限到達のためシグナル無視: {current_time}")
-
-            self._record_equity(current_time)
+        self._simulate()
 
         if self.closed_positions:
-            trades_df = pd.DataFrame([pos.to_dict() for pos in self.closed_positions])
+            trades_df = Position.to_frame(self.position_book, self.closed_positions.row_array())
         else:
             trades_df = pd.DataFrame(columns=['entry_time', 'exit_time', 'direction', 
                                               'entry_price', 'exit_price', 'sl_price', 'tp_price',
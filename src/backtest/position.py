@@ -3,19 +3,39 @@ import numpy as np
 from typing import Dict, List, Optional, Tuple
 from enum import Enum
 
+from .position_book import BookField, BookView, PositionBook, shared_book
+
 class PositionStatus(Enum):
     OPEN = "オープン"
     CLOSED_TAKE_PROFIT = "利確"
     CLOSED_STOP_LOSS = "損切り"
     CLOSED_MANUAL = "手動決済"
 
-class Position:
+class Position(BookView):
     """
     トレードポジションを表すクラス
+    
+    ポジションブック（PositionBook）の1行を指すビュー。属性はブックの配列に格納される。
     """
     
+    __slots__ = ()
+    
+    entry_time = BookField('entry_time', 'time')
+    direction = BookField('direction', 'int')
+    entry_price = BookField('entry_price')
+    sl_price = BookField('sl_price')
+    tp_price = BookField('tp_price')
+    strategy = BookField('strategy', 'label')
+    lot_size = BookField('lot_size')
+    exit_time = BookField('exit_time', 'time')
+    exit_price = BookField('exit_price')
+    status = BookField('status', 'enum_code', enum=PositionStatus)
+    profit_pips = BookField('profit_pips')
+    profit_jpy = BookField('profit_jpy')
+    
     def __init__(self, entry_time: pd.Timestamp, direction: int, entry_price: float, 
-                 sl_price: float, tp_price: float, strategy: str, lot_size: float = 0.01):
+                 sl_price: float, tp_price: float, strategy: str, lot_size: float = 0.01,
+                 book: Optional[PositionBook] = None):
         """
         初期化
         
@@ -35,20 +55,20 @@ class Position:
             使用した戦略の名前
         lot_size : float, default 0.01
             取引サイズ（ロット）
+        book : PositionBook, optional
+            格納先のポジションブック（省略時はプロセス内の共有ブック）
         """
-        self.entry_time = entry_time
-        self.direction = direction
-        self.entry_price = entry_price
-        self.sl_price = sl_price
-        self.tp_price = tp_price
-        self.strategy = strategy
-        self.lot_size = lot_size
-        
-        self.exit_time = None
-        self.exit_price = None
-        self.status = PositionStatus.OPEN
-        self.profit_pips = None
-        self.profit_jpy = None
+        self._book = book if book is not None else shared_book(entry_time)
+        self._row = self._book.add(
+            entry_time=entry_time,
+            direction=direction,
+            entry_price=entry_price,
+            sl_price=sl_price,
+            tp_price=tp_price,
+            strategy=strategy,
+            lot_size=lot_size,
+            status=0  # PositionStatus.OPEN
+        )
     
     def close_position(self, exit_time: pd.Timestamp, exit_price: float, status: PositionStatus):
         """
@@ -71,6 +91,8 @@ class Position:
         
         pip_value = 0.01 * 1000 * self.lot_size
         self.profit_jpy = self.profit_pips * pip_value
+        
+        self._book.mark_closed(self._row)
     
     def calculate_profit(self, current_price: float) -> float:
         """
@@ -112,3 +134,38 @@ class Position:
             '戦略': self.strategy,
             'ロットサイズ': self.lot_size
         }
+    
+    @staticmethod
+    def to_frame(book: PositionBook, rows: np.ndarray) -> pd.DataFrame:
+        """
+        複数ポジションの情報をDataFrameで返す（to_dictの各行と同じ内容を配列から作成）
+        
+        Parameters
+        ----------
+        book : PositionBook
+            ポジションブック
+        rows : np.ndarray
+            行番号
+            
+        Returns
+        -------
+        pd.DataFrame
+            ポジション情報（列はto_dictと同じ）
+        """
+        if len(rows) == 0:
+            return pd.DataFrame()
+        
+        statuses = np.array([status.value for status in PositionStatus] + [None], dtype=object)
+        directions = book.column('direction', rows)
+        return pd.DataFrame({
+            'エントリー時間': book.time_column('entry_time', rows),
+            '決済時間': book.time_column('exit_time', rows),
+            '取引方向': np.where(directions == 1, "買い", "売り").astype(object),
+            'エントリー価格': book.column('entry_price', rows),
+            '決済価格': book.column('exit_price', rows),
+            '損益(pips)': book.column('profit_pips', rows),
+            '損益(円)': book.column('profit_jpy', rows),
+            '決済理由': statuses[book.column('status', rows)],
+            '戦略': book.label_column('strategy', rows),
+            'ロットサイズ': book.column('lot_size', rows)
+        })
@@ -0,0 +1,402 @@
+"""
+ポジションブック（全ポジションを列ごとのNumPy配列で保持する）
+
+ポジション1件ごとにPythonオブジェクト（属性辞書とpd.Timestamp）を持つ代わりに、
+全ポジションの各項目を1本の配列に並べて保持する。時刻はint64（ナノ秒）、
+ステータス・戦略名・決済理由は整数コードで格納する。
+
+既存のPositionクラス（src.backtest.position / src.backtest.trade_executor）は
+ブックの1行を指す__slots__付きのビューで、属性の読み書きは配列の該当行に対して行う。
+決済済みポジションの一覧はブックの行番号の列（PositionSequence）として扱うため、
+長期間のバックテストでも決済済みポジションのオブジェクトは蓄積されず、
+統計は列に対する配列演算で計算できる。
+"""
+
+from array import array
+from collections.abc import Sequence
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# 未設定の時刻
+NAT = np.iinfo(np.int64).min
+
+# 列名 -> (型, 初期値)
+COLUMNS = {
+    'position_id': (np.int64, 0),
+    'entry_time': (np.int64, NAT),
+    'exit_time': (np.int64, NAT),
+    'direction': (np.int8, 0),
+    'status': (np.int8, 0),
+    'strategy': (np.int16, -1),
+    'symbol': (np.int16, -1),
+    'exit_reason': (np.int16, -1),
+    'entry_price': (np.float64, np.nan),
+    'exit_price': (np.float64, np.nan),
+    'sl_price': (np.float64, np.nan),
+    'tp_price': (np.float64, np.nan),
+    'lot_size': (np.float64, 0.0),
+    'profit_pips': (np.float64, np.nan),
+    'profit_jpy': (np.float64, np.nan),
+    'commission': (np.float64, 0.0),
+    'swap': (np.float64, 0.0),
+}
+
+# 文字列を整数コードで格納する列
+LABEL_COLUMNS = ('strategy', 'symbol', 'exit_reason')
+
+
+class PositionBook:
+    """
+    全ポジションの列指向ストア
+    """
+
+    def __init__(self, capacity: int = 1024):
+        """
+        初期化
+
+        Parameters
+        ----------
+        capacity : int
+            初期の行数（不足したら倍に拡張する）
+        """
+        self.capacity = max(1, capacity)
+        self.size = 0
+        # 各列は初期値で埋めておき、追加時は指定された値だけを書き込む
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.full(self.capacity, default, dtype=dtype) for name, (dtype, default) in COLUMNS.items()
+        }
+
+        # 文字列ラベル（コード -> 文字列 / 文字列 -> コード）
+        self.labels: Dict[str, List[str]] = {name: [] for name in LABEL_COLUMNS}
+        self._label_codes: Dict[str, Dict[str, int]] = {name: {} for name in LABEL_COLUMNS}
+
+        # 決済順の行番号
+        self.closed_rows = array('q')
+
+        # 時刻の種類（pd.Timestamp / バー番号などの整数）とタイムゾーン
+        self.time_kind: Optional[str] = None
+        self.tz = None
+        
+        # 変換が必要な列
+        self._encoders = {name: (lambda value, name=name: self.label_code(name, value))
+                          for name in LABEL_COLUMNS}
+        self._encoders['entry_time'] = self.encode_time
+        self._encoders['exit_time'] = self.encode_time
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, np.ndarray], labels: Dict[str, List[str]],
+                     time_kind: Optional[str] = None, tz=None) -> 'PositionBook':
+        """
+        保存した列からブックを復元する
+
+        Parameters
+        ----------
+        columns : Dict[str, np.ndarray]
+            列名 -> 値（全列が同じ長さ、省略した列は初期値）
+        labels : Dict[str, List[str]]
+            ラベル列のコード順の文字列
+        time_kind : str, optional
+            時刻の種類（'datetime' / 'int'）
+        tz : optional
+            タイムゾーン
+
+        Returns
+        -------
+        PositionBook
+            全行を決済済みとしたブック
+        """
+        size = len(next(iter(columns.values()))) if columns else 0
+        book = cls(capacity=size)
+        for name, values in columns.items():
+            book.columns[name][:size] = values
+        for name, values in labels.items():
+            book.labels[name] = list(values)
+            book._label_codes[name] = {value: code for code, value in enumerate(values)}
+        book.size = size
+        book.closed_rows = array('q', range(size))
+        book.time_kind = time_kind
+        book.tz = tz
+        return book
+
+    # ------------------------------------------------------------------
+    # 行の追加・決済
+    # ------------------------------------------------------------------
+
+    def add(self, **values) -> int:
+        """
+        ポジションを1行追加する
+
+        Parameters
+        ----------
+        **values
+            列名 -> 値（時刻はpd.Timestamp、ラベル列は文字列で渡す）
+
+        Returns
+        -------
+        int
+            追加した行番号
+        """
+        if self.size == self.capacity:
+            self._grow()
+
+        row = self.size
+        self.size += 1
+        columns = self.columns
+        encoders = self._encoders
+        for name, value in values.items():
+            encoder = encoders.get(name)
+            if encoder is not None:
+                value = encoder(value)
+            elif value is None:
+                value = COLUMNS[name][1]
+            columns[name][row] = value
+        return row
+
+    def mark_closed(self, row: int):
+        """行を決済順の一覧に加える"""
+        self.closed_rows.append(row)
+
+    def set(self, name: str, row: int, value):
+        """1つの値を格納する（時刻・ラベルは変換する）"""
+        encoder = self._encoders.get(name)
+        if encoder is not None:
+            value = encoder(value)
+        elif value is None:
+            value = COLUMNS[name][1]
+        self.columns[name][row] = value
+
+    # ------------------------------------------------------------------
+    # 変換
+    # ------------------------------------------------------------------
+
+    def label_code(self, name: str, value: Optional[str]) -> int:
+        """ラベル文字列の整数コード（Noneは-1）"""
+        if value is None or value != value:  # None / NaN
+            return -1
+        codes = self._label_codes[name]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.labels[name])
+            self.labels[name].append(value)
+        return code
+
+    def label_value(self, name: str, code: int) -> Optional[str]:
+        """整数コードのラベル文字列"""
+        return self.labels[name][code] if code >= 0 else None
+
+    def encode_time(self, value) -> int:
+        """時刻をint64に変換（pd.Timestampはナノ秒、整数はそのまま）"""
+        if value is None:
+            return NAT
+        if isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+            if self.time_kind is None:
+                self.time_kind = 'int'
+            return int(value)
+
+        timestamp = pd.Timestamp(value)
+        if self.time_kind is None:
+            self.time_kind = 'datetime'
+            self.tz = timestamp.tz
+        return timestamp.value
+
+    def decode_time(self, value: int):
+        """int64の時刻を元の型に戻す"""
+        if value == NAT:
+            return None
+        if self.time_kind == 'int':
+            return int(value)
+        timestamp = pd.Timestamp(value)
+        return timestamp.tz_localize('UTC').tz_convert(self.tz) if self.tz is not None else timestamp
+
+    # ------------------------------------------------------------------
+    # 列の参照
+    # ------------------------------------------------------------------
+
+    def closed_row_array(self) -> np.ndarray:
+        """決済順の行番号（配列）"""
+        return np.frombuffer(self.closed_rows, dtype=np.int64) if self.closed_rows else np.empty(0, np.int64)
+
+    def column(self, name: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """列の値（rowsを省略した場合は全行）"""
+        values = self.columns[name][:self.size]
+        return values if rows is None else values[rows]
+
+    def time_column(self, name: str, rows: Optional[np.ndarray] = None):
+        """時刻列（DatetimeIndex、整数の時刻の場合はint64配列）"""
+        values = self.column(name, rows)
+        if self.time_kind == 'int':
+            return values
+        index = pd.DatetimeIndex(values.view('datetime64[ns]'))
+        return index.tz_localize('UTC').tz_convert(self.tz) if self.tz is not None else index
+
+    def label_column(self, name: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """ラベル列（文字列の配列、未設定はNone）"""
+        table = np.array(self.labels[name] + [None], dtype=object)
+        return table[self.column(name, rows)]
+
+    @property
+    def nbytes(self) -> int:
+        """配列の使用メモリ（バイト）"""
+        return sum(values.nbytes for values in self.columns.values()) + self.closed_rows.buffer_info()[1] * 8
+
+    def _grow(self):
+        """行数を倍に拡張"""
+        self.capacity *= 2
+        for name, values in self.columns.items():
+            grown = np.full(self.capacity, COLUMNS[name][1], dtype=values.dtype)
+            grown[:self.size] = values[:self.size]
+            self.columns[name] = grown
+
+
+# 単独で作成されたポジション（book省略時）の共有ブック（時刻の種類・タイムゾーンごと）
+_SHARED_BOOKS: Dict[tuple, PositionBook] = {}
+
+
+def shared_book(time_value) -> PositionBook:
+    """
+    単独で作成されたポジションを格納する共有ブック
+
+    ポジションごとにブックを作ると1件ごとに全列の配列を確保するため、book省略時は
+    プロセス内で共有するブックに追加する。時刻の種類（pd.Timestamp / 整数）と
+    タイムゾーンはブック単位のため、それらごとに別のブックを使う。
+
+    Parameters
+    ----------
+    time_value
+        ポジションのエントリー時刻
+
+    Returns
+    -------
+    PositionBook
+        共有ブック（初回に作成）
+    """
+    if isinstance(time_value, (int, np.integer)) and not isinstance(time_value, bool):
+        key = ('int',)
+    elif time_value is None:
+        key = (None,)
+    else:
+        key = ('datetime', str(pd.Timestamp(time_value).tz))
+    book = _SHARED_BOOKS.get(key)
+    if book is None:
+        book = _SHARED_BOOKS[key] = PositionBook()
+    return book
+
+
+class BookField:
+    """
+    ブックの列を属性として読み書きするディスクリプタ
+
+    kind:
+        'float'          浮動小数点（NaNはnone_valueとして返す）
+        'int'            整数
+        'time'           時刻（未設定はNone）
+        'label'          ラベル文字列（未設定はNone）
+        'enum_code'      Enumのメンバー順のコード
+        'enum_value'     Enumの値
+    """
+
+    __slots__ = ('column', 'kind', 'enum', 'members', 'by_value', 'none_value')
+
+    def __init__(self, column: str, kind: str = 'float', enum=None, none_value=None):
+        self.column = column
+        self.kind = kind
+        self.enum = enum
+        self.members = tuple(enum) if enum is not None else ()
+        self.by_value = {member.value: member for member in self.members}
+        self.none_value = none_value
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        book = obj._book
+        value = book.columns[self.column][obj._row]
+
+        if self.kind == 'float':
+            return self.none_value if value != value else float(value)
+        if self.kind == 'int':
+            return int(value)
+        if self.kind == 'time':
+            return book.decode_time(value)
+        if self.kind == 'label':
+            return book.label_value(self.column, value)
+        if self.kind == 'enum_code':
+            return self.members[value] if value >= 0 else None
+        return self.by_value[int(value)]
+
+    def __set__(self, obj, value):
+        book = obj._book
+        if self.kind == 'enum_code':
+            value = self.members.index(value) if value is not None else -1
+        elif self.kind == 'enum_value':
+            value = value.value
+        elif self.kind == 'float' and value is None:
+            value = np.nan
+        book.set(self.column, obj._row, value)
+
+
+class BookView:
+    """
+    ブックの1行を指すビューの基底クラス
+    """
+
+    __slots__ = ('_book', '_row')
+
+    @classmethod
+    def from_row(cls, book: PositionBook, row: int):
+        """既存の行のビューを作成"""
+        view = cls.__new__(cls)
+        view._book = book
+        view._row = row
+        return view
+
+    @property
+    def book(self) -> PositionBook:
+        return self._book
+
+    @property
+    def row(self) -> int:
+        return self._row
+
+    def __eq__(self, other):
+        return type(other) is type(self) and other._book is self._book and other._row == self._row
+
+    def __hash__(self):
+        return hash((id(self._book), self._row))
+
+
+class PositionSequence(Sequence):
+    """
+    ブックの行番号の列をポジションのリストとして見せる読み取り専用シーケンス
+
+    要素は参照されたときにfactory(book, row)で作成する（ビューまたは辞書）。
+    """
+
+    def __init__(self, book: PositionBook, factory: Callable, rows: Optional[array] = None):
+        self._book = book
+        self._factory = factory
+        self._rows = rows if rows is not None else book.closed_rows
+
+    @property
+    def book(self) -> PositionBook:
+        return self._book
+
+    def row_array(self) -> np.ndarray:
+        """行番号（配列）"""
+        return np.frombuffer(self._rows, dtype=np.int64) if self._rows else np.empty(0, np.int64)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._factory(self._book, row) for row in self._rows[index]]
+        return self._factory(self._book, self._rows[index])
+
+    def __iter__(self):
+        for row in self._rows:
+            yield self._factory(self._book, row)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({len(self)}件)"
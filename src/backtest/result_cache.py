@@ -0,0 +1,423 @@
+"""
+バックテスト結果キャッシュ
+
+戦略・エンジン・データのいずれも変わっていないテストを再実行しないように、
+結果（取引・評価額の履歴・統計）を内容のハッシュをキーとして保存する。
+
+    キー = sha256(戦略のソースと設定 + エンジンのソース + データのマニフェスト + テスト環境の設定)
+
+    results/.backtest_cache/
+        index.json        テスト名 -> 最新の結果のキー
+        {key}/
+            meta.json     統計・テスト名・戦略設定・ブックのラベルと時刻の種類
+            result.npz    取引（ポジションブックの列）・評価額・残高の履歴
+
+戦略のソースは、戦略関数のモジュールと、そこから参照をたどって到達できるプロジェクトの
+モジュール（src.*など）全てのソースファイルのため、戦略が利用する指標やデータ処理を変更しても
+キーが変わる。データのマニフェストは読み込むデータファイルのパス・サイズ・更新時刻の一覧のため、
+データを更新するとキーが変わる。エンジン（ポジションブック・シミュレーションカーネル・
+TradeExecutor）のソースもキーに含むため、約定や損益の計算を変更した場合も古い結果は使わない。
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import sys
+import sysconfig
+from datetime import datetime
+from functools import lru_cache, partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.data.dataset_cache import data_manifest
+from .position_book import LABEL_COLUMNS, PositionBook, PositionSequence
+from .trade_executor import TradeExecutor, monthly_performance
+
+# キャッシュの形式バージョン（保存形式を変えたら上げる）
+CACHE_FORMAT_VERSION = 1
+
+# キーに含めるエンジンのソース
+ENGINE_MODULES = ('position_book.py', 'simulation_kernel.py', 'trade_executor.py')
+
+DEFAULT_CACHE_DIR = os.path.join('results', '.backtest_cache')
+INDEX_FILE = 'index.json'
+META_FILE = 'meta.json'
+RESULT_FILE = 'result.npz'
+
+
+@lru_cache(maxsize=1)
+def engine_fingerprint() -> str:
+    """エンジンのソースのハッシュ"""
+    digest = hashlib.sha256(str(CACHE_FORMAT_VERSION).encode())
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in ENGINE_MODULES:
+        with open(os.path.join(directory, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def _library_paths() -> Tuple[str, ...]:
+    """標準ライブラリ・インストール済みパッケージのディレクトリ"""
+    paths = {os.path.normcase(os.path.realpath(sysconfig.get_path(name)))
+             for name in ('stdlib', 'platstdlib', 'purelib', 'platlib')}
+    return tuple(path + os.sep for path in paths)
+
+
+def _project_source_file(module) -> Optional[str]:
+    """プロジェクトのモジュールならソースファイルのパス（標準ライブラリ・パッケージはNone）"""
+    path = getattr(module, '__file__', None)
+    if not path or not path.endswith('.py'):
+        return None
+    path = os.path.normcase(os.path.realpath(path))
+    if path.startswith(_library_paths()) or 'site-packages' in path.split(os.sep):
+        return None
+    return path
+
+
+def strategy_modules(strategy_func: Callable) -> Dict[str, str]:
+    """
+    戦略関数が参照するプロジェクトのモジュール
+
+    定義されたモジュールから、グローバル変数のモジュール・関数・クラスをたどって到達できる
+    プロジェクトのモジュール（src.*など、標準ライブラリ・インストール済みパッケージ以外）を集める。
+
+    Returns
+    -------
+    Dict[str, str]
+        モジュール名 -> ソースファイルのパス
+    """
+    start = inspect.getmodule(strategy_func)
+    if start is None or _project_source_file(start) is None:
+        return {}
+
+    found = {}
+    pending = [start]
+    while pending:
+        module = pending.pop()
+        if module.__name__ in found:
+            continue
+        found[module.__name__] = _project_source_file(module)
+
+        for value in list(vars(module).values()):
+            if inspect.ismodule(value):
+                target = value
+            elif inspect.isfunction(value) or inspect.isclass(value):
+                target = sys.modules.get(getattr(value, '__module__', None) or '')
+            else:
+                continue
+            if target is not None and target.__name__ not in found and _project_source_file(target):
+                pending.append(target)
+    return found
+
+
+def strategy_fingerprint(strategy_func: Callable) -> str:
+    """
+    戦略関数のハッシュ
+
+    関数が呼び出す補助関数や、利用するプロジェクトのモジュール（インジケーター・データ処理など）の
+    変更も反映されるように、strategy_modulesで集めたモジュールのソースファイルを全て使う
+    （ソースファイルがない場合は関数のソース、それも無理なら修飾名）。
+    functools.partialの場合は元の関数と固定した引数から計算する。
+    """
+    if isinstance(strategy_func, partial):
+        content = f"{strategy_fingerprint(strategy_func.func)}\n{strategy_func.args!r}\n{sorted(strategy_func.keywords.items())!r}"
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    name = f"{getattr(strategy_func, '__module__', '')}.{getattr(strategy_func, '__qualname__', repr(strategy_func))}"
+    digest = hashlib.sha256(name.encode('utf-8'))
+
+    modules = strategy_modules(strategy_func)
+    if modules:
+        for module_name in sorted(modules):
+            digest.update(f"\n{module_name}\n".encode('utf-8'))
+            with open(modules[module_name], 'rb') as f:
+                digest.update(f.read())
+        return digest.hexdigest()
+
+    try:
+        digest.update(f"\n{inspect.getsource(strategy_func)}".encode('utf-8'))
+    except (OSError, TypeError):
+        pass
+    return digest.hexdigest()
+
+
+def result_key(strategy_func: Callable, strategy_config: Optional[Dict], manifest: List[Dict],
+               settings: Optional[Dict] = None) -> str:
+    """
+    結果のキー
+
+    Parameters
+    ----------
+    strategy_func : Callable
+        戦略実行関数
+    strategy_config : Dict, optional
+        戦略設定
+    manifest : List[Dict]
+        データのマニフェスト（data_manifest）
+    settings : Dict, optional
+        テスト環境の設定（初期資金・スプレッド・期間など）
+
+    Returns
+    -------
+    str
+        sha256の16進文字列
+    """
+    content = json.dumps({
+        'strategy': strategy_fingerprint(strategy_func),
+        'strategy_config': strategy_config,
+        'engine': engine_fingerprint(),
+        'data': manifest,
+        'settings': settings
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def result_snapshot(executor: TradeExecutor, test_name: str,
+                    strategy_config: Optional[Dict] = None) -> Tuple[Dict[str, np.ndarray], Dict]:
+    """
+    TradeExecutorの結果を保存形式（配列・メタデータ）にする
+
+    配列とJSONにできる値のみのため、プロセス間で受け渡しできる。
+
+    Parameters
+    ----------
+    executor : TradeExecutor
+        実行済みのトレードエグゼキューター
+    test_name : str
+        テスト名
+    strategy_config : Dict, optional
+        戦略設定
+
+    Returns
+    -------
+    Tuple[Dict[str, np.ndarray], Dict]
+        (取引履歴の行のブックの列・評価額・残高の履歴, メタデータ)
+    """
+    book = executor.position_book
+    rows = executor.trade_history.row_array()
+    arrays = {f'book_{name}': book.column(name, rows) for name in book.columns}
+    arrays['equity'] = np.array(executor.equity_history)
+    arrays['balance'] = np.array(executor.balance_history)
+
+    meta = {
+        'format_version': CACHE_FORMAT_VERSION,
+        'test_name': test_name,
+        'created': datetime.now().isoformat(),
+        'strategy_config': strategy_config,
+        'statistics': json.loads(json.dumps(executor.get_statistics(), default=_json_default)),
+        'book': {
+            'labels': {name: book.labels[name] for name in LABEL_COLUMNS},
+            'time_kind': book.time_kind,
+            'tz': str(book.tz) if book.tz is not None else None
+        }
+    }
+    return arrays, meta
+
+
+def _json_default(value):
+    """NumPyの値をJSONに変換"""
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+class CachedBacktestResult:
+    """
+    キャッシュから読み込んだバックテスト結果
+
+    TradeExecutorの結果参照用のメソッド・属性（get_statistics, get_monthly_performance,
+    trade_history, equity_history, balance_history, get_drawdown_series）を持つため、
+    QuickTestHelperの表示・保存にそのまま渡せる。
+    """
+
+    def __init__(self, key: str, meta: Dict, book: PositionBook,
+                 equity_history: np.ndarray, balance_history: np.ndarray):
+        self.key = key
+        self.meta = meta
+        self.position_book = book
+        self.trade_history = PositionSequence(book, TradeExecutor._trade_record)
+        self.equity_history = equity_history
+        self.balance_history = balance_history
+
+    @property
+    def test_name(self) -> str:
+        return self.meta['test_name']
+
+    def get_statistics(self) -> Dict:
+        """統計情報（保存時のTradeExecutor.get_statisticsの値）"""
+        return dict(self.meta['statistics'])
+
+    def get_monthly_performance(self) -> pd.DataFrame:
+        """月別パフォーマンス"""
+        if not self.trade_history:
+            return pd.DataFrame()
+        return monthly_performance(self.position_book, self.trade_history.row_array())
+
+    def get_drawdown_series(self) -> np.ndarray:
+        """評価額の各時点のドローダウン（ピークからの下落率、0〜1）"""
+        equity = self.equity_history
+        peak = np.maximum.accumulate(equity)
+        return np.where(peak > 0, (peak - equity) / np.where(peak > 0, peak, 1), 0.0)
+
+    @classmethod
+    def from_snapshot(cls, key: str, arrays: Dict[str, np.ndarray], meta: Dict) -> 'CachedBacktestResult':
+        """保存形式（result_snapshot）から結果を作成"""
+        columns = {name[len('book_'):]: values for name, values in arrays.items() if name.startswith('book_')}
+        tz = meta['book']['tz']
+        book = PositionBook.from_columns(columns, meta['book']['labels'], meta['book']['time_kind'],
+                                         pd.Timestamp(0, tz=tz).tz if tz else None)
+        return cls(key, meta, book, arrays['equity'], arrays['balance'])
+
+    def __repr__(self):
+        return f"CachedBacktestResult({self.test_name}, {self.key[:12]})"
+
+
+class BacktestResultCache:
+    """
+    内容のハッシュをキーとするバックテスト結果の保存・読み込み
+    """
+
+    def __init__(self, root: str = DEFAULT_CACHE_DIR):
+        """
+        初期化
+
+        Parameters
+        ----------
+        root : str
+            キャッシュのディレクトリ
+        """
+        self.root = root
+
+    def load(self, key: str) -> Optional[CachedBacktestResult]:
+        """
+        キーの結果を読み込む
+
+        Parameters
+        ----------
+        key : str
+            結果のキー（result_key）
+
+        Returns
+        -------
+        CachedBacktestResult or None
+            キャッシュにない場合はNone
+        """
+        meta = self._read_meta(key)
+        if meta is None:
+            return None
+
+        with np.load(os.path.join(self.root, key, RESULT_FILE), allow_pickle=False) as arrays:
+            return CachedBacktestResult.from_snapshot(key, {name: arrays[name] for name in arrays.files}, meta)
+
+    def store(self, key: str, executor: TradeExecutor, test_name: str,
+              strategy_config: Optional[Dict] = None) -> str:
+        """
+        TradeExecutorの結果を保存する
+
+        Parameters
+        ----------
+        key : str
+            結果のキー（result_key）
+        executor : TradeExecutor
+            実行済みのトレードエグゼキューター
+        test_name : str
+            テスト名
+        strategy_config : Dict, optional
+            戦略設定
+
+        Returns
+        -------
+        str
+            保存先ディレクトリ
+        """
+        arrays, meta = result_snapshot(executor, test_name, strategy_config)
+        return self.store_snapshot(key, arrays, meta)
+
+    def store_snapshot(self, key: str, arrays: Dict[str, np.ndarray], meta: Dict) -> str:
+        """
+        保存形式（result_snapshot）の結果を保存する
+
+        Parameters
+        ----------
+        key : str
+            結果のキー（result_key）
+        arrays : Dict[str, np.ndarray]
+            配列
+        meta : Dict
+            メタデータ
+
+        Returns
+        -------
+        str
+            保存先ディレクトリ
+        """
+        directory = os.path.join(self.root, key)
+        if not os.path.exists(os.path.join(directory, META_FILE)):
+            # 一時ディレクトリに書いてから置き換える（中断しても壊れた結果を残さない）
+            temp_directory = f"{directory}.tmp{os.getpid()}"
+            os.makedirs(temp_directory, exist_ok=True)
+            np.savez_compressed(os.path.join(temp_directory, RESULT_FILE), **arrays)
+            with open(os.path.join(temp_directory, META_FILE), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2, default=_json_default)
+            try:
+                os.replace(temp_directory, directory)
+            except OSError:
+                # 同じキーを別プロセスが先に保存した
+                shutil.rmtree(temp_directory, ignore_errors=True)
+
+        self.register(meta['test_name'], key)
+        return directory
+
+    def register(self, test_name: str, key: str):
+        """テスト名の最新の結果としてキーを記録する"""
+        index = self._read_index()
+        index[test_name] = key
+        os.makedirs(self.root, exist_ok=True)
+        index_path = os.path.join(self.root, INDEX_FILE)
+        with open(f"{index_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+        os.replace(f"{index_path}.tmp", index_path)
+
+    def lookup(self, test_name: str) -> Optional[str]:
+        """テスト名の最新の結果のキー"""
+        return self._read_index().get(test_name)
+
+    def statistics(self, test_name: str) -> Optional[Dict]:
+        """
+        テスト名の最新の結果の統計（meta.jsonのみを読む）
+
+        Parameters
+        ----------
+        test_name : str
+            テスト名
+
+        Returns
+        -------
+        Dict or None
+            キャッシュにない場合はNone
+        """
+        key = self.lookup(test_name)
+        meta = self._read_meta(key) if key else None
+        return meta['statistics'] if meta is not None else None
+
+    def _read_meta(self, key: str) -> Optional[Dict]:
+        path = os.path.join(self.root, key, META_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('format_version') != CACHE_FORMAT_VERSION:
+            return None
+        return meta
+
+    def _read_index(self) -> Dict[str, str]:
+        path = os.path.join(self.root, INDEX_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
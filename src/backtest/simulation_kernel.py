@@ -0,0 +1,511 @@
+"""
+バックテストの共通シミュレーションカーネル
+
+各バックテストエンジン（BacktestEngine / CustomBacktestEngine / EnhancedBacktestEngine）と
+TradeExecutorが共通で使う売買・決済・損益計算の処理。
+
+- ポジションはポジションブック（PositionBook）に格納し、保有中ポジションは
+  行番号 -> (方向, エントリー価格, SL価格, TP価格, ロット) の辞書で管理する
+- 損益は 損益pips × 1ロット1pipあたりの損益（pip_value）× ロット で計算する
+  （BacktestEngine系は0.01×1000=10円、TradeExecutorは1ロット=100,000通貨で1,000円）
+- 使用証拠金・含み損益は保有ポジションの集計値からO(1)で計算する
+- ロットサイズと新規注文の可否はサイジングルール（SizingRule）で差し替える
+- 新規注文・決済・無視したシグナルは取引イベントログ（TradeEventLog）に数値のまま記録する
+- runはデータの列を一度だけリストに変換し、バーごとのループを
+  pd.Series（iloc）を作らずに実行する。資産推移は事前確保した配列に記録する
+"""
+
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import trade_event_log
+from .position_book import PositionBook
+from .trade_event_log import TradeEventLog
+
+
+class SizingRule:
+    """
+    ロットサイズと新規注文の可否を決めるルールの基底クラス
+    """
+
+    # 資産推移に毎バー記録する属性名
+    state_columns = ()
+
+    def prepare(self, data: pd.DataFrame):
+        """runの開始時に呼ばれる（必要な列を取り出す）"""
+
+    def lot_size(self, kernel: 'SimulationKernel', i: int) -> float:
+        """i番目のバーで開くポジションのロットサイズ"""
+        raise NotImplementedError
+
+    def admit(self, kernel: 'SimulationKernel', lot_size: float, price: float) -> bool:
+        """ポジションを開けるか（最大ポジション数はカーネルで判定済み）"""
+        return True
+
+    def on_close(self, kernel: 'SimulationKernel', row: int, status: int, profit: float):
+        """ポジションの決済時に呼ばれる"""
+
+
+class FixedLotSizing(SizingRule):
+    """
+    固定ロット（データにposition_size列があればその値）
+    """
+
+    def __init__(self, lot_size: float = 0.01, use_position_size: bool = True):
+        """
+        初期化
+
+        Parameters
+        ----------
+        lot_size : float
+            ロットサイズ
+        use_position_size : bool
+            データのposition_size列を優先するか
+        """
+        self.base_lot_size = lot_size
+        self.use_position_size = use_position_size
+        self._sizes: Optional[List[float]] = None
+
+    def prepare(self, data: pd.DataFrame):
+        if self.use_position_size and 'position_size' in data.columns:
+            self._sizes = data['position_size'].tolist()
+        else:
+            self._sizes = None
+
+    def lot_size(self, kernel: 'SimulationKernel', i: int) -> float:
+        return self._sizes[i] if self._sizes is not None else self.base_lot_size
+
+
+class WinRateLotSizing(FixedLotSizing):
+    """
+    勝率に応じたロットサイズ（EnhancedBacktestEngine）
+
+    決済済み取引の勝率（利確の割合）が閾値以上ならロットを増やす。
+    position_size列の値がある場合はその値（閾値以上なら2倍）を使う。
+    """
+
+    state_columns = ('win_rate',)
+
+    def __init__(self, base_lot_size: float = 0.01, increased_lot_size: float = 0.02,
+                 win_rate_threshold: float = 80.0):
+        """
+        初期化
+
+        Parameters
+        ----------
+        base_lot_size : float
+            基本ロットサイズ
+        increased_lot_size : float
+            勝率が閾値以上の場合のロットサイズ
+        win_rate_threshold : float
+            ロットサイズを増加させる勝率の閾値（%）
+        """
+        super().__init__(base_lot_size)
+        self.increased_lot_size = increased_lot_size
+        self.win_rate_threshold = win_rate_threshold
+        self.total_trades = 0
+        self.total_wins = 0
+        self.win_rate = 0.0
+
+    def lot_size(self, kernel: 'SimulationKernel', i: int) -> float:
+        increased = self.win_rate >= self.win_rate_threshold
+        if self._sizes is not None:
+            size = self._sizes[i]
+            if size == size:  # NaNでない
+                return size * 2 if increased else size
+        return self.increased_lot_size if increased else self.base_lot_size
+
+    def on_close(self, kernel: 'SimulationKernel', row: int, status: int, profit: float):
+        self.total_trades += 1
+        if status == kernel.tp_status:
+            self.total_wins += 1
+        self.win_rate = (self.total_wins / self.total_trades) * 100
+
+
+class MarginSizing(FixedLotSizing):
+    """
+    証拠金による制限（TradeExecutor）
+
+    保有ポジション全体の証拠金が初期資金のmax_usage（80%）を超える注文と、
+    残高から使用証拠金を引いた額で必要証拠金を賄えない注文を拒否する。
+    """
+
+    def __init__(self, initial_balance: float, margin_rate: float = 1.0,
+                 max_usage: float = 0.80, lot_size: float = 0.01):
+        """
+        初期化
+
+        Parameters
+        ----------
+        initial_balance : float
+            初期資金（円）
+        margin_rate : float
+            証拠金率（1.0 = レバレッジ1倍）
+        max_usage : float
+            初期資金に対する使用証拠金の上限
+        lot_size : float
+            runで使うロットサイズ
+        """
+        super().__init__(lot_size)
+        self.initial_balance = initial_balance
+        self.margin_rate = margin_rate
+        self.max_usage = max_usage
+
+    def required_margin(self, lot_size: float, price: float) -> float:
+        """必要証拠金（1ロット = 100,000通貨）"""
+        return lot_size * 100000 * price * self.margin_rate
+
+    def admit(self, kernel: 'SimulationKernel', lot_size: float, price: float) -> bool:
+        required_margin = self.required_margin(lot_size, price)
+        used_margin = self.required_margin(kernel.open_lots, price)
+        if used_margin + required_margin > self.initial_balance * self.max_usage:
+            return False
+        return kernel.balance - used_margin >= required_margin
+
+    def max_lot_size(self, kernel: 'SimulationKernel', price: float) -> float:
+        """取引可能な最大ロットサイズ（0.01ロット単位）"""
+        available = self.initial_balance * self.max_usage - self.required_margin(kernel.open_lots, price)
+        if available <= 0:
+            return 0.0
+        return max(0.0, round(available / (100000 * price * self.margin_rate), 2))
+
+
+class SimulationKernel:
+    """
+    売買・決済・損益計算のカーネル
+    """
+
+    def __init__(self, book: Optional[PositionBook] = None, initial_balance: float = 200000,
+                 max_positions: float = 3, sizing: Optional[SizingRule] = None,
+                 pip_value: float = 0.01 * 1000, open_status: int = 0,
+                 tp_status: int = 1, sl_status: int = 2):
+        """
+        初期化
+
+        Parameters
+        ----------
+        book : PositionBook, optional
+            ポジションの格納先
+        initial_balance : float
+            初期資金（円）
+        max_positions : float
+            同時に保有できる最大ポジション数
+        sizing : SizingRule, optional
+            ロットサイズ・新規注文の可否のルール（省略時は0.01ロット固定）
+        pip_value : float
+            1ロット1pipあたりの損益（円）
+        open_status, tp_status, sl_status : int
+            ブックのstatus列に書き込むコード（保有中・利確・損切り）
+        """
+        self.book = book if book is not None else PositionBook()
+        self.balance = initial_balance
+        self.max_positions = max_positions
+        self.sizing = sizing if sizing is not None else FixedLotSizing()
+        self.pip_value = pip_value
+        self.open_status = open_status
+        self.tp_status = tp_status
+        self.sl_status = sl_status
+
+        # 保有中ポジション（行番号 -> (方向, エントリー価格, SL価格, TP価格, ロット)、開いた順）
+        self.open: Dict[int, tuple] = {}
+
+        # 保有ポジションの集計値
+        self.open_lots = 0.0          # Σ ロット
+        self.net_lots = 0.0           # Σ ロット×方向
+        self.net_lot_entry = 0.0      # Σ ロット×方向×エントリー価格
+
+        # 決済済みポジションの損益の集計値
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+        self.profit_count = 0
+        self.loss_count = 0
+
+        # シグナルの集計（runで更新）
+        self.ignored_signals = 0
+        self.limit_reached_bars = 0
+        self.signal_actions: Optional[np.ndarray] = None
+
+        # 決済時に呼ぶ関数（row, status）
+        self.close_listeners: List[Callable[[int, int], None]] = []
+
+        # 取引イベントログ（set_event_logで設定）
+        self.event_log: Optional[TradeEventLog] = None
+
+    def set_event_log(self, event_log: Optional[TradeEventLog]):
+        """取引イベントログを設定（Noneで記録しない）"""
+        self.event_log = event_log
+        if event_log is not None:
+            event_log.bind(self.book)
+
+    # ------------------------------------------------------------------
+    # 売買
+    # ------------------------------------------------------------------
+
+    def open_position(self, entry_time, direction, entry_price: float, sl_price: float,
+                      tp_price: float, strategy, lot_size: float, commission: float = 0.0,
+                      **columns) -> int:
+        """
+        ポジションを開く
+
+        Parameters
+        ----------
+        entry_time
+            エントリー時刻（pd.Timestampまたはブックの時刻コード）
+        direction : int
+            取引方向（1=買い, -1=売り）
+        entry_price, sl_price, tp_price : float
+            エントリー・損切り・利確価格
+        strategy : str
+            戦略名
+        lot_size : float
+            ロットサイズ
+        commission : float
+            手数料（円、残高から差し引く）
+        **columns
+            ブックのその他の列（position_id, symbolなど）
+
+        Returns
+        -------
+        int
+            ブックの行番号
+        """
+        row = self.book.add(entry_time=entry_time, direction=direction, entry_price=entry_price,
+                            sl_price=sl_price, tp_price=tp_price, strategy=strategy, lot_size=lot_size,
+                            status=self.open_status, commission=commission, **columns)
+        self.open[row] = (direction, entry_price, sl_price, tp_price, lot_size)
+
+        signed_lots = direction * lot_size
+        self.open_lots += lot_size
+        self.net_lots += signed_lots
+        self.net_lot_entry += signed_lots * entry_price
+        if commission:
+            self.balance -= commission
+        if self.event_log is not None:
+            self.event_log.record(trade_event_log.OPEN, self.book.columns['entry_time'][row], row,
+                                  entry_price, direction)
+        return row
+
+    def close_position(self, row: int, exit_time, exit_price: float, status: int,
+                       reason: Optional[str] = None) -> float:
+        """
+        ポジションを決済する
+
+        Parameters
+        ----------
+        row : int
+            ブックの行番号
+        exit_time
+            決済時刻（pd.Timestampまたはブックの時刻コード）
+        exit_price : float
+            決済価格
+        status : int
+            ブックのstatus列に書き込むコード
+        reason : str, optional
+            決済理由（tp/sl/signalなど）
+
+        Returns
+        -------
+        float
+            損益（円）
+        """
+        direction, entry_price, _, _, lot_size = self.open.pop(row)
+
+        profit_pips = (exit_price - entry_price) * direction * 100
+        profit = profit_pips * (self.pip_value * lot_size)
+
+        book = self.book
+        columns = book.columns
+        time_code = book.encode_time(exit_time)
+        columns['exit_time'][row] = time_code
+        columns['exit_price'][row] = exit_price
+        columns['status'][row] = status
+        columns['profit_pips'][row] = profit_pips
+        columns['profit_jpy'][row] = profit
+        if reason is not None:
+            columns['exit_reason'][row] = book.label_code('exit_reason', reason)
+        book.mark_closed(row)
+
+        self.balance += profit
+        if profit > 0:
+            self.gross_profit += profit
+            self.profit_count += 1
+        elif profit < 0:
+            self.gross_loss += profit
+            self.loss_count += 1
+
+        if self.open:
+            signed_lots = direction * lot_size
+            self.open_lots -= lot_size
+            self.net_lots -= signed_lots
+            self.net_lot_entry -= signed_lots * entry_price
+        else:
+            # 全決済時は0に戻す（浮動小数点の誤差を持ち越さない）
+            self.open_lots = 0.0
+            self.net_lots = 0.0
+            self.net_lot_entry = 0.0
+
+        if self.event_log is not None:
+            self.event_log.record(trade_event_log.CLOSE, time_code, row, exit_price, profit)
+        self.sizing.on_close(self, row, status, profit)
+        for listener in self.close_listeners:
+            listener(row, status)
+        return profit
+
+    def check_exits(self, time, high: float, low: float, price: Optional[float] = None) -> List[int]:
+        """
+        保有中ポジションのTP/SLを判定して決済する
+
+        買いは高値がTP以上なら利確、安値がSL以下なら損切り（売りは逆）。
+
+        Parameters
+        ----------
+        time
+            現在時刻
+        high, low : float
+            バーの高値・安値
+        price : float, optional
+            決済価格（省略時はTP/SLの価格で決済する）
+
+        Returns
+        -------
+        List[int]
+            決済したポジションの行番号（開いた順）
+        """
+        hits = None
+        for row, (direction, _, sl_price, tp_price, _) in self.open.items():
+            if direction == 1:
+                if high >= tp_price:
+                    hit = (row, tp_price, True)
+                elif low <= sl_price:
+                    hit = (row, sl_price, False)
+                else:
+                    continue
+            else:
+                if low <= tp_price:
+                    hit = (row, tp_price, True)
+                elif high >= sl_price:
+                    hit = (row, sl_price, False)
+                else:
+                    continue
+            if hits is None:
+                hits = []
+            hits.append(hit)
+
+        if hits is None:
+            return []
+
+        for row, level, take_profit in hits:
+            self.close_position(row, time, level if price is None else price,
+                                self.tp_status if take_profit else self.sl_status,
+                                'tp' if take_profit else 'sl')
+        return [row for row, _, _ in hits]
+
+    def unrealized_pnl(self, price: float) -> float:
+        """
+        保有ポジション全体の未実現損益
+
+        Σ 方向×(現在価格 - エントリー価格)×100pips×ロット×pip_value
+        = 100×pip_value × (現在価格×Σ ロット×方向 - Σ ロット×方向×エントリー価格)
+        """
+        return 100 * self.pip_value * (price * self.net_lots - self.net_lot_entry)
+
+    # ------------------------------------------------------------------
+    # シグナル列によるバックテスト
+    # ------------------------------------------------------------------
+
+    def run(self, data: pd.DataFrame, spread_pips: float = 0.2) -> pd.DataFrame:
+        """
+        シグナル列（signal, entry_price, sl_price, tp_price, strategy）に従って全バーを処理する
+
+        各バーで、保有ポジションの決済（高値・安値でTP/SLを判定）→ シグナルがあれば新規注文
+        （エントリー価格にスプレッドの半分を加減）→ 資産の記録、の順に処理する。
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            High, Low, Close, signal, entry_price, sl_price, tp_price, strategyの列を持つデータ
+        spread_pips : float
+            スプレッド（pips）
+
+        Returns
+        -------
+        pd.DataFrame
+            資産推移（time, balance, equity, open_positionsとサイジングルールの状態の列）
+        """
+        n = len(data)
+        index = data.index
+        book = self.book
+        if isinstance(index, pd.DatetimeIndex):
+            # 時刻はブックの時刻コード（ナノ秒）で渡す
+            if book.time_kind is None:
+                book.time_kind = 'datetime'
+                book.tz = index.tz
+            times = index.asi8.tolist()
+        else:
+            times = list(index)
+
+        highs = data['High'].tolist()
+        lows = data['Low'].tolist()
+        closes = data['Close'].tolist()
+        signals = data['signal'].tolist()
+        entry_prices = data['entry_price'].tolist()
+        sl_prices = data['sl_price'].tolist()
+        tp_prices = data['tp_price'].tolist()
+        strategies = data['strategy'].tolist() if 'strategy' in data.columns else [None] * n
+
+        sizing = self.sizing
+        sizing.prepare(data)
+        state_columns = sizing.state_columns
+
+        half_spread = spread_pips * 0.01 / 2
+        max_positions = self.max_positions
+        open_positions = self.open
+        event_log = self.event_log
+
+        balances = np.empty(n)
+        equities = np.empty(n)
+        counts = np.empty(n, dtype=np.int64)
+        states = {name: np.empty(n) for name in state_columns}
+        actions = np.zeros(n, dtype=np.int8)  # 1=新規注文, -1=シグナル無視
+
+        for i in range(n):
+            time = times[i]
+            if open_positions:
+                self.check_exits(time, highs[i], lows[i])
+
+            if len(open_positions) >= max_positions:
+                self.limit_reached_bars += 1
+
+            signal = signals[i]
+            if signal != 0:
+                opened = False
+                if len(open_positions) < max_positions:
+                    lot_size = sizing.lot_size(self, i)
+                    if sizing.admit(self, lot_size, closes[i]):
+                        entry_price = entry_prices[i]
+                        entry_price = entry_price + half_spread if signal == 1 else entry_price - half_spread
+                        self.open_position(time, signal, entry_price, sl_prices[i], tp_prices[i],
+                                           strategies[i], lot_size)
+                        opened = True
+                if opened:
+                    actions[i] = 1
+                else:
+                    actions[i] = -1
+                    self.ignored_signals += 1
+                    if event_log is not None:
+                        event_log.record(trade_event_log.IGNORED, book.encode_time(time), -1,
+                                         entry_prices[i], signal)
+
+            balances[i] = self.balance
+            equities[i] = self.balance + self.unrealized_pnl(closes[i]) if open_positions else self.balance
+            counts[i] = len(open_positions)
+            for name in state_columns:
+                states[name][i] = getattr(sizing, name)
+
+        self.signal_actions = actions
+        if event_log is not None:
+            event_log.flush()
+        return pd.DataFrame({'time': index, 'balance': balances, 'equity': equities,
+                             'open_positions': counts, **states})
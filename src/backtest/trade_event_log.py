@@ -0,0 +1,192 @@
+"""
+取引イベントログ
+
+バックテスト中の新規注文・決済・無視したシグナルを固定長のリングバッファ（NumPyの構造化配列）に
+記録し、まとめて書き出す。
+
+- 記録時は数値（種類・時刻コード・ブックの行番号・価格・値）を書き込むだけで、文字列は作らない
+- テキストのログは、書き出し時にロガーのレベルが有効な場合だけ整形して1件のログにまとめて出力する
+- binary_pathを指定すると、イベントをそのまま（構造化配列のバイト列で）追記する。
+  read_eventsでDataFrameとして読み込める
+- 書き出し先がない場合もリングバッファに直近capacity件を保持する（recent_events）
+"""
+
+import logging
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .position_book import NAT, PositionBook
+
+# イベントの種類
+OPEN = 1
+CLOSE = 2
+IGNORED = 3
+
+EVENT_NAMES = {OPEN: '新規', CLOSE: '決済', IGNORED: 'シグナル無視'}
+
+# 1イベントのレコード（time: ブックの時刻コード, row: ポジションブックの行番号（なければ-1））
+# price / value: 新規=エントリー価格 / 方向, 決済=決済価格 / 損益（円）, シグナル無視=エントリー価格 / シグナル
+EVENT_DTYPE = np.dtype([
+    ('kind', np.int8),
+    ('time', np.int64),
+    ('row', np.int64),
+    ('price', np.float64),
+    ('value', np.float64),
+])
+
+
+class TradeEventLog:
+    """
+    バッファ付きの取引イベントログ
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO,
+                 capacity: int = 4096, binary_path: Optional[str] = None):
+        """
+        初期化
+
+        Parameters
+        ----------
+        logger : logging.Logger, optional
+            テキストの出力先（Noneの場合はテキストを出力しない）
+        level : int
+            テキストを出力するログレベル（ロガーで無効なレベルなら整形しない）
+        capacity : int
+            リングバッファの件数（溜まったら書き出す）
+        binary_path : str, optional
+            イベントを追記するバイナリファイル
+        """
+        self.logger = logger
+        self.level = level
+        self.capacity = max(1, capacity)
+        self.binary_path = binary_path
+        self.book: Optional[PositionBook] = None
+
+        self._events = np.zeros(self.capacity, dtype=EVENT_DTYPE)
+        self._written = 0  # 記録した件数（累計）
+        self._flushed = 0  # 書き出した件数（累計）
+
+        if binary_path:
+            directory = os.path.dirname(binary_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    def bind(self, book: PositionBook):
+        """テキストの整形に使うポジションブックを設定"""
+        self.book = book
+
+    def record(self, kind: int, time: int, row: int, price: float, value: float):
+        """
+        イベントを1件記録する
+
+        Parameters
+        ----------
+        kind : int
+            種類（OPEN / CLOSE / IGNORED）
+        time : int
+            ブックの時刻コード
+        row : int
+            ポジションブックの行番号（なければ-1）
+        price, value : float
+            価格・値（EVENT_DTYPEを参照）
+        """
+        if self._written - self._flushed >= self.capacity:
+            self.flush()
+        self._events[self._written % self.capacity] = (kind, time, row, price, value)
+        self._written += 1
+
+    def flush(self):
+        """未出力のイベントをまとめて書き出す"""
+        pending = self._written - self._flushed
+        if pending <= 0:
+            return
+
+        text_enabled = self.logger is not None and self.logger.isEnabledFor(self.level)
+        if text_enabled or self.binary_path:
+            events = self._pending_events(pending)
+            if self.binary_path:
+                with open(self.binary_path, 'ab') as f:
+                    events.tofile(f)
+            if text_enabled:
+                self.logger.log(self.level, "取引イベント %d件\n%s", len(events),
+                                "\n".join(self.format_event(event) for event in events))
+
+        self._flushed = self._written
+
+    def close(self):
+        """残りのイベントを書き出す"""
+        self.flush()
+
+    @property
+    def event_count(self) -> int:
+        """記録したイベント数（累計）"""
+        return self._written
+
+    def recent_events(self) -> pd.DataFrame:
+        """リングバッファに残っている直近のイベント（古い順）"""
+        return pd.DataFrame(self._pending_events(min(self._written, self.capacity)))
+
+    def format_event(self, event) -> str:
+        """イベントを1行の文字列にする"""
+        kind = int(event['kind'])
+        time = self._format_time(int(event['time']))
+        row = int(event['row'])
+
+        if kind == IGNORED:
+            return (f"ポジション上限到達のためシグナル無視: {time}, 値: {event['value']:g},"
+                    f" entry_price={event['price']:.3f}")
+
+        direction = "買い" if event['value'] > 0 else "売り"
+        strategy = ''
+        if self.book is not None and row >= 0:
+            columns = self.book.columns
+            strategy = self.book.label_value('strategy', columns['strategy'][row]) or ''
+            direction = "買い" if columns['direction'][row] == 1 else "売り"
+            if kind == OPEN:
+                return (f"新規: {time} {strategy} {direction} @ {event['price']:.3f}"
+                        f" SL {columns['sl_price'][row]:.3f} TP {columns['tp_price'][row]:.3f}"
+                        f" ロット {columns['lot_size'][row]:.2f}")
+            reason = self.book.label_value('exit_reason', columns['exit_reason'][row]) or ''
+            return (f"決済({reason}): {time} {strategy} {direction} @ {event['price']:.3f}"
+                    f" 損益 {columns['profit_pips'][row]:.1f}pips ({event['value']:.0f}円)")
+
+        if kind == OPEN:
+            return f"新規: {time} {direction} @ {event['price']:.3f}"
+        return f"決済: {time} @ {event['price']:.3f} 損益 {event['value']:.0f}円"
+
+    @staticmethod
+    def read_events(path: str) -> pd.DataFrame:
+        """
+        バイナリのイベントログを読み込む
+
+        Parameters
+        ----------
+        path : str
+            binary_pathに指定したファイル
+
+        Returns
+        -------
+        pd.DataFrame
+            kind, time, row, price, value の列（kind_nameに種類の名前）
+        """
+        df = pd.DataFrame(np.fromfile(path, dtype=EVENT_DTYPE))
+        df['kind_name'] = df['kind'].map(EVENT_NAMES)
+        return df
+
+    def _pending_events(self, count: int) -> np.ndarray:
+        """最後のcount件（古い順）"""
+        start = (self._written - count) % self.capacity
+        end = start + count
+        if end <= self.capacity:
+            return self._events[start:end].copy()
+        return np.concatenate([self._events[start:], self._events[:end - self.capacity]])
+
+    def _format_time(self, code: int):
+        if code == NAT:
+            return None
+        if self.book is not None:
+            return self.book.decode_time(code)
+        return code
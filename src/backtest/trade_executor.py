@@ -5,9 +5,14 @@
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional, Tuple
+from array import array
 from datetime import datetime
 from enum import Enum
 
+from .position_book import BookField, BookView, PositionBook, PositionSequence, shared_book
+from .simulation_kernel import MarginSizing, SimulationKernel
+from .trade_event_log import TradeEventLog
+
 class OrderType(Enum):
     """注文タイプ"""
     BUY = 1
@@ -20,8 +25,38 @@ class OrderStatus(Enum):
     CLOSED = "closed"
     CANCELLED = "cancelled"
 
-class Position:
-    """ポジションクラス"""
+# ポジションブックのstatus列のコード（OrderStatusのメンバー順）
+OPEN_CODE = list(OrderStatus).index(OrderStatus.OPEN)
+CLOSED_CODE = list(OrderStatus).index(OrderStatus.CLOSED)
+
+class Position(BookView):
+    """
+    ポジションクラス
+    
+    ポジションブック（PositionBook）の1行を指すビュー。属性はブックの配列に格納される。
+    """
+    
+    __slots__ = ()
+    
+    position_id = BookField('position_id', 'int')
+    symbol = BookField('symbol', 'label')
+    order_type = BookField('direction', 'enum_value', enum=OrderType)
+    entry_price = BookField('entry_price')
+    lot_size = BookField('lot_size')
+    entry_time = BookField('entry_time', 'time')
+    stop_loss = BookField('sl_price')
+    take_profit = BookField('tp_price')
+    strategy = BookField('strategy', 'label')
+    status = BookField('status', 'enum_code', enum=OrderStatus)
+    
+    # 決済情報
+    exit_price = BookField('exit_price')
+    exit_time = BookField('exit_time', 'time')
+    exit_reason = BookField('exit_reason', 'label')
+    pnl_pips = BookField('profit_pips')
+    pnl_amount = BookField('profit_jpy')
+    commission = BookField('commission')
+    swap = BookField('swap')
     
     def __init__(self, 
                  position_id: int,
@@ -32,7 +67,8 @@ class Position:
                  entry_time: pd.Timestamp,
                  stop_loss: float,
                  take_profit: float,
-                 strategy: str = ""):
+                 strategy: str = "",
+                 book: Optional[PositionBook] = None):
         """
         ポジションの初期化
         
@@ -56,26 +92,24 @@ class Position:
             テイクプロフィット価格
         strategy : str
             戦略名
+        book : PositionBook, optional
+            格納先のポジションブック（省略時はプロセス内の共有ブック）
         """
-        self.position_id = position_id
-        self.symbol = symbol
-        self.order_type = order_type
-        self.entry_price = entry_price
-        self.lot_size = lot_size
-        self.entry_time = entry_time
-        self.stop_loss = stop_loss
-        self.take_profit = take_profit
-        self.strategy = strategy
-        self.status = OrderStatus.OPEN
-        
-        # 決済情報
-        self.exit_price = None
-        self.exit_time = None
-        self.exit_reason = None
-        self.pnl_pips = 0
-        self.pnl_amount = 0
-        self.commission = 0
-        self.swap = 0
+        self._book = book if book is not None else shared_book(entry_time)
+        self._row = self._book.add(
+            position_id=position_id,
+            symbol=symbol,
+            direction=order_type.value,
+            entry_price=entry_price,
+            lot_size=lot_size,
+            entry_time=entry_time,
+            sl_price=stop_loss,
+            tp_price=take_profit,
+            strategy=strategy,
+            status=OPEN_CODE,
+            profit_pips=0.0,
+            profit_jpy=0.0
+        )
         
     def close(self, exit_price: float, exit_time: pd.Timestamp, reason: str = "manual"):
         """
@@ -104,6 +138,8 @@ class Position:
         # 金額計算（1ロット = 100,000通貨、1pip = 1,000円）
         self.pnl_amount = self.pnl_pips * self.lot_size * 1000
         
+        self._book.mark_closed(self._row)
+        
     def is_tp_hit(self, current_price: float) -> bool:
         """TP到達チェック"""
         if self.order_type == OrderType.BUY:
@@ -129,12 +165,16 @@ class Position:
 class TradeExecutor:
     """取引執行シミュレーター"""
     
+    # 評価額・残高の履歴配列の初期サイズ
+    HISTORY_CAPACITY = 4096
+    
     def __init__(self,
                  initial_balance: float = 3000000,
                  spread_pips: float = 0.2,
                  commission_per_lot: float = 0,
                  max_positions: int = 10,
-                 margin_rate: float = 1.0):  # レバレッジ1倍 = 証拠金率100%
+                 margin_rate: float = 1.0,  # レバレッジ1倍 = 証拠金率100%
+                 event_log: Optional[TradeEventLog] = None):
         """
         初期化
         
@@ -150,20 +190,33 @@ class TradeExecutor:
             最大同時保有ポジション数
         margin_rate : float
             証拠金率（1.0 = レバレッジ1倍）
+        event_log : TradeEventLog, optional
+            新規注文・決済の記録先（バッファに溜めて書き出すため、終了時にevent_log.flush()を呼ぶ）
         """
         self.initial_balance = initial_balance
-        self.balance = initial_balance
         self.spread_pips = spread_pips
         self.commission_per_lot = commission_per_lot
         self.max_positions = max_positions
         self.margin_rate = margin_rate
         
-        # ポジション管理
+        # ポジション管理（全ポジションをブックの配列に格納し、決済済みは行番号の列で参照する）
+        self.position_book = PositionBook()
         self.positions = {}  # {position_id: Position}
-        self.closed_positions = []
+        self.closed_positions = PositionSequence(self.position_book, Position.from_row)
         self.next_position_id = 1
         
-        # 統計情報
+        # 売買・決済・残高・保有ポジションの集計値は共通のシミュレーションカーネルで管理する
+        # （1ロット = 100,000通貨で1pip = 1,000円、決済はOrderStatus.CLOSED、証拠金の80%制限はMarginSizing）
+        self.margin_rule = MarginSizing(initial_balance, margin_rate)
+        self.kernel = SimulationKernel(self.position_book, initial_balance, max_positions, self.margin_rule,
+                                       pip_value=1000, open_status=OPEN_CODE, tp_status=CLOSED_CODE,
+                                       sl_status=CLOSED_CODE)
+        self.kernel.set_event_log(event_log)
+        self.event_log = event_log
+        self._close_balances = []  # check_positionsで決済した各ポジションの決済直後の残高
+        self.kernel.close_listeners.append(lambda row, status: self._close_balances.append(self.kernel.balance))
+        
+        # 統計情報（決済のたびに更新し、get_statisticsは集計値から計算する）
         self.total_trades = 0
         self.winning_trades = 0
         self.losing_trades = 0
@@ -176,57 +229,67 @@ class TradeExecutor:
         self.max_consecutive_wins = 0
         self.max_consecutive_losses = 0
         
-        # 履歴
-        self.balance_history = [initial_balance]
-        self.equity_history = [initial_balance]
-        self.trade_history = []
+        # 評価額ベースのドローダウン（update_equityで更新）
+        self.peak_equity = initial_balance
+        self.max_equity_drawdown = 0.0
+        
+        # 履歴（評価額・残高は事前確保した配列に格納し、不足したら倍に拡張する）
+        self._equity = np.empty(self.HISTORY_CAPACITY)
+        self._balances = np.empty(self.HISTORY_CAPACITY)
+        self._equity[0] = self._balances[0] = initial_balance
+        self._history_size = 1
+        
+        # trade_historyはTP/SLで決済したポジションの辞書を参照時に作成する
+        self._history_rows = array('q')
+        self.trade_history = PositionSequence(self.position_book, self._trade_record, self._history_rows)
         
     def can_open_position(self, lot_size: float, price: float = 150.0) -> bool:
         """新規ポジションを開けるかチェック"""
         if len(self.positions) >= self.max_positions:
             return False
         
-        # 必要証拠金の計算（実際の価格使用）
-        required_margin = self.calculate_required_margin(lot_size, price)
-        used_margin = sum(self.calculate_required_margin(pos.lot_size, price) 
-                         for pos in self.positions.values())
-        
-        # 総保有制限チェック（証拠金の80%まで）
-        max_total_position = self.initial_balance * 0.80
-        total_position_value = used_margin + required_margin
-        
-        if total_position_value > max_total_position:
-            return False
-        
-        # 利用可能証拠金のチェック
-        available_margin = self.balance - used_margin
-        return available_margin >= required_margin
+        # 総保有制限（証拠金の80%まで）と利用可能証拠金のチェック
+        return self.margin_rule.admit(self.kernel, lot_size, price)
     
     def calculate_required_margin(self, lot_size: float, price: float = 150.0) -> float:
         """必要証拠金を計算"""
         # 1ロット = 100,000通貨
-        position_value = lot_size * 100000 * price
-        return position_value * self.margin_rate
+        return self.margin_rule.required_margin(lot_size, price)
+    
+    def get_used_margin(self, price: float = 150.0) -> float:
+        """保有ポジション全体の使用証拠金（Σ ロット から計算）"""
+        return self.margin_rule.required_margin(self.kernel.open_lots, price)
+    
+    def get_unrealized_pnl(self, current_price: float) -> float:
+        """
+        保有ポジション全体の未実現損益
+        
+        Σ 方向×(現在価格 - エントリー価格)×100pips×ロット×1000円
+        = 100000 × (現在価格×Σ ロット×方向 - Σ ロット×方向×エントリー価格)
+        """
+        return self.kernel.unrealized_pnl(current_price)
+    
+    # 残高・集計値はカーネルの値を参照する
+    @property
+    def balance(self) -> float:
+        return self.kernel.balance
+    
+    @balance.setter
+    def balance(self, value: float):
+        self.kernel.balance = value
+    
+    open_lots = property(lambda self: self.kernel.open_lots, doc="Σ ロット")
+    net_lots = property(lambda self: self.kernel.net_lots, doc="Σ ロット×方向")
+    net_lot_entry = property(lambda self: self.kernel.net_lot_entry, doc="Σ ロット×方向×エントリー価格")
+    gross_profit = property(lambda self: self.kernel.gross_profit, doc="決済済みポジションの利益の合計")
+    gross_loss = property(lambda self: self.kernel.gross_loss, doc="決済済みポジションの損失の合計（負値）")
+    profit_count = property(lambda self: self.kernel.profit_count, doc="利益で決済したポジション数")
+    loss_count = property(lambda self: self.kernel.loss_count, doc="損失で決済したポジション数")
     
     def calculate_max_lot_size(self, price: float = 150.0) -> float:
         """現在の状況で取引可能な最大ロットサイズを計算"""
-        # 現在の使用証拠金
-        used_margin = sum(self.calculate_required_margin(pos.lot_size, price) 
-                         for pos in self.positions.values())
-        
-        # 80%制限での利用可能証拠金
-        max_total_position = self.initial_balance * 0.80
-        available_for_new_position = max_total_position - used_margin
-        
-        if available_for_new_position <= 0:
-            return 0.0
-        
-        # 1ロット = 100,000通貨 × 価格 × 証拠金率
-        one_lot_margin = 100000 * price * self.margin_rate
-        max_lot_size = available_for_new_position / one_lot_margin
-        
-        # 最小単位0.01ロットに丸める
-        return max(0.0, round(max_lot_size, 2))
+        # 80%制限での利用可能証拠金から計算し、最小単位0.01ロットに丸める
+        return self.margin_rule.max_lot_size(self.kernel, price)
     
     def calculate_max_positions(self, lot_size: float, price: float = 150.0) -> int:
         """現在の価格とロットサイズで取引可能な最大ポジション数を計算"""
@@ -293,23 +356,13 @@ class TradeExecutor:
             stop_loss = entry_price + (stop_loss_pips / 100)
             take_profit = entry_price - (take_profit_pips / 100)
         
-        # ポジション作成
-        position = Position(
-            position_id=self.next_position_id,
-            symbol="USDJPY",
-            order_type=order_type,
-            entry_price=entry_price,
-            lot_size=lot_size,
-            entry_time=timestamp,
-            stop_loss=stop_loss,
-            take_profit=take_profit,
-            strategy=strategy
-        )
-        
-        # 手数料
-        position.commission = self.commission_per_lot * lot_size
-        self.balance -= position.commission
-        self.total_commission += position.commission
+        # ポジション作成（手数料は残高から差し引く）
+        commission = self.commission_per_lot * lot_size
+        row = self.kernel.open_position(timestamp, order_type.value, entry_price, stop_loss, take_profit,
+                                        strategy, lot_size, commission, position_id=self.next_position_id,
+                                        symbol="USDJPY", profit_pips=0.0, profit_jpy=0.0)
+        position = Position.from_row(self.position_book, row)
+        self.total_commission += commission
         
         # ポジション登録
         self.positions[self.next_position_id] = position
@@ -334,65 +387,42 @@ class TradeExecutor:
         List[Position]
             決済されたポジションのリスト
         """
-        closed = []
+        if not self.positions:
+            return []
+        
+        # TP/SLの判定と決済はカーネルで行う（現在価格で決済）
+        self._close_balances.clear()
+        rows = self.kernel.check_exits(timestamp, current_price, current_price, current_price)
+        if not rows:
+            return []
         
-        for pos_id, position in list(self.positions.items()):
-            close_position = False
-            reason = ""
+        closed = []
+        position_ids = self.position_book.columns['position_id']
+        for row, balance in zip(rows, self._close_balances):
+            position = self.positions.pop(int(position_ids[row]))
+            self.total_pnl += position.pnl_amount
+            
+            # 統計更新
+            if position.pnl_amount > 0:
+                self.winning_trades += 1
+                self.consecutive_wins += 1
+                self.consecutive_losses = 0
+                self.max_consecutive_wins = max(self.max_consecutive_wins, self.consecutive_wins)
+            else:
+                self.losing_trades += 1
+                self.consecutive_losses += 1
+                self.consecutive_wins = 0
+                self.max_consecutive_losses = max(self.max_consecutive_losses, self.consecutive_losses)
             
-            # TP/SLチェック
-            if position.is_tp_hit(current_price):
-                close_position = True
-                reason = "tp"
-            elif position.is_sl_hit(current_price):
-                close_position = True
-                reason = "sl"
+            # ピーク残高とドローダウン更新（各決済の直後の残高）
+            if balance > self.peak_balance:
+                self.peak_balance = balance
+            drawdown = (self.peak_balance - balance) / self.peak_balance
+            self.max_drawdown = max(self.max_drawdown, drawdown)
             
-            if close_position:
-                # ポジションクローズ
-                position.close(current_price, timestamp, reason)
-                
-                # 残高更新
-                self.balance += position.pnl_amount
-                self.total_pnl += position.pnl_amount
-                
-                # 統計更新
-                if position.pnl_amount > 0:
-                    self.winning_trades += 1
-                    self.consecutive_wins += 1
-                    self.consecutive_losses = 0
-                    self.max_consecutive_wins = max(self.max_consecutive_wins, self.consecutive_wins)
-                else:
-                    self.losing_trades += 1
-                    self.consecutive_losses += 1
-                    self.consecutive_wins = 0
-                    self.max_consecutive_losses = max(self.max_consecutive_losses, self.consecutive_losses)
-                
-                # ピーク残高とドローダウン更新
-                if self.balance > self.peak_balance:
-                    self.peak_balance = self.balance
-                drawdown = (self.peak_balance - self.balance) / self.peak_balance
-                self.max_drawdown = max(self.max_drawdown, drawdown)
-                
-                # 履歴に追加
-                self.closed_positions.append(position)
-                self.trade_history.append({
-                    'position_id': position.position_id,
-                    'strategy': position.strategy,
-                    'order_type': 'BUY' if position.order_type == OrderType.BUY else 'SELL',
-                    'entry_time': position.entry_time,
-                    'entry_price': position.entry_price,
-                    'exit_time': position.exit_time,
-                    'exit_price': position.exit_price,
-                    'lot_size': position.lot_size,
-                    'pnl_pips': position.pnl_pips,
-                    'pnl_amount': position.pnl_amount,
-                    'exit_reason': position.exit_reason
-                })
-                
-                # ポジション削除
-                del self.positions[pos_id]
-                closed.append(position)
+            # 履歴に追加
+            self._history_rows.append(row)
+            closed.append(position)
         
         return closed
     
@@ -402,42 +432,86 @@ class TradeExecutor:
         if position_id not in self.positions:
             return None
         
-        position = self.positions[position_id]
-        position.close(current_price, timestamp, "signal")
-        
-        # 残高更新
-        self.balance += position.pnl_amount
+        position = self.positions.pop(position_id)
+        self.kernel.close_position(position.row, timestamp, current_price, CLOSED_CODE, "signal")
         self.total_pnl += position.pnl_amount
         
-        # 履歴に追加
-        self.closed_positions.append(position)
-        del self.positions[position_id]
-        
         return position
     
     def update_equity(self, current_price: float):
         """現在の評価額を更新"""
-        unrealized_pnl = sum(pos.get_unrealized_pnl(current_price) 
-                            for pos in self.positions.values())
+        unrealized_pnl = self.get_unrealized_pnl(current_price)
         equity = self.balance + unrealized_pnl
-        self.equity_history.append(equity)
-        self.balance_history.append(self.balance)
+        
+        size = self._history_size
+        if size == len(self._equity):
+            self._grow_history()
+        self._equity[size] = equity
+        self._balances[size] = self.balance
+        self._history_size = size + 1
+        
+        # 評価額のピークとドローダウン
+        if equity > self.peak_equity:
+            self.peak_equity = equity
+        elif self.peak_equity > 0:
+            drawdown = (self.peak_equity - equity) / self.peak_equity
+            if drawdown > self.max_equity_drawdown:
+                self.max_equity_drawdown = drawdown
         return equity
     
+    def _grow_history(self):
+        """評価額・残高の履歴配列を倍に拡張"""
+        size = self._history_size
+        for name in ('_equity', '_balances'):
+            grown = np.empty(len(getattr(self, name)) * 2)
+            grown[:size] = getattr(self, name)[:size]
+            setattr(self, name, grown)
+    
+    @property
+    def equity_history(self) -> np.ndarray:
+        """評価額の履歴（初期資金とupdate_equityの各呼び出し時点）"""
+        return self._equity[:self._history_size]
+    
+    @property
+    def balance_history(self) -> np.ndarray:
+        """残高の履歴（equity_historyと同じ時点）"""
+        return self._balances[:self._history_size]
+    
+    def get_drawdown_series(self) -> np.ndarray:
+        """評価額の各時点のドローダウン（ピークからの下落率、0〜1）"""
+        equity = self.equity_history
+        peak = np.maximum.accumulate(equity)
+        return np.where(peak > 0, (peak - equity) / np.where(peak > 0, peak, 1), 0.0)
+    
+    @staticmethod
+    def _trade_record(book: PositionBook, row: int) -> Dict:
+        """取引履歴の1件（ブックの行から作成）"""
+        position = Position.from_row(book, row)
+        return {
+            'position_id': position.position_id,
+            'strategy': position.strategy,
+            'order_type': 'BUY' if position.order_type == OrderType.BUY else 'SELL',
+            'entry_time': position.entry_time,
+            'entry_price': position.entry_price,
+            'exit_time': position.exit_time,
+            'exit_price': position.exit_price,
+            'lot_size': position.lot_size,
+            'pnl_pips': position.pnl_pips,
+            'pnl_amount': position.pnl_amount,
+            'exit_reason': position.exit_reason
+        }
+    
     def get_statistics(self) -> Dict:
-        """統計情報を取得"""
+        """統計情報を取得（集計値から計算するため、取引数によらず一定時間）"""
         win_rate = (self.winning_trades / self.total_trades * 100) if self.total_trades > 0 else 0
         
-        # 平均利益・損失を計算
-        winning_pnl = [p.pnl_amount for p in self.closed_positions if p.pnl_amount > 0]
-        losing_pnl = [p.pnl_amount for p in self.closed_positions if p.pnl_amount < 0]
-        
-        avg_win = np.mean(winning_pnl) if winning_pnl else 0
-        avg_loss = np.mean(losing_pnl) if losing_pnl else 0
+        # 平均利益・損失（決済済み全ポジションの損益の集計値から）
+        avg_win = self.gross_profit / self.profit_count if self.profit_count else 0
+        avg_loss = self.gross_loss / self.loss_count if self.loss_count else 0
         
         # プロフィットファクター
-        total_wins = sum(winning_pnl) if winning_pnl else 0
-        total_losses = abs(sum(losing_pnl)) if losing_pnl else 1
+        total_wins = self.gross_profit if self.profit_count else 0
+        total_losses = abs(self.gross_loss) if self.loss_count else 1
         profit_factor = total_wins / total_losses if total_losses > 0 else 0
         
         # リターン
@@ -456,6 +530,7 @@ class TradeExecutor:
             'avg_loss': avg_loss,
             'profit_factor': profit_factor,
             'max_drawdown': self.max_drawdown * 100,
+            'max_equity_drawdown': self.max_equity_drawdown * 100,
             'max_consecutive_wins': self.max_consecutive_wins,
             'max_consecutive_losses': self.max_consecutive_losses,
             'total_commission': self.total_commission,
@@ -467,21 +542,44 @@ class TradeExecutor:
         if not self.trade_history:
             return pd.DataFrame()
         
-        df = pd.DataFrame(self.trade_history)
-        df['month'] = pd.to_datetime(df['exit_time']).dt.to_period('M')
-        
-        monthly = df.groupby('month').agg({
-            'pnl_amount': 'sum',
-            'position_id': 'count',
-            'pnl_pips': 'sum'
-        }).rename(columns={
-            'position_id': 'trades',
-            'pnl_amount': 'profit',
-            'pnl_pips': 'total_pips'
-        })
-        
-        # 勝率を計算
-        monthly['wins'] = df[df['pnl_amount'] > 0].groupby('month').size()
-        monthly['win_rate'] = (monthly['wins'] / monthly['trades'] * 100).fillna(0)
-        
-        return monthly
\ No newline at end of file
+        return monthly_performance(self.position_book, self.trade_history.row_array())
+
+def monthly_performance(book: PositionBook, rows: np.ndarray) -> pd.DataFrame:
+    """
+    決済済みポジションの月別パフォーマンス
+    
+    Parameters
+    ----------
+    book : PositionBook
+        ポジションブック
+    rows : np.ndarray
+        集計する行番号
+        
+    Returns
+    -------
+    pd.DataFrame
+        決済月ごとの損益・取引数・合計pips・勝ち数・勝率
+    """
+    df = pd.DataFrame({
+        'position_id': book.column('position_id', rows),
+        'pnl_pips': book.column('profit_pips', rows),
+        'pnl_amount': book.column('profit_jpy', rows),
+        'exit_time': book.time_column('exit_time', rows)
+    })
+    df['month'] = pd.to_datetime(df['exit_time']).dt.to_period('M')
+    
+    monthly = df.groupby('month').agg({
+        'pnl_amount': 'sum',
+        'position_id': 'count',
+        'pnl_pips': 'sum'
+    }).rename(columns={
+        'position_id': 'trades',
+        'pnl_amount': 'profit',
+        'pnl_pips': 'total_pips'
+    })
+    
+    # 勝率を計算
+    monthly['wins'] = df[df['pnl_amount'] > 0].groupby('month').size()
+    monthly['win_rate'] = (monthly['wins'] / monthly['trades'] * 100).fillna(0)
+    
+    return monthly
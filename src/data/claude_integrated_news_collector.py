@@ -4,7 +4,6 @@ Claude統合型ニュース収集・感情分析システム
 ニュース収集 → Claude直接分析 → 自動統合の完全自動化
 """
 
-import urllib.request
 import json
 import os
 from datetime import datetime
@@ -18,6 +17,7 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from src.sentiment.claude_sentiment_analyzer import ClaudeSentimentAnalyzer
+from src.data.rss_fetcher import RSSFetcher
 
 class ClaudeIntegratedNewsCollector:
     """
@@ -26,7 +26,9 @@ class ClaudeIntegratedNewsCollector:
     
     def __init__(self, history_file: str = "news_history.json", 
                  access_log_file: str = "news_access_log.json",
-                 min_interval_hours: float = 1.0):
+                 min_interval_hours: float = 1.0,
+                 max_concurrent_fetches: int = 4,
+                 fetch_timeout: float = 15.0):
         print("Claude統合型ニュース収集・感情分析システム")
         
         self.history_file = history_file
@@ -37,6 +39,9 @@ class ClaudeIntegratedNewsCollector:
         self.access_log = self._load_access_log()
         self.sentiment_analyzer = ClaudeSentimentAnalyzer()
         
+        # RSS取得（並行・条件付きリクエスト・接続再利用）
+        self.fetcher = RSSFetcher(max_workers=max_concurrent_fetches, timeout=fetch_timeout)
+        
         # RSS feeds
         self.rss_feeds = [
             {
@@ -124,8 +129,8 @@ class ClaudeIntegratedNewsCollector:
         
         return False
     
-    def _update_access_log(self, feed_name: str, news_count: int):
-        """アクセス履歴更新"""
+    def _update_access_log(self, feed_name: str, news_count: int, fetch_result: Dict = None):
+        """アクセス履歴更新（取得結果のETag/Last-Modifiedも記録）"""
         current_time = datetime.now()
         
         if feed_name not in self.access_log:
@@ -136,6 +141,13 @@ class ClaudeIntegratedNewsCollector:
             'news_count': news_count,
             'total_accesses': self.access_log[feed_name].get('total_accesses', 0) + 1
         })
+        
+        if fetch_result is not None and fetch_result['status'] is not None:
+            self.access_log[feed_name].update({
+                'etag': fetch_result['etag'],
+                'last_modified': fetch_result['last_modified'],
+                'fetch_seconds': round(fetch_result['elapsed'], 3)
+            })
     
     def _generate_news_hash(self, title: str) -> str:
         """ニュースハッシュ生成"""
@@ -149,16 +161,22 @@ class ClaudeIntegratedNewsCollector:
     
     def fetch_rss_safely(self, url: str) -> str:
         """安全なRSS取得"""
-        try:
-            request = urllib.request.Request(url)
-            request.add_header('User-Agent', 
-                             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-            
-            with urllib.request.urlopen(request, timeout=15) as response:
-                return response.read().decode('utf-8', errors='ignore')
-        except Exception as e:
-            print(f"  アクセスエラー: {str(e)[:50]}...")
-            return ""
+        result = self.fetcher.fetch(url)
+        if result['error']:
+            print(f"  アクセスエラー: {result['error'][:50]}...")
+        return result['content']
+    
+    def fetch_feeds(self, feeds: List[Dict]) -> Dict[str, Dict]:
+        """
+        複数フィードの並行取得
+        
+        前回取得時のETag/Last-Modifiedをアクセス履歴から読み、条件付きリクエストを送る。
+        """
+        validators = {
+            feed['name']: self.access_log.get(feed['name'], {})
+            for feed in feeds
+        }
+        return self.fetcher.fetch_all(feeds, validators)
     
     def parse_rss_xml(self, xml_content: str, source_name: str) -> List[Dict]:
         """RSS XML解析"""
@@ -295,18 +313,31 @@ class ClaudeIntegratedNewsCollector:
         
         all_analyzed_news = []
         
-        for feed in self.rss_feeds:
+        # アクセス頻度チェック後、対象フィードをまとめて並行取得
+        target_feeds = [feed for feed in self.rss_feeds if not self._should_skip_fetch(feed['name'])]
+        try:
+            fetch_results = self.fetch_feeds(target_feeds)
+        finally:
+            # 次の収集まで間隔が空くため、スレッドプールと接続はここで閉じる
+            self.fetcher.close()
+        
+        for feed in target_feeds:
             print(f"\n{feed['name']} 収集中...")
+            fetch_result = fetch_results[feed['name']]
             
-            # アクセス頻度チェック
-            if self._should_skip_fetch(feed['name']):
+            # 前回から更新なし（304）
+            if fetch_result['not_modified']:
+                print(f"  更新なし ({fetch_result['elapsed']:.2f}秒)")
+                self._update_access_log(feed['name'], 0, fetch_result)
                 continue
             
             # RSS取得
-            xml_content = self.fetch_rss_safely(feed['url'])
+            xml_content = fetch_result['content']
             if not xml_content:
+                if fetch_result['error']:
+                    print(f"  アクセスエラー: {fetch_result['error'][:50]}...")
                 # アクセス失敗もログに記録
-                self._update_access_log(feed['name'], 0)
+                self._update_access_log(feed['name'], 0, fetch_result)
                 continue
             
             # 解析
@@ -358,7 +389,7 @@ class ClaudeIntegratedNewsCollector:
             all_analyzed_news.extend(analyzed_news)
             
             # アクセス履歴更新
-            self._update_access_log(feed['name'], len(news_items))
+            self._update_access_log(feed['name'], len(news_items), fetch_result)
         
         # 履歴保存
         if all_analyzed_news:
@@ -373,6 +404,16 @@ class ClaudeIntegratedNewsCollector:
         
         return all_analyzed_news
     
+    def close(self):
+        """RSS取得のスレッドプールと接続を閉じる"""
+        self.fetcher.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        self.close()
+    
     def display_analysis_summary(self, analyzed_news: List[Dict]):
         """分析結果サマリ表示"""
         if not analyzed_news:
@@ -426,10 +467,9 @@ class ClaudeIntegratedNewsCollector:
 
 def main():
     """メイン実行"""
-    collector = ClaudeIntegratedNewsCollector()
-    
-    # 完全自動収集・分析
-    analyzed_news = collector.collect_and_analyze()
+    with ClaudeIntegratedNewsCollector() as collector:
+        # 完全自動収集・分析
+        analyzed_news = collector.collect_and_analyze()
     
     # 結果表示
     collector.display_analysis_summary(analyzed_news)
@@ -0,0 +1,386 @@
+"""
+戦略テスト用データセットのキャッシュ（EnhancedDataManager用）
+
+指標の追加・時間足の統合・品質チェックまで済んだデータセットを2段階でキャッシュする。
+
+- ディスク: data/strategy_cache/{key}/ に列ごとの配列（.npy）とスキーマ（schema.json）として保存する。
+  キーはEnhancedDataManagerのcache_key・元データファイルのマニフェスト（サイズ・更新時刻）・
+  準備処理のソースから計算するため、データや指標の計算を変更すると別のキーになる。
+  保存時に同じcache_keyの古いキーのディレクトリは削除する。
+  読み込み後に型が変わる列（文字列以外のオブジェクト・拡張型など）を含むデータはディスクに保存しない。
+- メモリ: プロセス内の全マネージャーで共有する。配列を読み取り専用にしたデータフレームを保持し、
+  取り出し時はコピーせずに浅いコピー（同じ配列を参照するビュー）を返す。
+
+ビューに列を代入・追加してもキャッシュは変わらない（列ごと置き換わる）。既存の列の値を
+その場で書き換える操作（.locでの代入、+=など）は読み取り専用のためValueErrorになるので、
+書き換える場合は.copy()したデータを使う。
+
+    data/strategy_cache/{key}/
+        schema.json       cache_key・列名と型・インデックス・マニフェスト
+        index.npy         インデックス（時刻はUTCのint64、単位はschema.jsonに記録）
+        {列番号}.npy      数値・真偽値・時刻の列（タイムゾーン付きの時刻はUTCのint64、
+                          カテゴリはコード。単位・タイムゾーン・カテゴリはschema.jsonに記録）
+                          文字列の列はschema.jsonに格納
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# キーに含める準備処理のソース
+PREPARATION_MODULES = ('enhanced_data_manager.py', 'data_processor_enhanced.py')
+
+SCHEMA_FILE = 'schema.json'
+
+# メモリに保持するデータセット数
+MEMORY_ENTRIES = 8
+
+
+@lru_cache(maxsize=1)
+def preparation_fingerprint() -> str:
+    """データセットの準備処理のソースのハッシュ"""
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in PREPARATION_MODULES:
+        with open(os.path.join(directory, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def data_manifest(data_files: Dict[str, Dict[int, str]], years: Optional[List[int]] = None) -> List[Dict]:
+    """
+    データファイルのマニフェスト
+
+    Parameters
+    ----------
+    data_files : Dict[str, Dict[int, str]]
+        {時間足: {年: ファイルパス}}（AutoDataCollector.prepare_strategy_dataの戻り値）
+    years : List[int], optional
+        対象の年（省略時は全て）
+
+    Returns
+    -------
+    List[Dict]
+        時間足・年・ファイル名・サイズ・更新時刻（ナノ秒）の一覧
+    """
+    manifest = []
+    for timeframe in sorted(data_files):
+        for year in sorted(data_files[timeframe]):
+            if years is not None and year not in years:
+                continue
+            path = data_files[timeframe][year]
+            stat = os.stat(path)
+            manifest.append({
+                'timeframe': timeframe,
+                'year': int(year),
+                'file': os.path.basename(path),
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns
+            })
+    return manifest
+
+
+def _column_array(name, series: pd.Series):
+    """
+    列を保存する配列とスキーマに変換する
+
+    Returns
+    -------
+    Tuple[Optional[np.ndarray], Dict]
+        .npyに保存する配列（schema.jsonのみに格納する場合はNone）と列のスキーマ
+
+    Raises
+    ------
+    TypeError
+        型を保ったまま保存できない列
+    """
+    dtype = series.dtype
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        # UTCのint64と単位・タイムゾーン
+        return series.array.asi8, {'name': name, 'dtype': 'datetime', 'unit': dtype.unit, 'tz': str(dtype.tz)}
+    if isinstance(dtype, pd.CategoricalDtype):
+        categories = dtype.categories
+        if categories.dtype.kind not in 'biuf' and pd.api.types.infer_dtype(categories) != 'string':
+            raise TypeError(f"列 {name!r}: カテゴリの型 {categories.dtype} は保存できません")
+        return series.cat.codes.to_numpy(), {
+            'name': name, 'dtype': 'category', 'categories': categories.tolist(),
+            'categories_dtype': str(categories.dtype), 'ordered': bool(dtype.ordered)
+        }
+    if isinstance(dtype, np.dtype) and dtype.kind in 'biufcmM':
+        values = series.to_numpy()
+        return values, {'name': name, 'dtype': values.dtype.str}
+    if dtype == object and pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty'):
+        # 文字列（欠損はNone）の列はschema.jsonに格納
+        values = series.astype(object).where(series.notna(), None)
+        return None, {'name': name, 'dtype': None, 'values': values.tolist()}
+    raise TypeError(f"列 {name!r}: 型 {dtype} は保存できません")
+
+
+def save_frame(directory: str, data: pd.DataFrame, extra: Optional[Dict] = None):
+    """
+    データフレームを列ごとの配列とスキーマとして保存する
+
+    Parameters
+    ----------
+    directory : str
+        保存先（既存の場合は置き換える）
+    data : pd.DataFrame
+        データ
+    extra : Dict, optional
+        スキーマに追加する情報
+
+    Raises
+    ------
+    TypeError
+        型を保ったまま保存できない列・インデックスがある（何も書き込まない）
+    """
+    index = data.index
+    tz = getattr(index, 'tz', None)
+    if isinstance(index, pd.DatetimeIndex):
+        # タイムゾーン付きの場合もUTC、単位はインデックスの分解能（スキーマに記録）
+        index_values = index.asi8
+        index_kind = 'datetime'
+    elif isinstance(index.dtype, np.dtype) and index.dtype.kind in 'biuf':
+        index_values = index.to_numpy()
+        index_kind = 'values'
+    else:
+        raise TypeError(f"インデックス: 型 {index.dtype} は保存できません")
+
+    # 書き込む前に全列を変換する（保存できない列があれば何も残さない）
+    arrays = []
+    columns = []
+    for name in data.columns:
+        values, column = _column_array(name, data[name])
+        arrays.append(values)
+        columns.append(column)
+
+    # 一時ディレクトリに書いてから置き換える（中断しても壊れたデータセットを残さない）
+    temp_directory = f"{directory}.tmp{os.getpid()}"
+    os.makedirs(temp_directory, exist_ok=True)
+
+    np.save(os.path.join(temp_directory, 'index.npy'), index_values)
+    for number, values in enumerate(arrays):
+        if values is not None:
+            np.save(os.path.join(temp_directory, f'{number}.npy'), values)
+
+    schema = {
+        'created': datetime.now().isoformat(),
+        'rows': len(data),
+        'index': {'kind': index_kind, 'name': index.name, 'tz': str(tz) if tz is not None else None,
+                  'unit': getattr(index, 'unit', None)},
+        'columns': columns,
+    }
+    schema.update(extra or {})
+    with open(os.path.join(temp_directory, SCHEMA_FILE), 'w', encoding='utf-8') as f:
+        json.dump(schema, f, ensure_ascii=False, indent=2)
+
+    if os.path.exists(directory):
+        shutil.rmtree(directory, ignore_errors=True)
+    try:
+        os.replace(temp_directory, directory)
+    except OSError:
+        # 同じデータセットを別プロセスが先に保存した
+        shutil.rmtree(temp_directory, ignore_errors=True)
+
+
+def load_frame(directory: str) -> Optional[pd.DataFrame]:
+    """
+    save_frameで保存したデータフレームを読み込む
+
+    Parameters
+    ----------
+    directory : str
+        保存先
+
+    Returns
+    -------
+    pd.DataFrame or None
+        保存されていない場合はNone
+    """
+    schema_path = os.path.join(directory, SCHEMA_FILE)
+    if not os.path.exists(schema_path):
+        return None
+    with open(schema_path, encoding='utf-8') as f:
+        schema = json.load(f)
+
+    index_values = np.load(os.path.join(directory, 'index.npy'), allow_pickle=False)
+    index_spec = schema['index']
+    if index_spec['kind'] == 'datetime':
+        unit = index_spec.get('unit') or 'ns'
+        index = pd.DatetimeIndex(index_values.view(f'datetime64[{unit}]'), name=index_spec['name'])
+        if index_spec['tz'] is not None:
+            index = index.tz_localize('UTC').tz_convert(index_spec['tz'])
+    else:
+        index = pd.Index(index_values, name=index_spec['name'])
+
+    columns = {}
+    for number, column in enumerate(schema['columns']):
+        if column['dtype'] is None:
+            columns[column['name']] = pd.array(column['values'], dtype=object)
+            continue
+        values = np.load(os.path.join(directory, f'{number}.npy'), allow_pickle=False)
+        if column['dtype'] == 'datetime':
+            values = pd.DatetimeIndex(values.view(f"datetime64[{column['unit']}]"))
+            values = values.tz_localize('UTC').tz_convert(column['tz']).array
+        elif column['dtype'] == 'category':
+            categories = pd.Index(column['categories'], dtype=column['categories_dtype'])
+            values = pd.Categorical.from_codes(values, dtype=pd.CategoricalDtype(categories, column['ordered']))
+        columns[column['name']] = values
+    return pd.DataFrame(columns, index=index)
+
+
+def freeze_frame(data: pd.DataFrame) -> pd.DataFrame:
+    """データフレームの配列を読み取り専用にする（キャッシュ内のデータの書き換えを防ぐ）"""
+    for block in data._mgr.blocks:
+        values = block.values
+        if isinstance(values, np.ndarray):
+            values.flags.writeable = False
+    return data
+
+
+class DatasetCache:
+    """
+    準備済みデータセットのディスク・メモリの2段階キャッシュ
+    """
+
+    # メモリのキャッシュ（プロセス内の全インスタンスで共有、古いものから削除）
+    _memory: 'OrderedDict[str, pd.DataFrame]' = OrderedDict()
+
+    def __init__(self, root: str):
+        """
+        初期化
+
+        Parameters
+        ----------
+        root : str
+            ディスクのキャッシュのディレクトリ
+        """
+        self.root = root
+
+    @property
+    def memory(self) -> 'OrderedDict[str, pd.DataFrame]':
+        """メモリのキャッシュ（キー -> 読み取り専用のデータフレーム）"""
+        return self._memory
+
+    def key(self, cache_key: str, data_files: Dict[str, Dict[int, str]], years: List[int]) -> str:
+        """
+        データセットのキー
+
+        Parameters
+        ----------
+        cache_key : str
+            EnhancedDataManagerのキャッシュキー（時間足・年・追加時間足・指標の有無）
+        data_files : Dict[str, Dict[int, str]]
+            読み込むデータファイル
+        years : List[int]
+            対象の年
+
+        Returns
+        -------
+        str
+            {cache_keyのハッシュ}_{データ・準備処理を含むハッシュ}
+            （同じcache_keyの古いデータセットを前半で見つけて削除する）
+        """
+        content = json.dumps({
+            'cache_key': cache_key,
+            'data': data_manifest(data_files, years),
+            'preparation': preparation_fingerprint()
+        }, sort_keys=True)
+        return f"{self._group(cache_key)}_{hashlib.sha256(content.encode('utf-8')).hexdigest()}"
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """
+        データセットを取得（メモリ → ディスクの順に探す）
+
+        Parameters
+        ----------
+        key : str
+            データセットのキー
+
+        Returns
+        -------
+        pd.DataFrame or None
+            キャッシュのビュー（読み取り専用の配列を参照）、ない場合はNone
+        """
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            return data.copy(deep=False)
+
+        data = load_frame(os.path.join(self.root, key))
+        if data is None:
+            return None
+        return self._remember(key, data)
+
+    def put(self, key: str, data: pd.DataFrame, cache_key: str = '') -> pd.DataFrame:
+        """
+        データセットを保存する
+
+        Parameters
+        ----------
+        key : str
+            データセットのキー
+        data : pd.DataFrame
+            準備済みのデータセット
+        cache_key : str
+            EnhancedDataManagerのキャッシュキー（スキーマに記録）
+
+        Returns
+        -------
+        pd.DataFrame
+            キャッシュのビュー
+        """
+        try:
+            save_frame(os.path.join(self.root, key), data, {'cache_key': cache_key})
+            self._prune(key)
+        except TypeError as e:
+            # 型が変わるデータはディスクに保存しない（メモリのみ）
+            print(f"データセットをディスクにキャッシュしません: {e}")
+        return self._remember(key, data.copy())
+
+    def clear(self, disk: bool = False):
+        """
+        キャッシュをクリア
+
+        Parameters
+        ----------
+        disk : bool, default False
+            ディスクのキャッシュも削除するか
+        """
+        self._memory.clear()
+        if disk and os.path.exists(self.root):
+            shutil.rmtree(self.root)
+
+    @staticmethod
+    def _group(cache_key: str) -> str:
+        """cache_keyのハッシュ（キーの前半）"""
+        return hashlib.sha256(cache_key.encode('utf-8')).hexdigest()[:16]
+
+    def _prune(self, key: str):
+        """
+        同じcache_keyの古いデータセット（元データ・準備処理の変更前）と
+        旧形式のキー（cache_keyのハッシュなし）のディレクトリを削除する
+        """
+        group = key.split('_', 1)[0]
+        for name in os.listdir(self.root):
+            if name == key or '.tmp' in name:
+                continue
+            if name.split('_', 1)[0] == group or '_' not in name:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+                self._memory.pop(name, None)
+
+    def _remember(self, key: str, data: pd.DataFrame) -> pd.DataFrame:
+        """読み取り専用にしてメモリに保持し、ビューを返す"""
+        self._memory[key] = freeze_frame(data)
+        self._memory.move_to_end(key)
+        while len(self._memory) > MEMORY_ENTRIES:
+            self._memory.popitem(last=False)
+        return data.copy(deep=False)
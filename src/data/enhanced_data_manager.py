@@ -12,6 +12,90 @@ from datetime import datetime
 import logging
 from .auto_data_collector import AutoDataCollector, ensure_required_data
 from .data_processor_enhanced import DataProcessor
+from .dataset_cache import DatasetCache
+
+# データ品質チェックの理由（ビットフラグ）
+QUALITY_FLAGS = {
+    'missing': 1,        # 価格がNaN
+    'non_positive': 2,   # 価格が0以下
+    'price_change': 4,   # 異常な価格変動
+    'ohlc': 8,           # 高値・安値が始値・終値と矛盾
+    'duplicate': 16,     # 重複時刻（最初の正常な行以外）
+}
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+# 異常な価格変動とみなす変化率（直前3本の終値の中央値と比較するため、1本の異常値の次の行は正常とみなす）
+MAX_PRICE_CHANGE = 0.5
+
+
+def quality_flags(data: pd.DataFrame, max_change: float = MAX_PRICE_CHANGE) -> np.ndarray:
+    """
+    データ品質チェックの行ごとのフラグ
+    
+    Parameters
+    ----------
+    data : pd.DataFrame
+        Open/High/Low/Closeの列を含むデータ
+    max_change : float, default MAX_PRICE_CHANGE
+        異常な価格変動とみなす、直前の正常な終値（3本の中央値）からの変化率
+        
+    Returns
+    -------
+    np.ndarray
+        QUALITY_FLAGSの論理和（uint8、0は問題なし）
+    """
+    columns = [col for col in PRICE_COLUMNS if col in data.columns]
+    prices = {col: data[col].to_numpy(dtype=np.float64) for col in columns}
+    flags = np.zeros(len(data), dtype=np.uint8)
+    if len(data) == 0:
+        return flags
+    
+    missing = np.zeros(len(data), dtype=bool)
+    non_positive = np.zeros(len(data), dtype=bool)
+    for values in prices.values():
+        missing |= np.isnan(values)
+        non_positive |= values <= 0  # NaNはFalse
+    flags[missing] |= QUALITY_FLAGS['missing']
+    flags[non_positive] |= QUALITY_FLAGS['non_positive']
+    
+    # 異常な価格変動（価格が正常な行の直前の終値の中央値との比較、最初の行は比較しない）
+    usable = ~(missing | non_positive)
+    if 'Close' in prices and usable.any():
+        rows = np.flatnonzero(usable)
+        close = prices['Close'][rows]
+        reference = np.full(len(rows), np.nan)
+        reference[1:] = close[:-1]  # 直前が2本以下の場合は直前の終値
+        if len(rows) > 3:
+            a, b, c = close[:-3], close[1:-2], close[2:-1]
+            reference[3:] = np.maximum(np.minimum(a, b), np.minimum(np.maximum(a, b), c))
+        change = np.zeros(len(rows), dtype=bool)
+        with np.errstate(invalid='ignore'):
+            for values in prices.values():
+                change |= np.abs(values[rows] / reference - 1) >= max_change
+        flags[rows[change]] |= QUALITY_FLAGS['price_change']
+    
+    # OHLC整合性チェック
+    if len(columns) == len(PRICE_COLUMNS):
+        low, high = prices['Low'], prices['High']
+        with np.errstate(invalid='ignore'):
+            valid_ohlc = ((low <= prices['Open']) & (low <= prices['Close']) &
+                          (high >= prices['Open']) & (high >= prices['Close']))
+        flags[usable & ~valid_ohlc] |= QUALITY_FLAGS['ohlc']
+    
+    # 時系列の整合性チェック（他の問題がない行のうち、最初以外の重複時刻）
+    rows = np.flatnonzero(flags == 0)
+    index = data.index[rows]
+    if index.is_monotonic_increasing:
+        keys = index.asi8 if isinstance(index, pd.DatetimeIndex) else index.to_numpy()
+        duplicated = np.zeros(len(rows), dtype=bool)
+        duplicated[1:] = keys[1:] == keys[:-1]
+    else:
+        duplicated = index.duplicated(keep='first')
+    flags[rows[duplicated]] |= QUALITY_FLAGS['duplicate']
+    
+    return flags
+
 
 class EnhancedDataManager:
     """
@@ -22,6 +106,7 @@ class EnhancedDataManager:
     2. 戦略テスト用データセットの準備
     3. テクニカル指標の自動追加
     4. データ品質チェック
+    5. 準備済みデータセットのキャッシュ（ディスク・プロセス内メモリ）
     """
     
     def __init__(self, base_dir: str = None):
@@ -42,17 +127,26 @@ class EnhancedDataManager:
         
         self.auto_collector = AutoDataCollector(base_dir)
         
-        # キャッシュ
-        self._data_cache = {}
+        # キャッシュ（ディスクの準備済みデータセットと、全インスタンスで共有するメモリのキャッシュ）
+        self.dataset_cache = DatasetCache(os.path.join(self.base_dir, 'data', 'strategy_cache'))
+        self._data_cache = self.dataset_cache.memory
+        
+        # 直前のデータ品質チェックの結果（_validate_data_quality）
+        self.quality_report = None
         
     def get_strategy_data(self, 
                          primary_timeframe: str, 
                          years: List[int], 
                          additional_timeframes: List[str] = None,
-                         add_indicators: bool = True) -> pd.DataFrame:
+                         add_indicators: bool = True,
+                         drop_invalid: bool = True) -> pd.DataFrame:
         """
         戦略テスト用のデータセットを取得
         
+        準備済みのデータセット（元データファイルと準備処理が同じもの）はキャッシュから返すため、
+        CSVの読み込みと指標の計算は行わない。戻り値はキャッシュと配列を共有する読み取り専用のビューで、
+        列の追加・置き換えはできるが、既存の列の値を書き換える場合は.copy()してから行う。
+        
         Parameters
         ----------
         primary_timeframe : str
@@ -63,15 +157,15 @@ class EnhancedDataManager:
             追加で必要な時間足
         add_indicators : bool, default True
             テクニカル指標を自動追加するか
+        drop_invalid : bool, default True
+            データ品質チェックで問題のある行を除去するか（Falseの場合は除去せずにquality_flags列を追加）
             
         Returns
         -------
         pd.DataFrame
             戦略テスト用データセット
         """
-        cache_key = f"{primary_timeframe}_{sorted(years)}_{additional_timeframes}_{add_indicators}"
-        if cache_key in self._data_cache:
-            return self._data_cache[cache_key].copy()
+        cache_key = f"{primary_timeframe}_{sorted(years)}_{additional_timeframes}_{add_indicators}_{drop_invalid}"
         
         # 必要なデータを確保
         required_timeframes = [primary_timeframe]
@@ -80,6 +174,12 @@ class EnhancedDataManager:
         
         data_files = ensure_required_data(required_timeframes, years)
         
+        # 準備済みデータセットのキャッシュ（元データファイルのサイズ・更新時刻もキーに含む）
+        dataset_key = self.dataset_cache.key(cache_key, data_files, years)
+        cached_data = self.dataset_cache.get(dataset_key)
+        if cached_data is not None:
+            return cached_data
+        
         # プライマリ時間足データを読み込み
         primary_data = self._load_multi_year_data(primary_timeframe, years, data_files)
         
@@ -94,12 +194,10 @@ class EnhancedDataManager:
                 primary_data = self._merge_timeframe_data(primary_data, tf_data, timeframe)
         
         # データ品質チェック
-        primary_data = self._validate_data_quality(primary_data)
+        primary_data = self._validate_data_quality(primary_data, drop=drop_invalid)
         
         # キャッシュに保存
-        self._data_cache[cache_key] = primary_data.copy()
-        
-        return primary_data
+        return self.dataset_cache.put(dataset_key, primary_data, cache_key)
     
     def _load_multi_year_data(self, 
                              timeframe: str, 
@@ -239,53 +337,53 @@ class EnhancedDataManager:
         
         return merged_data
     
-    def _validate_data_quality(self, data: pd.DataFrame) -> pd.DataFrame:
+    def _validate_data_quality(self, data: pd.DataFrame, drop: bool = True,
+                               max_change: float = MAX_PRICE_CHANGE) -> pd.DataFrame:
         """
         データ品質チェックと修正
         
+        全ての判定を元のデータの配列に対して1回で行う（判定の順序や他の判定による除去で
+        結果が変わらない）。判定結果は行ごとのビットフラグ（QUALITY_FLAGS）にまとめ、
+        理由ごとの件数をself.quality_reportに記録する。
+        
         Parameters
         ----------
         data : pd.DataFrame
             データ
+        drop : bool, default True
+            Trueの場合は問題のある行を除去し、Falseの場合は全ての行を残して
+            quality_flags列（0は問題なし）を追加する
+        max_change : float, default MAX_PRICE_CHANGE
+            異常な価格変動とみなす直前の終値（中央値）からの変化率
             
         Returns
         -------
         pd.DataFrame
             品質チェック済みデータ
         """
-        original_len = len(data)
-        
-        # 1. NaN値の処理
-        data = data.dropna(subset=['Open', 'High', 'Low', 'Close'])
-        
-        # 2. 異常値の検出・除去（価格が0以下、異常な価格変動）
-        price_cols = ['Open', 'High', 'Low', 'Close']
-        for col in price_cols:
-            if col in data.columns:
-                # 0以下の値を除去
-                data = data[data[col] > 0]
-                
-                # 異常な価格変動（前日比±50%以上）を除去
-                pct_change = data[col].pct_change()
-                data = data[abs(pct_change) < 0.5]
-        
-        # 3. OHLC整合性チェック
-        valid_ohlc = (
-            (data['Low'] <= data['Open']) &
-            (data['Low'] <= data['Close']) &
-            (data['High'] >= data['Open']) &
-            (data['High'] >= data['Close'])
-        )
-        data = data[valid_ohlc]
+        flags = quality_flags(data, max_change)
+        bad = flags != 0
+        
+        # 結果（理由ごとの件数、1行が複数の理由に該当する場合は各理由に数える）
+        self.quality_report = {
+            'rows': len(data),
+            'removed' if drop else 'flagged': int(bad.sum()),
+            'reasons': {name: int(np.count_nonzero(flags & bit)) for name, bit in QUALITY_FLAGS.items()}
+        }
         
-        # 4. 時系列の整合性チェック（重複時刻の除去）
-        data = data[~data.index.duplicated(keep='first')]
+        if drop:
+            if bad.any():
+                data = data[~bad]
+        else:
+            data = data.assign(quality_flags=flags)
         
         # 結果ログ
-        removed_count = original_len - len(data)
-        if removed_count > 0:
-            removal_rate = (removed_count / original_len) * 100
-            print(f"Data quality check: Removed {removed_count} records ({removal_rate:.2f}%)")
+        count = self.quality_report['removed' if drop else 'flagged']
+        if count > 0:
+            rate = (count / len(flags)) * 100
+            reasons = ', '.join(f"{name} {value}" for name, value in self.quality_report['reasons'].items() if value)
+            action = 'Removed' if drop else 'Flagged'
+            print(f"Data quality check: {action} {count} records ({rate:.2f}%) [{reasons}]")
         
         return data
     
@@ -381,9 +479,16 @@ class EnhancedDataManager:
             'metadata': metadata
         }
     
-    def clear_cache(self):
-        """データキャッシュをクリア"""
-        self._data_cache.clear()
+    def clear_cache(self, disk: bool = False):
+        """
+        データキャッシュをクリア
+        
+        Parameters
+        ----------
+        disk : bool, default False
+            ディスクの準備済みデータセットも削除するか
+        """
+        self.dataset_cache.clear(disk)
         print("Data cache cleared")
 
 # 便利関数
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+ML学習用の特徴量ストア
+
+特徴量パイプライン（src.strategies.feature_pipeline）の特徴量セットを一度だけ計算し、
+年ごとにメモリマップ可能な配列（.npy）とスキーマ（.json）としてディスクに保存する。
+各予測モデルは特徴量セット名・列名・期間を指定して読み込むだけで、価格データからの
+再計算を省略できる。
+
+    data/features/{timeframe}/{year}/
+        index.npy                 時刻（int64, ナノ秒）
+        prices.npy                Open/High/Low/Close/Volume（照合用）
+        {feature_set}_v{version}.npy   特徴量（行=時刻, 列=特徴量）
+        {feature_set}_v{version}.json  スキーマ（列名・型・期間など）
+
+特徴量は全期間を連結した価格データで計算してから年ごとに分割するため、
+年の境目でも移動窓のウォームアップは発生しない（ストアの先頭のみ）。
+lookupは保存時の先頭から連続する範囲の価格データにのみ特徴量を返す（途中から始まる
+範囲では、その範囲だけで計算した値とウォームアップ期間・指数平滑系指標の値が異なるため）。
+バックテストでストアを使う場合は、テスト期間と同じ開始年で作成する。
+ファイル名にパイプラインのバージョンを含むため、定義を変えた特徴量セットは
+古いファイルを参照しない。
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.strategies.feature_pipeline import FEATURE_SETS, build_feature_pipeline
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class FeatureStore:
+    """
+    年ごとに分割した特徴量配列の保存・読み込み
+    """
+
+    def __init__(self, root: str = "data/features", timeframe: str = "15min"):
+        """
+        初期化
+
+        Parameters
+        ----------
+        root : str
+            特徴量ストアのルートディレクトリ
+        timeframe : str
+            時間足（'15min', '1H' など）
+        """
+        self.root = root
+        self.timeframe = timeframe
+        self.base_dir = os.path.join(root, timeframe)
+
+        # 年 -> 時刻配列（メモリマップ）
+        self._index_cache: Dict[int, np.ndarray] = {}
+
+    # ------------------------------------------------------------------
+    # 保存
+    # ------------------------------------------------------------------
+
+    def materialize(self, data: pd.DataFrame,
+                    feature_sets: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        特徴量セットを計算してストアに保存する
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            価格データ（複数年を連結した連続データ、DatetimeIndex）
+        feature_sets : Iterable[str], optional
+            保存する特徴量セット名（省略時はFEATURE_SETSの全て）
+
+        Returns
+        -------
+        Dict[str, int]
+            特徴量セット名 -> 保存した行数
+        """
+        data = data.sort_index()
+        years = data.index.year
+        prices = np.column_stack([self._price_column(data, name) for name in PRICE_COLUMNS])
+
+        for year in np.unique(years):
+            rows = years == year
+            year_dir = self._year_dir(int(year))
+            os.makedirs(year_dir, exist_ok=True)
+            # 時刻はインデックスの単位によらずナノ秒で保存する
+            np.save(os.path.join(year_dir, 'index.npy'), data.index[rows].as_unit('ns').asi8)
+            np.save(os.path.join(year_dir, 'prices.npy'), prices[rows])
+            self._index_cache.pop(int(year), None)
+
+        written = {}
+        for name in (feature_sets or FEATURE_SETS):
+            pipeline = build_feature_pipeline(name)
+            features = pipeline.compute(data)
+            values = features.to_numpy()
+
+            for year in np.unique(years):
+                rows = years == year
+                year_values = np.ascontiguousarray(values[rows])
+                stem = os.path.join(self._year_dir(int(year)), f"{name}_v{pipeline.version}")
+
+                np.save(stem + '.npy', year_values)
+                schema = {
+                    'feature_set': name,
+                    'version': pipeline.version,
+                    'timeframe': self.timeframe,
+                    'year': int(year),
+                    'columns': pipeline.feature_names,
+                    'dtype': np.dtype(pipeline.dtype).name,
+                    'rows': int(rows.sum()),
+                    'start': data.index[rows][0].isoformat(),
+                    'end': data.index[rows][-1].isoformat(),
+                    'created_at': datetime.now().isoformat()
+                }
+                with open(stem + '.json', 'w', encoding='utf-8') as f:
+                    json.dump(schema, f, ensure_ascii=False, indent=2)
+
+            written[name] = len(values)
+            print(f"特徴量ストア保存: {name} v{pipeline.version} "
+                  f"({values.shape[0]}行 x {values.shape[1]}列)")
+
+        return written
+
+    # ------------------------------------------------------------------
+    # 読み込み
+    # ------------------------------------------------------------------
+
+    def available_years(self) -> List[int]:
+        """保存済みの年"""
+        if not os.path.isdir(self.base_dir):
+            return []
+        return sorted(int(name) for name in os.listdir(self.base_dir) if name.isdigit())
+
+    def schema(self, feature_set: str, year: int) -> Optional[Dict]:
+        """
+        特徴量セットのスキーマ（現在のパイプラインのバージョンのもの）
+
+        Parameters
+        ----------
+        feature_set : str
+            特徴量セット名
+        year : int
+            年
+
+        Returns
+        -------
+        Dict or None
+            スキーマ（未保存の場合None）
+        """
+        path = self._stem(feature_set, year) + '.json'
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load(self, feature_set: str,
+             start: Optional[str] = None,
+             end: Optional[str] = None,
+             columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        特徴量を列名・期間を指定して読み込む
+
+        配列はメモリマップで開き、指定範囲の行・列だけを読み出す。
+
+        Parameters
+        ----------
+        feature_set : str
+            特徴量セット名
+        start, end : str or datetime, optional
+            期間（両端を含む。省略時は保存済みの全期間）
+        columns : List[str], optional
+            列名（省略時は全列）
+
+        Returns
+        -------
+        pd.DataFrame
+            特徴量（DatetimeIndex）
+        """
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+
+        frames = []
+        for year in self.available_years():
+            if (start is not None and year < start.year) or (end is not None and year > end.year):
+                continue
+            schema = self.schema(feature_set, year)
+            if schema is None:
+                continue
+
+            index = self._index(year)
+            lo = np.searchsorted(index, start.value, 'left') if start is not None else 0
+            hi = np.searchsorted(index, end.value, 'right') if end is not None else len(index)
+            if lo >= hi:
+                continue
+
+            names = columns or schema['columns']
+            positions = [schema['columns'].index(name) for name in names]
+            values = np.load(self._stem(feature_set, year) + '.npy', mmap_mode='r')
+            frames.append(pd.DataFrame(values[lo:hi, positions],
+                                       index=pd.DatetimeIndex(index[lo:hi].view('datetime64[ns]')),
+                                       columns=names))
+
+        if not frames:
+            raise KeyError(f"特徴量ストアに{feature_set}のデータがありません: {start} - {end}")
+
+        return pd.concat(frames) if len(frames) > 1 else frames[0]
+
+    def lookup(self, feature_set: str, data: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """
+        価格データの各行に対応する保存済み特徴量を取得する
+
+        保存済みの特徴量は保存時の先頭から計算した値なので、価格データが保存時の先頭から
+        連続する範囲（先頭を含む連続した行）で、保存時の価格と一致する場合のみ返す。
+        この場合は価格データだけで計算した値（FeaturePipeline.transform）と一致する。
+        途中から始まる範囲・間引いた行・ストア未作成・期間外・データ更新後はNoneを返すので、
+        呼び出し側は通常どおり特徴量を計算する（先頭のウォームアップも同じになる）。
+
+        Parameters
+        ----------
+        feature_set : str
+            特徴量セット名
+        data : pd.DataFrame
+            価格データ（DatetimeIndex）
+
+        Returns
+        -------
+        pd.DataFrame or None
+            data.indexと同じ行の特徴量
+        """
+        if len(data) == 0 or not isinstance(data.index, pd.DatetimeIndex):
+            return None
+        if any(name not in data.columns and name.lower() not in data.columns for name in PRICE_COLUMNS):
+            return None
+
+        timestamps = data.index.as_unit('ns').asi8
+        years = data.index.year
+        prices = np.column_stack([self._price_column(data, name) for name in PRICE_COLUMNS])
+
+        # 保存時の先頭からの行番号（特徴量セットを保存済みの連続した年）
+        offsets = {}
+        offset = 0
+        for year in self.available_years():
+            if self.schema(feature_set, year) is None:
+                if offsets:
+                    break
+                continue
+            offsets[year] = offset
+            offset += len(self._index(year))
+
+        blocks = []
+        columns = None
+        expected = 0
+        for year in np.unique(years):
+            year = int(year)
+            if year not in offsets:
+                return None
+
+            index = self._index(year)
+            rows = years == year
+            positions = np.searchsorted(index, timestamps[rows])
+            if positions.max() >= len(index) or not np.array_equal(index[positions], timestamps[rows]):
+                return None
+
+            # 保存時の先頭から連続しているか
+            first = offsets[year] + positions[0]
+            if first != expected or not np.all(np.diff(positions) == 1):
+                return None
+            expected = first + len(positions)
+
+            stored_prices = np.load(os.path.join(self._year_dir(year), 'prices.npy'), mmap_mode='r')
+            if not np.array_equal(stored_prices[positions[0]:positions[-1] + 1], prices[rows]):
+                return None
+
+            values = np.load(self._stem(feature_set, year) + '.npy', mmap_mode='r')
+            blocks.append(values[positions[0]:positions[-1] + 1])
+            columns = self.schema(feature_set, year)['columns']
+
+        values = np.concatenate(blocks) if len(blocks) > 1 else np.asarray(blocks[0])
+        return pd.DataFrame(values, index=data.index, columns=columns, copy=False)
+
+    # ------------------------------------------------------------------
+    # 内部処理
+    # ------------------------------------------------------------------
+
+    def _year_dir(self, year: int) -> str:
+        return os.path.join(self.base_dir, str(year))
+
+    def _stem(self, feature_set: str, year: int) -> str:
+        version = build_feature_pipeline(feature_set, 0).version
+        return os.path.join(self._year_dir(year), f"{feature_set}_v{version}")
+
+    def _index(self, year: int) -> np.ndarray:
+        if year not in self._index_cache:
+            self._index_cache[year] = np.load(os.path.join(self._year_dir(year), 'index.npy'),
+                                              mmap_mode='r')
+        return self._index_cache[year]
+
+    @staticmethod
+    def _price_column(data: pd.DataFrame, name: str) -> np.ndarray:
+        column = data[name] if name in data.columns else data[name.lower()]
+        return column.to_numpy(dtype=np.float64)
+
+
+def open_feature_store(timeframe: str = "15min",
+                       root: str = "data/features") -> Optional[FeatureStore]:
+    """
+    特徴量ストアが作成済みなら開く
+
+    Parameters
+    ----------
+    timeframe : str
+        時間足
+    root : str
+        特徴量ストアのルートディレクトリ
+
+    Returns
+    -------
+    FeatureStore or None
+        作成済みの場合FeatureStore、未作成の場合None
+    """
+    store = FeatureStore(root, timeframe)
+    return store if store.available_years() else None
@@ -6,6 +6,9 @@ from datetime import datetime, timedelta
 from src.utils.logger import Logger
 from src.data.data_processor_enhanced import DataProcessor
 
+# 1日（ナノ秒）
+DAY_NS = 24 * 60 * 60 * 1_000_000_000
+
 class MultiTimeframeDataManager:
     """
     複数時間足のデータを管理するクラス
@@ -195,11 +198,8 @@ class MultiTimeframeDataManager:
         
         resampled = df.resample(freq).agg(agg_dict)
         
-        common_index = base_index.intersection(resampled.index)
-        result = pd.DataFrame(index=base_index, columns=resampled.columns)
-        result.loc[common_index] = resampled.loc[common_index]
-        
-        return result
+        # 基準時間足の時刻に揃える（集約結果のない時刻はNaN、列の型は保持）
+        return resampled.reindex(base_index)
     
     def _downsample_to_base(self, df: pd.DataFrame, base_index: pd.DatetimeIndex, timeframe: str, base_timeframe: str) -> pd.DataFrame:
         """
@@ -221,38 +221,65 @@ class MultiTimeframeDataManager:
         pd.DataFrame
             ダウンサンプルされたデータフレーム
         """
-        result = pd.DataFrame(index=base_index, columns=df.columns)
-        
-        if isinstance(df.index, pd.DatetimeIndex):
-            if timeframe == "1W" and base_timeframe == "1D":
-                for week_start, row in df.iterrows():
-                    week_end = week_start + timedelta(days=6)
-                    week_dates = pd.date_range(week_start, week_end, freq='D')
-                    
-                    common_dates = base_index.intersection(week_dates)
-                    
-                    for date in common_dates:
-                        result.loc[date] = row
-            
-            elif timeframe == "1M" and base_timeframe in ["1D", "1W"]:
-                for month_start, row in df.iterrows():
-                    next_month = month_start + pd.offsets.MonthEnd(1)
-                    month_dates = pd.date_range(month_start, next_month, freq='D')
-                    
-                    common_dates = base_index.intersection(month_dates)
-                    
-                    for date in common_dates:
-                        result.loc[date] = row
-            
-            else:
-                for date in base_index:
-                    mask = df.index <= date
-                    if mask.any():
-                        closest_idx = df.index[mask][-1]
-                        result.loc[date] = df.loc[closest_idx]
+        if not isinstance(df.index, pd.DatetimeIndex):
+            return df.iloc[:0].reindex(base_index)
+        
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index(kind='stable')
         
+        if timeframe == "1W" and base_timeframe == "1D":
+            # 週の開始日から6日後まで
+            period_end = df.index + timedelta(days=6)
+        elif timeframe == "1M" and base_timeframe in ["1D", "1W"]:
+            # 月の開始日から月末まで
+            period_end = df.index + pd.offsets.MonthEnd(1)
+        else:
+            # 直前の行（期間の制限なし）
+            period_end = None
+        
+        positions = self._asof_positions(df.index, base_index, period_end)
+        
+        # 位置で行を取り出す（-1は該当なしでNaN、該当なしの行がなければ列の型は保持）
+        result = df.reset_index(drop=True).reindex(positions)
+        result.index = base_index
         return result
     
+    @staticmethod
+    def _asof_positions(index: pd.DatetimeIndex, base_index: pd.DatetimeIndex,
+                        period_end: Optional[pd.DatetimeIndex] = None) -> np.ndarray:
+        """
+        基準時間足の各時刻に対応する長い時間足の行の位置
+        
+        基準時間足の時刻以前で最後の行を、時刻（int64, ナノ秒）のsearchsortedで求める。
+        インデックスの単位（秒・ミリ秒など）が異なる場合もナノ秒にそろえて比較する。
+        
+        Parameters
+        ----------
+        index : pd.DatetimeIndex
+            長い時間足のインデックス（昇順）
+        base_index : pd.DatetimeIndex
+            基準時間足のインデックス
+        period_end : pd.DatetimeIndex, optional
+            各行の期間の終わり。指定した場合は期間内の、行の時刻から日単位の時刻のみ対応させる
+            
+        Returns
+        -------
+        np.ndarray
+            行の位置（対応する行がない場合は-1）
+        """
+        times = index.as_unit('ns').asi8
+        base_times = base_index.as_unit('ns').asi8
+        positions = np.searchsorted(times, base_times, side='right') - 1
+        
+        if period_end is not None and len(times) > 0:
+            found = positions >= 0
+            rows = positions[found]
+            elapsed = base_times[found] - times[rows]
+            in_period = (base_times[found] <= period_end.as_unit('ns').asi8[rows]) & (elapsed % DAY_NS == 0)
+            positions[np.flatnonzero(found)[~in_period]] = -1
+        
+        return positions
+    
     def calculate_indicators(self, data_dict: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
         """
         各時間足のテクニカル指標を計算する
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+RSSフィードの並行取得
+
+複数のRSSフィードをスレッドプールで同時に取得する。
+- 同時接続数の上限（max_workers）
+- フィードごとのタイムアウト
+- 条件付きリクエスト（ETag / Last-Modified、更新がなければ304で本文を受け取らない）
+- 接続の再利用（スレッドごとにホスト単位でHTTP/1.1の接続を保持）
+- プロキシ（環境変数 HTTP_PROXY / HTTPS_PROXY / NO_PROXY、httpsはCONNECTでトンネル）
+"""
+
+import base64
+import http.client
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import unquote, urljoin, urlsplit, urlunsplit
+from urllib.request import getproxies, proxy_bypass, proxy_bypass_environment
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+MAX_REDIRECTS = 3
+
+
+class RSSFetcher:
+    """
+    RSSフィードの並行取得
+    """
+
+    def __init__(self, max_workers: int = 4, timeout: float = 15.0,
+                 user_agent: str = DEFAULT_USER_AGENT,
+                 proxies: Optional[Dict[str, str]] = None):
+        """
+        初期化
+
+        Parameters
+        ----------
+        max_workers : int
+            同時に取得するフィード数の上限
+        timeout : float
+            フィードごとのタイムアウト（秒、フィードに'timeout'があればそちらを優先）
+        user_agent : str
+            User-Agentヘッダ
+        proxies : Dict[str, str], optional
+            スキーム -> プロキシURL（'no'は除外するホスト）。
+            省略時はurllibと同じく環境変数（HTTP_PROXY等）・システム設定に従う
+        """
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.proxies = getproxies() if proxies is None else proxies
+        self._bypass = proxy_bypass if proxies is None else (
+            lambda host: proxy_bypass_environment(host, self.proxies))
+
+        self._local = threading.local()
+        self._connections: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def fetch(self, url: str, etag: Optional[str] = None,
+              last_modified: Optional[str] = None,
+              timeout: Optional[float] = None) -> Dict:
+        """
+        1つのフィードを取得する
+
+        Parameters
+        ----------
+        url : str
+            フィードのURL
+        etag, last_modified : str, optional
+            前回取得時のETag / Last-Modified（条件付きリクエストに使う）
+        timeout : float, optional
+            タイムアウト（秒）
+
+        Returns
+        -------
+        Dict
+            status（HTTPステータス、失敗時None）, content（本文、304・失敗時は空文字）,
+            not_modified, etag, last_modified, elapsed, error
+        """
+        timeout = timeout or self.timeout
+        headers = {'User-Agent': self.user_agent, 'Accept-Encoding': 'identity'}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+        start = time.perf_counter()
+        result = {'url': url, 'status': None, 'content': '', 'not_modified': False,
+                  'etag': etag, 'last_modified': last_modified, 'elapsed': 0.0, 'error': None}
+        try:
+            for _ in range(MAX_REDIRECTS + 1):
+                status, response_headers, body = self._request(url, headers, timeout)
+                location = response_headers.get('location')
+                if status in (301, 302, 303, 307, 308) and location:
+                    url = urljoin(url, location)
+                    continue
+                break
+
+            result['status'] = status
+            if status == 304:
+                result['not_modified'] = True
+            elif 200 <= status < 300:
+                result['content'] = body.decode('utf-8', errors='ignore')
+                result['etag'] = response_headers.get('etag')
+                result['last_modified'] = response_headers.get('last-modified')
+            else:
+                result['error'] = f"HTTP {status}"
+        except Exception as e:
+            result['error'] = str(e) or type(e).__name__
+
+        result['elapsed'] = time.perf_counter() - start
+        return result
+
+    def fetch_all(self, feeds: List[Dict], validators: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
+        """
+        複数のフィードを並行して取得する
+
+        Parameters
+        ----------
+        feeds : List[Dict]
+            フィード（'name', 'url', 任意で'timeout'）
+        validators : Dict[str, Dict], optional
+            フィード名 -> 前回取得時の{'etag', 'last_modified'}
+
+        Returns
+        -------
+        Dict[str, Dict]
+            フィード名 -> fetchの結果（feedsと同じ順序）
+        """
+        validators = validators or {}
+        if not feeds:
+            return {}
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='rss_fetch')
+
+        futures = []
+        for feed in feeds:
+            validator = validators.get(feed['name'], {})
+            futures.append(self._executor.submit(
+                self.fetch, feed['url'], validator.get('etag'),
+                validator.get('last_modified'), feed.get('timeout')
+            ))
+
+        return {feed['name']: future.result() for feed, future in zip(feeds, futures)}
+
+    def close(self):
+        """スレッドプールと保持している接続を閉じる"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    # ------------------------------------------------------------------
+    # 内部処理
+    # ------------------------------------------------------------------
+
+    def _request(self, url: str, headers: Dict[str, str], timeout: float):
+        """GETリクエスト（保持している接続が切れていた場合は1回だけ接続し直す）"""
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        proxy = self._proxy(parts.scheme, parts.hostname)
+        request_headers = {**headers, 'Host': parts.netloc}
+        if proxy is not None and parts.scheme != 'https':
+            # HTTPプロキシへは絶対URIで送る（httpsはトンネル内で通常のリクエスト）
+            path = urlunsplit((parts.scheme, parts.netloc, parts.path or '/', parts.query, ''))
+            request_headers.update(proxy[2])
+
+        for attempt in range(2):
+            connection, reused = self._connection(parts.scheme, parts.hostname, parts.port, timeout, proxy)
+            try:
+                connection.request('GET', path, headers=request_headers)
+                response = connection.getresponse()
+                body = response.read()
+                if response.will_close:
+                    self._discard(connection, parts)
+                return response.status, {k.lower(): v for k, v in response.getheaders()}, body
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError,
+                    http.client.CannotSendRequest):
+                # サーバーが保持中の接続を閉じていた場合
+                self._discard(connection, parts)
+                if not reused or attempt == 1:
+                    raise
+            except Exception:
+                self._discard(connection, parts)
+                raise
+
+    def _proxy(self, scheme: str, host: str):
+        """ホストへの接続に使うプロキシ（ホスト, ポート, 認証ヘッダ）。使わない場合はNone"""
+        proxy_url = self.proxies.get(scheme)
+        if not proxy_url or self._bypass(host):
+            return None
+        if '://' not in proxy_url:
+            proxy_url = 'http://' + proxy_url
+
+        proxy = urlsplit(proxy_url)
+        auth_headers = {}
+        if proxy.username is not None:
+            credentials = f"{unquote(proxy.username)}:{unquote(proxy.password or '')}"
+            auth_headers['Proxy-Authorization'] = 'Basic ' + base64.b64encode(credentials.encode()).decode('ascii')
+        return proxy.hostname, proxy.port, auth_headers
+
+    def _connection(self, scheme: str, host: str, port: Optional[int], timeout: float, proxy=None):
+        """このスレッドで保持しているホストへの接続（なければ作成、proxyがあれば経由する）"""
+        pool = getattr(self._local, 'connections', None)
+        if pool is None:
+            pool = self._local.connections = {}
+
+        key = (scheme, host, port)
+        connection = pool.get(key)
+        reused = connection is not None
+        if connection is None:
+            if scheme == 'https' and proxy is not None:
+                # CONNECTでプロキシを通したトンネル内でTLS接続
+                connection = http.client.HTTPSConnection(proxy[0], proxy[1], timeout=timeout,
+                                                         context=ssl.create_default_context())
+                connection.set_tunnel(host, port, headers=proxy[2])
+            elif scheme == 'https':
+                connection = http.client.HTTPSConnection(host, port, timeout=timeout,
+                                                         context=ssl.create_default_context())
+            elif proxy is not None:
+                connection = http.client.HTTPConnection(proxy[0], proxy[1], timeout=timeout)
+            else:
+                connection = http.client.HTTPConnection(host, port, timeout=timeout)
+            pool[key] = connection
+            with self._lock:
+                self._connections.append(connection)
+
+        # フィードごとのタイムアウトを再利用する接続にも適用
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+        return connection, reused
+
+    def _discard(self, connection: http.client.HTTPConnection, parts):
+        """接続を閉じて保持をやめる"""
+        connection.close()
+        pool = getattr(self._local, 'connections', {})
+        pool.pop((parts.scheme, parts.hostname, parts.port), None)
+        with self._lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
@@ -0,0 +1,146 @@
+"""
+共有メモリ上のデータフレーム
+
+複数のプロセスで同じ価格データ（指標付き）を使う場合に、データを親プロセスで1回だけ読み込み、
+数値列と時刻のインデックスを1つの共有メモリ（multiprocessing.shared_memory）に配置する。
+子プロセスには共有メモリの名前と列の配置（spec）だけを渡し、attach_frameで復元する。
+
+    spec = {
+        'name': 共有メモリ名, 'rows': 行数,
+        'index': {'offset', 'dtype', 'storage', 'tz', 'freq', 'name'},
+        'columns': [(列名, dtype, offset) ...],    共有メモリ上の列
+        'objects': {列名: 値のリスト},             文字列などの列（specと一緒に渡す）
+        'order': 元の列順
+    }
+
+戦略がデータフレームを書き換えても他のプロセスに影響しないように、attach_frameは
+共有メモリから各プロセス専用の配列にコピーしたデータフレームを返す（CSVの読み込みや
+pickleの復元は行わず、配列のコピーのみ）。
+"""
+
+from multiprocessing import shared_memory
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+# 各配列の開始位置の境界（バイト）
+ALIGNMENT = 64
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class SharedFrame:
+    """
+    データフレームを共有メモリに配置する（作成したプロセスが解放する）
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        """
+        初期化（データを共有メモリにコピーする）
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            共有するデータ（数値・真偽値・時刻の列は共有メモリ、それ以外の列はspecに含める）
+        """
+        index = data.index
+        tz = getattr(index, 'tz', None)
+        if isinstance(index, pd.DatetimeIndex):
+            index_values = index.asi8  # タイムゾーン付きの場合もUTC、単位はインデックスの分解能
+            index_dtype = f'datetime64[{index.unit}]'
+        else:
+            index_values = np.asarray(index)
+            index_dtype = index_values.dtype.str
+
+        arrays = [index_values]
+        layout = []
+        objects = {}
+        for name in data.columns:
+            values = data[name].to_numpy()
+            if values.dtype.kind in 'biufcmM':
+                arrays.append(values)
+                layout.append((name, values.dtype.str))
+            else:
+                objects[name] = values.tolist()
+
+        # 配置を決めてから1つの共有メモリにまとめてコピーする
+        offsets = []
+        size = 0
+        for values in arrays:
+            offsets.append(size)
+            size = _aligned(size + values.nbytes)
+
+        self.nbytes = max(size, 1)  # 共有メモリのサイズ（バイト）
+        self._shm = shared_memory.SharedMemory(create=True, size=self.nbytes)
+        for values, offset in zip(arrays, offsets):
+            target = np.ndarray(values.shape, dtype=values.dtype, buffer=self._shm.buf, offset=offset)
+            target[...] = values
+
+        self.spec = {
+            'name': self._shm.name,
+            'rows': len(data),
+            'index': {'offset': offsets[0], 'dtype': index_dtype, 'storage': index_values.dtype.str,
+                      'tz': str(tz) if tz is not None else None, 'freq': getattr(index, 'freqstr', None),
+                      'name': index.name},
+            'columns': [(name, dtype, offset) for (name, dtype), offset in zip(layout, offsets[1:])],
+            'objects': objects,
+            'order': list(data.columns),
+        }
+
+    def close(self):
+        """共有メモリを解放する"""
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def attach_frame(spec: Dict) -> pd.DataFrame:
+    """
+    共有メモリのデータフレームを復元する
+
+    Parameters
+    ----------
+    spec : Dict
+        SharedFrame.spec
+
+    Returns
+    -------
+    pd.DataFrame
+        共有メモリからコピーしたデータフレーム（元と同じ列順・型・インデックス）
+    """
+    shm = shared_memory.SharedMemory(name=spec['name'])
+    try:
+        rows = spec['rows']
+        buffer = shm.buf
+
+        index_spec = spec['index']
+        index_values = np.ndarray(rows, dtype=index_spec['storage'], buffer=buffer,
+                                  offset=index_spec['offset']).copy()
+        if index_spec['dtype'].startswith('datetime64'):
+            index = pd.DatetimeIndex(index_values.view(index_spec['dtype']), name=index_spec['name'])
+            if index_spec['tz'] is not None:
+                index = index.tz_localize('UTC').tz_convert(index_spec['tz'])
+            if index_spec['freq'] is not None:
+                index.freq = index_spec['freq']
+        else:
+            index = pd.Index(index_values, name=index_spec['name'])
+
+        columns = {name: np.ndarray(rows, dtype=dtype, buffer=buffer, offset=offset).copy()
+                   for name, dtype, offset in spec['columns']}
+        del buffer
+    finally:
+        shm.close()
+
+    for name, values in spec['objects'].items():
+        columns[name] = values
+    return pd.DataFrame({name: columns[name] for name in spec['order']}, index=index)
@@ -0,0 +1,886 @@
+"""
+ストリーミング（逐次更新）テクニカル指標
+
+1本の足が確定するたびにupdate()を呼び出し、過去データ全体を再計算せずに
+指標値を定数時間で更新する。バックテストとMT5ライブループで同じ計算を使うための基盤。
+
+各指標はfrom_history()で過去データから一括初期化でき、その後はupdate()で1本ずつ更新する。
+平滑化方式（smoothing）は既存の一括計算と結果を揃えるために選択できる:
+
+- 'wilder' : ta ライブラリ互換（DataProcessor.add_technical_indicators）
+- 'talib'  : TA-Lib互換（LightweightMLPredictor等のtalib呼び出し）
+- 'sma'    : 単純移動平均（MultiTimeframeDataManager.calculate_indicators）
+"""
+
+import math
+from collections import deque
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class StreamingIndicator:
+    """
+    ストリーミング指標の基底クラス
+
+    サブクラスはupdate()を実装し、最新の値をvalue属性に保持する
+    """
+
+    __slots__ = ()
+
+    def update(self, *values):
+        """新しい値で指標を更新する"""
+        raise NotImplementedError
+
+    def initialize(self, *arrays):
+        """
+        過去データで状態を一括初期化する
+
+        Parameters
+        ----------
+        *arrays : array-like
+            update()の引数と同じ順序の履歴配列（例: ATRならhigh, low, close）
+
+        Returns
+        -------
+        StreamingIndicator
+            初期化済みの自身
+        """
+        columns = [a.tolist() if hasattr(a, 'tolist') else list(a) for a in arrays]
+        update = self.update
+        for values in zip(*columns):
+            update(*values)
+        return self
+
+    @classmethod
+    def from_history(cls, *arrays, **params):
+        """
+        過去データから指標を生成する
+
+        Parameters
+        ----------
+        *arrays : array-like
+            update()の引数と同じ順序の履歴配列
+        **params
+            コンストラクタの引数
+
+        Returns
+        -------
+        StreamingIndicator
+            履歴で初期化済みの指標
+        """
+        return cls(**params).initialize(*arrays)
+
+
+class SMA(StreamingIndicator):
+    """
+    単純移動平均（移動和による逐次計算）
+
+    pandasのrolling(window).mean()と同じく、ウィンドウ内にNaNが含まれる間はNaNを返す。
+    浮動小数点誤差の蓄積を防ぐため、一定回数ごとにバッファから合計を再計算する。
+    """
+
+    __slots__ = ('window', '_values', '_sum', '_nan_count', '_updates', 'value')
+
+    _RESYNC_INTERVAL = 10000
+
+    def __init__(self, window: int = 20):
+        """
+        初期化
+
+        Parameters
+        ----------
+        window : int, default 20
+            移動平均の期間
+        """
+        self.window = window
+        self._values = deque(maxlen=window)
+        self._sum = 0.0
+        self._nan_count = 0
+        self._updates = 0
+        self.value = math.nan
+
+    def update(self, value: float) -> float:
+        """
+        新しい値で移動平均を更新する
+
+        Parameters
+        ----------
+        value : float
+            新しい値
+
+        Returns
+        -------
+        float
+            移動平均。期間に満たない場合やウィンドウ内にNaNがある場合はNaN
+        """
+        if len(self._values) == self.window:
+            old = self._values[0]
+            if old != old:
+                self._nan_count -= 1
+            else:
+                self._sum -= old
+
+        self._values.append(value)
+        if value != value:
+            self._nan_count += 1
+        else:
+            self._sum += value
+
+        self._updates += 1
+        if self._updates % self._RESYNC_INTERVAL == 0:
+            self._sum = math.fsum(v for v in self._values if v == v)
+
+        if len(self._values) < self.window or self._nan_count > 0:
+            self.value = math.nan
+        else:
+            self.value = self._sum / self.window
+
+        return self.value
+
+
+class EMA(StreamingIndicator):
+    """
+    指数移動平均
+
+    seed='first'はpandasのewm(adjust=False)と同じく最初の値から平滑化を開始し、
+    min_periods本の観測後に値を返す。seed='sma'はTA-Libと同じく
+    最初のwindow本の単純平均を初期値とする。NaNの入力は無視する。
+    """
+
+    __slots__ = ('window', 'alpha', 'seed', 'min_periods', '_count', '_sum', '_ema', 'value')
+
+    def __init__(self, window: int = 20, alpha: Optional[float] = None,
+                 seed: str = 'first', min_periods: Optional[int] = None):
+        """
+        初期化
+
+        Parameters
+        ----------
+        window : int, default 20
+            期間（alpha未指定時は2 / (window + 1)を平滑化係数とする）
+        alpha : float, optional
+            平滑化係数（ワイルダー平滑化なら1 / window）
+        seed : str, default 'first'
+            初期値の決め方（'first' または 'sma'）
+        min_periods : int, optional
+            値を返すまでに必要な観測数（デフォルトはwindow）
+        """
+        if seed not in ('first', 'sma'):
+            raise ValueError(f"未対応のseedです: {seed}")
+
+        self.window = window
+        self.alpha = alpha if alpha is not None else 2.0 / (window + 1)
+        self.seed = seed
+        self.min_periods = min_periods if min_periods is not None else window
+        self._count = 0
+        self._sum = 0.0
+        self._ema = math.nan
+        self.value = math.nan
+
+    def update(self, value: float) -> float:
+        """
+        新しい値で指数移動平均を更新する
+
+        Parameters
+        ----------
+        value : float
+            新しい値
+
+        Returns
+        -------
+        float
+            指数移動平均。観測数が足りない場合はNaN
+        """
+        if value != value:
+            return self.value
+
+        self._count += 1
+
+        if self.seed == 'sma':
+            if self._count < self.window:
+                self._sum += value
+                return self.value
+            if self._count == self.window:
+                self._ema = (self._sum + value) / self.window
+            else:
+                self._ema += self.alpha * (value - self._ema)
+            self.value = self._ema
+            return self.value
+
+        if self._count == 1:
+            self._ema = value
+        else:
+            self._ema += self.alpha * (value - self._ema)
+
+        if self._count >= self.min_periods:
+            self.value = self._ema
+
+        return self.value
+
+
+class RollingStd(StreamingIndicator):
+    """
+    移動標準偏差（ウィンドウ付きWelford法）
+
+    値の入れ替え時に平均と偏差平方和を差分更新するため、
+    移動和の二乗和方式よりも桁落ちに強い。pandasのrolling(window).std()と同じく、
+    ウィンドウ内にNaN・無限大が含まれる間はNaNを返し、最後の1つがウィンドウから
+    外れた時点でバッファから平均と偏差平方和を再計算する。
+    """
+
+    __slots__ = ('window', 'ddof', '_values', '_mean', '_m2', '_invalid_count', '_stale', '_updates',
+                 'mean', 'value')
+
+    _RESYNC_INTERVAL = 10000
+
+    def __init__(self, window: int = 20, ddof: int = 1):
+        """
+        初期化
+
+        Parameters
+        ----------
+        window : int, default 20
+            期間
+        ddof : int, default 1
+            自由度（pandasのrolling.std()は1、ta.BollingerBandsは0）
+        """
+        self.window = window
+        self.ddof = ddof
+        self._values = deque(maxlen=window)
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._invalid_count = 0
+        self._stale = False
+        self._updates = 0
+        self.mean = math.nan
+        self.value = math.nan
+
+    def update(self, value: float) -> float:
+        """
+        新しい値で移動標準偏差を更新する
+
+        Parameters
+        ----------
+        value : float
+            新しい値
+
+        Returns
+        -------
+        float
+            移動標準偏差。期間に満たない場合やウィンドウ内にNaNがある場合はNaN
+        """
+        values = self._values
+        n = len(values)
+        full = n == self.window
+        old = values[0] if full else 0.0
+
+        if full and not math.isfinite(old):
+            self._invalid_count -= 1
+        if not math.isfinite(value):
+            self._invalid_count += 1
+        values.append(value)
+
+        if self._invalid_count > 0:
+            # 差分更新を止め、NaNがウィンドウから外れた時点で再計算する
+            self._stale = True
+            self.mean = math.nan
+            self.value = math.nan
+            return self.value
+
+        self._updates += 1
+        if self._stale or self._updates % self._RESYNC_INTERVAL == 0:
+            n = len(values)
+            self._mean = math.fsum(values) / n
+            self._m2 = math.fsum((v - self._mean) ** 2 for v in values)
+            self._stale = False
+        elif full:
+            new_mean = self._mean + (value - old) / n
+            self._m2 += (value - old) * (value - new_mean + old - self._mean)
+            self._mean = new_mean
+        else:
+            n += 1
+            delta = value - self._mean
+            self._mean += delta / n
+            self._m2 += delta * (value - self._mean)
+
+        if n < self.window:
+            return self.value
+
+        self.mean = self._mean
+        self.value = math.sqrt(max(0.0, self._m2) / (n - self.ddof))
+        return self.value
+
+
+class Bollinger(StreamingIndicator):
+    """
+    ボリンジャーバンド
+
+    中心線と標準偏差をRollingStdから取得する。
+    ddof=0でta.BollingerBands、ddof=1でpandasのrolling.std()を使う計算と一致する。
+    """
+
+    __slots__ = ('window', 'num_std', '_std', 'middle', 'upper', 'lower')
+
+    def __init__(self, window: int = 20, num_std: float = 2.0, ddof: int = 0):
+        """
+        初期化
+
+        Parameters
+        ----------
+        window : int, default 20
+            移動平均の期間
+        num_std : float, default 2.0
+            バンド幅（標準偏差の倍率）
+        ddof : int, default 0
+            標準偏差の自由度
+        """
+        self.window = window
+        self.num_std = num_std
+        self._std = RollingStd(window, ddof)
+        self.middle = math.nan
+        self.upper = math.nan
+        self.lower = math.nan
+
+    @property
+    def value(self) -> Tuple[float, float, float]:
+        """(上バンド, 中心線, 下バンド)"""
+        return self.upper, self.middle, self.lower
+
+    def update(self, value: float) -> Tuple[float, float, float]:
+        """
+        新しい終値でバンドを更新する
+
+        Parameters
+        ----------
+        value : float
+            終値
+
+        Returns
+        -------
+        Tuple[float, float, float]
+            (上バンド, 中心線, 下バンド)。期間に満たない場合はNaN
+        """
+        std = self._std.update(value)
+        if std != std:
+            # 期間に満たない・ウィンドウ内にNaNがある
+            self.middle = self.upper = self.lower = math.nan
+            return self.upper, self.middle, self.lower
+
+        self.middle = self._std.mean
+        self.upper = self.middle + self.num_std * std
+        self.lower = self.middle - self.num_std * std
+
+        return self.upper, self.middle, self.lower
+
+
+class RSI(StreamingIndicator):
+    """
+    RSI
+
+    smoothing='wilder'はta.momentum.RSIIndicator（平滑化係数1/windowの指数移動平均を
+    先頭の足から開始）、'talib'はTA-LibのRSI（最初のwindow本の平均を初期値とする
+    ワイルダー平滑化）、'sma'は値幅の単純移動平均による計算と一致する。
+    """
+
+    __slots__ = ('window', 'smoothing', '_prev', '_gain', '_loss', 'value')
+
+    def __init__(self, window: int = 14, smoothing: str = 'wilder'):
+        """
+        初期化
+
+        Parameters
+        ----------
+        window : int, default 14
+            RSIの期間
+        smoothing : str, default 'wilder'
+            平滑化方式（'wilder', 'talib', 'sma'）
+        """
+        if smoothing == 'wilder':
+            self._gain = EMA(window, alpha=1.0 / window)
+            self._loss = EMA(window, alpha=1.0 / window)
+        elif smoothing == 'talib':
+            self._gain = EMA(window, alpha=1.0 / window, seed='sma')
+            self._loss = EMA(window, alpha=1.0 / window, seed='sma')
+        elif smoothing == 'sma':
+            self._gain = SMA(window)
+            self._loss = SMA(window)
+        else:
+            raise ValueError(f"未対応の平滑化方式です: {smoothing}")
+
+        self.window = window
+        self.smoothing = smoothing
+        self._prev = None
+        self.value = math.nan
+
+    def update(self, close: float) -> float:
+        """
+        新しい終値でRSIを更新する
+
+        Parameters
+        ----------
+        close : float
+            終値
+
+        Returns
+        -------
+        float
+            RSI（0〜100）。期間に満たない場合はNaN
+        """
+        if self._prev is None:
+            self._prev = close
+            if self.smoothing != 'talib':
+                # pandasのdiff()の先頭NaNはwhere()で0として扱われる
+                self._gain.update(0.0)
+                self._loss.update(0.0)
+            return self.value
+
+        diff = close - self._prev
+        self._prev = close
+
+        avg_gain = self._gain.update(diff if diff > 0 else 0.0)
+        avg_loss = self._loss.update(-diff if diff < 0 else 0.0)
+
+        if avg_gain != avg_gain or avg_loss != avg_loss:
+            return self.value
+
+        if self.smoothing == 'talib':
+            total = avg_gain + avg_loss
+            self.value = 100.0 * avg_gain / total if total != 0 else 0.0
+        elif avg_loss == 0:
+            if self.smoothing == 'wilder':
+                self.value = 100.0
+            else:
+                self.value = 100.0 if avg_gain > 0 else math.nan
+        else:
+            self.value = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+        return self.value
+
+
+class ATR(StreamingIndicator):
+    """
+    ATR
+
+    smoothing='wilder'はta.volatility.AverageTrueRange（先頭の足の高値-安値を含む
+    最初のwindow本の平均を初期値とするワイルダー平滑化）、'talib'はTA-LibのATR
+    （2本目以降の真の値幅を使用）、'sma'は真の値幅の単純移動平均と一致する。
+    """
+
+    __slots__ = ('window', 'smoothing', '_prev_close', '_average', 'true_range', 'value')
+
+    def __init__(self, window: int = 14, smoothing: str = 'wilder'):
+        """
+        初期化
+
+        Parameters
+        ----------
+        window : int, default 14
+            ATRの期間
+        smoothing : str, default 'wilder'
+            平滑化方式（'wilder', 'talib', 'sma'）
+        """
+        if smoothing in ('wilder', 'talib'):
+            self._average = EMA(window, alpha=1.0 / window, seed='sma')
+        elif smoothing == 'sma':
+            self._average = SMA(window)
+        else:
+            raise ValueError(f"未対応の平滑化方式です: {smoothing}")
+
+        self.window = window
+        self.smoothing = smoothing
+        self._prev_close = None
+        self.true_range = math.nan
+        self.value = math.nan
+
+    def update(self, high: float, low: float, close: float) -> float:
+        """
+        新しい足でATRを更新する
+
+        Parameters
+        ----------
+        high : float
+            高値
+        low : float
+            安値
+        close : float
+            終値
+
+        Returns
+        -------
+        float
+            ATR。期間に満たない場合はNaN
+        """
+        prev_close = self._prev_close
+        self._prev_close = close
+
+        if prev_close is None:
+            self.true_range = high - low
+            if self.smoothing == 'talib':
+                return self.value
+        else:
+            self.true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+        self.value = self._average.update(self.true_range)
+        return self.value
+
+
+class ADX(StreamingIndicator):
+    """
+    ADX（+DI / -DI を含む）
+
+    smoothing='sma'はMultiTimeframeDataManager.calculate_indicatorsと同じく
+    +DM/-DM・真の値幅・DXを単純移動平均で平滑化する。
+    smoothing='talib'はTA-LibのADX（ワイルダーの累積平滑化）と一致する。
+    """
+
+    __slots__ = ('window', 'smoothing', '_prev_high', '_prev_low', '_prev_close',
+                 '_count', '_plus_dm', '_minus_dm', '_tr', '_dx', '_dx_sum',
+                 'plus_di', 'minus_di', 'value')
+
+    def __init__(self, window: int = 14, smoothing: str = 'sma'):
+        """
+        初期化
+
+        Parameters
+        ----------
+        window : int, default 14
+            ADXの期間
+        smoothing : str, default 'sma'
+            平滑化方式（'sma', 'talib'）
+        """
+        if smoothing == 'sma':
+            self._plus_dm = SMA(window)
+            self._minus_dm = SMA(window)
+            self._tr = SMA(window)
+            self._dx = SMA(window)
+        elif smoothing == 'talib':
+            self._plus_dm = 0.0
+            self._minus_dm = 0.0
+            self._tr = 0.0
+            self._dx = math.nan
+        else:
+            raise ValueError(f"未対応の平滑化方式です: {smoothing}")
+
+        self.window = window
+        self.smoothing = smoothing
+        self._prev_high = None
+        self._prev_low = None
+        self._prev_close = None
+        self._count = 0
+        self._dx_sum = 0.0
+        self.plus_di = math.nan
+        self.minus_di = math.nan
+        self.value = math.nan
+
+    def update(self, high: float, low: float, close: float) -> float:
+        """
+        新しい足でADXを更新する
+
+        Parameters
+        ----------
+        high : float
+            高値
+        low : float
+            安値
+        close : float
+            終値
+
+        Returns
+        -------
+        float
+            ADX。期間に満たない場合はNaN
+        """
+        if self.smoothing == 'sma':
+            return self._update_sma(high, low, close)
+        return self._update_talib(high, low, close)
+
+    def _update_sma(self, high: float, low: float, close: float) -> float:
+        """単純移動平均による更新"""
+        if self._prev_close is None:
+            true_range = high - low
+            plus_dm = 0.0
+            minus_dm = 0.0
+        else:
+            true_range = max(high - low, abs(high - self._prev_close), abs(low - self._prev_close))
+            up_move = high - self._prev_high
+            down_move = self._prev_low - low
+            plus_dm = up_move if up_move > 0 and up_move > down_move else 0.0
+            # calculate_indicatorsと同じく、-DMは置換後の+DMと比較する
+            minus_dm = down_move if down_move > 0 and down_move > plus_dm else 0.0
+
+        self._prev_high = high
+        self._prev_low = low
+        self._prev_close = close
+
+        atr = self._tr.update(true_range)
+        avg_plus = self._plus_dm.update(plus_dm)
+        avg_minus = self._minus_dm.update(minus_dm)
+
+        if atr != atr:
+            self.value = self._dx.update(math.nan)
+            return self.value
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.plus_di = float(np.float64(100.0) * avg_plus / np.float64(atr))
+            self.minus_di = float(np.float64(100.0) * avg_minus / np.float64(atr))
+            dx = float(np.float64(100.0) * abs(self.plus_di - self.minus_di) /
+                       np.float64(self.plus_di + self.minus_di))
+
+        self.value = self._dx.update(dx)
+        return self.value
+
+    def _update_talib(self, high: float, low: float, close: float) -> float:
+        """TA-Lib互換のワイルダー累積平滑化による更新"""
+        if self._prev_close is None:
+            self._prev_high = high
+            self._prev_low = low
+            self._prev_close = close
+            return self.value
+
+        n = self.window
+        self._count += 1
+
+        diff_plus = high - self._prev_high
+        diff_minus = self._prev_low - low
+        true_range = max(high - low, abs(high - self._prev_close), abs(low - self._prev_close))
+        self._prev_high = high
+        self._prev_low = low
+        self._prev_close = close
+
+        if self._count >= n:
+            self._plus_dm -= self._plus_dm / n
+            self._minus_dm -= self._minus_dm / n
+            self._tr -= self._tr / n
+
+        if diff_minus > 0 and diff_plus < diff_minus:
+            self._minus_dm += diff_minus
+        elif diff_plus > 0 and diff_plus > diff_minus:
+            self._plus_dm += diff_plus
+        self._tr += true_range
+
+        if self._count < n:
+            return self.value
+
+        dx = math.nan
+        if self._tr != 0:
+            self.plus_di = 100.0 * self._plus_dm / self._tr
+            self.minus_di = 100.0 * self._minus_dm / self._tr
+            total = self.plus_di + self.minus_di
+            if total != 0:
+                dx = 100.0 * abs(self.minus_di - self.plus_di) / total
+
+        if self._count < 2 * n:
+            if dx == dx:
+                self._dx_sum += dx
+            if self._count == 2 * n - 1:
+                self.value = self._dx_sum / n
+        elif dx == dx:
+            self.value = (self.value * (n - 1) + dx) / n
+
+        return self.value
+
+
+class MACD(StreamingIndicator):
+    """
+    MACD
+
+    ta.trend.MACDと同じく、pandasのewm(span, adjust=False)相当の指数移動平均で計算する
+    """
+
+    __slots__ = ('_fast', '_slow', '_signal', 'macd', 'signal', 'histogram')
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        """
+        初期化
+
+        Parameters
+        ----------
+        fast : int, default 12
+            短期EMAの期間
+        slow : int, default 26
+            長期EMAの期間
+        signal : int, default 9
+            シグナル線の期間
+        """
+        self._fast = EMA(fast)
+        self._slow = EMA(slow)
+        self._signal = EMA(signal)
+        self.macd = math.nan
+        self.signal = math.nan
+        self.histogram = math.nan
+
+    @property
+    def value(self) -> Tuple[float, float, float]:
+        """(MACD, シグナル, ヒストグラム)"""
+        return self.macd, self.signal, self.histogram
+
+    def update(self, close: float) -> Tuple[float, float, float]:
+        """
+        新しい終値でMACDを更新する
+
+        Parameters
+        ----------
+        close : float
+            終値
+
+        Returns
+        -------
+        Tuple[float, float, float]
+            (MACD, シグナル, ヒストグラム)。期間に満たない場合はNaN
+        """
+        fast = self._fast.update(close)
+        slow = self._slow.update(close)
+        self.macd = fast - slow
+        self.signal = self._signal.update(self.macd)
+        self.histogram = self.macd - self.signal
+        return self.macd, self.signal, self.histogram
+
+
+class _RollingExtreme(StreamingIndicator):
+    """
+    単調デックによる移動最大値・最小値の共通実装
+
+    pandasのrolling(window).max()と同じく、ウィンドウ内にNaNが含まれる間はNaNを返す
+    （NaNはデックに入れず、最後のNaNの位置だけを記録する）。
+    """
+
+    __slots__ = ('window', '_deque', '_index', '_last_nan', 'value')
+
+    _sign = 1.0
+
+    def __init__(self, window: int = 20):
+        """
+        初期化
+
+        Parameters
+        ----------
+        window : int, default 20
+            期間
+        """
+        self.window = window
+        self._deque = deque()
+        self._index = 0
+        self._last_nan = -window
+        self.value = math.nan
+
+    def update(self, value: float) -> float:
+        """
+        新しい値で更新する
+
+        Parameters
+        ----------
+        value : float
+            新しい値
+
+        Returns
+        -------
+        float
+            ウィンドウ内の最大値（最小値）。期間に満たない場合やウィンドウ内にNaNがある場合はNaN
+        """
+        index = self._index
+        window = self._deque
+        if value == value:
+            key = self._sign * value
+            while window and window[-1][1] <= key:
+                window.pop()
+            window.append((index, key))
+        else:
+            self._last_nan = index
+
+        if window and window[0][0] <= index - self.window:
+            window.popleft()
+
+        self._index = index + 1
+        if self._index >= self.window:
+            if index - self._last_nan < self.window:
+                self.value = math.nan
+            else:
+                self.value = self._sign * window[0][1]
+
+        return self.value
+
+
+class RollingMax(_RollingExtreme):
+    """移動最大値（単調デックによる償却O(1)更新）"""
+
+    __slots__ = ()
+
+    _sign = 1.0
+
+
+class RollingMin(_RollingExtreme):
+    """移動最小値（単調デックによる償却O(1)更新）"""
+
+    __slots__ = ()
+
+    _sign = -1.0
+
+
+class TokyoRange(StreamingIndicator):
+    """
+    東京時間レンジ（高値・安値）の逐次計算
+
+    DataProcessor.get_tokyo_session_rangeと同じく、日本時間9:00〜15:00（両端を含む）の
+    高値・安値を日付ごとに記録する。日付が変わると自動的にリセットされる。
+    """
+
+    __slots__ = ('start_hour', 'end_hour', '_date', 'high', 'low')
+
+    def __init__(self, start_hour: int = 9, end_hour: int = 15):
+        """
+        初期化
+
+        Parameters
+        ----------
+        start_hour : int, default 9
+            東京時間の開始時刻（日本時間）
+        end_hour : int, default 15
+            東京時間の終了時刻（日本時間、この時刻ちょうどの足まで含む）
+        """
+        self.start_hour = start_hour
+        self.end_hour = end_hour
+        self._date = None
+        self.high = math.nan
+        self.low = math.nan
+
+    @property
+    def value(self) -> Tuple[float, float]:
+        """(東京時間高値, 安値)"""
+        return self.high, self.low
+
+    def update(self, timestamp, high: float, low: float) -> Tuple[float, float]:
+        """
+        新しい足でレンジを更新する
+
+        Parameters
+        ----------
+        timestamp : pd.Timestamp
+            足の時刻（データのインデックスと同じタイムゾーン）
+        high : float
+            高値
+        low : float
+            安値
+
+        Returns
+        -------
+        Tuple[float, float]
+            (当日の東京時間高値, 安値)。東京時間の足がまだない場合はNaN
+        """
+        date = timestamp.date()
+        if date != self._date:
+            self._date = date
+            self.high = math.nan
+            self.low = math.nan
+
+        jst_hour = (timestamp.hour + 9) % 24
+        jst_minutes = jst_hour * 60 + timestamp.minute
+        in_session = (self.start_hour * 60 <= jst_minutes < self.end_hour * 60 or
+                      (jst_minutes == self.end_hour * 60 and timestamp.second == 0
+                       and timestamp.microsecond == 0))
+
+        if in_session:
+            self.high = high if math.isnan(self.high) else max(self.high, high)
+            self.low = low if math.isnan(self.low) else min(self.low, low)
+
+        return self.high, self.low
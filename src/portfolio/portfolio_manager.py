@@ -140,20 +140,27 @@ class PortfolioManager:
         -------
         Dict[str, pd.DataFrame]
             ポジションサイズが追加されたデータフレーム
+
+        Notes
+        -----
+        戦略が配列版のcalculate_position_sizes(signals, equity)を持つ場合はそれを使用し、
+        持たない場合はスカラー版calculate_position_sizeをシグナルのユニーク値ごとに
+        呼び出して配列全体へ展開する（BaseStrategy.calculate_position_sizesと同じ方式）
         """
         for name, signals_df in signals.items():
             if name in self.strategies:
                 strategy = self.strategies[name]["strategy"]
                 balance = self.strategies[name]["balance"]
-                
-                signals_df['position_size'] = 0.0
-                
-                for i in range(len(signals_df)):
-                    signal = signals_df['signal'].iloc[i]
-                    if signal != 0:
-                        position_size = strategy.calculate_position_size(signal, balance)
-                        signals_df.loc[signals_df.index[i], 'position_size'] = position_size
-        
+
+                signal_values = signals_df['signal'].to_numpy(dtype=float)
+
+                if hasattr(strategy, 'calculate_position_sizes'):
+                    position_sizes = strategy.calculate_position_sizes(signal_values, balance)
+                else:
+                    position_sizes = BaseStrategy.calculate_position_sizes(strategy, signal_values, balance)
+
+                signals_df['position_size'] = np.asarray(position_sizes, dtype=float)
+
         return signals
     
     def calculate_correlation(self, signals: Dict[str, pd.DataFrame]) -> Dict[str, Dict[str, float]]:
@@ -12,6 +12,8 @@ import json
 import os
 import re
 
+from src.sentiment.sentiment_log import SentimentLog
+
 class ClaudeSentimentAnalyzer:
     """
     Claude Code感情分析システム
@@ -19,8 +21,14 @@ class ClaudeSentimentAnalyzer:
     
     def __init__(self, sentiment_cache_path: str = "sentiment_cache.json"):
         self.sentiment_cache_path = sentiment_cache_path
+        
+        # スナップショット（sentiment_cache.json）＋追記ログ（sentiment_cache.jsonl）
+        self._store = SentimentLog(sentiment_cache_path)
         self.sentiment_cache = self._load_sentiment_cache()
         
+        # 時刻順の索引（時刻・スコア・信頼度・ニュース件数の並列配列）
+        self._build_time_index()
+        
         # 感情分析スコアの範囲
         self.score_range = (-1.0, 1.0)
         
@@ -34,23 +42,102 @@ class ClaudeSentimentAnalyzer:
         }
     
     def _load_sentiment_cache(self) -> Dict:
-        """感情分析キャッシュの読み込み"""
-        if os.path.exists(self.sentiment_cache_path):
-            try:
-                with open(self.sentiment_cache_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"キャッシュ読み込みエラー: {e}")
-        return {}
+        """感情分析キャッシュの読み込み（スナップショットの後に追記ログを再生）"""
+        return self._store.load()
     
     def _save_sentiment_cache(self):
-        """感情分析キャッシュの保存"""
+        """感情分析キャッシュの保存（キャッシュ全体をスナップショットに書き出す）"""
         try:
-            with open(self.sentiment_cache_path, 'w', encoding='utf-8') as f:
-                json.dump(self.sentiment_cache, f, ensure_ascii=False, indent=2)
+            self._store.compact(self.sentiment_cache)
         except Exception as e:
             print(f"キャッシュ保存エラー: {e}")
     
+    def compact_sentiment_cache(self):
+        """
+        追記ログをスナップショットに統合する
+        
+        sentiment_cache.jsonを直接読む処理（MT5への転送・エクスポートなど）の前に呼ぶ。
+        """
+        if self._store.log_records > 0:
+            self._save_sentiment_cache()
+    
+    @staticmethod
+    def _resolve_timestamp(key: str, sentiment_data: Dict) -> Optional[pd.Timestamp]:
+        """
+        キャッシュエントリの時刻を求める
+        
+        数値キー（ニュースのハッシュ）の場合はデータ内のtimestamp（なければadded_timestamp）、
+        それ以外はキー自体を時刻として解釈する。
+        """
+        if key.lstrip('-').isdigit():
+            timestamp_source = sentiment_data.get('timestamp') or sentiment_data.get('added_timestamp')
+            if not timestamp_source:
+                return None
+        else:
+            timestamp_source = key
+        
+        timestamp = pd.Timestamp(timestamp_source)
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.tz_convert(None)
+        return timestamp
+    
+    def _build_time_index(self):
+        """
+        感情分析キャッシュの時刻索引を作成する
+        
+        時刻はint64（ナノ秒）で昇順に並べ、同時刻のエントリはキャッシュへの追加順を保つ。
+        """
+        keys, times, scores, confidences, news_counts = [], [], [], [], []
+        
+        for key, sentiment_data in self.sentiment_cache.items():
+            try:
+                timestamp = self._resolve_timestamp(key, sentiment_data)
+            except (ValueError, TypeError):
+                continue
+            if timestamp is None:
+                continue
+            
+            keys.append(key)
+            times.append(timestamp.value)
+            scores.append(sentiment_data.get('sentiment_score', sentiment_data.get('score', 0.0)))
+            confidences.append(sentiment_data.get('confidence', 0.0))
+            news_counts.append(sentiment_data.get('news_count', 1))
+        
+        order = np.argsort(np.array(times, dtype=np.int64), kind='stable')
+        self._index_keys = [keys[i] for i in order]
+        self._index_times = np.array(times, dtype=np.int64)[order]
+        self._index_scores = np.array(scores, dtype=np.float64)[order]
+        self._index_confidences = np.array(confidences, dtype=np.float64)[order]
+        self._index_news_counts = np.array(news_counts, dtype=np.int64)[order]
+        self._indexed_entries = len(self.sentiment_cache)
+    
+    def _insert_into_time_index(self, key: str, sentiment_data: Dict):
+        """追加されたエントリを時刻索引の該当位置に挿入する"""
+        try:
+            timestamp = self._resolve_timestamp(key, sentiment_data)
+        except (ValueError, TypeError):
+            timestamp = None
+        
+        if timestamp is not None:
+            position = int(np.searchsorted(self._index_times, timestamp.value, side='right'))
+            self._index_keys.insert(position, key)
+            self._index_times = np.insert(self._index_times, position, timestamp.value)
+            self._index_scores = np.insert(
+                self._index_scores, position,
+                sentiment_data.get('sentiment_score', sentiment_data.get('score', 0.0))
+            )
+            self._index_confidences = np.insert(self._index_confidences, position,
+                                                sentiment_data.get('confidence', 0.0))
+            self._index_news_counts = np.insert(self._index_news_counts, position,
+                                                sentiment_data.get('news_count', 1))
+        
+        self._indexed_entries = len(self.sentiment_cache)
+    
+    def _ensure_time_index(self):
+        """sentiment_cacheが直接変更されていた場合は索引を作り直す"""
+        if self._indexed_entries != len(self.sentiment_cache):
+            self._build_time_index()
+    
     def analyze_news_importance(self, news_text: str) -> float:
         """
         ニュースの重要度を自動判定
@@ -166,8 +253,15 @@ FXトレーダーの視点で、実際の取引判断に使える分析をお願
             analysis_result['news_text'] = news_text[:200]  # 最初の200文字のみ保存
             analysis_result['added_timestamp'] = datetime.now().isoformat()
             
+            replaced = news_hash in self.sentiment_cache
             self.sentiment_cache[news_hash] = analysis_result
-            self._save_sentiment_cache()
+            if replaced:
+                self._build_time_index()
+            else:
+                self._insert_into_time_index(news_hash, analysis_result)
+            
+            # 追記ログに1件だけ書き込む（ログが大きくなったらスナップショットに統合）
+            self._store.append(news_hash, analysis_result, self.sentiment_cache)
             
             print(f"感情分析結果を保存: {analysis_result['sentiment_score']:.2f}")
             return True
@@ -302,6 +396,8 @@ FXトレーダーの視点で、実際の取引判断に使える分析をお願
         """
         指定時刻より前の感情分析データのみを取得（時系列整合性確保）
         
+        時刻索引を二分探索するため、キャッシュ全体は走査しない。
+        
         Args:
             target_timestamp: 基準時刻（この時刻より前のデータのみ使用）
             hours_back: 何時間前までのデータを取得するか
@@ -309,61 +405,79 @@ FXトレーダーの視点で、実際の取引判断に使える分析をお願
         Returns:
             時系列的に整合性のある感情分析データのリスト
         """
-        relevant_sentiments = []
+        self._ensure_time_index()
         
         # 基準時刻より前のデータのみを対象とする
-        cutoff_time = target_timestamp - timedelta(hours=hours_back)
-        
-        for timestamp_str, sentiment_data in self.sentiment_cache.items():
-            try:
-                # 実際のタイムスタンプキーを使用（数値キーの場合は追加タイムスタンプを使用）
-                if timestamp_str.lstrip('-').isdigit():
-                    # 数値キーの場合は、データ内のタイムスタンプを使用
-                    timestamp_source = sentiment_data.get('timestamp') or sentiment_data.get('added_timestamp')
-                    if timestamp_source:
-                        sentiment_timestamp = pd.to_datetime(timestamp_source)
-                    else:
-                        continue  # タイムスタンプが見つからない場合はスキップ
-                else:
-                    # 通常のタイムスタンプキー
-                    sentiment_timestamp = pd.to_datetime(timestamp_str)
-                
-                # 時系列整合性チェック
-                if cutoff_time <= sentiment_timestamp < target_timestamp:
-                    relevant_sentiments.append({
-                        'timestamp': sentiment_timestamp,
-                        'score': sentiment_data.get('sentiment_score', sentiment_data.get('score', 0.0)),
-                        'confidence': sentiment_data.get('confidence', 0.0),
-                        'news_count': sentiment_data.get('news_count', 1)
-                    })
-                    
-            except Exception as e:
-                # エラーが発生した場合はスキップして継続
-                continue
-        
-        # 時刻順でソート（古い順）
-        relevant_sentiments.sort(key=lambda x: x['timestamp'])
-        
-        return relevant_sentiments
+        target = pd.Timestamp(target_timestamp).value
+        cutoff = (pd.Timestamp(target_timestamp) - timedelta(hours=hours_back)).value
+        
+        start = int(np.searchsorted(self._index_times, cutoff, side='left'))
+        end = int(np.searchsorted(self._index_times, target, side='left'))
+        
+        # 時刻順（古い順）
+        return [
+            {
+                'timestamp': pd.Timestamp(self._index_times[i]),
+                'score': self._index_scores[i],
+                'confidence': self._index_confidences[i],
+                'news_count': self._index_news_counts[i]
+            }
+            for i in range(start, end)
+        ]
     
-    def get_sentiment_at_time(self, target_timestamp: pd.Timestamp) -> float:
+    def get_sentiment_at_time(self, target_timestamp: pd.Timestamp, hours_back: int = 24) -> float:
         """
         指定時刻での感情分析スコアを取得（時系列整合性確保）
         
         Args:
             target_timestamp: 取得したい時刻
+            hours_back: 何時間前までのデータを使うか
             
         Returns:
             感情分析スコア (-1.0 ~ 1.0)
         """
-        # バックテスト中は未来のデータを使用しない
-        recent_sentiments = self.get_recent_sentiments(target_timestamp, hours_back=24)
+        self._ensure_time_index()
         
-        if not recent_sentiments:
+        # バックテスト中は未来のデータを使用しない（target_timestamp未満の最新エントリ）
+        target = pd.Timestamp(target_timestamp)
+        latest = int(np.searchsorted(self._index_times, target.value, side='left')) - 1
+        
+        if latest < 0 or self._index_times[latest] < (target - timedelta(hours=hours_back)).value:
             return 0.0  # 中立
         
-        # 最新の感情分析スコアを使用
-        return recent_sentiments[-1]['score']
+        return float(self._index_scores[latest])
+    
+    def get_sentiment_series(self, index: pd.DatetimeIndex, hours_back: int = 24) -> pd.Series:
+        """
+        バックテストの時刻インデックス全体に対する感情分析スコアを一括で取得
+        
+        各時刻についてget_sentiment_at_timeと同じ値（その時刻より前・hours_back時間以内の
+        最新スコア、なければ0.0）を返す。
+        
+        Args:
+            index: 価格データの時刻インデックス
+            hours_back: 何時間前までのデータを使うか
+            
+        Returns:
+            indexと同じインデックスの感情分析スコア
+        """
+        self._ensure_time_index()
+        
+        index = pd.DatetimeIndex(index)
+        # エントリーの時刻（Timestamp.value）と同じナノ秒にそろえる
+        targets = (index.tz_convert(None) if index.tz is not None else index).as_unit('ns').asi8
+        
+        latest = np.searchsorted(self._index_times, targets, side='left') - 1
+        has_entry = latest >= 0
+        latest = np.maximum(latest, 0)
+        
+        scores = np.zeros(len(targets))
+        if len(self._index_times) > 0:
+            window = pd.Timedelta(hours=hours_back).value
+            valid = has_entry & (self._index_times[latest] >= targets - window)
+            scores[valid] = self._index_scores[latest[valid]]
+        
+        return pd.Series(scores, index=index, name='sentiment_score')
     
     def is_valid_for_backtest(self, backtest_start: pd.Timestamp, backtest_end: pd.Timestamp) -> bool:
         """
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+感情分析キャッシュの追記型ストア
+
+感情分析結果を1件ごとにJSON Lines形式のログ（sentiment_cache.jsonl）へ追記し、
+ログがスナップショット（sentiment_cache.json）と同程度の大きさになった時点で
+スナップショットへ統合（コンパクション）する。1件追加するたびにキャッシュ全体を
+書き直す方式と違い、n件の追加にかかる書き込み量はO(n)に抑えられる。
+
+    sentiment_cache.json    スナップショット（従来と同じ {キー: 分析結果} のJSON）
+    sentiment_cache.jsonl   スナップショット以降の追加分（1行1件 {"key": ..., "value": ...}）
+
+読み込み時はスナップショットを読んだ後にログを1行ずつ再生する（同じキーは後の行が優先）。
+スナップショットは一時ファイルに書いてから置き換えるため、書き込み中に異常終了しても
+壊れない。ログの末尾に書きかけの行が残っていた場合は読み込み時に切り捨てる。
+"""
+
+import json
+import os
+from typing import Dict, Optional
+
+
+class SentimentLog:
+    """
+    スナップショット＋追記ログによる感情分析キャッシュの永続化
+    """
+
+    def __init__(self, snapshot_path: str,
+                 log_path: Optional[str] = None,
+                 compaction_ratio: float = 1.0,
+                 min_compaction_records: int = 100,
+                 fsync: bool = True):
+        """
+        初期化
+
+        Parameters
+        ----------
+        snapshot_path : str
+            スナップショット（JSON）のパス
+        log_path : str, optional
+            追記ログ（JSON Lines）のパス（省略時はスナップショットの拡張子を.jsonlにしたもの）
+        compaction_ratio : float
+            ログの件数がスナップショットの件数のこの倍数を超えたらコンパクションする
+        min_compaction_records : int
+            コンパクションするログの最小件数
+        fsync : bool
+            追記ごとにディスクへ同期するか
+        """
+        self.snapshot_path = snapshot_path
+        self.log_path = log_path or os.path.splitext(snapshot_path)[0] + '.jsonl'
+        self.compaction_ratio = compaction_ratio
+        self.min_compaction_records = min_compaction_records
+        self.fsync = fsync
+
+        self.snapshot_records = 0
+        self.log_records = 0
+        self._log_file = None
+
+    # ------------------------------------------------------------------
+    # 読み込み
+    # ------------------------------------------------------------------
+
+    def load(self) -> Dict:
+        """
+        スナップショットとログからキャッシュを復元する
+
+        Returns
+        -------
+        Dict
+            キー -> 感情分析結果
+        """
+        self.close()
+        cache = {}
+
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                    cache = json.load(f)
+            except Exception as e:
+                print(f"キャッシュ読み込みエラー: {e}")
+        self.snapshot_records = len(cache)
+
+        self.log_records = 0
+        if not os.path.exists(self.log_path):
+            return cache
+
+        # ログは1行ずつ読み、正常に読めた最後の行の終端までを有効とする
+        valid_bytes = 0
+        with open(self.log_path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                    cache[record['key']] = record['value']
+                except (ValueError, KeyError, TypeError):
+                    break
+                valid_bytes += len(line)
+                self.log_records += 1
+
+        # 書きかけの行（異常終了時）を切り捨て、次の追記が正しい行から始まるようにする
+        if valid_bytes < os.path.getsize(self.log_path):
+            print(f"感情分析ログの末尾を破棄: {os.path.getsize(self.log_path) - valid_bytes}バイト")
+            with open(self.log_path, 'r+b') as f:
+                f.truncate(valid_bytes)
+
+        return cache
+
+    # ------------------------------------------------------------------
+    # 書き込み
+    # ------------------------------------------------------------------
+
+    def append(self, key: str, value: Dict, cache: Optional[Dict] = None) -> bool:
+        """
+        1件をログへ追記する
+
+        Parameters
+        ----------
+        key : str
+            キャッシュのキー
+        value : Dict
+            感情分析結果
+        cache : Dict, optional
+            追記後のキャッシュ全体（渡した場合、ログが大きくなっていればコンパクションする）
+
+        Returns
+        -------
+        bool
+            コンパクションしたか
+        """
+        if self._log_file is None:
+            self._log_file = open(self.log_path, 'a', encoding='utf-8')
+
+        self._log_file.write(json.dumps({'key': key, 'value': value}, ensure_ascii=False) + '\n')
+        self._log_file.flush()
+        if self.fsync:
+            os.fsync(self._log_file.fileno())
+        self.log_records += 1
+
+        if cache is not None and self.needs_compaction():
+            self.compact(cache)
+            return True
+        return False
+
+    def needs_compaction(self) -> bool:
+        """ログがスナップショットに対して大きくなったか"""
+        threshold = max(self.min_compaction_records, self.compaction_ratio * self.snapshot_records)
+        return self.log_records >= threshold
+
+    def compact(self, cache: Dict):
+        """
+        キャッシュ全体をスナップショットに書き出し、ログを空にする
+
+        スナップショットは一時ファイルに書いてから置き換える。置き換え後・ログを空にする前に
+        異常終了した場合も、ログの再生は同じ値の上書きになるだけなので内容は変わらない。
+
+        Parameters
+        ----------
+        cache : Dict
+            キャッシュ全体
+        """
+        self.close()
+
+        directory = os.path.dirname(os.path.abspath(self.snapshot_path))
+        temp_path = self.snapshot_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        self._fsync_directory(directory)
+
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'w', encoding='utf-8') as f:
+                f.flush()
+                os.fsync(f.fileno())
+
+        self.snapshot_records = len(cache)
+        self.log_records = 0
+
+    def close(self):
+        """追記用のファイルを閉じる"""
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+
+    @staticmethod
+    def _fsync_directory(directory: str):
+        """ファイルの置き換えをディスクへ反映する（対応していないOSでは何もしない）"""
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
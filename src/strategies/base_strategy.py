@@ -62,7 +62,42 @@ class BaseStrategy:
         position_size = risk_amount / (self.sl_pips * pip_value)
         
         return position_size
-    
+
+    def calculate_position_sizes(self, signals: np.ndarray, equity: float) -> np.ndarray:
+        """
+        シグナル配列全体のポジションサイズを一括計算する
+
+        スカラー版calculate_position_sizeはシグナル値と戦略の状態のみに依存するため、
+        シグナル配列に含まれる非ゼロのユニーク値ごとに1回だけ呼び出し、
+        結果を配列全体へ展開する
+
+        Parameters
+        ----------
+        signals : np.ndarray
+            トレードシグナルの配列（1.0=買い、-1.0=売り、0.0=シグナルなし）
+        equity : float
+            口座残高
+
+        Returns
+        -------
+        np.ndarray
+            シグナルと同じ長さのポジションサイズ配列（ロット単位）
+        """
+        signals = np.asarray(signals, dtype=float)
+        sizes = np.zeros(len(signals), dtype=float)
+
+        if len(signals) == 0:
+            return sizes
+
+        unique_signals, inverse = np.unique(signals, return_inverse=True)
+        unique_sizes = np.array([
+            self.calculate_position_size(signal, equity) if signal != 0 else 0.0
+            for signal in unique_signals
+        ], dtype=float)
+
+        sizes[:] = unique_sizes[inverse]
+        return sizes
+
     def calculate_stop_loss(self, price: float, signal: float) -> float:
         """
         ストップロス価格を計算する
@@ -122,6 +122,16 @@ class EnhancedTrinityMLStage1:
             print(f"感情分析スコア取得エラー: {e}")
             return 0.0
     
+    def get_sentiment_scores(self, index: pd.DatetimeIndex) -> np.ndarray:
+        """
+        全時刻の感情分析スコアを一括取得（get_sentiment_scoreの一括版）
+        """
+        try:
+            return self.sentiment_analyzer.get_sentiment_series(index).to_numpy()
+        except Exception as e:
+            print(f"感情分析スコア取得エラー: {e}")
+            return np.zeros(len(index))
+    
     def calculate_dynamic_tp_sl(self, row: pd.Series, confidence: float, 
                                sentiment_score: float) -> Tuple[float, float]:
         """
@@ -180,6 +190,9 @@ class EnhancedTrinityMLStage1:
             print("感情分析データが利用不可能です。技術分析のみで実行します。")
             self.sentiment_weight = 0.0  # 感情分析の重みを0にする
         
+        # 全バーの感情分析スコアを一括取得（各時刻より前のデータのみ使用）
+        sentiment_scores = self.get_sentiment_scores(data.index)
+        
         signals = pd.DataFrame(index=data.index)
         signals['Signal'] = 0
         signals['Confidence'] = 0.0
@@ -225,7 +238,7 @@ class EnhancedTrinityMLStage1:
             
             if trinity_signal != 0:
                 # 感情分析スコア取得
-                sentiment_score = self.get_sentiment_score(data.index[current_idx])
+                sentiment_score = sentiment_scores[current_idx]
                 
                 # 統合信頼度計算（感情分析を含む）
                 integrated_confidence = (
@@ -0,0 +1,507 @@
+"""
+ML予測モデル用の特徴量パイプライン
+
+特徴量を宣言的に一度だけ定義し、事前確保したfloat32の2次元配列に一括で書き込む。
+リターン・移動窓・TA-Libの計算結果は特徴量間で共有し、同じ計算を繰り返さない。
+計算結果は（データのフィンガープリント, 特徴量セットのバージョン）をキーとする
+LRUキャッシュに読み取り専用の配列として保持し、呼び出し側には配列を共有する
+新しいDataFrame（列の追加・置き換えはキャッシュに影響しない）を返す。
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Tuple
+
+import numpy as np
+import pandas as pd
+import talib
+
+from src.data.dataset_cache import freeze_frame
+
+
+def data_fingerprint(data: pd.DataFrame) -> str:
+    """
+    価格データのフィンガープリント
+
+    インデックスと全カラムの値から計算するため、末尾の時刻と長さが同じでも
+    内容が異なるデータは区別される。
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        価格データ
+
+    Returns
+    -------
+    str
+        16進数のハッシュ値
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(data.shape).encode())
+    digest.update(str(data.index.dtype).encode())  # 時刻の単位が異なるインデックスを区別する
+    digest.update(np.ascontiguousarray(data.index.asi8 if isinstance(data.index, pd.DatetimeIndex)
+                                       else pd.util.hash_pandas_object(data.index).values).tobytes())
+    for column in data.columns:
+        digest.update(str(column).encode())
+        values = data[column].to_numpy()
+        if values.dtype == object:
+            values = pd.util.hash_pandas_object(data[column], index=False).values
+        digest.update(np.ascontiguousarray(values).tobytes())
+    return digest.hexdigest()
+
+
+class FeatureContext:
+    """
+    特徴量計算の作業領域
+
+    価格系列と中間結果を保持し、同じ引数の計算は一度だけ実行する。
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        self.index = data.index
+        self.close = self._column(data, 'Close')
+        self.high = self._column(data, 'High')
+        self.low = self._column(data, 'Low')
+        self.open = self._column(data, 'Open')
+        if 'Volume' in data.columns or 'volume' in data.columns:
+            self.volume = self._column(data, 'Volume')
+        else:
+            self.volume = pd.Series(1.0, index=data.index)
+        self._memo: Dict[Hashable, object] = {}
+
+    @staticmethod
+    def _column(data: pd.DataFrame, name: str) -> pd.Series:
+        column = data[name] if name in data.columns else data[name.lower()]
+        return column.astype(np.float64)
+
+    def cached(self, key: Hashable, func: Callable[[], object]):
+        """keyの計算結果がなければfuncで計算して保持する"""
+        if key not in self._memo:
+            self._memo[key] = func()
+        return self._memo[key]
+
+    def returns(self, period: int) -> pd.Series:
+        """period本前からの変化率"""
+        return self.cached(('returns', period), lambda: self.close.pct_change(period))
+
+    def rolling(self, series: str, window: int, stat: str) -> pd.Series:
+        """
+        価格系列・リターンの移動統計
+
+        Parameters
+        ----------
+        series : str
+            'close', 'high', 'low' または 'returns_{period}'
+        window : int
+            窓の長さ
+        stat : str
+            'mean', 'std', 'max', 'min'
+        """
+        def compute():
+            if series.startswith('returns_'):
+                source = self.returns(int(series.split('_')[1]))
+            else:
+                source = getattr(self, series)
+            return getattr(source.rolling(window), stat)()
+
+        return self.cached(('rolling', series, window, stat), compute)
+
+    def talib(self, name: str, *inputs: str, **params):
+        """
+        TA-Lib関数の呼び出し（同じ引数の呼び出しは共有）
+
+        Parameters
+        ----------
+        name : str
+            TA-Lib関数名（例: 'RSI'）
+        *inputs : str
+            入力系列名（'close', 'high', 'low', 'open', 'volume'）
+        **params
+            TA-Lib関数のパラメータ
+        """
+        key = ('talib', name, inputs, tuple(sorted(params.items())))
+
+        def compute():
+            arrays = [getattr(self, source).to_numpy() for source in inputs]
+            return getattr(talib, name)(*arrays, **params)
+
+        return self.cached(key, compute)
+
+    def shift(self, series: str, periods: int) -> pd.Series:
+        """価格系列をperiods本ずらす"""
+        return self.cached(('shift', series, periods), lambda: getattr(self, series).shift(periods))
+
+
+class FeaturePipeline:
+    """
+    特徴量パイプライン
+
+    (特徴量名, 計算関数)のリストで特徴量セットを宣言する。計算関数はFeatureContextを受け取り、
+    データと同じ長さの配列（またはSeries）を返す。
+    """
+
+    def __init__(self,
+                 name: str,
+                 features: List[Tuple[str, Callable[[FeatureContext], object]]],
+                 version: int = 1,
+                 max_cache_entries: int = 16,
+                 dtype=np.float32):
+        """
+        初期化
+
+        Parameters
+        ----------
+        name : str
+            特徴量セット名
+        features : List[Tuple[str, Callable]]
+            (特徴量名, 計算関数)のリスト。この順に列が並ぶ
+        version : int
+            特徴量セットのバージョン（定義を変えたら上げる。キャッシュキーに含まれる）
+        max_cache_entries : int
+            LRUキャッシュに保持する結果の最大数
+        dtype : np.dtype
+            出力配列の型
+        """
+        self.name = name
+        self.features = features
+        self.version = version
+        self.max_cache_entries = max_cache_entries
+        self.dtype = dtype
+        self._cache: "OrderedDict[Tuple[str, str, int], pd.DataFrame]" = OrderedDict()
+
+    @property
+    def feature_names(self) -> List[str]:
+        return [name for name, _ in self.features]
+
+    def transform(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        特徴量を計算する（キャッシュがあればそれを返す）
+
+        欠損値は前方補完し、残りは0で埋める。
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            価格データ
+
+        Returns
+        -------
+        pd.DataFrame
+            特徴量（キャッシュの読み取り専用の配列を共有する新しいDataFrame。
+            その場での値の書き換えはValueErrorになるため、必要ならcopy()する）
+        """
+        key = (data_fingerprint(data), self.name, self.version)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key].copy(deep=False)
+
+        features = freeze_frame(self.compute(data))
+
+        self._cache[key] = features
+        if len(self._cache) > self.max_cache_entries:
+            self._cache.popitem(last=False)
+
+        return features.copy(deep=False)
+
+    def compute(self, data: pd.DataFrame) -> pd.DataFrame:
+        """キャッシュを使わずに特徴量を計算する"""
+        ctx = FeatureContext(data)
+
+        # 列優先で確保し、各特徴量を連続領域に書き込む（DataFrameもコピーなしで参照できる）
+        values = np.empty((len(data), len(self.features)), dtype=self.dtype, order='F')
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for column, (_, func) in enumerate(self.features):
+                values[:, column] = np.asarray(func(ctx), dtype=np.float64)
+                _ffill_fillna_zero(values[:, column])
+
+        return pd.DataFrame(values, index=data.index, columns=self.feature_names, copy=False)
+
+    def clear_cache(self):
+        """キャッシュを破棄する"""
+        self._cache.clear()
+
+
+def _ffill_fillna_zero(column: np.ndarray):
+    """1列をその場で前方補完し、残った欠損値（先頭のウォームアップ期間）を0にする"""
+    missing = np.isnan(column)
+    if not missing.any():
+        return
+
+    first_valid = int(missing.argmin()) if not missing.all() else len(column)
+    if missing[first_valid:].any():
+        rows = np.where(missing, 0, np.arange(len(column)))
+        np.maximum.accumulate(rows, out=rows)
+        column[:] = column[rows]
+        missing = np.isnan(column)
+
+    column[missing] = 0
+
+
+def _price_position(ctx: FeatureContext, period: int):
+    highest = ctx.rolling('high', period, 'max')
+    lowest = ctx.rolling('low', period, 'min')
+    return (ctx.close - lowest) / (highest - lowest + 1e-8)
+
+
+def _sma_distance(ctx: FeatureContext, period: int):
+    sma = ctx.talib('SMA', 'close', timeperiod=period)
+    return (ctx.close.to_numpy() - sma) / sma
+
+
+def _candle(ctx: FeatureContext) -> Dict[str, pd.Series]:
+    """ローソク足の実体・ヒゲ（価格パターン特徴量で共有）"""
+    def compute():
+        close, open_price, high, low = ctx.close, ctx.open, ctx.high, ctx.low
+        return {
+            'body': abs(close - open_price),
+            'upper': high - np.maximum(close, open_price),
+            'lower': np.minimum(close, open_price) - low,
+            'range': high - low + 1e-8,
+        }
+    return ctx.cached('candle', compute)
+
+
+def build_extended_feature_pipeline(max_cache_entries: int = 16) -> FeaturePipeline:
+    """
+    拡張特徴量セット（54個）のパイプライン
+
+    OptimizedMLPredictor.create_features_extendedと同じ特徴量を同じ列順で計算する。
+    """
+    close = lambda ctx: ctx.close.to_numpy()
+    features = []
+
+    # === 1. 多期間リターン系特徴量 (8個) ===
+    for period in [3, 5, 8, 10, 15, 20, 30, 45]:
+        features.append((f'returns_{period}', lambda ctx, p=period: ctx.returns(p)))
+
+    # === 2. ボラティリティ系特徴量 (6個) ===
+    for period in [5, 10, 15, 20, 30, 45]:
+        features.append((f'volatility_{period}',
+                         lambda ctx, p=period: ctx.rolling('returns_1', p, 'std')))
+
+    # === 3. 価格位置・レンジ系特徴量 (4個) ===
+    for period in [10, 20, 30, 50]:
+        features.append((f'price_position_{period}', lambda ctx, p=period: _price_position(ctx, p)))
+
+    # === 4. テクニカル指標群 (11個) ===
+    rsi_14 = lambda ctx: ctx.talib('RSI', 'close', timeperiod=14) / 100
+    features += [
+        ('rsi_14', rsi_14),
+        ('rsi_21', lambda ctx: ctx.talib('RSI', 'close', timeperiod=21) / 100),
+        ('rsi_momentum', lambda ctx: pd.Series(rsi_14(ctx)).diff(5).to_numpy()),
+        ('macd_signal_12_26', lambda ctx: (ctx.talib('MACD', 'close')[0] -
+                                           ctx.talib('MACD', 'close')[1]) / close(ctx)),
+        ('macd_signal_8_21', lambda ctx: (ctx.talib('MACD', 'close', fastperiod=8, slowperiod=21)[0] -
+                                          ctx.talib('MACD', 'close', fastperiod=8, slowperiod=21)[1]) / close(ctx)),
+        ('macd_histogram', lambda ctx: ctx.talib('MACD', 'close')[2] / close(ctx)),
+        ('bb_position', lambda ctx: (close(ctx) - ctx.talib('BBANDS', 'close', timeperiod=20)[2]) /
+                                    (ctx.talib('BBANDS', 'close', timeperiod=20)[0] -
+                                     ctx.talib('BBANDS', 'close', timeperiod=20)[2] + 1e-8)),
+        ('bb_width', lambda ctx: (ctx.talib('BBANDS', 'close', timeperiod=20)[0] -
+                                  ctx.talib('BBANDS', 'close', timeperiod=20)[2]) /
+                                 ctx.talib('BBANDS', 'close', timeperiod=20)[1]),
+        ('stoch_k', lambda ctx: ctx.talib('STOCH', 'high', 'low', 'close', fastk_period=14)[0] / 100),
+        ('stoch_d', lambda ctx: ctx.talib('STOCH', 'high', 'low', 'close', fastk_period=14)[1] / 100),
+        ('stoch_momentum', lambda ctx: (ctx.talib('STOCH', 'high', 'low', 'close', fastk_period=14)[0] -
+                                        ctx.talib('STOCH', 'high', 'low', 'close', fastk_period=14)[1]) / 100),
+    ]
+
+    # === 5. 移動平均系特徴量 (8個) ===
+    for period in [5, 10, 15, 20, 30, 45, 60, 90]:
+        features.append((f'sma_distance_{period}', lambda ctx, p=period: _sma_distance(ctx, p)))
+
+    # === 6. 高度なテクニカル指標 (6個) ===
+    features += [
+        ('atr_14', lambda ctx: ctx.talib('ATR', 'high', 'low', 'close', timeperiod=14) / close(ctx)),
+        ('atr_21', lambda ctx: ctx.talib('ATR', 'high', 'low', 'close', timeperiod=21) / close(ctx)),
+        ('cci', lambda ctx: ctx.talib('CCI', 'high', 'low', 'close', timeperiod=14) / 100),
+        ('williams_r', lambda ctx: ctx.talib('WILLR', 'high', 'low', 'close', timeperiod=14) / -100),
+        ('mfi', lambda ctx: ctx.talib('MFI', 'high', 'low', 'close', 'volume', timeperiod=14) / 100),
+        ('adx', lambda ctx: ctx.talib('ADX', 'high', 'low', 'close', timeperiod=14) / 100),
+    ]
+
+    # === 7. 価格パターン特徴量 (5個) ===
+    features += [
+        ('body_ratio', lambda ctx: _candle(ctx)['body'] / _candle(ctx)['range']),
+        ('upper_shadow_ratio', lambda ctx: _candle(ctx)['upper'] / _candle(ctx)['range']),
+        ('lower_shadow_ratio', lambda ctx: _candle(ctx)['lower'] / _candle(ctx)['range']),
+        ('doji_score', lambda ctx: 1 - (_candle(ctx)['body'] / _candle(ctx)['range'])),
+        ('gap', lambda ctx: (ctx.open - ctx.shift('close', 1)) / ctx.shift('close', 1)),
+    ]
+
+    # === 8. モメンタム・オシレーター系 (4個) ===
+    features += [
+        ('momentum_10', lambda ctx: ctx.close / ctx.shift('close', 10) - 1),
+        ('momentum_20', lambda ctx: ctx.close / ctx.shift('close', 20) - 1),
+        ('roc_14', lambda ctx: ctx.talib('ROC', 'close', timeperiod=14) / 100),
+        ('trix', lambda ctx: ctx.talib('TRIX', 'close', timeperiod=14) / 100),
+    ]
+
+    # === 9. 相関・統計特徴量 (2個) ===
+    features += [
+        ('trend_strength', lambda ctx: ctx.talib('LINEARREG_SLOPE', 'close', timeperiod=14) / close(ctx)),
+        ('price_dispersion', lambda ctx: ctx.rolling('close', 20, 'std') / ctx.rolling('close', 20, 'mean')),
+    ]
+
+    return FeaturePipeline('extended', features, version=1, max_cache_entries=max_cache_entries)
+
+
+def build_optimized_feature_pipeline(max_cache_entries: int = 16) -> FeaturePipeline:
+    """
+    高速版特徴量セット（10個）のパイプライン
+
+    OptimizedMLPredictor.create_features_optimizedと同じ特徴量を同じ列順で計算する。
+    """
+    close = lambda ctx: ctx.close.to_numpy()
+    features = [
+        # 1. 価格リターン
+        ('returns_5', lambda ctx: ctx.returns(5)),
+        ('returns_10', lambda ctx: ctx.returns(10)),
+        ('returns_20', lambda ctx: ctx.returns(20)),
+        # 2. ボラティリティ
+        ('volatility_10', lambda ctx: ctx.rolling('returns_5', 10, 'std')),
+        ('volatility_20', lambda ctx: ctx.rolling('returns_5', 20, 'std')),
+        # 3. 価格位置
+        ('price_position', lambda ctx: (ctx.close - ctx.rolling('low', 20, 'min')) /
+                                       (ctx.rolling('high', 20, 'max') -
+                                        ctx.rolling('low', 20, 'min') + 0.0001)),
+        # 4. テクニカル指標
+        ('rsi', lambda ctx: ctx.talib('RSI', 'close', timeperiod=14) / 100),
+        ('macd_signal', lambda ctx: (ctx.talib('MACD', 'close')[0] -
+                                     ctx.talib('MACD', 'close')[1]) / close(ctx)),
+        ('atr', lambda ctx: ctx.talib('ATR', 'high', 'low', 'close', timeperiod=14) / close(ctx)),
+        # 5. 移動平均
+        ('sma_distance', lambda ctx: _sma_distance(ctx, 20)),
+    ]
+
+    return FeaturePipeline('optimized', features, version=1, max_cache_entries=max_cache_entries)
+
+
+def build_lightweight_feature_pipeline(max_cache_entries: int = 16) -> FeaturePipeline:
+    """
+    軽量特徴量セット（36個）のパイプライン
+
+    LightweightMLPredictor.create_featuresと同じ特徴量を同じ列順で計算する。
+    学習済みモデルとの互換性のためfloat64で出力する。
+    """
+    close = lambda ctx: ctx.close.to_numpy()
+    shadow_range = lambda ctx: ctx.high - ctx.low + 0.0001
+    features = []
+
+    # 基本的な価格特徴
+    for period in [1, 3, 5, 10]:
+        features.append((f'returns_{period}', lambda ctx, p=period: ctx.returns(p)))
+
+    # ボラティリティ
+    for period in [5, 10, 20]:
+        features.append((f'volatility_{period}',
+                         lambda ctx, p=period: ctx.rolling('returns_1', p, 'std')))
+
+    # 価格位置（高値安値に対する現在価格の位置）
+    for period in [5, 10, 20]:
+        features.append((f'price_position_{period}',
+                         lambda ctx, p=period: (ctx.close - ctx.rolling('low', p, 'min')) /
+                                               (ctx.rolling('high', p, 'max') - ctx.rolling('low', p, 'min'))))
+
+    # テクニカル指標
+    for period in [7, 14, 21]:
+        features.append((f'rsi_{period}', lambda ctx, p=period: ctx.talib('RSI', 'close', timeperiod=p) / 100))
+
+    bb_upper = lambda ctx: ctx.talib('BBANDS', 'close', timeperiod=20)[0]
+    bb_middle = lambda ctx: ctx.talib('BBANDS', 'close', timeperiod=20)[1]
+    bb_lower = lambda ctx: ctx.talib('BBANDS', 'close', timeperiod=20)[2]
+    features += [
+        ('macd', lambda ctx: ctx.talib('MACD', 'close')[0] / close(ctx)),
+        ('macd_signal', lambda ctx: ctx.talib('MACD', 'close')[1] / close(ctx)),
+        ('macd_hist', lambda ctx: ctx.talib('MACD', 'close')[2] / close(ctx)),
+        ('bb_width', lambda ctx: (bb_upper(ctx) - bb_lower(ctx)) / bb_middle(ctx)),
+        ('bb_position', lambda ctx: (close(ctx) - bb_lower(ctx)) / (bb_upper(ctx) - bb_lower(ctx))),
+        ('atr_14', lambda ctx: ctx.talib('ATR', 'high', 'low', 'close', timeperiod=14) / close(ctx)),
+    ]
+
+    # 移動平均の傾き・乖離
+    sma = lambda ctx, p: pd.Series(ctx.talib('SMA', 'close', timeperiod=p))
+    for period, lag in [(5, 3), (10, 5), (20, 10)]:
+        features.append((f'sma_{period}_slope',
+                         lambda ctx, p=period, k=lag: ((sma(ctx, p) - sma(ctx, p).shift(k)) /
+                                                       sma(ctx, p).shift(k)).to_numpy()))
+    for period in [5, 10, 20]:
+        features.append((f'sma_{period}_distance', lambda ctx, p=period: _sma_distance(ctx, p)))
+
+    # モメンタム・出来高
+    features += [
+        ('momentum_5', lambda ctx: ctx.talib('MOM', 'close', timeperiod=5) / close(ctx)),
+        ('momentum_10', lambda ctx: ctx.talib('MOM', 'close', timeperiod=10) / close(ctx)),
+        ('volume_ratio', lambda ctx: ctx.volume / ctx.rolling('volume', 20, 'mean')),
+        ('volume_momentum', lambda ctx: ctx.volume.pct_change(5)),
+    ]
+
+    # 時間特徴（市場セッション）
+    features += [
+        ('hour', lambda ctx: ctx.index.hour / 24),
+        ('is_tokyo', lambda ctx: (ctx.index.hour >= 9) & (ctx.index.hour < 15)),
+        ('is_london', lambda ctx: (ctx.index.hour >= 16) & (ctx.index.hour < 24)),
+        ('is_ny', lambda ctx: (ctx.index.hour >= 21) | (ctx.index.hour < 2)),
+    ]
+
+    # ローソク足パターン
+    features += [
+        ('body_ratio', lambda ctx: (ctx.close - ctx.open) / shadow_range(ctx)),
+        ('upper_shadow', lambda ctx: _candle(ctx)['upper'] / shadow_range(ctx)),
+        ('lower_shadow', lambda ctx: _candle(ctx)['lower'] / shadow_range(ctx)),
+    ]
+
+    return FeaturePipeline('lightweight', features, version=1,
+                           max_cache_entries=max_cache_entries, dtype=np.float64)
+
+
+def build_mt5_lightweight_feature_pipeline(max_cache_entries: int = 16) -> FeaturePipeline:
+    """
+    MT5対応軽量特徴量セット（6個）のパイプライン
+
+    MT5CompatibleTrinityStrategy.create_lightweight_features（TA-Lib使用時）と
+    同じ特徴量を同じ列順で計算する。
+    """
+    features = [
+        ('returns_1', lambda ctx: ctx.returns(1)),
+        ('returns_5', lambda ctx: ctx.returns(5)),
+        ('returns_15', lambda ctx: ctx.returns(15)),
+        ('rsi_14', lambda ctx: ctx.talib('RSI', 'close', timeperiod=14) / 100),
+        ('volatility_10', lambda ctx: ctx.rolling('returns_1', 10, 'std')),
+        ('sma_distance_20', lambda ctx: (ctx.close.to_numpy() - ctx.talib('SMA', 'close', timeperiod=20)) /
+                                        ctx.close.to_numpy()),
+    ]
+
+    return FeaturePipeline('mt5_lightweight', features, version=1,
+                           max_cache_entries=max_cache_entries, dtype=np.float64)
+
+
+# 特徴量セット名 -> パイプライン構築関数（特徴量ストアで実体化する対象）
+FEATURE_SETS: Dict[str, Callable[..., FeaturePipeline]] = {
+    'lightweight': build_lightweight_feature_pipeline,
+    'extended': build_extended_feature_pipeline,
+    'optimized': build_optimized_feature_pipeline,
+    'mt5_lightweight': build_mt5_lightweight_feature_pipeline,
+}
+
+
+def build_feature_pipeline(name: str, max_cache_entries: int = 16) -> FeaturePipeline:
+    """
+    特徴量セット名からパイプラインを構築する
+
+    Parameters
+    ----------
+    name : str
+        FEATURE_SETSに登録された特徴量セット名
+    max_cache_entries : int
+        LRUキャッシュに保持する結果の最大数
+
+    Returns
+    -------
+    FeaturePipeline
+        特徴量パイプライン
+    """
+    if name not in FEATURE_SETS:
+        raise ValueError(f"未登録の特徴量セットです: {name}")
+    return FEATURE_SETS[name](max_cache_entries)
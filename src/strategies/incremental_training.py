@@ -0,0 +1,105 @@
+"""
+ML予測モデルの差分学習（ウォームスタート）ユーティリティ
+
+再学習のたびに窓全体でモデルを作り直す代わりに、前回の学習以降に
+目的変数が確定した新しいデータだけで既存モデルを更新する。
+更新コストは窓の長さではなく新規データの量に比例する。
+
+- XGBoost / LightGBM: 既存のブースターから追加ラウンドを学習
+- GradientBoosting: warm_startで追加ステージを学習
+- RandomForest: warm_startで新しい木を追加し、古い木を捨てる
+"""
+
+from typing import Optional
+
+import numpy as np
+from sklearn.ensemble import (
+    RandomForestRegressor, ExtraTreesRegressor, GradientBoostingRegressor
+)
+
+# XGBoost / LightGBM（オプション）
+try:
+    from xgboost import XGBRegressor
+except ImportError:
+    XGBRegressor = None
+
+try:
+    from lightgbm import LGBMRegressor
+except ImportError:
+    LGBMRegressor = None
+
+
+def supports_incremental(model) -> bool:
+    """
+    差分学習に対応したモデルか判定する
+
+    Parameters
+    ----------
+    model : Any
+        学習済みモデル
+
+    Returns
+    -------
+    bool
+        grow_model()で更新できる場合True
+    """
+    if isinstance(model, (RandomForestRegressor, ExtraTreesRegressor, GradientBoostingRegressor)):
+        return True
+    if XGBRegressor is not None and isinstance(model, XGBRegressor):
+        return True
+    if LGBMRegressor is not None and isinstance(model, LGBMRegressor):
+        return True
+    return False
+
+
+def grow_model(model, X: np.ndarray, y: np.ndarray, n_new: int,
+               max_trees: Optional[int] = None):
+    """
+    学習済みモデルに新しいデータで木（ブースティングラウンド）を追加する
+
+    Parameters
+    ----------
+    model : Any
+        学習済みモデル（supports_incremental()がTrueのもの）
+    X : np.ndarray
+        新しいデータの特徴量（学習時と同じスケーリング）
+    y : np.ndarray
+        新しいデータの目的変数
+    n_new : int
+        追加する木（ラウンド）の数
+    max_trees : int, optional
+        RandomForestで保持する木の最大数。超えた分は古い木から捨てる
+
+    Returns
+    -------
+    Any
+        更新されたモデル（引数と同じオブジェクト）
+    """
+    if isinstance(model, (RandomForestRegressor, ExtraTreesRegressor)):
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_new)
+        model.fit(X, y)
+        if max_trees is not None and len(model.estimators_) > max_trees:
+            model.estimators_ = model.estimators_[-max_trees:]
+        model.set_params(warm_start=False, n_estimators=len(model.estimators_))
+
+    elif isinstance(model, GradientBoostingRegressor):
+        model.set_params(warm_start=True, n_estimators=model.n_estimators_ + n_new)
+        model.fit(X, y)
+        model.set_params(warm_start=False)
+
+    elif XGBRegressor is not None and isinstance(model, XGBRegressor):
+        n_estimators = model.get_params()['n_estimators']
+        model.set_params(n_estimators=n_new)
+        model.fit(X, y, xgb_model=model.get_booster())
+        model.set_params(n_estimators=n_estimators)
+
+    elif LGBMRegressor is not None and isinstance(model, LGBMRegressor):
+        n_estimators = model.get_params()['n_estimators']
+        model.set_params(n_estimators=n_new)
+        model.fit(X, y, init_model=model.booster_)
+        model.set_params(n_estimators=n_estimators)
+
+    else:
+        raise ValueError(f"差分学習に対応していないモデルです: {type(model).__name__}")
+
+    return model
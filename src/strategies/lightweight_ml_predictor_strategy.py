@@ -13,7 +13,7 @@ TensorFlow不要の軽量版短期売買戦略
 import pandas as pd
 import numpy as np
 import talib
-from typing import Tuple, Dict, Optional, List
+from typing import Tuple, Dict, Optional, List, Union, Sequence
 from datetime import datetime, timedelta
 import pickle
 import os
@@ -22,6 +22,11 @@ from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error, mean_absolute_error
 
+from src.strategies.incremental_training import grow_model, supports_incremental
+from src.strategies.feature_pipeline import build_lightweight_feature_pipeline
+from src.data.feature_store import FeatureStore, open_feature_store
+from src.utils.model_artifact import ModelArtifact, artifact_exists, save_model_artifact
+
 # XGBoost（オプション）
 try:
     import xgboost as xgb
@@ -43,7 +48,12 @@ class LightweightMLPredictor:
                  confidence_threshold: float = 0.6,
                  max_positions: int = 3,
                  risk_per_trade: float = 0.01,
-                 model_type: str = 'random_forest'):
+                 model_type: str = 'random_forest',
+                 retrain_mode: str = 'full',
+                 full_retrain_interval: int = 10,
+                 trees_per_update: int = 20,
+                 feature_store: Optional[FeatureStore] = None,
+                 model_dir: str = "models/lightweight_ml"):
         """
         初期化
         
@@ -51,6 +61,16 @@ class LightweightMLPredictor:
         ----------
         model_type : str
             'random_forest' or 'xgboost'
+        retrain_mode : str
+            'full'（毎回作り直し）or 'incremental'（新規データで差分学習）
+        full_retrain_interval : int
+            差分学習を何回続けたら窓全体で作り直すか
+        trees_per_update : int
+            差分学習1回で追加する木（ブースティングラウンド）の数
+        feature_store : FeatureStore, optional
+            保存済み特徴量の読み込み元（該当データがなければ計算する）
+        model_dir : str
+            モデルの保存先
         """
         self.initial_balance = initial_balance
         self.lookback_periods = lookback_periods
@@ -69,14 +89,34 @@ class LightweightMLPredictor:
         self.last_training_date = None
         self.training_score = 0
         
+        # 差分学習
+        self.retrain_mode = retrain_mode
+        self.full_retrain_interval = full_retrain_interval
+        self.trees_per_update = trees_per_update
+        self.trained_until = None
+        self.incremental_updates = 0
+        
+        # 特徴量パイプライン・特徴量ストア
+        self.feature_pipeline = build_lightweight_feature_pipeline()
+        self.feature_store = feature_store
+        
+        # 事前計算済み特徴量（precompute_featuresで設定）
+        self.feature_matrix = None
+        self.feature_index = None
+        self.close_values = None
+        self.prediction_cache = {}
+        
         # モデル保存パス
-        self.model_dir = "models/lightweight_ml"
+        self.model_dir = model_dir
         os.makedirs(self.model_dir, exist_ok=True)
         
     def create_features(self, data: pd.DataFrame) -> pd.DataFrame:
         """
         特徴量生成（最適化版）
         
+        特徴量ストアに保存済みならそれを読み込み、なければパイプラインで計算する。
+        定義はfeature_pipeline.build_lightweight_feature_pipelineを参照
+        
         Parameters
         ----------
         data : pd.DataFrame
@@ -87,87 +127,12 @@ class LightweightMLPredictor:
         pd.DataFrame
             特徴量データ
         """
-        features = pd.DataFrame(index=data.index)
+        if self.feature_store is not None:
+            features = self.feature_store.lookup(self.feature_pipeline.name, data)
+            if features is not None:
+                return features
         
-        close = data['Close'] if 'Close' in data.columns else data['close']
-        high = data['High'] if 'High' in data.columns else data['high']
-        low = data['Low'] if 'Low' in data.columns else data['low']
-        open_price = data['Open'] if 'Open' in data.columns else data['open']
-        
-        # 基本的な価格特徴
-        features['returns_1'] = close.pct_change(1)
-        features['returns_3'] = close.pct_change(3)
-        features['returns_5'] = close.pct_change(5)
-        features['returns_10'] = close.pct_change(10)
-        
-        # ボラティリティ
-        features['volatility_5'] = features['returns_1'].rolling(5).std()
-        features['volatility_10'] = features['returns_1'].rolling(10).std()
-        features['volatility_20'] = features['returns_1'].rolling(20).std()
-        
-        # 価格位置（高値安値に対する現在価格の位置）
-        features['price_position_5'] = (close - low.rolling(5).min()) / (high.rolling(5).max() - low.rolling(5).min())
-        features['price_position_10'] = (close - low.rolling(10).min()) / (high.rolling(10).max() - low.rolling(10).min())
-        features['price_position_20'] = (close - low.rolling(20).min()) / (high.rolling(20).max() - low.rolling(20).min())
-        
-        # テクニカル指標
-        # RSI
-        features['rsi_7'] = talib.RSI(close, timeperiod=7) / 100
-        features['rsi_14'] = talib.RSI(close, timeperiod=14) / 100
-        features['rsi_21'] = talib.RSI(close, timeperiod=21) / 100
-        
-        # MACD
-        macd, signal, hist = talib.MACD(close, fastperiod=12, slowperiod=26, signalperiod=9)
-        features['macd'] = macd / close
-        features['macd_signal'] = signal / close
-        features['macd_hist'] = hist / close
-        
-        # ボリンジャーバンド
-        bb_upper, bb_middle, bb_lower = talib.BBANDS(close, timeperiod=20, nbdevup=2, nbdevdn=2)
-        features['bb_width'] = (bb_upper - bb_lower) / bb_middle
-        features['bb_position'] = (close - bb_lower) / (bb_upper - bb_lower)
-        
-        # ATR
-        features['atr_14'] = talib.ATR(high, low, close, timeperiod=14) / close
-        
-        # 移動平均の傾き
-        sma_5 = talib.SMA(close, timeperiod=5)
-        sma_10 = talib.SMA(close, timeperiod=10)
-        sma_20 = talib.SMA(close, timeperiod=20)
-        
-        features['sma_5_slope'] = (sma_5 - sma_5.shift(3)) / sma_5.shift(3)
-        features['sma_10_slope'] = (sma_10 - sma_10.shift(5)) / sma_10.shift(5)
-        features['sma_20_slope'] = (sma_20 - sma_20.shift(10)) / sma_20.shift(10)
-        
-        # 移動平均との乖離
-        features['sma_5_distance'] = (close - sma_5) / sma_5
-        features['sma_10_distance'] = (close - sma_10) / sma_10
-        features['sma_20_distance'] = (close - sma_20) / sma_20
-        
-        # モメンタム
-        features['momentum_5'] = talib.MOM(close, timeperiod=5) / close
-        features['momentum_10'] = talib.MOM(close, timeperiod=10) / close
-        
-        # 出来高関連（もしあれば）
-        if 'Volume' in data.columns or 'volume' in data.columns:
-            volume = data['Volume'] if 'Volume' in data.columns else data['volume']
-            if not volume.isna().all():
-                features['volume_ratio'] = volume / volume.rolling(20).mean()
-                features['volume_momentum'] = volume.pct_change(5)
-        
-        # 時間特徴（市場セッション）
-        if hasattr(data.index, 'hour'):
-            features['hour'] = data.index.hour / 24
-            features['is_tokyo'] = ((data.index.hour >= 9) & (data.index.hour < 15)).astype(int)
-            features['is_london'] = ((data.index.hour >= 16) & (data.index.hour < 24)).astype(int)
-            features['is_ny'] = ((data.index.hour >= 21) | (data.index.hour < 2)).astype(int)
-        
-        # ローソク足パターン
-        features['body_ratio'] = (close - open_price) / (high - low + 0.0001)
-        features['upper_shadow'] = (high - np.maximum(close, open_price)) / (high - low + 0.0001)
-        features['lower_shadow'] = (np.minimum(close, open_price) - low) / (high - low + 0.0001)
-        
-        return features.fillna(method='ffill').fillna(0)
+        return self.feature_pipeline.transform(data)
     
     def prepare_training_data(self, data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
         """
@@ -197,6 +162,62 @@ class LightweightMLPredictor:
         
         return X, y
     
+    def precompute_features(self, data: pd.DataFrame):
+        """
+        全期間の特徴量を一度だけ計算して保持する
+        
+        create_featuresの各特徴量は過去のデータのみを使う（因果的）ため、
+        全期間で計算した行iの値はdata.iloc[:i+1]で計算した最終行と一致する。
+        以降はpredict/generate_signal/train_model_on_rowsに行番号を渡して使う。
+        
+        Parameters
+        ----------
+        data : pd.DataFrame
+            価格データ（全期間）
+        """
+        features = self.create_features(data)
+        close = data['Close'] if 'Close' in data.columns else data['close']
+        
+        self.feature_matrix = features.values.astype(np.float64)
+        self.feature_index = data.index
+        self.close_values = close.values.astype(np.float64)
+        self.prediction_cache = {}
+        
+        print(f"特徴量事前計算完了: {self.feature_matrix.shape[0]}行 x {self.feature_matrix.shape[1]}特徴量")
+    
+    def prepare_training_data_from_rows(self, start: int, end: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        事前計算済み特徴量から学習データを準備
+        
+        行endの時点で確定している目的変数のみを使うため、
+        t + prediction_horizon <= end となる行tだけを学習に使う（未来情報の混入防止）。
+        
+        Parameters
+        ----------
+        start : int
+            学習に使う最初の行番号
+        end : int
+            学習時点の行番号（この行までのデータが利用可能）
+            
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            (X, y) 学習データ
+        """
+        if self.feature_matrix is None:
+            raise ValueError("precompute_features()を先に呼び出してください")
+        
+        rows = np.arange(max(0, start), end - self.prediction_horizon + 1)
+        if len(rows) == 0:
+            return np.empty((0, self.feature_matrix.shape[1])), np.empty(0)
+        
+        X = self.feature_matrix[rows]
+        y = self.close_values[rows + self.prediction_horizon] / self.close_values[rows] - 1
+        
+        valid_idx = ~(np.isnan(X).any(axis=1) | np.isnan(y))
+        
+        return X[valid_idx], y[valid_idx]
+    
     def build_model(self):
         """
         モデル構築
@@ -244,6 +265,108 @@ class LightweightMLPredictor:
         # データ準備
         X, y = self.prepare_training_data(data)
         
+        self._fit(X, y)
+    
+    def train_model_on_rows(self, start: int, end: int):
+        """
+        事前計算済み特徴量の行範囲でモデル学習
+        
+        Parameters
+        ----------
+        start : int
+            学習に使う最初の行番号
+        end : int
+            学習時点の行番号
+        """
+        print(f"モデル学習開始 ({self.model_type}, 行{start}-{end})...")
+        
+        X, y = self.prepare_training_data_from_rows(start, end)
+        
+        self._fit(X, y)
+        
+        if self.is_trained:
+            self.trained_until = end
+    
+    def retrain_on_rows(self, start: int, end: int):
+        """
+        再学習（retrain_modeに応じて作り直しか差分学習を選ぶ）
+        
+        'incremental'の場合、前回の学習以降に確定したデータだけで既存モデルを更新する。
+        full_retrain_interval回ごと、または差分学習できない場合は行start-endで作り直す。
+        
+        Parameters
+        ----------
+        start : int
+            作り直す場合に学習に使う最初の行番号
+        end : int
+            学習時点の行番号
+        """
+        if (self.retrain_mode == 'incremental' and self.is_trained and
+                self.trained_until is not None and
+                self.incremental_updates < self.full_retrain_interval and
+                supports_incremental(self.model)):
+            self.update_model_on_rows(end)
+        else:
+            self.train_model_on_rows(start, end)
+    
+    def update_model_on_rows(self, end: int):
+        """
+        差分学習（ウォームスタート）
+        
+        前回の学習時点trained_untilから行endまでに目的変数が確定した行だけを使い、
+        既存モデルに木（ブースティングラウンド）を追加する。
+        スケーラーはpartial_fitで累積統計を更新する。累積統計の変化は新規データの比率程度と
+        小さいが、既存の木とのずれを解消するため定期的にtrain_model_on_rowsで作り直す。
+        
+        Parameters
+        ----------
+        end : int
+            学習時点の行番号
+        """
+        X, y = self.prepare_training_data_from_rows(
+            self.trained_until - self.prediction_horizon + 1, end
+        )
+        
+        if len(X) < 20:
+            print("差分学習データ不足")
+            return
+        
+        # 更新前のモデルで新規データを評価（未学習データでの検証）
+        y_pred = self.model.predict(self.scaler_X.transform(X))
+        val_mae = mean_absolute_error(self.scaler_y.transform(y.reshape(-1, 1)).ravel(), y_pred)
+        
+        # スケーラーの累積更新
+        self.scaler_X.partial_fit(X)
+        self.scaler_y.partial_fit(y.reshape(-1, 1))
+        X_scaled = self.scaler_X.transform(X)
+        y_scaled = self.scaler_y.transform(y.reshape(-1, 1)).ravel()
+        
+        # 既存モデルに追加学習（RandomForestは木の総数を保つよう古い木を捨てる）
+        grow_model(self.model, X_scaled, y_scaled, self.trees_per_update,
+                   max_trees=self.build_model().get_params()['n_estimators'])
+        
+        if hasattr(self.model, 'feature_importances_'):
+            self.feature_importance = self.model.feature_importances_
+        
+        self.training_score = 1 / (1 + val_mae)
+        self.trained_until = end
+        self.incremental_updates += 1
+        self.last_training_date = datetime.now()
+        self.prediction_cache = {}
+        
+        print(f"差分学習完了 ({len(X)}件, {self.incremental_updates}回目)。検証MAE: {val_mae:.6f}")
+    
+    def _fit(self, X: np.ndarray, y: np.ndarray):
+        """
+        学習データでモデルを構築・学習
+        
+        Parameters
+        ----------
+        X : np.ndarray
+            特徴量
+        y : np.ndarray
+            目的変数（将来リターン）
+        """
         if len(X) < 100:
             print("学習データ不足")
             return
@@ -277,6 +400,8 @@ class LightweightMLPredictor:
         
         self.is_trained = True
         self.last_training_date = datetime.now()
+        self.prediction_cache = {}
+        self.incremental_updates = 0
         
         print(f"学習完了。検証MAE: {val_mae:.6f}, MSE: {val_mse:.6f}")
         print(f"トレーニングスコア: {self.training_score:.3f}")
@@ -284,14 +409,14 @@ class LightweightMLPredictor:
         # モデル保存
         self.save_model()
     
-    def predict(self, data: pd.DataFrame) -> Tuple[float, float]:
+    def predict(self, data: Union[pd.DataFrame, int]) -> Tuple[float, float]:
         """
         価格予測
         
         Parameters
         ----------
-        data : pd.DataFrame
-            直近データ
+        data : pd.DataFrame or int
+            直近データ。precompute_features()済みの場合は行番号も指定できる
             
         Returns
         -------
@@ -301,6 +426,13 @@ class LightweightMLPredictor:
         if not self.is_trained or self.model is None:
             return 0.0, 0.0
         
+        # 事前計算済み特徴量の行番号指定
+        if isinstance(data, (int, np.integer)):
+            row = int(data)
+            if row not in self.prediction_cache:
+                self.prefetch_predictions([row])
+            return self.prediction_cache[row]
+        
         # 特徴量生成
         features = self.create_features(data)
         
@@ -310,29 +442,89 @@ class LightweightMLPredictor:
         # 最新のデータを取得
         X = features.iloc[-1:].values
         
+        predictions, confidences = self._predict_matrix(X)
+        
+        return predictions[0], confidences[0]
+    
+    def predict_rows(self, rows: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        事前計算済み特徴量の複数行をまとめて予測
+        
+        Parameters
+        ----------
+        rows : Sequence[int]
+            予測する行番号
+            
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            (予測値の配列, 信頼度の配列)
+        """
+        rows = np.asarray(rows, dtype=int)
+        
+        if not self.is_trained or self.model is None or len(rows) == 0:
+            return np.zeros(len(rows)), np.zeros(len(rows))
+        
+        if self.feature_matrix is None:
+            raise ValueError("precompute_features()を先に呼び出してください")
+        
+        return self._predict_matrix(self.feature_matrix[rows])
+    
+    def prefetch_predictions(self, rows: Sequence[int]):
+        """
+        次の再学習までに評価する行をまとめて予測し、キャッシュする
+        
+        1行ずつmodel.predictを呼ぶよりも、ブロック単位で呼ぶ方が
+        ツリーアンサンブルでははるかに高速。キャッシュは再学習時に破棄される。
+        
+        Parameters
+        ----------
+        rows : Sequence[int]
+            予測する行番号
+        """
+        rows = [int(r) for r in rows]
+        predictions, confidences = self.predict_rows(rows)
+        
+        for row, prediction, confidence in zip(rows, predictions, confidences):
+            self.prediction_cache[row] = (float(prediction), float(confidence))
+    
+    def _predict_matrix(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        特徴量行列から予測値と信頼度を計算
+        
+        Parameters
+        ----------
+        X : np.ndarray
+            特徴量行列
+            
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            (予測値の配列, 信頼度の配列)
+        """
         # スケーリング
         X_scaled = self.scaler_X.transform(X)
         
         # 予測
-        prediction_scaled = self.model.predict(X_scaled)[0]
+        predictions_scaled = self.model.predict(X_scaled)
         
         # 逆スケーリング
-        prediction = self.scaler_y.inverse_transform([[prediction_scaled]])[0, 0]
+        predictions = self.scaler_y.inverse_transform(predictions_scaled.reshape(-1, 1)).ravel()
         
         # 信頼度計算（モデルのトレーニングスコアと予測の大きさに基づく）
-        prediction_magnitude = min(abs(prediction) * 50, 1.0)
-        confidence = self.training_score * prediction_magnitude
+        prediction_magnitude = np.minimum(np.abs(predictions) * 50, 1.0)
+        confidences = self.training_score * prediction_magnitude
         
-        return prediction, confidence
+        return predictions, confidences
     
-    def generate_signal(self, data: pd.DataFrame, current_positions: int = 0) -> Tuple[int, Dict]:
+    def generate_signal(self, data: Union[pd.DataFrame, int], current_positions: int = 0) -> Tuple[int, Dict]:
         """
         取引シグナル生成
         
         Parameters
         ----------
-        data : pd.DataFrame
-            価格データ
+        data : pd.DataFrame or int
+            価格データ、またはprecompute_features()済みの行番号
         current_positions : int
             現在のポジション数
             
@@ -395,30 +587,55 @@ class LightweightMLPredictor:
         return np.clip(base_lot, 0.01, 3.0)
     
     def save_model(self):
-        """モデル保存"""
+        """
+        モデル保存
+        
+        pickleではなく成果物形式（manifest.json + ノード配列/ブースターファイル）で保存する。
+        読み込み時にscikit-learnのオブジェクトを復元しないため、起動から最初の予測までが速い。
+        """
         if self.model is None:
             return
         
-        # モデルと関連オブジェクト保存
-        model_path = os.path.join(self.model_dir, f"{self.model_type}_model.pkl")
-        with open(model_path, 'wb') as f:
-            pickle.dump({
-                'model': self.model,
-                'scaler_X': self.scaler_X,
-                'scaler_y': self.scaler_y,
+        model_path = os.path.join(self.model_dir, f"{self.model_type}_model")
+        save_model_artifact(
+            model_path,
+            self.model,
+            scaler_X=self.scaler_X,
+            scaler_y=self.scaler_y,
+            metadata={
+                'model_type': self.model_type,
                 'last_training': self.last_training_date,
                 'training_score': self.training_score,
                 'feature_importance': self.feature_importance
-            }, f)
+            }
+        )
         
         print(f"モデル保存完了: {model_path}")
     
     def load_model(self):
-        """モデル読み込み"""
-        model_path = os.path.join(self.model_dir, f"{self.model_type}_model.pkl")
+        """
+        モデル読み込み
         
-        if os.path.exists(model_path):
-            with open(model_path, 'rb') as f:
+        成果物形式を優先し、無ければ従来のpickle（{model_type}_model.pkl）を読み込む。
+        成果物形式から読み込んだモデルは予測専用のため、次の再学習は作り直しになる。
+        """
+        model_path = os.path.join(self.model_dir, f"{self.model_type}_model")
+        legacy_path = model_path + ".pkl"
+        
+        if artifact_exists(model_path):
+            artifact = ModelArtifact(model_path)
+            self.model = artifact.model()
+            self.scaler_X = self._restore_scaler(artifact.scaler_X)
+            self.scaler_y = self._restore_scaler(artifact.scaler_y)
+            
+            last_training = artifact.metadata.get('last_training')
+            self.last_training_date = datetime.fromisoformat(last_training) if last_training else None
+            self.training_score = artifact.metadata.get('training_score', 0.5)
+            feature_importance = artifact.metadata.get('feature_importance')
+            self.feature_importance = np.array(feature_importance) if feature_importance is not None else None
+        
+        elif os.path.exists(legacy_path):
+            with open(legacy_path, 'rb') as f:
                 saved_data = pickle.load(f)
                 self.model = saved_data['model']
                 self.scaler_X = saved_data['scaler_X']
@@ -426,12 +643,25 @@ class LightweightMLPredictor:
                 self.last_training_date = saved_data['last_training']
                 self.training_score = saved_data.get('training_score', 0.5)
                 self.feature_importance = saved_data.get('feature_importance', None)
-            
-            self.is_trained = True
-            print(f"モデル読み込み完了。最終学習: {self.last_training_date}")
-            return True
         
-        return False
+        else:
+            return False
+        
+        self.is_trained = True
+        self.prediction_cache = {}
+        print(f"モデル読み込み完了。最終学習: {self.last_training_date}")
+        return True
+    
+    @staticmethod
+    def _restore_scaler(params) -> StandardScaler:
+        """成果物のスケーラーパラメータからStandardScalerを復元（partial_fitで更新できるように）"""
+        scaler = StandardScaler()
+        scaler.mean_ = params.mean_
+        scaler.scale_ = params.scale_
+        scaler.var_ = params.var_
+        scaler.n_samples_seen_ = params.n_samples_seen_
+        scaler.n_features_in_ = params.n_features_in_
+        return scaler
 
 
 def lightweight_ml_wrapper(data: pd.DataFrame, executor, metadata: Dict = None):
@@ -458,17 +688,21 @@ def lightweight_ml_wrapper(data: pd.DataFrame, executor, metadata: Dict = None):
         confidence_threshold=0.6,
         max_positions=3,
         risk_per_trade=0.01,
-        model_type=model_type
+        model_type=model_type,
+        retrain_mode=(metadata or {}).get('retrain_mode', 'full'),
+        feature_store=(metadata or {}).get('feature_store', open_feature_store())
     )
     
     print(f"Lightweight ML Predictor Strategy テスト開始 ({model_type})")
     print("設定: 1時間先予測、信頼度閾値0.6、最大ポジション3")
     
+    # 特徴量を全期間で一度だけ計算（因果的なので各時点の値は変わらない）
+    strategy.precompute_features(data)
+    
     # モデル学習（最初の30日分）
     training_size = min(500, len(data) // 3)
     if len(data) > training_size:
-        training_data = data.iloc[:training_size]
-        strategy.train_model(training_data)
+        strategy.train_model_on_rows(0, training_size - 1)
     else:
         print("学習データ不足")
         return
@@ -479,9 +713,13 @@ def lightweight_ml_wrapper(data: pd.DataFrame, executor, metadata: Dict = None):
     
     # メインループ
     start_idx = training_size
+    eval_step = 10  # 10本ごと（2.5時間ごと）
+    retrain_interval = 500  # 500本ごと（約5日ごと）
+    
+    # 次の再学習までの評価足をまとめて予測
+    strategy.prefetch_predictions(range(start_idx, min(start_idx + retrain_interval, len(data)), eval_step))
     
-    for i in range(start_idx, len(data), 10):  # 10本ごと（2.5時間ごと）
-        current_data = data.iloc[:i+1]
+    for i in range(start_idx, len(data), eval_step):
         current_time = data.index[i]
         price_col = 'Close' if 'Close' in data.columns else 'close'
         current_price = data[price_col].iloc[i]
@@ -490,15 +728,15 @@ def lightweight_ml_wrapper(data: pd.DataFrame, executor, metadata: Dict = None):
         executor.check_positions(current_price, current_time)
         
         # 定期的な再学習（500本ごと = 約5日ごと）
-        if (i - start_idx) % 500 == 0 and i > start_idx:
+        if (i - start_idx) % retrain_interval == 0 and i > start_idx:
             retraining_count += 1
             print(f"再学習 #{retraining_count}: {current_time}")
-            recent_data = data.iloc[max(0, i-1000):i+1]
-            strategy.train_model(recent_data)
+            strategy.retrain_on_rows(max(0, i-1000), i)
+            strategy.prefetch_predictions(range(i, min(i + retrain_interval, len(data)), eval_step))
         
         # シグナル生成
         current_position_count = len(executor.positions) if hasattr(executor, 'positions') else 0
-        signal, analysis = strategy.generate_signal(current_data, current_position_count)
+        signal, analysis = strategy.generate_signal(i, current_position_count)
         
         if signal != 0:
             signals_generated += 1
@@ -8,7 +8,7 @@ import pandas as pd
 import numpy as np
 import sys
 import os
-from typing import Tuple, Dict, Optional
+from typing import Tuple, Dict
 from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
@@ -49,11 +49,13 @@ class MT5CompatibleTrinityStrategy:
     def __init__(self,
                  confidence_threshold: float = 0.18,
                  prediction_horizon: int = 4,  # 8→4に軽量化
-                 max_memory_mb: int = 500):  # メモリ制限
+                 max_memory_mb: int = 500,  # メモリ制限
+                 feature_store=None):  # 保存済み特徴量（src.data.feature_store.FeatureStore）
         
         self.confidence_threshold = confidence_threshold
         self.prediction_horizon = prediction_horizon
         self.max_memory_mb = max_memory_mb
+        self.feature_store = feature_store
         
         # 軽量モデル（単一RandomForest）
         if MT5_COMPATIBLE:
@@ -102,8 +104,15 @@ class MT5CompatibleTrinityStrategy:
     def create_lightweight_features(self, data: pd.DataFrame) -> pd.DataFrame:
         """
         軽量特徴量生成（MT5 VPS対応）
+        
+        特徴量ストアに保存済み（特徴量セット'mt5_lightweight'）ならそれを読み込む。
         """
         try:
+            if self.feature_store is not None:
+                stored = self.feature_store.lookup('mt5_lightweight', data)
+                if stored is not None:
+                    return stored
+            
             features = pd.DataFrame(index=data.index)
             
             # 価格データ
@@ -265,27 +274,14 @@ class MT5CompatibleTrinityStrategy:
             X = features.iloc[-1:].values
             
             if MT5_COMPATIBLE and self.model is not None:
-                X_scaled = self.scaler_X.transform(X)
-                prediction_scaled = self.model.predict(X_scaled)[0]
-                prediction = self.scaler_y.inverse_transform([[prediction_scaled]])[0, 0]
+                prediction = self._predict_matrix(X)[0]
             else:
                 # 代替実装（簡易トレンド予測）
                 close = data['Close'] if 'Close' in data.columns else data['close']
                 recent_trend = close.tail(20).pct_change().mean()
                 prediction = recent_trend * 2.0  # 簡易予測
             
-            # Enhanced信頼度計算
-            sentiment_features = self.get_sentiment_features()
-            sentiment_boost = sentiment_features.get('news_sentiment', 0.0) * 0.25
-            
-            base_confidence = (
-                0.4 * self.prediction_accuracy + 
-                0.4 * self.training_score + 
-                0.2 * min(abs(prediction) * 100, 1.0)
-            )
-            
-            enhanced_confidence = base_confidence + sentiment_boost
-            enhanced_confidence = max(0.0, min(1.0, enhanced_confidence))
+            enhanced_confidence = self._enhanced_confidence(np.array([prediction]))[0]
             
             return prediction, enhanced_confidence
             
@@ -293,6 +289,31 @@ class MT5CompatibleTrinityStrategy:
             print(f"予測エラー: {e}")
             return 0.0, 0.0
     
+    def _predict_matrix(self, X: np.ndarray) -> np.ndarray:
+        """
+        特徴量行列から予測値を計算（スケーリング・逆スケーリング込み）
+        """
+        X_scaled = self.scaler_X.transform(X)
+        predictions_scaled = self.model.predict(X_scaled)
+        return self.scaler_y.inverse_transform(predictions_scaled.reshape(-1, 1)).ravel()
+    
+    def _enhanced_confidence(self, predictions: np.ndarray) -> np.ndarray:
+        """
+        Enhanced信頼度計算（予測値の配列に対してベクトル化）
+        """
+        # 感情分析は時点によらず直近の値を使うため1回だけ取得
+        sentiment_features = self.get_sentiment_features()
+        sentiment_boost = sentiment_features.get('news_sentiment', 0.0) * 0.25
+        
+        base_confidence = (
+            0.4 * self.prediction_accuracy + 
+            0.4 * self.training_score + 
+            0.2 * np.minimum(np.abs(predictions) * 100, 1.0)
+        )
+        
+        enhanced_confidence = base_confidence + sentiment_boost
+        return np.clip(enhanced_confidence, 0.0, 1.0)
+    
     def generate_signal(self, data: pd.DataFrame) -> Tuple[int, Dict]:
         """
         軽量シグナル生成（MT5対応）
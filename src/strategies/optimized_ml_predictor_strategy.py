@@ -13,16 +13,24 @@ Optimized ML Predictor Strategy (最適化版機械学習予測モデル)
 import pandas as pd
 import numpy as np
 import talib
-from typing import Tuple, Dict, Optional
+from typing import Tuple, Dict, Optional, Sequence, Union
 from datetime import datetime
 import pickle
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.linear_model import Ridge
 from sklearn.metrics import mean_absolute_error
 from xgboost import XGBRegressor
 import lightgbm as lgb
+
+from src.strategies.incremental_training import grow_model, supports_incremental
+from src.strategies.feature_pipeline import (
+    build_extended_feature_pipeline, build_optimized_feature_pipeline
+)
+from src.data.feature_store import FeatureStore, open_feature_store
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -40,7 +48,14 @@ class OptimizedMLPredictor:
                  confidence_threshold: float = 0.7,  # 高い閾値を維持
                  max_positions: int = 2,
                  risk_per_trade: float = 0.02,
-                 model_type: str = 'random_forest'):
+                 model_type: str = 'random_forest',
+                 n_cores: Optional[int] = None,
+                 parallel_training: bool = True,
+                 retrain_mode: str = 'full',
+                 full_retrain_interval: int = 5,
+                 trees_per_update: int = 30,
+                 feature_store: Optional[FeatureStore] = None,
+                 model_dir: str = "models/optimized_ml"):
         """
         初期化
         
@@ -48,6 +63,20 @@ class OptimizedMLPredictor:
         ----------
         confidence_threshold : float
             品質重視のため高い閾値を設定
+        n_cores : int, optional
+            学習に使うコア数（省略時はマシンのコア数）
+        parallel_training : bool
+            アンサンブルの各モデルを同時に学習するか
+        retrain_mode : str
+            'full'（毎回作り直し）or 'incremental'（新規データで差分学習）
+        full_retrain_interval : int
+            差分学習を何回続けたら窓全体で作り直すか
+        trees_per_update : int
+            差分学習1回で各モデルに追加する木（ブースティングラウンド）の数
+        feature_store : FeatureStore, optional
+            保存済み特徴量の読み込み元（該当データがなければ計算する）
+        model_dir : str
+            モデルの保存先
         """
         self.initial_balance = initial_balance
         self.lookback_periods = lookback_periods
@@ -68,12 +97,32 @@ class OptimizedMLPredictor:
         self.training_score = 0
         self.prediction_accuracy = 0
         
-        # キャッシュ（高速化）
-        self._feature_cache = {}
-        self._cache_size = 100
+        # 学習スケジューラ
+        self.n_cores = n_cores or os.cpu_count() or 1
+        self.parallel_training = parallel_training
+        self.thread_budget = {}
+        self.training_times = {}
+        
+        # 特徴量パイプライン（LRUキャッシュ付き）
+        self._cache_size = 16
+        self.optimized_pipeline = build_optimized_feature_pipeline(self._cache_size)
+        self.extended_pipeline = build_extended_feature_pipeline(self._cache_size)
+        self.feature_store = feature_store
+        
+        # 事前計算済み特徴量（バッチ予測用）
+        self.feature_matrix = None
+        self.close_values = None
+        self.prediction_cache = {}
+        
+        # 差分学習
+        self.retrain_mode = retrain_mode
+        self.full_retrain_interval = full_retrain_interval
+        self.trees_per_update = trees_per_update
+        self.trained_until = None
+        self.incremental_updates = 0
         
         # モデル保存パス
-        self.model_dir = "models/optimized_ml"
+        self.model_dir = model_dir
         os.makedirs(self.model_dir, exist_ok=True)
     
     def create_features_optimized(self, data: pd.DataFrame) -> pd.DataFrame:
@@ -81,175 +130,29 @@ class OptimizedMLPredictor:
         最適化された特徴量生成（高速版）
         
         重要な特徴量のみに絞って処理時間を短縮
+        定義はfeature_pipeline.build_optimized_feature_pipelineを参照
         """
-        # キャッシュチェック
-        data_hash = hash(str(data.index[-1]) + str(len(data)))
-        if data_hash in self._feature_cache:
-            return self._feature_cache[data_hash]
-        
-        features = pd.DataFrame(index=data.index)
-        
-        close = data['Close'] if 'Close' in data.columns else data['close']
-        high = data['High'] if 'High' in data.columns else data['high']
-        low = data['Low'] if 'Low' in data.columns else data['low']
-        
-        # 最重要特徴量のみ（計算時間削減）
-        # 1. 価格リターン（3種類のみ）
-        features['returns_5'] = close.pct_change(5)
-        features['returns_10'] = close.pct_change(10)
-        features['returns_20'] = close.pct_change(20)
-        
-        # 2. ボラティリティ（2種類のみ）
-        features['volatility_10'] = features['returns_5'].rolling(10).std()
-        features['volatility_20'] = features['returns_5'].rolling(20).std()
-        
-        # 3. 価格位置（1種類のみ）
-        features['price_position'] = (close - low.rolling(20).min()) / (
-            high.rolling(20).max() - low.rolling(20).min() + 0.0001
-        )
-        
-        # 4. テクニカル指標（最重要3つのみ）
-        # RSI
-        features['rsi'] = talib.RSI(close, timeperiod=14) / 100
-        
-        # MACD
-        macd, signal, _ = talib.MACD(close, fastperiod=12, slowperiod=26, signalperiod=9)
-        features['macd_signal'] = (macd - signal) / close
-        
-        # ATR（ボラティリティ指標）
-        features['atr'] = talib.ATR(high, low, close, timeperiod=14) / close
-        
-        # 5. 移動平均（シンプル版）
-        sma_20 = talib.SMA(close, timeperiod=20)
-        features['sma_distance'] = (close - sma_20) / sma_20
-        
-        # 欠損値処理（高速化のため前方補完のみ）
-        features = features.ffill().fillna(0)
-        
-        # キャッシュ更新
-        if len(self._feature_cache) > self._cache_size:
-            # 古いキャッシュを削除
-            self._feature_cache = {}
-        self._feature_cache[data_hash] = features
-        
-        return features
+        return self._features(self.optimized_pipeline, data)
     
     def create_features_extended(self, data: pd.DataFrame) -> pd.DataFrame:
         """
         拡張特徴量生成 - 高性能PC版
         50+個の多様な特徴量で劇的な精度向上を目指す
-        """
-        # キャッシュチェック
-        data_hash = hash(str(data.index[-1]) + str(len(data)) + "extended")
-        if data_hash in self._feature_cache:
-            return self._feature_cache[data_hash]
-
-        features = pd.DataFrame(index=data.index)
-        
-        # 基本価格データ
-        close = data['Close'] if 'Close' in data.columns else data['close']
-        high = data['High'] if 'High' in data.columns else data['high']
-        low = data['Low'] if 'Low' in data.columns else data['low']
-        open_price = data['Open'] if 'Open' in data.columns else data['open']
-        volume = data['Volume'] if 'Volume' in data.columns else pd.Series(index=data.index, data=1)
-        
-        # === 1. 多期間リターン系特徴量 (8個) ===
-        for period in [3, 5, 8, 10, 15, 20, 30, 45]:
-            features[f'returns_{period}'] = close.pct_change(period)
-        
-        # === 2. ボラティリティ系特徴量 (6個) ===
-        for period in [5, 10, 15, 20, 30, 45]:
-            features[f'volatility_{period}'] = close.pct_change().rolling(period).std()
-        
-        # === 3. 価格位置・レンジ系特徴量 (4個) ===
-        for period in [10, 20, 30, 50]:
-            features[f'price_position_{period}'] = (close - low.rolling(period).min()) / (
-                high.rolling(period).max() - low.rolling(period).min() + 1e-8
-            )
         
-        # === 4. テクニカル指標群 (12個) ===
-        # RSI系
-        features['rsi_14'] = talib.RSI(close, timeperiod=14) / 100
-        features['rsi_21'] = talib.RSI(close, timeperiod=21) / 100
-        features['rsi_momentum'] = features['rsi_14'] - features['rsi_14'].shift(5)
-        
-        # MACD系
-        macd_12_26, signal_12_26, _ = talib.MACD(close, fastperiod=12, slowperiod=26)
-        macd_8_21, signal_8_21, _ = talib.MACD(close, fastperiod=8, slowperiod=21)
-        features['macd_signal_12_26'] = (macd_12_26 - signal_12_26) / close
-        features['macd_signal_8_21'] = (macd_8_21 - signal_8_21) / close
-        features['macd_histogram'] = talib.MACD(close)[2] / close
-        
-        # ボリンジャーバンド
-        bb_upper, bb_middle, bb_lower = talib.BBANDS(close, timeperiod=20, nbdevup=2, nbdevdn=2)
-        features['bb_position'] = (close - bb_lower) / (bb_upper - bb_lower + 1e-8)
-        features['bb_width'] = (bb_upper - bb_lower) / bb_middle
-        
-        # ストキャスティクス
-        slowk, slowd = talib.STOCH(high, low, close, fastk_period=14, slowk_period=3, slowd_period=3)
-        features['stoch_k'] = slowk / 100
-        features['stoch_d'] = slowd / 100
-        features['stoch_momentum'] = (slowk - slowd) / 100
-        
-        # === 5. 移動平均系特徴量 (8個) ===
-        for period in [5, 10, 15, 20, 30, 45, 60, 90]:
-            sma = talib.SMA(close, timeperiod=period)
-            features[f'sma_distance_{period}'] = (close - sma) / sma
-        
-        # === 6. 高度なテクニカル指標 (6個) ===
-        # ATR系
-        features['atr_14'] = talib.ATR(high, low, close, timeperiod=14) / close
-        features['atr_21'] = talib.ATR(high, low, close, timeperiod=21) / close
-        
-        # CCI (商品チャンネル指数)
-        features['cci'] = talib.CCI(high, low, close, timeperiod=14) / 100
-        
-        # Williams %R
-        features['williams_r'] = talib.WILLR(high, low, close, timeperiod=14) / -100
-        
-        # MFI (マネーフローインデックス)
-        features['mfi'] = talib.MFI(high, low, close, volume, timeperiod=14) / 100
-        
-        # ADX (方向性指標)
-        features['adx'] = talib.ADX(high, low, close, timeperiod=14) / 100
-        
-        # === 7. 価格パターン特徴量 (5個) ===
-        # 実体とヒゲの比率
-        body_size = abs(close - open_price)
-        upper_shadow = high - np.maximum(close, open_price)
-        lower_shadow = np.minimum(close, open_price) - low
-        total_range = high - low + 1e-8
-        
-        features['body_ratio'] = body_size / total_range
-        features['upper_shadow_ratio'] = upper_shadow / total_range
-        features['lower_shadow_ratio'] = lower_shadow / total_range
-        features['doji_score'] = 1 - (body_size / total_range)
-        
-        # 前日比較
-        features['gap'] = (open_price - close.shift(1)) / close.shift(1)
-        
-        # === 8. モメンタム・オシレーター系 (4個) ===
-        features['momentum_10'] = close / close.shift(10) - 1
-        features['momentum_20'] = close / close.shift(20) - 1
-        features['roc_14'] = talib.ROC(close, timeperiod=14) / 100
-        features['trix'] = talib.TRIX(close, timeperiod=14) / 100
-        
-        # === 9. 相関・統計特徴量 (2個) ===
-        # トレンド強度
-        features['trend_strength'] = talib.LINEARREG_SLOPE(close, timeperiod=14) / close
-        
-        # 価格分散
-        features['price_dispersion'] = close.rolling(20).std() / close.rolling(20).mean()
-        
-        # 欠損値処理（高速化のため前方補完のみ）
-        features = features.ffill().fillna(0)
-        
-        # キャッシュ更新
-        if len(self._feature_cache) > self._cache_size:
-            self._feature_cache = {}
-        self._feature_cache[data_hash] = features
-        
-        return features
+        定義はfeature_pipeline.build_extended_feature_pipelineを参照。
+        中間結果を共有しながらfloat32の2次元配列に一括で計算し、
+        データのフィンガープリント単位でLRUキャッシュする。
+        """
+        return self._features(self.extended_pipeline, data)
+    
+    def _features(self, pipeline, data: pd.DataFrame) -> pd.DataFrame:
+        """特徴量ストアに保存済みならそれを読み込み、なければパイプラインで計算する"""
+        if self.feature_store is not None:
+            features = self.feature_store.lookup(pipeline.name, data)
+            if features is not None:
+                return features
+        
+        return pipeline.transform(data)
     
     def build_ensemble_models(self):
         """
@@ -302,6 +205,91 @@ class OptimizedMLPredictor:
         
         return models
     
+    def allocate_thread_budget(self) -> Dict[str, int]:
+        """
+        アンサンブル各モデルのスレッド数を割り当てる
+        
+        n_jobsを持たない単一スレッドのモデル（GradientBoosting）には1を、
+        残りのコアをn_jobs対応モデルに均等に割り当てる。合計はn_coresとなる
+        （コア数がモデル数より少ない場合は各モデル最低1スレッド）。
+        
+        Returns
+        -------
+        Dict[str, int]
+            モデル名 -> スレッド数
+        """
+        multi_threaded = [name for name, model in self.models.items()
+                          if 'n_jobs' in model.get_params()]
+        single_threaded = [name for name in self.models if name not in multi_threaded]
+        
+        budget = {name: 1 for name in single_threaded}
+        if multi_threaded:
+            remaining = max(self.n_cores - len(single_threaded), len(multi_threaded))
+            base, extra = divmod(remaining, len(multi_threaded))
+            for i, name in enumerate(multi_threaded):
+                budget[name] = base + (1 if i < extra else 0)
+        
+        return budget
+    
+    def fit_ensemble(self, X_train: np.ndarray, y_train: np.ndarray,
+                     X_val: np.ndarray, y_val: np.ndarray) -> Tuple[Dict, Dict]:
+        """
+        アンサンブル各モデルの学習・検証
+        
+        parallel_trainingが有効な場合は全モデルを同時に学習する。各モデルには
+        allocate_thread_budget()のスレッド数を設定するため、コアの奪い合いや
+        GradientBoosting学習中の遊休コアが生じず、学習時間は最も遅いモデルで決まる。
+        
+        Parameters
+        ----------
+        X_train, y_train : np.ndarray
+            学習データ（スケーリング済み）
+        X_val, y_val : np.ndarray
+            検証データ（スケーリング済み）
+            
+        Returns
+        -------
+        Tuple[Dict, Dict]
+            (モデル名 -> 検証MAE, モデル名 -> 検証予測)
+        """
+        if self.parallel_training:
+            self.thread_budget = self.allocate_thread_budget()
+        else:
+            self.thread_budget = {name: (self.n_cores if 'n_jobs' in model.get_params() else 1)
+                                  for name, model in self.models.items()}
+        
+        for name, model in self.models.items():
+            if 'n_jobs' in model.get_params():
+                model.set_params(n_jobs=self.thread_budget[name])
+        
+        def fit_member(name):
+            model = self.models[name]
+            start = time.time()
+            model.fit(X_train, y_train)
+            y_pred = model.predict(X_val)
+            return mean_absolute_error(y_val, y_pred), y_pred, time.time() - start
+        
+        start = time.time()
+        if self.parallel_training:
+            with ThreadPoolExecutor(max_workers=len(self.models)) as pool:
+                futures = {name: pool.submit(fit_member, name) for name in self.models}
+                results = {name: future.result() for name, future in futures.items()}
+        else:
+            results = {name: fit_member(name) for name in self.models}
+        total_time = time.time() - start
+        
+        model_scores = {name: result[0] for name, result in results.items()}
+        model_predictions = {name: result[1] for name, result in results.items()}
+        self.training_times = {name: result[2] for name, result in results.items()}
+        
+        for name in self.models:
+            print(f"  {name} MAE: {model_scores[name]:.6f} "
+                  f"({self.thread_budget[name]}スレッド, {self.training_times[name]:.1f}秒)")
+        print(f"  アンサンブル学習時間: {total_time:.1f}秒 "
+              f"(個別合計 {sum(self.training_times.values()):.1f}秒)")
+        
+        return model_scores, model_predictions
+    
     def train_model(self, data: pd.DataFrame):
         """
         モデル学習（高速版）
@@ -343,17 +331,9 @@ class OptimizedMLPredictor:
         # アンサンブル学習（高性能PC版）
         print("アンサンブル学習開始...")
         self.models = self.build_ensemble_models()
-        model_scores = {}
-        model_predictions = {}
-        
-        for name, model in self.models.items():
-            print(f"  {name}モデル学習中...")
-            model.fit(X_train_scaled, y_train_scaled)
-            y_pred = model.predict(X_val_scaled)
-            score = mean_absolute_error(y_val_scaled, y_pred)
-            model_scores[name] = score
-            model_predictions[name] = y_pred
-            print(f"  {name} MAE: {score:.6f}")
+        model_scores, model_predictions = self.fit_ensemble(
+            X_train_scaled, y_train_scaled, X_val_scaled, y_val_scaled
+        )
         
         # 重み計算（逆MAE重み付け）
         total_inverse_score = sum(1/score for score in model_scores.values())
@@ -369,7 +349,8 @@ class OptimizedMLPredictor:
         print(f"個別MAE: {model_scores}")
         print(f"アンサンブルMAE: {val_mae:.6f}")
         
-        # 予測精度計算（方向の正確性）
+        # 予測精度計算（方向の正確性、従来通り最後のモデルの検証予測で評価）
+        y_pred = model_predictions[list(self.models)[-1]]
         y_pred_orig = self.scaler_y.inverse_transform(y_pred.reshape(-1, 1)).flatten()
         direction_accuracy = np.mean(np.sign(y_pred_orig) == np.sign(y_val))
         self.prediction_accuracy = direction_accuracy
@@ -379,17 +360,163 @@ class OptimizedMLPredictor:
         
         self.is_trained = True
         self.last_training_date = datetime.now()
+        self.prediction_cache = {}
+        self.incremental_updates = 0
         
         print(f"学習完了。MAE: {val_mae:.4f}, 方向精度: {direction_accuracy:.2%}")
         print(f"総合スコア: {self.training_score:.3f}")
     
-    def predict_fast(self, data: pd.DataFrame) -> Tuple[float, float]:
+    def precompute_features(self, data: pd.DataFrame):
+        """
+        全期間の拡張特徴量を一度だけ計算して保持する
+        
+        create_features_extendedの各特徴量は過去のデータのみを使うため、
+        全期間で計算した行iの値はdata.iloc[:i+1]で計算した最終行と一致する。
+        以降はpredict_fast/generate_quality_signalに行番号を渡して使う。
+        
+        Parameters
+        ----------
+        data : pd.DataFrame
+            価格データ（全期間）
+        """
+        features = self.create_features_extended(data)
+        close = data['Close'] if 'Close' in data.columns else data['close']
+        
+        self.feature_matrix = features.values.astype(np.float64)
+        self.close_values = close.values.astype(np.float64)
+        self.prediction_cache = {}
+        
+        print(f"特徴量事前計算完了: {self.feature_matrix.shape[0]}行 x {self.feature_matrix.shape[1]}特徴量")
+    
+    def retrain_on_rows(self, data: pd.DataFrame, start: int, end: int):
+        """
+        再学習（retrain_modeに応じて作り直しか差分学習を選ぶ）
+        
+        'incremental'の場合、前回の学習以降に確定したデータだけで各モデルを更新する。
+        full_retrain_interval回ごと、または差分学習できない場合はdata.iloc[start:end+1]で作り直す。
+        
+        Parameters
+        ----------
+        data : pd.DataFrame
+            価格データ（全期間）
+        start : int
+            作り直す場合に学習に使う最初の行番号
+        end : int
+            学習時点の行番号
+        """
+        if (self.retrain_mode == 'incremental' and self.is_trained and
+                self.trained_until is not None and self.feature_matrix is not None and
+                self.incremental_updates < self.full_retrain_interval and
+                all(supports_incremental(model) for model in self.models.values())):
+            self.update_model_on_rows(end)
+        else:
+            self.train_model(data.iloc[start:end + 1])
+            if self.is_trained:
+                self.trained_until = end
+    
+    def update_model_on_rows(self, end: int):
+        """
+        差分学習（ウォームスタート）
+        
+        前回の学習時点trained_untilから行endまでに目的変数が確定した行だけで
+        各モデルに木（ブースティングラウンド）を追加する。アンサンブル重みと
+        スコアは更新前のモデルで新規データを予測した誤差（未学習データでの検証）から求める。
+        スケーラーはpartial_fitで累積統計を更新し、定期的な作り直しで既存の木とのずれを解消する。
+        
+        Parameters
+        ----------
+        end : int
+            学習時点の行番号
+        """
+        if self.feature_matrix is None:
+            raise ValueError("precompute_features()を先に呼び出してください")
+        
+        rows = np.arange(self.trained_until - self.prediction_horizon + 1,
+                         end - self.prediction_horizon + 1)
+        X = self.feature_matrix[rows]
+        y = self.close_values[rows + self.prediction_horizon] / self.close_values[rows] - 1
+        valid_idx = ~(np.isnan(X).any(axis=1) | np.isnan(y))
+        X, y = X[valid_idx], y[valid_idx]
+        
+        if len(X) < 100:
+            print("差分学習データ不足")
+            return
+        
+        print(f"差分学習開始 ({len(X)}件)...")
+        
+        # 更新前のモデルで新規データを評価
+        X_scaled = self.scaler_X.transform(X)
+        y_scaled = self.scaler_y.transform(y.reshape(-1, 1)).ravel()
+        model_predictions = {name: model.predict(X_scaled) for name, model in self.models.items()}
+        model_scores = {name: mean_absolute_error(y_scaled, pred)
+                        for name, pred in model_predictions.items()}
+        
+        total_inverse_score = sum(1/score for score in model_scores.values())
+        self.ensemble_weights = {name: (1/score)/total_inverse_score 
+                               for name, score in model_scores.items()}
+        y_pred_ensemble = sum(self.ensemble_weights[name] * pred 
+                             for name, pred in model_predictions.items())
+        val_mae = mean_absolute_error(y_scaled, y_pred_ensemble)
+        y_pred_orig = self.scaler_y.inverse_transform(y_pred_ensemble.reshape(-1, 1)).ravel()
+        direction_accuracy = np.mean(np.sign(y_pred_orig) == np.sign(y))
+        
+        # スケーラーの累積更新
+        self.scaler_X.partial_fit(X)
+        self.scaler_y.partial_fit(y.reshape(-1, 1))
+        X_scaled = self.scaler_X.transform(X)
+        y_scaled = self.scaler_y.transform(y.reshape(-1, 1)).ravel()
+        
+        # 各モデルに追加学習（RandomForestは木の総数を保つよう古い木を捨てる）
+        tree_limits = {name: model.get_params()['n_estimators']
+                       for name, model in self.build_ensemble_models().items()}
+        
+        def grow_member(name):
+            start = time.time()
+            grow_model(self.models[name], X_scaled, y_scaled, self.trees_per_update,
+                       max_trees=tree_limits[name])
+            return time.time() - start
+        
+        if self.parallel_training:
+            with ThreadPoolExecutor(max_workers=len(self.models)) as pool:
+                futures = {name: pool.submit(grow_member, name) for name in self.models}
+                self.training_times = {name: future.result() for name, future in futures.items()}
+        else:
+            self.training_times = {name: grow_member(name) for name in self.models}
+        
+        self.prediction_accuracy = direction_accuracy
+        self.training_score = (1 / (1 + val_mae)) * direction_accuracy
+        self.trained_until = end
+        self.incremental_updates += 1
+        self.last_training_date = datetime.now()
+        self.prediction_cache = {}
+        
+        print(f"差分学習完了 ({self.incremental_updates}回目, {sum(self.training_times.values()):.1f}秒)。"
+              f"MAE: {val_mae:.4f}, 方向精度: {direction_accuracy:.2%}")
+    
+    def predict_fast(self, data: Union[pd.DataFrame, int]) -> Tuple[float, float]:
         """
         高速予測
+        
+        Parameters
+        ----------
+        data : pd.DataFrame or int
+            直近データ。precompute_features()済みの場合は行番号も指定できる
+            
+        Returns
+        -------
+        Tuple[float, float]
+            (予測値, 信頼度)
         """
         if not self.is_trained or not self.models:
             return 0.0, 0.0
         
+        # 事前計算済み特徴量の行番号指定
+        if isinstance(data, (int, np.integer)):
+            row = int(data)
+            if row not in self.prediction_cache:
+                self.prefetch_predictions([row])
+            return self.prediction_cache[row]
+        
         # 拡張特徴量生成（高性能PC版）
         features = self.create_features_extended(data)
         
@@ -398,32 +525,91 @@ class OptimizedMLPredictor:
         
         # 最新データ
         X = features.iloc[-1:].values
-        X_scaled = self.scaler_X.transform(X)
         
-        # アンサンブル予測
-        predictions = {}
-        for name, model in self.models.items():
-            pred_scaled = model.predict(X_scaled)[0]
-            predictions[name] = pred_scaled
+        predictions, confidences = self._predict_matrix(X)
+        
+        return predictions[0], confidences[0]
+    
+    def predict_rows(self, rows: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        事前計算済み特徴量の複数行をまとめて予測
+        
+        Parameters
+        ----------
+        rows : Sequence[int]
+            予測する行番号
+            
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            (予測値の配列, 信頼度の配列)
+        """
+        rows = np.asarray(rows, dtype=int)
+        
+        if not self.is_trained or not self.models or len(rows) == 0:
+            return np.zeros(len(rows)), np.zeros(len(rows))
+        
+        if self.feature_matrix is None:
+            raise ValueError("precompute_features()を先に呼び出してください")
+        
+        return self._predict_matrix(self.feature_matrix[rows])
+    
+    def prefetch_predictions(self, rows: Sequence[int]):
+        """
+        次の再学習までに評価する行をまとめて予測し、キャッシュする
+        
+        アンサンブルの各モデルをブロック単位で1回ずつ呼ぶため、
+        1行ずつ予測する場合に比べてモデル数分の呼び出しオーバーヘッドがまとめて削減される。
+        キャッシュは再学習時に破棄される。
+        
+        Parameters
+        ----------
+        rows : Sequence[int]
+            予測する行番号
+        """
+        rows = [int(r) for r in rows]
+        predictions, confidences = self.predict_rows(rows)
+        
+        for row, prediction, confidence in zip(rows, predictions, confidences):
+            self.prediction_cache[row] = (float(prediction), float(confidence))
+    
+    def _predict_matrix(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        特徴量行列からアンサンブル予測値と信頼度を計算
+        
+        Parameters
+        ----------
+        X : np.ndarray
+            特徴量行列
+            
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            (予測値の配列, 信頼度の配列)
+        """
+        X_scaled = self.scaler_X.transform(X)
         
-        # 重み付けアンサンブル
-        prediction_scaled = sum(self.ensemble_weights[name] * pred 
-                              for name, pred in predictions.items())
-        prediction = self.scaler_y.inverse_transform([[prediction_scaled]])[0, 0]
+        # 重み付けアンサンブル（各モデルはブロック全体を1回で予測）
+        prediction_scaled = sum(self.ensemble_weights[name] * model.predict(X_scaled)
+                                for name, model in self.models.items())
+        predictions = self.scaler_y.inverse_transform(
+            np.asarray(prediction_scaled).reshape(-1, 1)
+        ).ravel()
         
         # 信頼度計算（予測の大きさと学習スコアに基づく）
         # 月20万円目標のため、品質重視
-        prediction_strength = min(abs(prediction) * 100, 1.0)
-        confidence = self.training_score * prediction_strength * self.prediction_accuracy
+        prediction_strength = np.minimum(np.abs(predictions) * 100, 1.0)
+        confidences = self.training_score * prediction_strength * self.prediction_accuracy
         
-        return prediction, confidence
+        return predictions, confidences
     
-    def generate_quality_signal(self, data: pd.DataFrame, 
+    def generate_quality_signal(self, data: Union[pd.DataFrame, int], 
                                 current_positions: int = 0) -> Tuple[int, Dict]:
         """
         品質重視のシグナル生成
         
         月20万円目標のため、精度の高い取引のみ実行
+        dataにはprecompute_features()済みの行番号も指定できる
         """
         if current_positions >= self.max_positions:
             return 0, {'reason': 'max_positions_reached'}
@@ -502,17 +688,21 @@ def optimized_ml_wrapper(data: pd.DataFrame, executor, metadata: Dict = None):
         confidence_threshold=0.7,
         max_positions=2,
         risk_per_trade=0.02,
-        model_type='random_forest'
+        model_type='random_forest',
+        retrain_mode=(metadata or {}).get('retrain_mode', 'full'),
+        feature_store=(metadata or {}).get('feature_store', open_feature_store())
     )
     
     print("最適化ML予測戦略 - 月20万円目標")
     print("品質重視の取引実行")
     
+    # 特徴量を全期間で一度だけ計算（予測用）
+    strategy.precompute_features(data)
+    
     # 初回学習
     training_size = min(3000, len(data) // 4)
     if len(data) > training_size:
-        training_data = data.iloc[:training_size]
-        strategy.train_model(training_data)
+        strategy.retrain_on_rows(data, 0, training_size - 1)
     else:
         print("学習データ不足")
         return
@@ -522,9 +712,16 @@ def optimized_ml_wrapper(data: pd.DataFrame, executor, metadata: Dict = None):
     monthly_profit = 0
     current_month = None
     
+    eval_step = 200  # 200本ごと = 50時間ごと
+    retrain_interval = 10000  # 10000本ごと = 約100日ごと
+    
+    # 次の再学習までの評価足をまとめて予測
+    strategy.prefetch_predictions(
+        range(training_size, min(training_size + retrain_interval, len(data)), eval_step)
+    )
+    
     # メインループ（200本ごと = 50時間ごとで高速化）
-    for i in range(training_size, len(data), 200):
-        current_data = data.iloc[:i+1]
+    for i in range(training_size, len(data), eval_step):
         current_time = data.index[i]
         price_col = 'Close' if 'Close' in data.columns else 'close'
         current_price = data[price_col].iloc[i]
@@ -540,14 +737,14 @@ def optimized_ml_wrapper(data: pd.DataFrame, executor, metadata: Dict = None):
         executor.check_positions(current_price, current_time)
         
         # 週次再学習（10000本ごと = 約100日ごと）
-        if (i - training_size) % 10000 == 0 and i > training_size:
+        if (i - training_size) % retrain_interval == 0 and i > training_size:
             print(f"モデル再学習: {current_time}")
-            recent_data = data.iloc[max(0, i-5000):i+1]
-            strategy.train_model(recent_data)
+            strategy.retrain_on_rows(data, max(0, i-5000), i)
+            strategy.prefetch_predictions(range(i, min(i + retrain_interval, len(data)), eval_step))
         
         # シグナル生成（品質重視）
         current_positions = len(executor.positions) if hasattr(executor, 'positions') else 0
-        signal, analysis = strategy.generate_quality_signal(current_data, current_positions)
+        signal, analysis = strategy.generate_quality_signal(i, current_positions)
         
         if signal != 0:
             signals_generated += 1
@@ -0,0 +1,371 @@
+"""
+ストリーミング（バー単位）戦略インターフェース
+
+足が1本確定するたびにon_bar(bar)を呼び出してシグナルを得る。
+指標は逐次更新の状態として保持するため、1本あたりの処理量は履歴の長さに依存しない。
+バックテストとMT5ライブループで同じ戦略コードを動かすことを目的とする。
+"""
+
+import math
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.indicators.streaming import RSI, Bollinger, TokyoRange
+
+
+def _bar_value(bar, key: str) -> float:
+    """バーから価格を取得する（大文字・小文字どちらのカラム名にも対応）"""
+    if key in bar:
+        return float(bar[key])
+    return float(bar[key.lower()])
+
+
+def _bar_time(bar) -> pd.Timestamp:
+    """バーの時刻を取得する（pd.Seriesのname、または'timestamp'キー）"""
+    if isinstance(bar, pd.Series) and bar.name is not None:
+        return pd.Timestamp(bar.name)
+    return pd.Timestamp(bar['timestamp'])
+
+
+class StreamingStrategy:
+    """
+    ストリーミング戦略の基底クラス
+
+    サブクラスはon_bar()を実装し、足1本ごとにシグナル（1=買い、-1=売り、0=なし）を返す。
+    シグナルを出した場合はlast_orderにエントリー価格・SL・TPを格納する。
+    """
+
+    def __init__(self, sl_pips: float = 10.0, tp_pips: float = 20.0):
+        """
+        初期化
+
+        Parameters
+        ----------
+        sl_pips : float, default 10.0
+            損切り幅（pips）
+        tp_pips : float, default 20.0
+            利確幅（pips）
+        """
+        self.sl_pips = sl_pips
+        self.tp_pips = tp_pips
+        self.name = "StreamingStrategy"
+        self.last_order: Optional[Dict[str, Any]] = None
+
+    def on_bar(self, bar) -> int:
+        """
+        確定した足を1本処理してシグナルを返す
+
+        Parameters
+        ----------
+        bar : pd.Series or Dict
+            Open/High/Low/Closeを持つ足。時刻はpd.Seriesのname、
+            または辞書の'timestamp'キーで渡す
+
+        Returns
+        -------
+        int
+            シグナル（1=買い、-1=売り、0=シグナルなし）
+        """
+        raise NotImplementedError
+
+    def reset(self):
+        """内部状態を初期化する"""
+        self.last_order = None
+
+    def _make_order(self, signal: int, price: float) -> int:
+        """シグナルに対応する注文情報をlast_orderに記録する"""
+        self.last_order = {
+            'signal': signal,
+            'entry_price': price,
+            'sl_price': price - signal * self.sl_pips * 0.01,
+            'tp_price': price + signal * self.tp_pips * 0.01,
+            'strategy': self.name
+        }
+        return signal
+
+    def run(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        データフレームを1本ずつ再生してシグナルを生成する
+
+        generate_signals()と同じカラム（signal, entry_price, sl_price, tp_price, strategy）を
+        追加したDataFrameを返すため、既存のバックテストエンジンにそのまま渡せる。
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            価格データ
+
+        Returns
+        -------
+        pd.DataFrame
+            シグナルが追加されたDataFrame
+        """
+        n = len(df)
+        signals = np.zeros(n, dtype=int)
+        entry_prices = np.full(n, np.nan)
+        sl_prices = np.full(n, np.nan)
+        tp_prices = np.full(n, np.nan)
+        strategies = np.full(n, None, dtype=object)
+
+        for i, (timestamp, row) in enumerate(zip(df.index, df.to_dict('records'))):
+            row['timestamp'] = timestamp
+            self.last_order = None
+            signal = self.on_bar(row)
+
+            if signal != 0 and self.last_order is not None:
+                signals[i] = signal
+                entry_prices[i] = self.last_order['entry_price']
+                sl_prices[i] = self.last_order['sl_price']
+                tp_prices[i] = self.last_order['tp_price']
+                strategies[i] = self.last_order['strategy']
+
+        result = df.copy()
+        result['signal'] = signals
+        result['entry_price'] = entry_prices
+        result['sl_price'] = sl_prices
+        result['tp_price'] = tp_prices
+        result['strategy'] = strategies
+
+        return result
+
+
+class StreamingBollingerRsiStrategy(StreamingStrategy):
+    """
+    ボリンジャーバンド＋RSI逆張り戦略のストリーミング版
+
+    BollingerRsiStrategyと同じ判定を行う。前の足の終値がボリンジャーバンド2σに到達し、
+    かつRSIが70以上（売り）または30以下（買い）の場合に、現在の足の始値でエントリーする。
+    指標（ta.BollingerBands / ta.RSIIndicator相当）は内部で逐次計算する。
+    """
+
+    def __init__(self, sl_pips: float = 7.0, tp_pips: float = 10.0,
+                 bb_window: int = 20, bb_dev: float = 2.0, rsi_window: int = 14,
+                 rsi_upper: float = 70, rsi_lower: float = 30):
+        """
+        初期化
+
+        Parameters
+        ----------
+        sl_pips : float, default 7.0
+            損切り幅（pips）
+        tp_pips : float, default 10.0
+            利確幅（pips）
+        bb_window : int, default 20
+            ボリンジャーバンドの期間
+        bb_dev : float, default 2.0
+            ボリンジャーバンドの標準偏差倍率
+        rsi_window : int, default 14
+            RSIの期間
+        rsi_upper : float, default 70
+            売りシグナルのRSI閾値
+        rsi_lower : float, default 30
+            買いシグナルのRSI閾値
+        """
+        super().__init__(sl_pips, tp_pips)
+        self.name = "ボリンジャーバンド＋RSI逆張り"
+        self.bb_window = bb_window
+        self.bb_dev = bb_dev
+        self.rsi_window = rsi_window
+        self.rsi_upper = rsi_upper
+        self.rsi_lower = rsi_lower
+        self.reset()
+
+    def reset(self):
+        """内部状態を初期化する"""
+        super().reset()
+        self._bollinger = Bollinger(self.bb_window, self.bb_dev, ddof=0)
+        self._rsi = RSI(self.rsi_window)
+        self._prev_close = math.nan
+        self._prev_upper = math.nan
+        self._prev_lower = math.nan
+        self._prev_rsi = math.nan
+        self._prev_signal = 0
+
+    def on_bar(self, bar) -> int:
+        """
+        確定した足を1本処理してシグナルを返す
+
+        Parameters
+        ----------
+        bar : pd.Series or Dict
+            Open/Closeを持つ足
+
+        Returns
+        -------
+        int
+            シグナル（1=買い、-1=売り、0=シグナルなし）
+        """
+        open_price = _bar_value(bar, 'Open')
+        close = _bar_value(bar, 'Close')
+
+        signal = 0
+        if self._prev_signal == 0:
+            if self._prev_close >= self._prev_upper and self._prev_rsi >= self.rsi_upper:
+                signal = self._make_order(-1, open_price)
+            elif self._prev_close <= self._prev_lower and self._prev_rsi <= self.rsi_lower:
+                signal = self._make_order(1, open_price)
+
+        upper, _, lower = self._bollinger.update(close)
+        self._prev_close = close
+        self._prev_upper = upper
+        self._prev_lower = lower
+        self._prev_rsi = self._rsi.update(close)
+        self._prev_signal = signal
+
+        return signal
+
+
+class StreamingTokyoLondonStrategy(StreamingStrategy):
+    """
+    東京レンジ・ロンドンブレイクアウト戦略のストリーミング版
+
+    TokyoLondonStrategyと同じ判定を行う。東京時間レンジを逐次記録し、
+    日本時間16時以降の足で前のロンドン時間の足がレンジをブレイクした場合に
+    現在の足の終値でエントリーする。
+    """
+
+    def __init__(self, sl_pips: float = 10.0, tp_pips: float = 15.0):
+        """
+        初期化
+
+        Parameters
+        ----------
+        sl_pips : float, default 10.0
+            損切り幅（pips）
+        tp_pips : float, default 15.0
+            利確幅（pips）
+        """
+        super().__init__(sl_pips, tp_pips)
+        self.name = "東京レンジ・ロンドンブレイクアウト"
+        self.reset()
+
+    def reset(self):
+        """内部状態を初期化する"""
+        super().reset()
+        self._tokyo_range = TokyoRange()
+        self._prev_close = math.nan
+        self._prev_london_close = None
+        self._prev_london_signal = 0
+
+    def on_bar(self, bar) -> int:
+        """
+        確定した足を1本処理してシグナルを返す
+
+        Parameters
+        ----------
+        bar : pd.Series or Dict
+            High/Low/Closeと時刻を持つ足
+
+        Returns
+        -------
+        int
+            シグナル（1=買い、-1=売り、0=シグナルなし）
+        """
+        timestamp = _bar_time(bar)
+        high = _bar_value(bar, 'High')
+        low = _bar_value(bar, 'Low')
+        close = _bar_value(bar, 'Close')
+
+        tokyo_high, tokyo_low = self._tokyo_range.update(timestamp, high, low)
+
+        signal = 0
+        if (timestamp.hour + 9) % 24 >= 16:
+            if self._prev_london_close is not None and self._prev_london_signal == 0:
+                if (self._prev_london_close > tokyo_high and
+                        self._prev_close <= tokyo_high):
+                    signal = self._make_order(1, close)
+                elif (self._prev_london_close < tokyo_low and
+                      self._prev_close >= tokyo_low):
+                    signal = self._make_order(-1, close)
+
+            self._prev_london_close = close
+            self._prev_london_signal = signal
+
+        self._prev_close = close
+
+        return signal
+
+
+class FrameStrategyAdapter(StreamingStrategy):
+    """
+    既存の一括計算戦略（generate_signals(df)）をストリーミングで動かすアダプタ
+
+    ネイティブのストリーミング実装がない戦略向け。直近lookback本のみを保持し、
+    足が確定するたびにその範囲でgenerate_signals()を呼んで最後の足のシグナルを返す。
+    1本あたりの処理量はlookbackで頭打ちになり、履歴全体を再計算しない。
+    lookbackが指標のウォームアップ期間を十分にカバーしていれば一括計算と同じ結果になる。
+    """
+
+    def __init__(self, strategy, lookback: int = 500,
+                 prepare: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None):
+        """
+        初期化
+
+        Parameters
+        ----------
+        strategy : Any
+            generate_signals(df)を持つ戦略
+        lookback : int, default 500
+            generate_signals()に渡す直近の足の本数
+        prepare : Callable[[pd.DataFrame], pd.DataFrame], optional
+            generate_signals()の前に呼ぶ前処理（例: DataProcessor.add_technical_indicators）
+        """
+        super().__init__(getattr(strategy, 'sl_pips', 10.0), getattr(strategy, 'tp_pips', 20.0))
+        self.strategy = strategy
+        self.name = getattr(strategy, 'name', type(strategy).__name__)
+        self.lookback = lookback
+        self.prepare = prepare
+        self.reset()
+
+    def reset(self):
+        """内部状態を初期化する"""
+        super().reset()
+        self._rows = deque(maxlen=self.lookback)
+        self._times = deque(maxlen=self.lookback)
+
+    def on_bar(self, bar) -> int:
+        """
+        確定した足を1本処理してシグナルを返す
+
+        Parameters
+        ----------
+        bar : pd.Series or Dict
+            戦略が必要とするカラムと時刻を持つ足
+
+        Returns
+        -------
+        int
+            シグナル（1=買い、-1=売り、0=シグナルなし）
+        """
+        row = dict(bar)
+        row.pop('timestamp', None)
+        self._times.append(_bar_time(bar))
+        self._rows.append(row)
+
+        window_df = pd.DataFrame(list(self._rows), index=pd.DatetimeIndex(list(self._times)))
+        if self.prepare is not None:
+            window_df = self.prepare(window_df)
+
+        signals_df = self.strategy.generate_signals(window_df)
+        if signals_df is None or signals_df.empty or 'signal' not in signals_df.columns:
+            return 0
+
+        last = signals_df.iloc[-1]
+        signal = int(last['signal']) if not pd.isna(last['signal']) else 0
+        if signal == 0:
+            return 0
+
+        entry_price = last.get('entry_price', np.nan)
+        if pd.isna(entry_price):
+            entry_price = _bar_value(bar, 'Close')
+
+        self._make_order(signal, float(entry_price))
+        for key in ('sl_price', 'tp_price', 'strategy'):
+            value = last.get(key, None)
+            if value is not None and not (isinstance(value, float) and math.isnan(value)):
+                self.last_order[key] = value
+
+        return signal
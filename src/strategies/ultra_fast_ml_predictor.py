@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Ultra Fast ML Predictor (Trinity ML基盤予測モデル)
+マルチコア並列処理による高速特徴量生成・学習
+
+特徴:
+- 履歴をチャンクに分割し、max_cores個のプロセスで特徴量を並列計算
+- チャンクにはウォームアップ期間を重ねて持たせ、直列計算と完全に同じ結果を得る
+- 単一RandomForestによる将来リターン予測
+- Enhanced Trinity ML戦略の基盤（MT5CompatibleTrinityStrategyはこの軽量版）
+"""
+
+import os
+from multiprocessing import Pool
+from typing import Dict, NamedTuple, Optional, Tuple
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+from sklearn.metrics import mean_absolute_error
+import warnings
+warnings.filterwarnings('ignore')
+
+# 特徴量セット（11個）
+FEATURE_NAMES = [
+    'returns_1', 'returns_5', 'returns_15', 'returns_30',
+    'volatility_10', 'volatility_20', 'rsi_14',
+    'sma_distance_20', 'sma_distance_50', 'atr_14', 'price_position_20'
+]
+
+# 特徴量計算に必要な最大の過去本数（チャンク間で重ねるウォームアップ期間）
+WARMUP_BARS = 50
+
+# これより短いデータは並列化せずに直列で計算する（プロセス起動コストの方が大きいため）
+MIN_CHUNK_ROWS = 5000
+
+
+def _rolling(values: np.ndarray, window: int, func, **kwargs) -> np.ndarray:
+    """
+    移動窓の集計（窓ごとに独立して計算）
+
+    pandasのrollingは累積計算のため開始位置によって末尾の桁が変わりうるが、
+    窓ごとに独立して計算することでチャンク分割しても結果が変わらない。
+    """
+    result = np.full(len(values), np.nan)
+    if len(values) >= window:
+        result[window - 1:] = func(sliding_window_view(values, window), axis=-1, **kwargs)
+    return result
+
+
+def _pct_change(values: np.ndarray, periods: int) -> np.ndarray:
+    """periods本前からの変化率"""
+    result = np.full(len(values), np.nan)
+    if len(values) > periods:
+        result[periods:] = values[periods:] / values[:-periods] - 1
+    return result
+
+
+def create_features_chunk(args) -> pd.DataFrame:
+    """
+    1チャンク分の特徴量を計算する（並列処理用）
+
+    全ての特徴量は直近WARMUP_BARS本以内のデータのみを使う。
+    チャンク先頭のwarmup行は前のチャンクと重なる部分で、計算後に取り除く。
+
+    Parameters
+    ----------
+    args : Tuple[pd.DataFrame, int]
+        (価格データ, 先頭から取り除くウォームアップ行数)
+
+    Returns
+    -------
+    pd.DataFrame
+        特徴量（ウォームアップ行を除く）
+    """
+    data, warmup = args
+
+    close = (data['Close'] if 'Close' in data.columns else data['close']).to_numpy(dtype=np.float64)
+    high = (data['High'] if 'High' in data.columns else data['high']).to_numpy(dtype=np.float64)
+    low = (data['Low'] if 'Low' in data.columns else data['low']).to_numpy(dtype=np.float64)
+
+    features = {}
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 1. 価格リターン
+        for period in [1, 5, 15, 30]:
+            features[f'returns_{period}'] = _pct_change(close, period)
+
+        # 2. ボラティリティ
+        for period in [10, 20]:
+            features[f'volatility_{period}'] = _rolling(features['returns_1'], period, np.std, ddof=1)
+
+        # 3. RSI（単純移動平均版）
+        delta = np.full(len(close), np.nan)
+        delta[1:] = np.diff(close)
+        gain = _rolling(np.where(delta > 0, delta, 0.0), 14, np.mean)
+        loss = _rolling(np.where(delta < 0, -delta, 0.0), 14, np.mean)
+        features['rsi_14'] = (100 - 100 / (1 + gain / loss)) / 100
+
+        # 4. 移動平均乖離
+        for period in [20, 50]:
+            sma = _rolling(close, period, np.mean)
+            features[f'sma_distance_{period}'] = (close - sma) / close
+
+        # 5. ATR（単純移動平均版）
+        prev_close = np.full(len(close), np.nan)
+        prev_close[1:] = close[:-1]
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+        true_range[0] = np.nan
+        features['atr_14'] = _rolling(true_range, 14, np.mean) / close
+
+        # 6. 価格位置
+        highest = _rolling(high, 20, np.max)
+        lowest = _rolling(low, 20, np.min)
+        features['price_position_20'] = (close - lowest) / (highest - lowest + 1e-8)
+
+    result = pd.DataFrame(features, index=data.index, columns=FEATURE_NAMES)
+    result = result.replace([np.inf, -np.inf], np.nan)
+
+    return result.iloc[warmup:]
+
+
+class UltraFastPrediction(NamedTuple):
+    """
+    予測結果
+
+    (予測値, 信頼度)のタプルとして展開でき、辞書と同様にget()でも参照できる。
+    'direction'は予測値の符号（1=上昇、-1=下落、0=中立）。
+    """
+    prediction: float
+    confidence: float
+
+    def get(self, key: str, default=None):
+        if key == 'direction':
+            return int(np.sign(self.prediction))
+        if key in self._fields:
+            return getattr(self, key)
+        return default
+
+
+class UltraFastMLPredictor:
+    """
+    マルチコア対応の高速ML予測モデル（Trinity ML基盤）
+
+    特徴量生成・学習をmax_coresまでの並列度で実行する。
+    """
+
+    def __init__(self,
+                 base_confidence_threshold: float = 0.18,
+                 prediction_horizon: int = 8,
+                 max_cores: int = 24,
+                 dynamic_threshold: bool = True):
+        """
+        初期化
+
+        Parameters
+        ----------
+        base_confidence_threshold : float
+            シグナル発生に必要な信頼度の基準値
+        prediction_horizon : int
+            何本先のリターンを予測するか
+        max_cores : int
+            並列処理に使う最大コア数（実際のCPUコア数で頭打ち）
+        dynamic_threshold : bool
+            直近のボラティリティに応じて信頼度閾値を調整するか
+        """
+        self.base_confidence_threshold = base_confidence_threshold
+        self.prediction_horizon = prediction_horizon
+        self.max_cores = max(1, min(max_cores, os.cpu_count() or 1))
+        self.dynamic_threshold = dynamic_threshold
+
+        self.model = RandomForestRegressor(
+            n_estimators=200,
+            max_depth=15,
+            min_samples_split=5,
+            min_samples_leaf=3,
+            max_features='sqrt',
+            n_jobs=self.max_cores,
+            random_state=42
+        )
+        self.scaler_X = StandardScaler()
+        self.scaler_y = StandardScaler()
+
+        self.feature_names = list(FEATURE_NAMES)
+
+        # 学習状態
+        self.is_trained = False
+        self.training_score = 0.0
+        self.prediction_accuracy = 0.5
+        self.last_training_date = None
+
+        print(f"UltraFast ML初期化完了 (コア数: {self.max_cores}, 予測範囲: {prediction_horizon}本先)")
+
+    def create_features_parallel(self, data: pd.DataFrame,
+                                 n_chunks: Optional[int] = None) -> pd.DataFrame:
+        """
+        特徴量の並列生成
+
+        データをチャンクに分割し、各チャンクに直前WARMUP_BARS本を重ねて持たせて
+        max_cores個までのプロセスで計算する。結果は直列計算と完全に一致する。
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            価格データ
+        n_chunks : int, optional
+            分割数（省略時はmax_cores。短いデータは分割しない）
+
+        Returns
+        -------
+        pd.DataFrame
+            特徴量
+        """
+        if n_chunks is None:
+            n_chunks = min(self.max_cores, len(data) // MIN_CHUNK_ROWS)
+        n_chunks = min(n_chunks, len(data))
+
+        if n_chunks <= 1:
+            return create_features_chunk((data, 0))
+
+        bounds = np.linspace(0, len(data), n_chunks + 1).astype(int)
+        tasks = []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            warmup_start = max(0, start - WARMUP_BARS)
+            tasks.append((data.iloc[warmup_start:end], start - warmup_start))
+
+        with Pool(processes=min(n_chunks, self.max_cores)) as pool:
+            chunks = pool.map(create_features_chunk, tasks)
+
+        return pd.concat(chunks)
+
+    def prepare_training_data(self, data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        学習データの準備
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            価格データ
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            (X, y) 学習データ
+        """
+        features = self.create_features_parallel(data)
+
+        close = data['Close'] if 'Close' in data.columns else data['close']
+        future_returns = close.shift(-self.prediction_horizon) / close - 1
+
+        valid_idx = ~(features.isna().any(axis=1) | future_returns.isna())
+        X = features[valid_idx].values
+        y = future_returns[valid_idx].values
+
+        return X, y
+
+    def train_model_parallel(self, data: pd.DataFrame):
+        """
+        モデル学習（特徴量生成・学習ともに並列）
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            学習データ
+        """
+        X, y = self.prepare_training_data(data)
+
+        if len(X) < 100:
+            print(f"学習データ不足: {len(X)}件 < 100件")
+            return
+
+        split_idx = int(len(X) * 0.8)
+        X_train, X_test = X[:split_idx], X[split_idx:]
+        y_train, y_test = y[:split_idx], y[split_idx:]
+
+        # スケーリング
+        X_train_scaled = self.scaler_X.fit_transform(X_train)
+        X_test_scaled = self.scaler_X.transform(X_test)
+        y_train_scaled = self.scaler_y.fit_transform(y_train.reshape(-1, 1)).ravel()
+
+        # モデル学習
+        self.model.fit(X_train_scaled, y_train_scaled)
+
+        # 評価
+        y_pred_scaled = self.model.predict(X_test_scaled)
+        y_pred = self.scaler_y.inverse_transform(y_pred_scaled.reshape(-1, 1)).ravel()
+
+        mae = mean_absolute_error(y_test, y_pred)
+        direction_accuracy = np.mean(np.sign(y_pred) == np.sign(y_test))
+
+        self.prediction_accuracy = direction_accuracy
+        self.training_score = (1 / (1 + mae)) * direction_accuracy
+        self.is_trained = True
+        self.last_training_date = datetime.now()
+
+        print(f"学習完了 ({len(X)}件) - MAE: {mae:.6f}, 方向精度: {direction_accuracy:.1%}")
+
+    def predict_ultra_fast(self, data: pd.DataFrame) -> UltraFastPrediction:
+        """
+        最新の足に対する予測
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            直近データ（WARMUP_BARS本以上あれば全特徴量が揃う）
+
+        Returns
+        -------
+        UltraFastPrediction
+            (予測値, 信頼度)
+        """
+        if not self.is_trained or len(data) == 0:
+            return UltraFastPrediction(0.0, 0.0)
+
+        # 最新の足の特徴量のみ必要なため、直近WARMUP_BARS本だけで計算
+        features = create_features_chunk((data.tail(WARMUP_BARS), 0))
+        X = features.iloc[-1:].fillna(0).values
+
+        X_scaled = self.scaler_X.transform(X)
+        prediction_scaled = self.model.predict(X_scaled)
+        prediction = self.scaler_y.inverse_transform(prediction_scaled.reshape(-1, 1))[0, 0]
+
+        # 信頼度計算（方向精度・学習スコア・予測の大きさ）
+        confidence = (
+            0.4 * self.prediction_accuracy +
+            0.4 * self.training_score +
+            0.2 * min(abs(prediction) * 100, 1.0)
+        )
+
+        return UltraFastPrediction(float(prediction), float(max(0.0, min(1.0, confidence))))
+
+    def get_confidence_threshold(self, data: pd.DataFrame) -> float:
+        """
+        信頼度閾値の取得
+
+        dynamic_thresholdが有効な場合、短期と長期のボラティリティ比に応じて
+        基準値を0.8～1.2倍の範囲で調整する（荒れた相場ほど慎重に）。
+        """
+        if not self.dynamic_threshold or len(data) < WARMUP_BARS:
+            return self.base_confidence_threshold
+
+        features = create_features_chunk((data.tail(WARMUP_BARS), 0))
+        short_vol = features['volatility_10'].iloc[-1]
+        long_vol = features['volatility_20'].iloc[-1]
+
+        if not (long_vol > 0):
+            return self.base_confidence_threshold
+
+        return self.base_confidence_threshold * float(np.clip(short_vol / long_vol, 0.8, 1.2))
+
+    def generate_ultra_fast_signal(self, data: pd.DataFrame) -> Tuple[int, Dict]:
+        """
+        シグナル生成
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            価格データ
+
+        Returns
+        -------
+        Tuple[int, Dict]
+            (シグナル, 分析詳細)
+        """
+        prediction, confidence = self.predict_ultra_fast(data)
+        threshold = self.get_confidence_threshold(data)
+
+        analysis = {
+            'prediction': prediction,
+            'confidence': confidence,
+            'threshold': threshold,
+            'accuracy': self.prediction_accuracy,
+            'strategy_type': 'UltraFast_Trinity_ML'
+        }
+
+        if not self.is_trained:
+            return 0, {**analysis, 'reason': 'not_trained'}
+
+        if confidence < threshold:
+            return 0, {**analysis, 'reason': 'low_confidence'}
+
+        if prediction > 0.0010:
+            signal = 1
+        elif prediction < -0.0010:
+            signal = -1
+        else:
+            signal = 0
+            analysis['reason'] = 'insufficient_prediction'
+
+        return signal, analysis
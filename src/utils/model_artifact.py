@@ -0,0 +1,408 @@
+"""
+学習済みモデルの成果物（アーティファクト）形式
+
+pickleの代わりに、モデルをディレクトリ単位の軽量な形式で保存・読み込みする。
+
+    <path>/
+        manifest.json     形式バージョン・モデル構成・メタデータ
+        scalers.npz       StandardScalerのパラメータ（mean/scale/var）
+        <name>.trees.npz  RandomForest / GradientBoostingの木（ノード配列）
+        <name>.ubj        XGBoostのブースター（UBJSON）
+        <name>.txt        LightGBMのブースター（テキスト）
+
+読み込みは遅延評価で、manifest.jsonのみを先に読み、各モデルは最初の予測時に読み込む。
+木モデルはnumpyだけで予測できるため、実行環境でscikit-learnを読み込む必要がない。
+このモジュールは標準ライブラリとnumpyのみに依存し、MT5転送パッケージにもそのまま同梱できる。
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+ARTIFACT_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+SCALERS_FILE = "scalers.npz"
+
+
+# ---------------------------------------------------------------------------
+# 保存
+# ---------------------------------------------------------------------------
+
+def _model_kind(model) -> str:
+    """モデルの種類を判定する（クラス名で判定し、各ライブラリの読み込みを避ける）"""
+    names = [cls.__name__ for cls in type(model).__mro__]
+    if 'XGBModel' in names:
+        return 'xgboost'
+    if 'LGBMModel' in names:
+        return 'lightgbm'
+    if 'BaseGradientBoosting' in names:
+        return 'gradient_boosting'
+    if 'BaseForest' in names:
+        return 'forest'
+    raise ValueError(f"成果物形式に対応していないモデルです: {type(model).__name__}")
+
+
+def _save_trees(path: str, trees: List, extra: Dict[str, np.ndarray]):
+    """決定木のリストをノード配列として連結して保存する"""
+    node_counts = [tree.node_count for tree in trees]
+    np.savez(
+        path,
+        offsets=np.concatenate([[0], np.cumsum(node_counts)]).astype(np.int64),
+        children_left=np.concatenate([tree.children_left for tree in trees]).astype(np.int32),
+        children_right=np.concatenate([tree.children_right for tree in trees]).astype(np.int32),
+        feature=np.concatenate([tree.feature for tree in trees]).astype(np.int32),
+        threshold=np.concatenate([tree.threshold for tree in trees]),
+        missing_go_to_left=np.concatenate([tree.missing_go_to_left for tree in trees]).astype(np.uint8),
+        value=np.concatenate([tree.value[:, 0, 0] for tree in trees]),
+        max_depth=np.array(max(tree.max_depth for tree in trees)),
+        **extra
+    )
+
+
+def _save_member(directory: str, name: str, model) -> Dict[str, Any]:
+    """1モデルを保存し、マニフェストのエントリを返す"""
+    kind = _model_kind(model)
+
+    if kind == 'xgboost':
+        filename = f"{name}.ubj"
+        model.get_booster().save_model(os.path.join(directory, filename))
+    elif kind == 'lightgbm':
+        filename = f"{name}.txt"
+        model.booster_.save_model(os.path.join(directory, filename))
+    elif kind == 'forest':
+        filename = f"{name}.trees.npz"
+        _save_trees(os.path.join(directory, filename),
+                    [estimator.tree_ for estimator in model.estimators_], {})
+    else:
+        if model.loss != 'squared_error' or getattr(model.init_, 'constant_', None) is None:
+            raise ValueError("GradientBoostingは二乗誤差・定数初期値のモデルのみ対応しています")
+        filename = f"{name}.trees.npz"
+        _save_trees(os.path.join(directory, filename),
+                    [estimator.tree_ for estimator in model.estimators_[:, 0]],
+                    {'init': np.asarray(model.init_.constant_).ravel()[:1],
+                     'learning_rate': np.array(model.learning_rate)})
+
+    return {'name': name, 'kind': kind, 'file': filename,
+            'n_features': int(getattr(model, 'n_features_in_', 0))}
+
+
+def save_model_artifact(path: str,
+                        models,
+                        weights: Optional[Dict[str, float]] = None,
+                        scaler_X=None,
+                        scaler_y=None,
+                        feature_names: Optional[List[str]] = None,
+                        metadata: Optional[Dict[str, Any]] = None) -> str:
+    """
+    学習済みモデルを成果物形式で保存する
+
+    Parameters
+    ----------
+    path : str
+        保存先ディレクトリ
+    models : Any or Dict[str, Any]
+        単一モデル、またはアンサンブル（モデル名 -> モデル）
+    weights : Dict[str, float], optional
+        アンサンブル重み（省略時は均等）
+    scaler_X, scaler_y : StandardScaler, optional
+        特徴量・目的変数のスケーラー
+    feature_names : List[str], optional
+        特徴量名
+    metadata : Dict[str, Any], optional
+        学習スコアなどJSONに保存できる付加情報
+
+    Returns
+    -------
+    str
+        マニフェストファイルのパス
+    """
+    os.makedirs(path, exist_ok=True)
+
+    if not isinstance(models, dict):
+        models = {'model': models}
+    if weights is None:
+        weights = {name: 1.0 / len(models) for name in models}
+
+    members = []
+    for name, model in models.items():
+        entry = _save_member(path, name, model)
+        entry['weight'] = float(weights[name])
+        members.append(entry)
+
+    scalers = {}
+    for prefix, scaler in [('X', scaler_X), ('y', scaler_y)]:
+        if scaler is not None:
+            scalers[f'{prefix}_mean'] = np.asarray(scaler.mean_, dtype=np.float64)
+            scalers[f'{prefix}_scale'] = np.asarray(scaler.scale_, dtype=np.float64)
+            scalers[f'{prefix}_var'] = np.asarray(scaler.var_, dtype=np.float64)
+            scalers[f'{prefix}_n_samples_seen'] = np.asarray(scaler.n_samples_seen_)
+    if scalers:
+        np.savez(os.path.join(path, SCALERS_FILE), **scalers)
+
+    manifest = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'created_at': datetime.now().isoformat(),
+        'members': members,
+        'scalers': SCALERS_FILE if scalers else None,
+        'feature_names': list(feature_names) if feature_names is not None else None,
+        'metadata': metadata or {}
+    }
+
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, default=_json_default)
+
+    return manifest_path
+
+
+def _json_default(value):
+    """numpy型・日時をJSONに変換する"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"JSONに変換できない値です: {type(value).__name__}")
+
+
+def artifact_exists(path: str) -> bool:
+    """pathに成果物が保存されているか"""
+    return os.path.exists(os.path.join(path, MANIFEST_FILE))
+
+
+def artifact_size(path: str) -> int:
+    """成果物の合計サイズ（バイト）"""
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+# ---------------------------------------------------------------------------
+# 読み込み・予測
+# ---------------------------------------------------------------------------
+
+class ArrayScaler:
+    """StandardScalerのパラメータのみを持つ変換器"""
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray, var: np.ndarray, n_samples_seen):
+        self.mean_ = mean
+        self.scale_ = scale
+        self.var_ = var
+        self.n_samples_seen_ = n_samples_seen
+        self.n_features_in_ = len(mean)
+
+    def transform(self, X) -> np.ndarray:
+        X = np.array(X, dtype=np.float64)
+        X -= self.mean_
+        X /= self.scale_
+        return X
+
+    def inverse_transform(self, X) -> np.ndarray:
+        X = np.array(X, dtype=np.float64)
+        X *= self.scale_
+        X += self.mean_
+        return X
+
+
+class TreeEnsembleModel:
+    """
+    ノード配列から読み込んだ決定木アンサンブル
+
+    全ての木を同時に根から葉までたどるため、反復回数は木の深さで済む。
+    RandomForestは木の平均、GradientBoostingは初期値+学習率×木の和を返す。
+    """
+
+    def __init__(self, path: str, kind: str):
+        arrays = np.load(path)
+        self.kind = kind
+        self.offsets = arrays['offsets']
+        # 子ノード番号は木ごとの番号なので、連結後の通し番号に変換しておく
+        node_offsets = np.repeat(self.offsets[:-1], np.diff(self.offsets))
+        self.children_left = arrays['children_left'] + node_offsets
+        self.children_right = arrays['children_right'] + node_offsets
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.missing_go_to_left = arrays['missing_go_to_left'].astype(bool)
+        self.value = arrays['value']
+        self.max_depth = int(arrays['max_depth'])
+        self.is_leaf = arrays['children_left'] < 0
+        if kind == 'gradient_boosting':
+            self.init = float(arrays['init'][0])
+            self.learning_rate = float(arrays['learning_rate'])
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.offsets) - 1
+
+    def apply(self, X) -> np.ndarray:
+        """各サンプルが到達する葉のノード番号（サンプル数 x 木の数）"""
+        # scikit-learnと同様にfloat32に変換した値で分岐を判定する
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.offsets[:-1], (len(X), self.n_trees)).copy()
+
+        for _ in range(self.max_depth):
+            active = ~self.is_leaf[nodes]
+            if not active.any():
+                break
+            values = X[rows, self.feature[nodes]]
+            go_left = np.where(np.isnan(values), self.missing_go_to_left[nodes],
+                               values <= self.threshold[nodes])
+            child = np.where(go_left, self.children_left[nodes], self.children_right[nodes])
+            nodes = np.where(active, child, nodes)
+
+        return nodes
+
+    def predict(self, X) -> np.ndarray:
+        leaf_values = self.value[self.apply(X)]
+
+        # scikit-learnと同じ順序（木の順）で累積する
+        if self.kind == 'gradient_boosting':
+            prediction = np.full(len(leaf_values), self.init)
+            for t in range(self.n_trees):
+                prediction += self.learning_rate * leaf_values[:, t]
+            return prediction
+
+        prediction = np.zeros(len(leaf_values))
+        for t in range(self.n_trees):
+            prediction += leaf_values[:, t]
+        return prediction / self.n_trees
+
+
+class _XGBoostModel:
+    """XGBoostブースターの予測ラッパー"""
+
+    def __init__(self, path: str):
+        import xgboost as xgb
+        self.booster = xgb.Booster(model_file=path)
+
+    def predict(self, X) -> np.ndarray:
+        return self.booster.inplace_predict(np.asarray(X))
+
+
+class _LightGBMModel:
+    """LightGBMブースターの予測ラッパー"""
+
+    def __init__(self, path: str):
+        import lightgbm as lgb
+        self.booster = lgb.Booster(model_file=path)
+
+    def predict(self, X) -> np.ndarray:
+        return self.booster.predict(np.asarray(X))
+
+
+class ModelArtifact:
+    """
+    成果物形式で保存されたモデルの遅延読み込み
+
+    生成時はmanifest.jsonのみを読み、スケーラーと各モデルは最初に使う時点で読み込む。
+    """
+
+    def __init__(self, path: str):
+        """
+        初期化
+
+        Parameters
+        ----------
+        path : str
+            成果物のディレクトリ
+        """
+        self.path = path
+        with open(os.path.join(path, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+
+        if self.manifest.get('format_version', 0) > ARTIFACT_FORMAT_VERSION:
+            raise ValueError(f"未対応の成果物形式バージョンです: {self.manifest['format_version']}")
+
+        self._models: Dict[str, Any] = {}
+        self._scalers: Optional[Dict[str, Optional[ArrayScaler]]] = None
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self.manifest['metadata']
+
+    @property
+    def feature_names(self) -> Optional[List[str]]:
+        return self.manifest['feature_names']
+
+    @property
+    def weights(self) -> Dict[str, float]:
+        return {member['name']: member['weight'] for member in self.manifest['members']}
+
+    def model(self, name: Optional[str] = None):
+        """
+        モデルを取得する（初回のみファイルから読み込む）
+
+        Parameters
+        ----------
+        name : str, optional
+            モデル名（省略時は最初のモデル）
+
+        Returns
+        -------
+        Any
+            predict(X_scaled)を持つモデル
+        """
+        members = {member['name']: member for member in self.manifest['members']}
+        member = members[name] if name is not None else self.manifest['members'][0]
+
+        if member['name'] not in self._models:
+            file_path = os.path.join(self.path, member['file'])
+            if member['kind'] == 'xgboost':
+                self._models[member['name']] = _XGBoostModel(file_path)
+            elif member['kind'] == 'lightgbm':
+                self._models[member['name']] = _LightGBMModel(file_path)
+            else:
+                self._models[member['name']] = TreeEnsembleModel(file_path, member['kind'])
+
+        return self._models[member['name']]
+
+    def _load_scalers(self) -> Dict[str, Optional[ArrayScaler]]:
+        if self._scalers is None:
+            self._scalers = {'X': None, 'y': None}
+            if self.manifest['scalers']:
+                arrays = np.load(os.path.join(self.path, self.manifest['scalers']))
+                for prefix in ('X', 'y'):
+                    if f'{prefix}_mean' in arrays:
+                        self._scalers[prefix] = ArrayScaler(
+                            arrays[f'{prefix}_mean'], arrays[f'{prefix}_scale'],
+                            arrays[f'{prefix}_var'], arrays[f'{prefix}_n_samples_seen']
+                        )
+        return self._scalers
+
+    @property
+    def scaler_X(self) -> Optional[ArrayScaler]:
+        return self._load_scalers()['X']
+
+    @property
+    def scaler_y(self) -> Optional[ArrayScaler]:
+        return self._load_scalers()['y']
+
+    def predict(self, X) -> np.ndarray:
+        """
+        特徴量から予測値を計算する（スケーリング・重み付け・逆スケーリング込み）
+
+        Parameters
+        ----------
+        X : np.ndarray
+            特徴量（スケーリング前）
+
+        Returns
+        -------
+        np.ndarray
+            予測値（元のスケール）
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if self.scaler_X is not None:
+            X = self.scaler_X.transform(X)
+
+        prediction = sum(member['weight'] * self.model(member['name']).predict(X)
+                         for member in self.manifest['members'])
+        prediction = np.asarray(prediction, dtype=np.float64)
+
+        if self.scaler_y is not None:
+            prediction = self.scaler_y.inverse_transform(prediction.reshape(-1, 1)).ravel()
+
+        return prediction
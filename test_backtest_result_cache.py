@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+バックテスト結果キャッシュテスト
+保存した結果（統計・取引履歴・月別パフォーマンス・評価額の履歴）を同じ値で読み込めることと、
+戦略のソース・戦略が利用するモジュール・設定・データファイルが変わるとキーが変わることと、
+キャッシュからの読み込みが再実行より速いことを確認する
+"""
+
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.backtest.result_cache import BacktestResultCache, data_manifest, result_key, strategy_modules
+from src.backtest.trade_executor import TradeExecutor
+
+
+def make_data(n: int, seed: int = 0) -> pd.DataFrame:
+    """ランダムウォークの15分足"""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2024-01-01', periods=n, freq='15min')
+    close = 150 + np.cumsum(rng.normal(0, 0.03, n))
+    return pd.DataFrame({'Close': close}, index=index)
+
+
+def alternating_strategy(data: pd.DataFrame, executor: TradeExecutor, metadata: dict):
+    """一定間隔で売買を交互に発注する戦略"""
+    close = data['Close'].to_numpy()
+    interval = metadata.get('interval', 40)
+    for i, timestamp in enumerate(data.index):
+        price = float(close[i])
+        executor.check_positions(price, timestamp)
+        if i % interval == 0:
+            executor.open_position(1 if (i // interval) % 2 else -1, price, 0.1, 20, 30, timestamp,
+                                   strategy='alternating')
+        executor.update_equity(price)
+
+
+def other_strategy(data: pd.DataFrame, executor: TradeExecutor, metadata: dict):
+    """買いのみの戦略"""
+    close = data['Close'].to_numpy()
+    for i, timestamp in enumerate(data.index):
+        executor.check_positions(float(close[i]), timestamp)
+        if i % 40 == 0:
+            executor.open_position(1, float(close[i]), 0.1, 20, 30, timestamp)
+
+
+def run(data: pd.DataFrame, config: dict) -> TradeExecutor:
+    executor = TradeExecutor(initial_balance=3000000, max_positions=10)
+    alternating_strategy(data, executor, config)
+    return executor
+
+
+def same_records(left, right) -> bool:
+    """取引履歴の辞書の一致（NaNは同じ値とみなす）"""
+    if len(left) != len(right):
+        return False
+    for a, b in zip(left, right):
+        if a.keys() != b.keys():
+            return False
+        for key in a:
+            x, y = a[key], b[key]
+            if isinstance(x, float) and isinstance(y, float) and np.isnan(x) and np.isnan(y):
+                continue
+            if x != y:
+                return False
+    return True
+
+
+def test_round_trip(directory: str) -> bool:
+    """保存した結果と読み込んだ結果の一致"""
+    data = make_data(60000)
+    config = {'interval': 40}
+    executor = run(data, config)
+
+    cache = BacktestResultCache(directory)
+    key = result_key(alternating_strategy, config, [])
+    path = cache.store(key, executor, 'round_trip', config)
+    cached = cache.load(key)
+
+    same_stats = cached.get_statistics() == executor.get_statistics()
+    same_trades = same_records(list(cached.trade_history), list(executor.trade_history))
+    try:
+        pd.testing.assert_frame_equal(cached.get_monthly_performance(), executor.get_monthly_performance())
+        same_monthly = True
+    except AssertionError:
+        same_monthly = False
+    same_history = (np.array_equal(cached.equity_history, executor.equity_history) and
+                    np.array_equal(cached.balance_history, executor.balance_history) and
+                    np.array_equal(cached.get_drawdown_series(), executor.get_drawdown_series()))
+    same_index = cache.lookup('round_trip') == key and cache.statistics('round_trip') == executor.get_statistics()
+
+    size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    csv_size = (len(pd.DataFrame(list(executor.trade_history)).to_csv(index=False).encode()) +
+                len(pd.DataFrame({'equity': executor.equity_history,
+                                  'balance': executor.balance_history}).to_csv(index=False).encode()))
+    print(f"  取引 {len(cached.trade_history)}件・評価額 {len(cached.equity_history)}点"
+          f"  保存サイズ {size / 1024:.0f}KB（CSVの場合 {csv_size / 1024:.0f}KB）")
+    print(f"  統計: {same_stats}  取引履歴: {same_trades}  月別: {same_monthly}"
+          f"  評価額・残高: {same_history}  テスト名の索引: {same_index}")
+    return same_stats and same_trades and same_monthly and same_history and same_index
+
+
+def test_key_sensitivity(directory: str) -> bool:
+    """戦略のソース・設定・データファイルの変更とキー"""
+    data_dir = os.path.join(directory, 'data')
+    os.makedirs(data_dir)
+    data_files = {'15min': {}}
+    for year in (2023, 2024):
+        path = os.path.join(data_dir, f'USDJPY_15min_{year}.csv')
+        make_data(100, seed=year).to_csv(path)
+        data_files['15min'][year] = path
+
+    config = {'interval': 40}
+    base = result_key(alternating_strategy, config, data_manifest(data_files), {'setup': 'basic'})
+    checks = {
+        '同じ入力で同じキー': result_key(alternating_strategy, dict(config), data_manifest(data_files),
+                                 {'setup': 'basic'}) == base,
+        '設定の変更': result_key(alternating_strategy, {'interval': 50}, data_manifest(data_files),
+                            {'setup': 'basic'}) != base,
+        '戦略の変更': result_key(other_strategy, config, data_manifest(data_files), {'setup': 'basic'}) != base,
+        '環境の変更': result_key(alternating_strategy, config, data_manifest(data_files),
+                            {'setup': 'enhanced'}) != base,
+        '対象年の変更': result_key(alternating_strategy, config, data_manifest(data_files, [2024]),
+                             {'setup': 'basic'}) != base,
+    }
+
+    # データファイルの更新
+    path = data_files['15min'][2024]
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    checks['データの更新'] = result_key(alternating_strategy, config, data_manifest(data_files),
+                                 {'setup': 'basic'}) != base
+
+    for name, ok in checks.items():
+        print(f"  {name}: {ok}")
+    return all(checks.values())
+
+
+HELPER_SOURCE = """
+def interval(metadata):
+    return metadata.get('interval', {default})
+"""
+
+INDICATOR_SOURCE = """
+WINDOW = {window}
+"""
+
+STRATEGY_SOURCE = """
+import cache_dep_indicator
+from cache_dep_helper import interval
+
+
+def dependent_strategy(data, executor, metadata):
+    step = interval(metadata)
+    close = data['Close'].to_numpy()
+    for i, timestamp in enumerate(data.index):
+        executor.check_positions(float(close[i]), timestamp)
+        if i % step == cache_dep_indicator.WINDOW:
+            executor.open_position(1, float(close[i]), 0.1, 20, 30, timestamp)
+"""
+
+
+def write_module(directory: str, name: str, source: str):
+    with open(os.path.join(directory, f'{name}.py'), 'w', encoding='utf-8') as f:
+        f.write(source)
+
+
+def test_dependency_change(directory: str) -> bool:
+    """戦略が利用するモジュール（別ファイル）の変更でキャッシュを使わない"""
+    write_module(directory, 'cache_dep_helper', HELPER_SOURCE.format(default=40))
+    write_module(directory, 'cache_dep_indicator', INDICATOR_SOURCE.format(window=0))
+    write_module(directory, 'cache_dep_strategy', STRATEGY_SOURCE)
+    sys.path.insert(0, directory)
+    try:
+        strategy = importlib.import_module('cache_dep_strategy').dependent_strategy
+        modules = sorted(strategy_modules(strategy))
+
+        data = make_data(2000, seed=4)
+        executor = TradeExecutor(initial_balance=3000000, max_positions=10)
+        strategy(data, executor, {})
+        cache = BacktestResultCache(os.path.join(directory, 'cache'))
+        key = result_key(strategy, {}, [])
+        cache.store(key, executor, 'dependency', {})
+        hit = cache.load(result_key(strategy, {}, [])) is not None
+
+        # 関数のimport先・モジュールのimport先をそれぞれ書き換える
+        write_module(directory, 'cache_dep_helper', HELPER_SOURCE.format(default=50))
+        helper_key = result_key(strategy, {}, [])
+        helper_miss = helper_key != key and cache.load(helper_key) is None
+        write_module(directory, 'cache_dep_indicator', INDICATOR_SOURCE.format(window=1))
+        indicator_key = result_key(strategy, {}, [])
+        indicator_miss = indicator_key not in (key, helper_key) and cache.load(indicator_key) is None
+    finally:
+        sys.path.remove(directory)
+        for name in ('cache_dep_strategy', 'cache_dep_helper', 'cache_dep_indicator'):
+            sys.modules.pop(name, None)
+
+    # インストール済みパッケージ（numpy・pandas）は含めない
+    library_free = not any(name.split('.')[0] in ('numpy', 'pandas') for name in strategy_modules(run))
+
+    ok = (modules == ['cache_dep_helper', 'cache_dep_indicator', 'cache_dep_strategy'] and
+          hit and helper_miss and indicator_miss and library_free)
+    print(f"  対象モジュール: {modules}")
+    print(f"  変更なしで再利用: {hit}  補助関数の変更でミス: {helper_miss}"
+          f"  参照モジュールの変更でミス: {indicator_miss}  パッケージを除外: {library_free}")
+    return ok
+
+
+def test_speed(directory: str) -> bool:
+    """再実行とキャッシュからの読み込みの時間"""
+    data = make_data(100000, seed=3)
+    config = {'interval': 30}
+    cache = BacktestResultCache(directory)
+
+    start = time.perf_counter()
+    executor = run(data, config)
+    key = result_key(alternating_strategy, config, [])
+    cache.store(key, executor, 'speed', config)
+    run_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    key = result_key(alternating_strategy, config, [])
+    cached = cache.load(key)
+    stats = cached.get_statistics()
+    cached.get_monthly_performance()
+    load_time = time.perf_counter() - start
+
+    print(f"  {len(data)}バー・取引 {stats['total_trades']}件: 実行 {run_time:.2f}秒 → キャッシュ {load_time * 1e3:.1f}ms")
+    return load_time < run_time / 10
+
+
+def test_backtest_result_cache():
+    """バックテスト結果キャッシュテスト"""
+
+    print("=" * 60)
+    print("バックテスト結果キャッシュテスト")
+    print("=" * 60)
+
+    results = []
+    for name, test in [('保存と読み込み', test_round_trip),
+                       ('キー', test_key_sensitivity),
+                       ('戦略が利用するモジュール', test_dependency_change),
+                       ('実行時間', test_speed)]:
+        directory = tempfile.mkdtemp()
+        try:
+            print(f"\n{name}:")
+            results.append(test(directory))
+        finally:
+            shutil.rmtree(directory)
+
+    print("\n" + "=" * 60)
+    print("結果: " + ("全て成功" if all(results) else "失敗あり"))
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = test_backtest_result_cache()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+一括予測テスト
+事前計算済み特徴量の複数行をまとめて予測した結果（predict_rows / prefetch_predictions）が、
+直近データを渡して1行ずつ予測した結果（OptimizedMLPredictor.predict_fast・
+LightweightMLPredictor.predict）と一致することを確認する
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.strategies.lightweight_ml_predictor_strategy import LightweightMLPredictor
+from src.strategies.optimized_ml_predictor_strategy import OptimizedMLPredictor
+
+TRAIN_END = 3000
+EVAL_ROWS = list(range(3000, 3060))
+TOLERANCE = 1e-10
+
+
+def load_test_data(year: int = 2024, rows: int = 3200) -> pd.DataFrame:
+    """15分足データを読み込む"""
+    data_path = f"data/processed/15min/{year}/USDJPY_15min_{year}.csv"
+    df = pd.read_csv(data_path, index_col='Datetime', parse_dates=True)
+    return df[['Open', 'High', 'Low', 'Close', 'Volume']].iloc[:rows]
+
+
+def compare(name: str, single, batch, single_time: float, batch_time: float) -> bool:
+    """1行ずつの予測と一括予測の比較"""
+    single = np.asarray(single, dtype=float)
+    batch = np.asarray(batch, dtype=float)
+    max_diff = np.max(np.abs(single - batch))
+    ok = single.shape == batch.shape and np.all(np.isfinite(batch)) and max_diff <= TOLERANCE
+    print(f"  [{'OK' if ok else 'NG'}] {name}: {len(single)}行  最大誤差 {max_diff:.2e}"
+          f"  1行ずつ {single_time:.2f}秒 → 一括 {batch_time * 1e3:.1f}ms")
+    return ok
+
+
+def test_optimized(data: pd.DataFrame, model_dir: str) -> bool:
+    """OptimizedMLPredictor: predict_rows・prefetch_predictionsとpredict_fast"""
+    strategy = OptimizedMLPredictor(model_dir=model_dir)
+    with redirect_stdout(StringIO()):
+        strategy.precompute_features(data)
+        strategy.train_model(data.iloc[:TRAIN_END])
+
+    start = time.perf_counter()
+    single = [strategy.predict_fast(data.iloc[:row + 1]) for row in EVAL_ROWS]
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predictions, confidences = strategy.predict_rows(EVAL_ROWS)
+    batch_time = time.perf_counter() - start
+
+    strategy.prediction_cache = {}
+    strategy.prefetch_predictions(EVAL_ROWS)
+    prefetched = [strategy.predict_fast(row) for row in EVAL_ROWS]
+
+    ok = compare("予測値（predict_rows）", [p for p, _ in single], predictions, single_time, batch_time)
+    ok &= compare("信頼度（predict_rows）", [c for _, c in single], confidences, single_time, batch_time)
+    ok &= compare("prefetch_predictions → predict_fast(行番号)", single, prefetched, single_time, batch_time)
+    return ok
+
+
+def test_lightweight(data: pd.DataFrame, model_dir: str) -> bool:
+    """LightweightMLPredictor: predict_rows・prefetch_predictionsとpredict"""
+    strategy = LightweightMLPredictor(model_dir=model_dir)
+    with redirect_stdout(StringIO()):
+        strategy.precompute_features(data)
+        strategy.train_model_on_rows(0, TRAIN_END)
+
+    start = time.perf_counter()
+    single = [strategy.predict(data.iloc[:row + 1]) for row in EVAL_ROWS]
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predictions, confidences = strategy.predict_rows(EVAL_ROWS)
+    batch_time = time.perf_counter() - start
+
+    strategy.prediction_cache = {}
+    strategy.prefetch_predictions(EVAL_ROWS)
+    prefetched = [strategy.predict(row) for row in EVAL_ROWS]
+
+    ok = compare("予測値（predict_rows）", [p for p, _ in single], predictions, single_time, batch_time)
+    ok &= compare("信頼度（predict_rows）", [c for _, c in single], confidences, single_time, batch_time)
+    ok &= compare("prefetch_predictions → predict(行番号)", single, prefetched, single_time, batch_time)
+    return ok
+
+
+def test_batch_prediction():
+    """一括予測テスト"""
+
+    print("=" * 60)
+    print("一括予測テスト")
+    print("=" * 60)
+
+    data = load_test_data()
+    print(f"データ: {len(data)}レコード  学習: 先頭{TRAIN_END}行  評価: {len(EVAL_ROWS)}行")
+
+    results = []
+    for name, test in [('OptimizedMLPredictor', test_optimized),
+                       ('LightweightMLPredictor', test_lightweight)]:
+        model_dir = tempfile.mkdtemp()
+        try:
+            print(f"\n{name}:")
+            results.append(test(data, model_dir))
+        finally:
+            shutil.rmtree(model_dir)
+
+    print("\n" + "=" * 60)
+    print("結果: " + ("全て成功" if all(results) else "失敗あり"))
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = test_batch_prediction()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+データ品質チェックテスト
+EnhancedDataManager._validate_data_quality が問題のある行（NaN・0以下・異常な価格変動・
+OHLCの矛盾・重複時刻）だけを理由ごとに数えて除去することと、除去せずにフラグを付けられること、
+1分足25年分を短時間で処理できることを確認する
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.data.enhanced_data_manager import EnhancedDataManager, QUALITY_FLAGS
+
+
+def make_data(n: int, freq: str = '15min', seed: int = 0) -> pd.DataFrame:
+    """ランダムウォークのOHLC"""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2000-01-01', periods=n, freq=freq)
+    close = 110 + np.cumsum(rng.normal(0, 0.01, n))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = np.abs(rng.normal(0, 0.01, n))
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) + spread,
+        'Low': np.minimum(open_, close) - spread,
+        'Close': close,
+    }, index=index)
+
+
+def legacy_validate(data: pd.DataFrame) -> pd.DataFrame:
+    """変更前の品質チェック（列ごとに絞り込みを繰り返す）"""
+    data = data.dropna(subset=['Open', 'High', 'Low', 'Close'])
+    for col in ['Open', 'High', 'Low', 'Close']:
+        data = data[data[col] > 0]
+        pct_change = data[col].pct_change()
+        data = data[abs(pct_change) < 0.5]
+    valid_ohlc = ((data['Low'] <= data['Open']) & (data['Low'] <= data['Close']) &
+                  (data['High'] >= data['Open']) & (data['High'] >= data['Close']))
+    data = data[valid_ohlc]
+    return data[~data.index.duplicated(keep='first')]
+
+
+def make_faulty_data() -> pd.DataFrame:
+    """問題のある行を含むデータ"""
+    data = make_data(1000)
+    data.iloc[100, data.columns.get_loc('Close')] = np.nan      # NaN
+    data.iloc[200, data.columns.get_loc('Low')] = 0.0           # 0以下
+    data.iloc[300, :] = data.iloc[300] * 3                      # 1本だけの異常値（次の行は正常）
+    data.iloc[400, data.columns.get_loc('High')] = data['Low'].iloc[400] - 0.1  # OHLCの矛盾
+    index = data.index.to_numpy().copy()
+    index[501] = index[500]                                     # 重複時刻
+    index[601] = index[600]                                     # 最初の行がNaNの重複時刻
+    data.index = pd.DatetimeIndex(index)
+    data.iloc[600, data.columns.get_loc('Open')] = np.nan
+    return data
+
+
+def test_reasons() -> bool:
+    """理由ごとの件数と除去される行"""
+    data = make_faulty_data()
+    manager = EnhancedDataManager()
+    cleaned = manager._validate_data_quality(data)
+    report = manager.quality_report
+
+    expected = {'missing': 2, 'non_positive': 1, 'price_change': 1, 'ohlc': 1, 'duplicate': 1}
+    expected_removed = [data.index[i] for i in (100, 200, 300, 400)]
+    kept = [data.index[0], data.index[301], data.index[601]]
+    ok = (report['reasons'] == expected and report['removed'] == 6 and len(cleaned) == 994 and
+          all(ts not in cleaned.index for ts in expected_removed) and all(ts in cleaned.index for ts in kept) and
+          cleaned.index.is_unique)
+
+    legacy = legacy_validate(data)
+    print(f"  理由ごとの件数: {report['reasons']}")
+    print(f"  除去 {report['removed']}行（変更前の実装は {len(data) - len(legacy)}行、"
+          f"最初の行と異常値の次の行も除去）  正しい行のみ除去: {ok}")
+    return ok
+
+
+def test_flag_mode() -> bool:
+    """除去せずにフラグを付ける"""
+    data = make_faulty_data()
+    manager = EnhancedDataManager()
+    flagged = manager._validate_data_quality(data, drop=False)
+    dropped = manager._validate_data_quality(data)
+
+    flags = flagged['quality_flags']
+    ok = (len(flagged) == len(data) and 'quality_flags' not in data.columns and
+          flagged[flags == 0].drop(columns='quality_flags').equals(dropped) and
+          int(flags.iloc[300]) == QUALITY_FLAGS['price_change'] and
+          int(flags.iloc[600]) == QUALITY_FLAGS['missing'])
+    print(f"  全{len(flagged)}行を残す: {len(flagged) == len(data)}"
+          f"  フラグ0の行が除去の結果と一致: {ok}")
+    return ok
+
+
+def test_order_independence() -> bool:
+    """列順を変えても結果が変わらない"""
+    data = make_faulty_data()
+    manager = EnhancedDataManager()
+    first = manager._validate_data_quality(data)
+    reordered = manager._validate_data_quality(data[['Close', 'Low', 'High', 'Open']])
+    ok = first.index.equals(reordered.index)
+    print(f"  列順によらず同じ行を除去: {ok}")
+    return ok
+
+
+def test_speed() -> bool:
+    """1分足25年分の処理時間"""
+    data = make_data(25 * 260 * 1440, freq='1min', seed=1)
+    manager = EnhancedDataManager()
+
+    start = time.perf_counter()
+    manager._validate_data_quality(data)
+    new_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    legacy_validate(data)
+    legacy_time = time.perf_counter() - start
+
+    print(f"  {len(data)}行: 変更前 {legacy_time:.2f}秒 → {new_time:.2f}秒")
+    return new_time < legacy_time and new_time < 5
+
+
+def test_data_quality():
+    """データ品質チェックテスト"""
+
+    print("=" * 60)
+    print("データ品質チェックテスト")
+    print("=" * 60)
+
+    results = []
+    for name, test in [('理由ごとの除去', test_reasons),
+                       ('フラグのみ', test_flag_mode),
+                       ('判定の順序', test_order_independence),
+                       ('処理時間', test_speed)]:
+        print(f"\n{name}:")
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print("結果: " + ("全て成功" if all(results) else "失敗あり"))
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = test_data_quality()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+準備済みデータセットのキャッシュテスト
+EnhancedDataManager.get_strategy_dataがディスク・メモリのキャッシュから同じデータを返すことと、
+別のマネージャー（get_backtest_dataのように毎回作成される場合）でもメモリのキャッシュを使うこと、
+返すデータがキャッシュを書き換えない読み取り専用のビューであること、
+元データファイルが更新されると作り直して古いデータセットを削除することと、
+保存形式が列の型・インデックスの単位を保ち、保てない列は保存しないことを確認する
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.data.auto_data_collector import ensure_required_data
+from src.data.dataset_cache import load_frame, save_frame
+from src.data.enhanced_data_manager import EnhancedDataManager
+
+YEARS = [2022, 2023, 2024, 2025]
+
+
+def make_manager(cache_dir: str) -> EnhancedDataManager:
+    manager = EnhancedDataManager()
+    manager.dataset_cache.root = cache_dir
+    return manager
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def test_tiers(cache_dir: str) -> bool:
+    """初回（CSV・指標計算）・メモリ・ディスクのキャッシュの一致と時間"""
+    make_manager(cache_dir).clear_cache()
+
+    cold, cold_time = timed(lambda: make_manager(cache_dir).get_strategy_data('15min', YEARS))
+    memory, memory_time = timed(lambda: make_manager(cache_dir).get_strategy_data('15min', YEARS))
+    make_manager(cache_dir).clear_cache()
+    disk, disk_time = timed(lambda: make_manager(cache_dir).get_strategy_data('15min', YEARS))
+
+    same = True
+    for cached in (memory, disk):
+        try:
+            pd.testing.assert_frame_equal(cached, cold)
+        except AssertionError:
+            same = False
+
+    print(f"  {len(cold)}行 × {len(cold.columns)}列: 初回 {cold_time * 1e3:.0f}ms → メモリ {memory_time * 1e3:.1f}ms"
+          f" / ディスク {disk_time * 1e3:.1f}ms  一致: {same}")
+    return same and memory_time < cold_time and disk_time < cold_time
+
+
+def test_read_only_view(cache_dir: str) -> bool:
+    """返すデータはキャッシュを書き換えない"""
+    manager = make_manager(cache_dir)
+    view = manager.get_strategy_data('15min', YEARS)
+    original_close = view['Close'].to_numpy().copy()
+
+    # 列の置き換え・追加はビューのみ
+    view['Close'] = view['Close'] * 2
+    view['signal'] = 0
+    view.loc[view.index[0], 'signal'] = 1
+
+    # 既存の列の値をその場で書き換えるとエラー
+    other = manager.get_strategy_data('15min', YEARS)
+    try:
+        other.loc[other.index[0], 'Open'] = 0.0
+        in_place_blocked = False
+    except ValueError:
+        in_place_blocked = True
+
+    again = manager.get_strategy_data('15min', YEARS)
+    unchanged = (np.array_equal(again['Close'].to_numpy(), original_close) and 'signal' not in again.columns and
+                 again['Open'].iloc[0] != 0.0)
+    shares_memory = np.shares_memory(again['High'].to_numpy(), other['High'].to_numpy())
+
+    # コピーすれば書き換えられる
+    copied = again.copy()
+    copied.loc[copied.index[0], 'Open'] = 0.0
+
+    print(f"  キャッシュは変わらない: {unchanged}  その場の書き換えはエラー: {in_place_blocked}"
+          f"  ビュー同士で配列を共有: {shares_memory}")
+    return unchanged and in_place_blocked and shares_memory
+
+
+def test_invalidation(cache_dir: str) -> bool:
+    """元データファイルの更新でキーが変わる"""
+    manager = make_manager(cache_dir)
+    data = manager.get_strategy_data('15min', YEARS)
+    cache_key = f"15min_{sorted(YEARS)}_None_True_True"
+    data_files = ensure_required_data(['15min'], YEARS)
+    before = manager.dataset_cache.key(cache_key, data_files, YEARS)
+    other_key = manager.dataset_cache.key('other', data_files, YEARS)
+    manager.dataset_cache.put(other_key, data.iloc[:10], 'other')
+
+    path = data_files['15min'][2024]
+    stat = os.stat(path)
+    try:
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        after = manager.dataset_cache.key(cache_key, data_files, YEARS)
+        rebuilt = manager.dataset_cache.get(after) is None
+        # 作り直したデータセットを保存すると古いキーのディレクトリは削除される
+        manager.dataset_cache.put(after, data, cache_key)
+    finally:
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    remaining = set(os.listdir(cache_dir))
+    pruned = remaining == {after, other_key}
+
+    restored = manager.dataset_cache.key(cache_key, data_files, YEARS) == before
+    other_years = manager.dataset_cache.key(cache_key, data_files, [2024, 2025]) != before
+    ok = before != after and rebuilt and pruned and restored and other_years
+    print(f"  更新でキーが変わる: {before != after}  更新後は作り直す: {rebuilt}"
+          f"  古いキーを削除（他のcache_keyは残す）: {pruned}  対象年でキーが変わる: {other_years}")
+    return ok
+
+
+def test_frame_round_trip(cache_dir: str) -> bool:
+    """数値以外の列・タイムゾーン付きインデックスの保存と読み込み"""
+    index = pd.date_range('2024-01-01', periods=50, freq='15min', tz='Asia/Tokyo', name='time')
+    data = pd.DataFrame({
+        'Close': np.linspace(150, 151, 50),
+        'volume': np.arange(50),
+        'flag': np.arange(50) % 2 == 0,
+        'session': ['tokyo', 'london'] * 25,
+        'note': ['a', None] * 25,
+        'opened': pd.date_range('2024-01-01', periods=50, freq='h', tz='America/New_York', unit='s'),
+        'closed': pd.date_range('2024-01-01', periods=50, freq='h', unit='ms'),
+        'regime': pd.Categorical(['trend', 'range', 'trend', 'volatile', 'range'] * 10,
+                                 categories=['range', 'trend', 'volatile'], ordered=True),
+        'level': pd.Categorical([1, 2, 3, 2, 1] * 10),
+    }, index=index)
+    data.loc[index[3], 'opened'] = pd.NaT
+    directory = os.path.join(cache_dir, 'frame')
+    save_frame(directory, data)
+    loaded = load_frame(directory)
+    try:
+        pd.testing.assert_frame_equal(loaded, data, check_freq=False)
+        same = True
+    except AssertionError:
+        same = False
+    print(f"  数値・真偽値・文字列・時刻（タイムゾーン付き）・カテゴリの列とタイムゾーン付きインデックス: {same}")
+
+    # ナノ秒以外の単位のインデックス（pandas 2のas_unit）
+    units = {}
+    for unit in ('s', 'ms', 'us'):
+        for tz in (None, 'Asia/Tokyo'):
+            unit_data = data.copy()
+            unit_data.index = (index.tz_localize(None) if tz is None else index).as_unit(unit)
+            unit_directory = os.path.join(cache_dir, f"frame_{unit}_{tz is not None}")
+            save_frame(unit_directory, unit_data)
+            try:
+                pd.testing.assert_frame_equal(load_frame(unit_directory), unit_data, check_freq=False)
+                units[f"{unit}{'+tz' if tz else ''}"] = True
+            except AssertionError:
+                units[f"{unit}{'+tz' if tz else ''}"] = False
+    print(f"  単位ごとのインデックス: {units}")
+
+    # 型を保てない列はディスクに保存しない（何も書き込まない）
+    refused = {}
+    for name, values in [('混在したオブジェクト', [{'a': 1}, 'b'] * 25),
+                         ('Timestampのオブジェクト', pd.Series(index, index=index, dtype=object)),
+                         ('null許容整数', pd.array(range(50), dtype='Int64'))]:
+        refused_directory = os.path.join(cache_dir, 'refused')
+        try:
+            save_frame(refused_directory, pd.DataFrame({'Close': data['Close'], 'value': values}))
+            refused[name] = False
+        except TypeError:
+            refused[name] = not os.path.exists(refused_directory)
+    print(f"  保存しない列: {refused}")
+    return same and all(units.values()) and all(refused.values())
+
+
+def test_dataset_cache():
+    """準備済みデータセットのキャッシュテスト"""
+
+    print("=" * 60)
+    print("準備済みデータセット キャッシュテスト")
+    print("=" * 60)
+
+    results = []
+    for name, test in [('キャッシュの段階', test_tiers),
+                       ('読み取り専用のビュー', test_read_only_view),
+                       ('元データの更新', test_invalidation),
+                       ('保存形式', test_frame_round_trip)]:
+        cache_dir = tempfile.mkdtemp()
+        try:
+            print(f"\n{name}:")
+            results.append(test(cache_dir))
+        finally:
+            EnhancedDataManager().dataset_cache.clear()
+            shutil.rmtree(cache_dir)
+
+    print("\n" + "=" * 60)
+    print("結果: " + ("全て成功" if all(results) else "失敗あり"))
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = test_dataset_cache()
+    sys.exit(0 if success else 1)
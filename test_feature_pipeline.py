@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+特徴量パイプラインテスト
+FeaturePipelineの結果が従来の1列ずつの計算と一致し、
+メモリ使用量と計算時間が削減されることを確認する
+"""
+
+import pandas as pd
+import numpy as np
+import os
+import sys
+import time
+import talib
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.strategies.feature_pipeline import (
+    build_extended_feature_pipeline, build_optimized_feature_pipeline
+)
+
+
+def reference_extended_features(data: pd.DataFrame) -> pd.DataFrame:
+    """従来のcreate_features_extended（pandasで1列ずつ計算）"""
+
+    features = pd.DataFrame(index=data.index)
+
+    # 基本価格データ
+    close = data['Close'] if 'Close' in data.columns else data['close']
+    high = data['High'] if 'High' in data.columns else data['high']
+    low = data['Low'] if 'Low' in data.columns else data['low']
+    open_price = data['Open'] if 'Open' in data.columns else data['open']
+    volume = data['Volume'] if 'Volume' in data.columns else pd.Series(index=data.index, data=1)
+
+    # === 1. 多期間リターン系特徴量 (8個) ===
+    for period in [3, 5, 8, 10, 15, 20, 30, 45]:
+        features[f'returns_{period}'] = close.pct_change(period)
+
+    # === 2. ボラティリティ系特徴量 (6個) ===
+    for period in [5, 10, 15, 20, 30, 45]:
+        features[f'volatility_{period}'] = close.pct_change().rolling(period).std()
+
+    # === 3. 価格位置・レンジ系特徴量 (4個) ===
+    for period in [10, 20, 30, 50]:
+        features[f'price_position_{period}'] = (close - low.rolling(period).min()) / (
+            high.rolling(period).max() - low.rolling(period).min() + 1e-8
+        )
+
+    # === 4. テクニカル指標群 (12個) ===
+    # RSI系
+    features['rsi_14'] = talib.RSI(close, timeperiod=14) / 100
+    features['rsi_21'] = talib.RSI(close, timeperiod=21) / 100
+    features['rsi_momentum'] = features['rsi_14'] - features['rsi_14'].shift(5)
+
+    # MACD系
+    macd_12_26, signal_12_26, _ = talib.MACD(close, fastperiod=12, slowperiod=26)
+    macd_8_21, signal_8_21, _ = talib.MACD(close, fastperiod=8, slowperiod=21)
+    features['macd_signal_12_26'] = (macd_12_26 - signal_12_26) / close
+    features['macd_signal_8_21'] = (macd_8_21 - signal_8_21) / close
+    features['macd_histogram'] = talib.MACD(close)[2] / close
+
+    # ボリンジャーバンド
+    bb_upper, bb_middle, bb_lower = talib.BBANDS(close, timeperiod=20, nbdevup=2, nbdevdn=2)
+    features['bb_position'] = (close - bb_lower) / (bb_upper - bb_lower + 1e-8)
+    features['bb_width'] = (bb_upper - bb_lower) / bb_middle
+
+    # ストキャスティクス
+    slowk, slowd = talib.STOCH(high, low, close, fastk_period=14, slowk_period=3, slowd_period=3)
+    features['stoch_k'] = slowk / 100
+    features['stoch_d'] = slowd / 100
+    features['stoch_momentum'] = (slowk - slowd) / 100
+
+    # === 5. 移動平均系特徴量 (8個) ===
+    for period in [5, 10, 15, 20, 30, 45, 60, 90]:
+        sma = talib.SMA(close, timeperiod=period)
+        features[f'sma_distance_{period}'] = (close - sma) / sma
+
+    # === 6. 高度なテクニカル指標 (6個) ===
+    # ATR系
+    features['atr_14'] = talib.ATR(high, low, close, timeperiod=14) / close
+    features['atr_21'] = talib.ATR(high, low, close, timeperiod=21) / close
+
+    # CCI (商品チャンネル指数)
+    features['cci'] = talib.CCI(high, low, close, timeperiod=14) / 100
+
+    # Williams %R
+    features['williams_r'] = talib.WILLR(high, low, close, timeperiod=14) / -100
+
+    # MFI (マネーフローインデックス)
+    features['mfi'] = talib.MFI(high, low, close, volume, timeperiod=14) / 100
+
+    # ADX (方向性指標)
+    features['adx'] = talib.ADX(high, low, close, timeperiod=14) / 100
+
+    # === 7. 価格パターン特徴量 (5個) ===
+    # 実体とヒゲの比率
+    body_size = abs(close - open_price)
+    upper_shadow = high - np.maximum(close, open_price)
+    lower_shadow = np.minimum(close, open_price) - low
+    total_range = high - low + 1e-8
+
+    features['body_ratio'] = body_size / total_range
+    features['upper_shadow_ratio'] = upper_shadow / total_range
+    features['lower_shadow_ratio'] = lower_shadow / total_range
+    features['doji_score'] = 1 - (body_size / total_range)
+
+    # 前日比較
+    features['gap'] = (open_price - close.shift(1)) / close.shift(1)
+
+    # === 8. モメンタム・オシレーター系 (4個) ===
+    features['momentum_10'] = close / close.shift(10) - 1
+    features['momentum_20'] = close / close.shift(20) - 1
+    features['roc_14'] = talib.ROC(close, timeperiod=14) / 100
+    features['trix'] = talib.TRIX(close, timeperiod=14) / 100
+
+    # === 9. 相関・統計特徴量 (2個) ===
+    # トレンド強度
+    features['trend_strength'] = talib.LINEARREG_SLOPE(close, timeperiod=14) / close
+
+    # 価格分散
+    features['price_dispersion'] = close.rolling(20).std() / close.rolling(20).mean()
+
+    # 欠損値処理（高速化のため前方補完のみ）
+    features = features.ffill().fillna(0)
+
+    return features
+
+
+def reference_optimized_features(data: pd.DataFrame) -> pd.DataFrame:
+    """従来のcreate_features_optimized（pandasで1列ずつ計算）"""
+
+    features = pd.DataFrame(index=data.index)
+
+    close = data['Close'] if 'Close' in data.columns else data['close']
+    high = data['High'] if 'High' in data.columns else data['high']
+    low = data['Low'] if 'Low' in data.columns else data['low']
+
+    # 最重要特徴量のみ（計算時間削減）
+    # 1. 価格リターン（3種類のみ）
+    features['returns_5'] = close.pct_change(5)
+    features['returns_10'] = close.pct_change(10)
+    features['returns_20'] = close.pct_change(20)
+
+    # 2. ボラティリティ（2種類のみ）
+    features['volatility_10'] = features['returns_5'].rolling(10).std()
+    features['volatility_20'] = features['returns_5'].rolling(20).std()
+
+    # 3. 価格位置（1種類のみ）
+    features['price_position'] = (close - low.rolling(20).min()) / (
+        high.rolling(20).max() - low.rolling(20).min() + 0.0001
+    )
+
+    # 4. テクニカル指標（最重要3つのみ）
+    # RSI
+    features['rsi'] = talib.RSI(close, timeperiod=14) / 100
+
+    # MACD
+    macd, signal, _ = talib.MACD(close, fastperiod=12, slowperiod=26, signalperiod=9)
+    features['macd_signal'] = (macd - signal) / close
+
+    # ATR（ボラティリティ指標）
+    features['atr'] = talib.ATR(high, low, close, timeperiod=14) / close
+
+    # 5. 移動平均（シンプル版）
+    sma_20 = talib.SMA(close, timeperiod=20)
+    features['sma_distance'] = (close - sma_20) / sma_20
+
+    # 欠損値処理（高速化のため前方補完のみ）
+    features = features.ffill().fillna(0)
+
+    return features
+
+
+def load_test_data(years=(2022, 2023, 2024)) -> pd.DataFrame:
+    """15分足データを読み込む"""
+    data_list = []
+    for year in years:
+        data_path = f"data/processed/15min/{year}/USDJPY_15min_{year}.csv"
+        data_list.append(pd.read_csv(data_path, index_col='Datetime', parse_dates=True))
+    return pd.concat(data_list, axis=0).sort_index()[['Open', 'High', 'Low', 'Close', 'Volume']]
+
+
+def compare(name: str, reference: pd.DataFrame, features: pd.DataFrame,
+            reference_time: float, pipeline_time: float) -> bool:
+    """列名・値（float32精度）・メモリ・時間を比較して表示する"""
+    same_columns = list(reference.columns) == list(features.columns)
+    same_values = np.allclose(reference.values.astype(np.float32), features.values,
+                              rtol=1e-6, atol=1e-7, equal_nan=True)
+    reference_mb = reference.memory_usage(index=False).sum() / 1024 / 1024
+    features_mb = features.memory_usage(index=False).sum() / 1024 / 1024
+    ok = same_columns and same_values and features_mb <= reference_mb / 2
+
+    print(f"{name} ({features.shape[1]}特徴量): {'一致' if same_columns and same_values else '不一致'}")
+    print(f"  メモリ: {reference_mb:.1f}MB -> {features_mb:.1f}MB")
+    print(f"  計算時間: {reference_time:.3f}秒 -> {pipeline_time:.3f}秒")
+    return ok
+
+
+def test_feature_pipeline():
+    """特徴量パイプラインテスト"""
+
+    print("=" * 60)
+    print("特徴量パイプラインテスト")
+    print("=" * 60)
+
+    data = load_test_data()
+    print(f"データ: {len(data)}レコード\n")
+
+    results = []
+
+    for name, reference_func, pipeline in [
+        ('拡張特徴量', reference_extended_features, build_extended_feature_pipeline()),
+        ('高速版特徴量', reference_optimized_features, build_optimized_feature_pipeline()),
+    ]:
+        start = time.time()
+        reference = reference_func(data)
+        reference_time = time.time() - start
+
+        start = time.time()
+        features = pipeline.transform(data)
+        pipeline_time = time.time() - start
+
+        results.append(compare(name, reference, features, reference_time, pipeline_time))
+
+    # LRUキャッシュ（ヒット時はキャッシュの配列を共有する）
+    pipeline = build_extended_feature_pipeline(max_cache_entries=2)
+    first = pipeline.transform(data)
+    cached = lambda features: np.shares_memory(features.to_numpy(), first.to_numpy())
+    results.append(cached(pipeline.transform(data.copy())))
+
+    modified = data.copy()
+    modified.iloc[100, modified.columns.get_loc('Close')] += 0.01
+    results.append(not cached(pipeline.transform(modified)))
+
+    pipeline.transform(data.iloc[:-1])
+    results.append(not cached(pipeline.transform(data)))
+    print(f"\nLRUキャッシュ: {'OK' if all(results[-3:]) else 'NG'} (保持数 {len(pipeline._cache)})")
+
+    # 返したDataFrameへの列の追加・置き換えはキャッシュに影響せず、値の書き換えはエラー
+    pipeline = build_extended_feature_pipeline()
+    original = pipeline.transform(data).copy()
+    returned = pipeline.transform(data)
+    returned['extra'] = 1.0
+    returned[returned.columns[0]] = 0.0
+    try:
+        pipeline.transform(data).iloc[0, 1] = 123.0
+        in_place_blocked = False
+    except ValueError:
+        in_place_blocked = True
+    again = pipeline.transform(data)
+    unchanged = again.equals(original) and 'extra' not in again.columns
+    results.append(unchanged and in_place_blocked)
+    print(f"返した特徴量の変更: キャッシュは変わらない {unchanged}  その場の書き換えはエラー {in_place_blocked}")
+
+    print("\n" + "=" * 60)
+    print("結果: " + ("全て成功" if all(results) else "失敗あり"))
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = test_feature_pipeline()
+    sys.exit(0 if success else 1)
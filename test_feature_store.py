@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+特徴量ストアテスト
+保存した特徴量が同じ範囲の価格データで計算した結果と一致し（途中から始まる範囲では
+ストアを使わない）、時刻の単位によらず読み書きでき、読み込みが再計算より速いことを確認する
+"""
+
+import numpy as np
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from build_feature_store import load_price_data
+from src.data.feature_store import FeatureStore
+from src.strategies.feature_pipeline import FEATURE_SETS, build_feature_pipeline
+from src.strategies.lightweight_ml_predictor_strategy import LightweightMLPredictor
+from src.strategies.optimized_ml_predictor_strategy import OptimizedMLPredictor
+
+
+def same_values(left, right) -> bool:
+    return left is not None and np.array_equal(np.asarray(left.values), right.values, equal_nan=True)
+
+
+def test_lookup_parity(store: FeatureStore, data) -> bool:
+    """保存済み特徴量とパイプラインの計算結果（同じ範囲の価格データで計算）の比較"""
+    prefix = data[data.index < '2023-07-01']
+    ok = True
+
+    for name in FEATURE_SETS:
+        pipeline = build_feature_pipeline(name)
+
+        # 保存時の先頭から始まる範囲（全期間・先頭の半年）は計算結果と完全に一致する
+        stored = store.lookup(name, data)
+        same_full = same_values(stored, pipeline.transform(data))
+        same_prefix = same_values(store.lookup(name, prefix), pipeline.transform(prefix))
+
+        print(f"  {name:16s} 全期間: {same_full}  先頭の半年: {same_prefix}")
+        ok = ok and same_full and same_prefix and list(stored.columns) == pipeline.feature_names
+
+    return ok
+
+
+def test_slice_parity(store: FeatureStore, data) -> bool:
+    """途中から始まる範囲はストアを使わず、その範囲で計算した値になる"""
+    mid_year = data.loc['2024-03-01':'2024-09-30']
+    ok = True
+
+    for name in FEATURE_SETS:
+        served = store.lookup(name, mid_year) is not None
+        ok = ok and not served
+    print(f"  年の途中からの範囲はストアを使わない: {ok}")
+
+    # 予測モデル（ストアあり）の特徴量がその範囲だけで計算した値と一致する
+    lightweight = LightweightMLPredictor(feature_store=store, model_dir=store.root)
+    expected = lightweight.feature_pipeline.transform(mid_year)
+    same_lightweight = same_values(lightweight.create_features(mid_year), expected)
+
+    optimized = OptimizedMLPredictor(feature_store=store, model_dir=store.root)
+    optimized.precompute_features(mid_year)
+    reference = OptimizedMLPredictor(model_dir=store.root)
+    reference.precompute_features(mid_year)
+    same_optimized = np.array_equal(optimized.feature_matrix, reference.feature_matrix, equal_nan=True)
+
+    print(f"  LightweightMLPredictor: {same_lightweight}  OptimizedMLPredictor: {same_optimized}")
+    return ok and same_lightweight and same_optimized
+
+
+def test_load_range(store: FeatureStore, data) -> bool:
+    """列名・期間を指定した読み込み（年をまたぐ範囲）"""
+    columns = ['rsi_14', 'sma_distance_20']
+    loaded = store.load('mt5_lightweight', '2023-12-29', '2024-01-03 12:00', columns=columns)
+
+    expected = build_feature_pipeline('mt5_lightweight').compute(data)
+    expected = expected.loc['2023-12-29':'2024-01-03 12:00', columns]
+
+    ok = (list(loaded.columns) == columns and loaded.index.equals(expected.index) and
+          np.array_equal(loaded.values, expected.values))
+    print(f"  年をまたぐ期間の読み込み: {len(loaded)}行 {'一致' if ok else '不一致'}")
+    return ok
+
+
+def test_lookup_miss(store: FeatureStore, data) -> bool:
+    """保存時と異なるデータでは使わない"""
+    modified = data.copy()
+    modified.iloc[100, modified.columns.get_loc('Close')] += 0.01
+    shifted = data.copy()
+    shifted.index = shifted.index + np.timedelta64(1, 'm')
+
+    ok = (store.lookup('lightweight', modified) is None and
+          store.lookup('lightweight', shifted) is None and
+          store.lookup('lightweight', data.iloc[::7]) is None)
+    print(f"  価格変更・時刻ずれ・間引いた行の検出: {'OK' if ok else 'NG'}")
+    return ok
+
+
+def test_index_units(root: str, data) -> bool:
+    """秒単位のインデックス（pandas 2のas_unit）での保存・読み込み・参照"""
+    seconds = data.loc['2024-01-01':'2024-03-31'].copy()
+    seconds.index = seconds.index.as_unit('s')
+    store = FeatureStore(os.path.join(root, 'seconds'), '15min')
+    with redirect_stdout(StringIO()):
+        store.materialize(seconds, ['mt5_lightweight'])
+
+    expected = build_feature_pipeline('mt5_lightweight').compute(seconds)
+    loaded = store.load('mt5_lightweight', '2024-02-01', '2024-02-29 23:45')
+    same_load = (loaded.index.as_unit('ns').equals(expected.loc['2024-02-01':'2024-02-29 23:45'].index.as_unit('ns'))
+                 and np.array_equal(loaded.values, expected.loc['2024-02-01':'2024-02-29 23:45'].values))
+
+    # 秒単位・ナノ秒単位のどちらの価格データでも参照できる
+    nanoseconds = seconds.copy()
+    nanoseconds.index = nanoseconds.index.as_unit('ns')
+    same_lookup = (same_values(store.lookup('mt5_lightweight', seconds), expected) and
+                   same_values(store.lookup('mt5_lightweight', nanoseconds), expected))
+
+    print(f"  秒単位のインデックス: 期間指定の読み込み {same_load}  参照 {same_lookup}")
+    return same_load and same_lookup
+
+
+def test_predictor_speed(store: FeatureStore, data) -> bool:
+    """予測モデルの特徴量事前計算（ストアあり/なし、保存時と同じ期間）"""
+    ok = True
+
+    for cls in [LightweightMLPredictor, OptimizedMLPredictor]:
+        # 新しいインスタンス（別スクリプトの実行に相当）ごとの計算時間
+        timings = {}
+        matrices = {}
+        for label, feature_store in [('計算', None), ('ストア', store)]:
+            start = time.time()
+            for _ in range(3):
+                strategy = cls(feature_store=feature_store, model_dir=store.root)
+                strategy.precompute_features(data)
+            timings[label] = (time.time() - start) / 3
+            matrices[label] = strategy.feature_matrix
+
+        same = np.array_equal(matrices['計算'], matrices['ストア'], equal_nan=True)
+        print(f"  {cls.__name__:22s} 計算: {timings['計算']:.3f}秒 → ストア: {timings['ストア']:.3f}秒  一致: {same}")
+        ok = ok and same
+
+    return ok
+
+
+def test_feature_store():
+    """特徴量ストアテスト"""
+
+    print("=" * 60)
+    print("特徴量ストアテスト")
+    print("=" * 60)
+
+    data = load_price_data('15min', [2023, 2024])
+    root = tempfile.mkdtemp()
+    results = []
+
+    try:
+        store = FeatureStore(root, '15min')
+        start = time.time()
+        store.materialize(data)
+        print(f"ストア作成: {time.time() - start:.2f}秒")
+
+        print("\n保存済み特徴量の一致:")
+        results.append(test_lookup_parity(store, data))
+        results.append(test_slice_parity(store, data))
+
+        print("\n読み込み:")
+        results.append(test_load_range(store, data))
+        results.append(test_lookup_miss(store, data))
+        results.append(test_index_units(root, data))
+
+        print("\n予測モデルの特徴量事前計算:")
+        results.append(test_predictor_speed(store, data))
+    finally:
+        shutil.rmtree(root)
+
+    print("\n" + "=" * 60)
+    print("結果: " + ("全て成功" if all(results) else "失敗あり"))
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = test_feature_store()
+    sys.exit(0 if success else 1)
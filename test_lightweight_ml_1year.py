@@ -54,8 +54,12 @@ def test_lightweight_ml_1year():
     
     # 初回学習（最初の30日分）
     training_size = min(2000, len(data) // 4)
-    training_data = data.iloc[:training_size]
-    strategy.train_model(training_data)
+    # 特徴量を全期間で一度だけ計算（以降は行番号で参照）
+    strategy.precompute_features(data)
+    strategy.train_model_on_rows(0, training_size - 1)
+    
+    # 次の再学習までの評価足をまとめて予測
+    strategy.prefetch_predictions(range(training_size, min(training_size + 2000, len(data)), 20))
     
     print("初回学習完了。取引シミュレーション開始...")
     
@@ -65,7 +69,6 @@ def test_lightweight_ml_1year():
     
     # メインループ（高速化：20本ごと、再学習は月1回）
     for i in range(training_size, len(data), 20):  # 5時間ごと
-        current_data = data.iloc[:i+1]
         current_time = data.index[i]
         current_price = data['Close'].iloc[i] if 'Close' in data.columns else data['close'].iloc[i]
         
@@ -76,12 +79,12 @@ def test_lightweight_ml_1year():
         if (i - training_size) % 2000 == 0 and i > training_size:
             retraining_count += 1
             print(f"再学習 #{retraining_count}: {current_time.date()}")
-            recent_data = data.iloc[max(0, i-2000):i+1]
-            strategy.train_model(recent_data)
+            strategy.train_model_on_rows(max(0, i-2000), i)
+            strategy.prefetch_predictions(range(i, min(i + 2000, len(data)), 20))
         
         # シグナル生成
         current_positions = len(executor.positions)
-        signal, analysis = strategy.generate_signal(current_data, current_positions)
+        signal, analysis = strategy.generate_signal(i, current_positions)
         
         if signal != 0:
             signals_generated += 1
@@ -68,8 +68,12 @@ def test_lightweight_ml_2year_fast():
     
     # 初回学習（最初の2ヶ月分 = 約4000本）
     training_size = min(4000, len(data) // 10)
-    training_data = data.iloc[:training_size]
-    strategy.train_model(training_data)
+    # 特徴量を全期間で一度だけ計算（以降は行番号で参照）
+    strategy.precompute_features(data)
+    strategy.train_model_on_rows(0, training_size - 1)
+    
+    # 次の再学習までの評価足をまとめて予測
+    strategy.prefetch_predictions(range(training_size, min(training_size + 6000, len(data)), 40))
     
     print(f"初回学習完了（{training_size}レコード使用）。取引シミュレーション開始...")
     
@@ -79,7 +83,6 @@ def test_lightweight_ml_2year_fast():
     
     # メインループ（40本ごと = 10時間ごと、高速化のため）
     for i in range(training_size, len(data), 40):
-        current_data = data.iloc[:i+1]
         current_time = data.index[i]
         current_price = data['Close'].iloc[i] if 'Close' in data.columns else data['close'].iloc[i]
         
@@ -91,12 +94,12 @@ def test_lightweight_ml_2year_fast():
             retraining_count += 1
             print(f"再学習 #{retraining_count}: {current_time.date()}")
             # 直近2ヶ月分で再学習
-            recent_data = data.iloc[max(0, i-4000):i+1]
-            strategy.train_model(recent_data)
+            strategy.train_model_on_rows(max(0, i-4000), i)
+            strategy.prefetch_predictions(range(i, min(i + 6000, len(data)), 40))
         
         # シグナル生成
         current_positions = len(executor.positions)
-        signal, analysis = strategy.generate_signal(current_data, current_positions)
+        signal, analysis = strategy.generate_signal(i, current_positions)
         
         if signal != 0:
             signals_generated += 1
@@ -87,8 +87,12 @@ def test_ml_with_trades():
     
     # 初回学習（最初の1ヶ月分）
     training_size = 2000
-    training_data = data.iloc[:training_size]
-    strategy.train_model(training_data)
+    # 特徴量を全期間で一度だけ計算（以降は行番号で参照）
+    strategy.precompute_features(data)
+    strategy.train_model_on_rows(0, training_size - 1)
+    
+    # 次の再学習までの評価足をまとめて予測
+    strategy.prefetch_predictions(range(training_size, min(training_size + 3000, len(data)), 100))
     
     print("初回学習完了。取引シミュレーション開始...")
     
@@ -98,7 +102,6 @@ def test_ml_with_trades():
     
     # メインループ（100本ごと = 約25時間ごと、高速化）
     for i in range(training_size, len(data), 100):
-        current_data = data.iloc[:i+1]
         current_time = data.index[i]
         current_price = data['Close'].iloc[i] if 'Close' in data.columns else data['close'].iloc[i]
         
@@ -109,12 +112,12 @@ def test_ml_with_trades():
         if (i - training_size) % 3000 == 0 and i > training_size:
             retraining_count += 1
             print(f"再学習 #{retraining_count}: {current_time.date()}")
-            recent_data = data.iloc[max(0, i-3000):i+1]
-            strategy.train_model(recent_data)
+            strategy.train_model_on_rows(max(0, i-3000), i)
+            strategy.prefetch_predictions(range(i, min(i + 3000, len(data)), 100))
         
         # シグナル生成
         current_positions = len(executor.positions)
-        signal, analysis = strategy.generate_signal(current_data, current_positions)
+        signal, analysis = strategy.generate_signal(i, current_positions)
         
         if signal != 0:
             signals_generated += 1
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+モデル成果物形式テスト
+pickleと同じ予測値になること、ファイルサイズと起動から最初の予測までの時間を比較する
+"""
+
+import numpy as np
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.preprocessing import StandardScaler
+
+from src.utils.model_artifact import ModelArtifact, artifact_size, save_model_artifact
+
+try:
+    from xgboost import XGBRegressor
+except ImportError:
+    XGBRegressor = None
+
+try:
+    from lightgbm import LGBMRegressor
+except ImportError:
+    LGBMRegressor = None
+
+
+def make_data(n: int = 5000, n_features: int = 20, seed: int = 0):
+    """検証用の回帰データ"""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, n_features))
+    y = X[:, 0] * 0.5 - X[:, 1] * X[:, 2] + rng.normal(scale=0.1, size=n)
+    return X, y
+
+
+def build_models() -> dict:
+    """検証するモデル"""
+    models = {
+        'random_forest': RandomForestRegressor(n_estimators=100, max_depth=12, random_state=42, n_jobs=1),
+        'gradient_boosting': GradientBoostingRegressor(n_estimators=100, max_depth=4, random_state=42),
+    }
+    if XGBRegressor is not None:
+        models['xgboost'] = XGBRegressor(n_estimators=100, max_depth=6, random_state=42, n_jobs=1)
+    if LGBMRegressor is not None:
+        models['lightgbm'] = LGBMRegressor(n_estimators=100, num_leaves=31, random_state=42,
+                                           n_jobs=1, verbose=-1)
+    return models
+
+
+# 起動から最初の予測までを別プロセスで計測するスクリプト
+PICKLE_LOADER = """
+import pickle, sys, time
+import numpy as np
+start = time.perf_counter()
+with open(sys.argv[1], 'rb') as f:
+    data = pickle.load(f)
+X = np.load(sys.argv[2])
+pred = data['scaler_y'].inverse_transform(
+    data['model'].predict(data['scaler_X'].transform(X)).reshape(-1, 1)).ravel()
+print(time.perf_counter() - start)
+"""
+
+ARTIFACT_LOADER = """
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[3])
+from src.utils.model_artifact import ModelArtifact
+import numpy as np
+X = np.load(sys.argv[2])
+pred = ModelArtifact(sys.argv[1]).predict(X)
+print(time.perf_counter() - start)
+"""
+
+
+def cold_start_time(loader: str, model_path: str, X_path: str) -> float:
+    """新しいプロセスで読み込み〜最初の予測までの時間"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    output = subprocess.run([sys.executable, '-c', loader, model_path, X_path, root],
+                            capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def test_model(name: str, model, X: np.ndarray, y: np.ndarray, workdir: str) -> bool:
+    """1モデルについてpickleと成果物形式を比較"""
+    X_train, X_test = X[:4000], X[4000:].copy()
+    # 欠損値の扱いも比較する（GradientBoostingは欠損値に非対応）
+    if name != 'gradient_boosting':
+        X_test[::50, 0] = np.nan
+
+    scaler_X = StandardScaler().fit(X_train)
+    scaler_y = StandardScaler().fit(y[:4000].reshape(-1, 1))
+    model.fit(scaler_X.transform(X_train), scaler_y.transform(y[:4000].reshape(-1, 1)).ravel())
+
+    # XGBoostの予測はfloat32のため、逆スケーリングはfloat64で比較する
+    expected = scaler_y.inverse_transform(
+        model.predict(scaler_X.transform(X_test)).astype(np.float64).reshape(-1, 1)).ravel()
+
+    pickle_path = os.path.join(workdir, f"{name}.pkl")
+    with open(pickle_path, 'wb') as f:
+        pickle.dump({'model': model, 'scaler_X': scaler_X, 'scaler_y': scaler_y}, f)
+
+    artifact_path = os.path.join(workdir, name)
+    save_model_artifact(artifact_path, model, scaler_X=scaler_X, scaler_y=scaler_y,
+                        metadata={'training_score': 0.5})
+
+    artifact = ModelArtifact(artifact_path)
+    actual = artifact.predict(X_test)
+    max_diff = np.max(np.abs(actual - expected))
+
+    X_path = os.path.join(workdir, 'X_test.npy')
+    np.save(X_path, X_test)
+    pickle_time = min(cold_start_time(PICKLE_LOADER, pickle_path, X_path) for _ in range(3))
+    artifact_time = min(cold_start_time(ARTIFACT_LOADER, artifact_path, X_path) for _ in range(3))
+
+    print(f"  {name:18s} 最大誤差: {max_diff:.2e}  "
+          f"サイズ: {os.path.getsize(pickle_path) / 1024:8.1f}KB → {artifact_size(artifact_path) / 1024:8.1f}KB  "
+          f"初回予測: {pickle_time:.3f}秒 → {artifact_time:.3f}秒")
+
+    return max_diff < 1e-9 and artifact.metadata['training_score'] == 0.5
+
+
+def test_ensemble(X: np.ndarray, y: np.ndarray, workdir: str) -> bool:
+    """重み付きアンサンブルの保存・予測"""
+    models = {
+        'rf': RandomForestRegressor(n_estimators=30, max_depth=8, random_state=42, n_jobs=1).fit(X, y),
+        'gb': GradientBoostingRegressor(n_estimators=30, random_state=42).fit(X, y),
+    }
+    weights = {'rf': 0.3, 'gb': 0.7}
+    expected = sum(weights[name] * model.predict(X) for name, model in models.items())
+
+    path = os.path.join(workdir, 'ensemble')
+    save_model_artifact(path, models, weights=weights, feature_names=[f"f{i}" for i in range(X.shape[1])])
+    artifact = ModelArtifact(path)
+
+    max_diff = np.max(np.abs(artifact.predict(X) - expected))
+    print(f"  アンサンブル       最大誤差: {max_diff:.2e}")
+
+    return max_diff < 1e-9 and artifact.feature_names[0] == 'f0'
+
+
+def test_model_artifact():
+    """モデル成果物形式テスト"""
+
+    print("=" * 60)
+    print("モデル成果物形式テスト")
+    print("=" * 60)
+
+    X, y = make_data()
+    workdir = tempfile.mkdtemp()
+    results = []
+
+    try:
+        print("\npickle → 成果物形式:")
+        for name, model in build_models().items():
+            results.append(test_model(name, model, X, y, workdir))
+
+        print("\nアンサンブル:")
+        results.append(test_ensemble(X, y, workdir))
+    finally:
+        shutil.rmtree(workdir)
+
+    print("\n" + "=" * 60)
+    print("結果: " + ("全て成功" if all(results) else "失敗あり"))
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = test_model_artifact()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+時間足の同期テスト
+MultiTimeframeDataManager.synchronize_timeframes（_downsample_to_base・_resample_to_base）が
+変更前の実装と同じ値を返すことと、列の型（float/int）を保持すること、
+日足25年分の同期が短時間で終わることを確認する
+"""
+
+import os
+import sys
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.data.multi_timeframe_data_manager import MultiTimeframeDataManager
+
+
+def make_ohlc(index: pd.DatetimeIndex, seed: int = 0) -> pd.DataFrame:
+    """ランダムウォークのOHLC（出来高はint）"""
+    rng = np.random.default_rng(seed)
+    close = 110 + np.cumsum(rng.normal(0, 0.5, len(index)))
+    return pd.DataFrame({
+        'Open': close - 0.1,
+        'High': close + 0.5,
+        'Low': close - 0.5,
+        'Close': close,
+        'Volume': rng.integers(100, 1000, len(index)),
+    }, index=index)
+
+
+def legacy_downsample(df: pd.DataFrame, base_index: pd.DatetimeIndex, timeframe: str,
+                      base_timeframe: str) -> pd.DataFrame:
+    """変更前の_downsample_to_base（行ごとの代入）"""
+    result = pd.DataFrame(index=base_index, columns=df.columns)
+    if timeframe == "1W" and base_timeframe == "1D":
+        for week_start, row in df.iterrows():
+            week_dates = pd.date_range(week_start, week_start + timedelta(days=6), freq='D')
+            for date in base_index.intersection(week_dates):
+                result.loc[date] = row
+    elif timeframe == "1M" and base_timeframe in ["1D", "1W"]:
+        for month_start, row in df.iterrows():
+            month_dates = pd.date_range(month_start, month_start + pd.offsets.MonthEnd(1), freq='D')
+            for date in base_index.intersection(month_dates):
+                result.loc[date] = row
+    else:
+        for date in base_index:
+            mask = df.index <= date
+            if mask.any():
+                result.loc[date] = df.loc[df.index[mask][-1]]
+    return result
+
+
+def legacy_resample(resampled: pd.DataFrame, base_index: pd.DatetimeIndex) -> pd.DataFrame:
+    """変更前の_resample_to_baseの最後の部分（object型のデータフレームへの代入）"""
+    common_index = base_index.intersection(resampled.index)
+    result = pd.DataFrame(index=base_index, columns=resampled.columns)
+    result.loc[common_index] = resampled.loc[common_index]
+    return result
+
+
+def same_values(new: pd.DataFrame, legacy: pd.DataFrame) -> bool:
+    try:
+        pd.testing.assert_frame_equal(new.astype(float), legacy.astype(float), check_freq=False)
+        return True
+    except AssertionError:
+        return False
+
+
+def test_downsample() -> bool:
+    """長い時間足の同期（変更前の実装との一致）"""
+    manager = MultiTimeframeDataManager()
+    base_index = pd.bdate_range('2020-01-01', '2024-12-31')
+    daily = make_ohlc(base_index)
+
+    cases = {
+        # 週の開始日（月曜）・1週抜けた週
+        '1W → 1D': (make_ohlc(pd.date_range('2019-12-30', '2024-12-30', freq='W-MON').delete(10), 1),
+                    '1W', '1D'),
+        # 週の時刻が日足とずれている（日単位の時刻のみ対応）
+        '1W（12時）→ 1D': (make_ohlc(pd.date_range('2019-12-30 12:00', '2024-12-30', freq='W-MON'), 2),
+                         '1W', '1D'),
+        # 月の開始日・月末の日付
+        '1M（月初）→ 1D': (make_ohlc(pd.date_range('2020-01-01', '2024-12-01', freq='MS'), 3), '1M', '1D'),
+        '1M（月末）→ 1D': (make_ohlc(pd.date_range('2020-01-31', '2024-12-31', freq='M'), 4), '1M', '1D'),
+        '1M（月初）→ 1W': (make_ohlc(pd.date_range('2020-01-01', '2024-12-01', freq='MS'), 5), '1M', '1W'),
+        # その他（直前の行）
+        '1D → 4H': (daily.iloc[:300], '1D', '4H'),
+        # ナノ秒以外の単位のインデックス（pandas 2のas_unit）
+        '1W（秒）→ 1D': (make_ohlc(pd.date_range('2019-12-30', '2024-12-30', freq='W-MON', unit='s'), 7),
+                        '1W', '1D'),
+        '1M（ミリ秒）→ 1D（マイクロ秒）': (make_ohlc(pd.date_range('2020-01-01', '2024-12-01', freq='MS', unit='ms'), 8),
+                                     '1M', '1D_us'),
+    }
+    base_indexes = {
+        '1D': base_index,
+        '1D_us': base_index.as_unit('us'),
+        '1W': pd.date_range('2020-01-03', '2024-12-27', freq='W-FRI'),
+        '4H': pd.date_range('2020-01-01 02:00', '2021-03-31', freq='4H'),
+    }
+
+    ok = True
+    for name, (df, timeframe, base_timeframe) in cases.items():
+        target = base_indexes[base_timeframe]
+        base_timeframe = base_timeframe.split('_')[0]
+        new = manager._downsample_to_base(df, target, timeframe, base_timeframe)
+        legacy = legacy_downsample(df, target, timeframe, base_timeframe)
+        same = same_values(new, legacy)
+        filled = int(new['Close'].notna().sum())
+        print(f"  {name}: 一致 {same}（{filled}/{len(target)}行）  列の型: {dict(new.dtypes.astype(str))['Close']}")
+        ok &= same
+
+    # 全ての行に対応する場合は整数の列もintのまま
+    weekly = make_ohlc(pd.date_range('2019-12-30', '2024-12-30', freq='W-MON'), 6)
+    new = manager._downsample_to_base(weekly, base_index[base_index >= '2020-01-01'], '1W', '1D')
+    keeps_int = new['Volume'].dtype == weekly['Volume'].dtype
+    print(f"  欠けがない場合の整数の列: {new['Volume'].dtype}")
+    return ok and keeps_int
+
+
+def test_resample() -> bool:
+    """短い時間足の集約（変更前の実装との一致）"""
+    manager = MultiTimeframeDataManager()
+    base_index = pd.bdate_range('2022-01-03', '2023-12-29')
+    hourly = make_ohlc(pd.date_range('2022-01-03', '2023-12-29 20:00', freq='4H'), 7)
+    hourly = hourly[hourly.index.dayofweek < 5]
+
+    new = manager._resample_to_base(hourly, base_index, '4H', '1D')
+    resampled = hourly.resample('D').agg({'Open': 'first', 'High': 'max', 'Low': 'min',
+                                          'Close': 'last', 'Volume': 'sum'})
+    legacy = legacy_resample(resampled, base_index)
+    same = same_values(new, legacy)
+    typed = new['Close'].dtype == np.float64 and new['Volume'].dtype == np.int64
+    print(f"  4H → 1D: 一致 {same}  列の型: Close {new['Close'].dtype}, Volume {new['Volume'].dtype}"
+          f"（変更前 {legacy['Close'].dtype}）")
+    return same and typed
+
+
+def test_speed() -> bool:
+    """日足25年分の同期時間"""
+    manager = MultiTimeframeDataManager()
+    base_index = pd.bdate_range('2000-01-03', '2024-12-31')
+    data = {
+        '1D': make_ohlc(base_index, 8),
+        '1W': make_ohlc(pd.date_range('2000-01-03', '2024-12-30', freq='W-MON'), 9),
+        '1M': make_ohlc(pd.date_range('2000-01-01', '2024-12-01', freq='MS'), 10),
+    }
+
+    start = time.perf_counter()
+    synced = manager.synchronize_timeframes(data, '1D')
+    new_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    legacy = {tf: legacy_downsample(data[tf], base_index, tf, '1D') for tf in ('1W', '1M')}
+    legacy_time = time.perf_counter() - start
+
+    same = all(same_values(synced[tf], legacy[tf]) for tf in ('1W', '1M'))
+    print(f"  日足 {len(base_index)}行 + 週足・月足: 変更前 {legacy_time:.2f}秒 → {new_time * 1e3:.1f}ms  一致: {same}")
+    return same and new_time < 0.1
+
+
+def test_multi_timeframe_sync():
+    """時間足の同期テスト"""
+
+    print("=" * 60)
+    print("時間足の同期テスト")
+    print("=" * 60)
+
+    results = []
+    for name, test in [('長い時間足の同期', test_downsample),
+                       ('短い時間足の集約', test_resample),
+                       ('処理時間', test_speed)]:
+        print(f"\n{name}:")
+        results.append(test())
+
+    print("\n" + "=" * 60)
+    print("結果: " + ("全て成功" if all(results) else "失敗あり"))
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = test_multi_timeframe_sync()
+    sys.exit(0 if success else 1)
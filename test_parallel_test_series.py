@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+テストシリーズの並列実行テスト
+AutoTestRunner.run_test_series(parallel=True)が逐次実行と同じ統計を返すことと、
+データの読み込みがテスト環境ごとに1回であること、戦略がデータを書き換えても他のテストに
+影響しないこと、エラーになったテストを除いて完了すること、キャッシュした結果を使うことと、
+共有メモリのデータフレーム（SharedFrame）がナノ秒以外の時刻のインデックスも復元することを確認する
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from auto_test_runner import AutoTestRunner
+from src.backtest.trade_executor import TradeExecutor
+from src.data.shared_frame import SharedFrame, attach_frame
+
+YEARS = [2022, 2023, 2024, 2025]
+
+
+def interval_strategy(data: pd.DataFrame, executor: TradeExecutor, metadata: dict,
+                      interval: int = 50, sl_pips: float = 20, tp_pips: float = 30):
+    """一定間隔で売買を交互に発注する戦略"""
+    close = data['Close'].to_numpy()
+    index = data.index
+    for i in range(len(data)):
+        price = float(close[i])
+        executor.check_positions(price, index[i])
+        if i % interval == 0:
+            executor.open_position(1 if (i // interval) % 2 else -1, price, 0.1, sl_pips, tp_pips, index[i])
+        if i % 16 == 0:
+            executor.update_equity(price)
+
+
+def mutating_strategy(data: pd.DataFrame, executor: TradeExecutor, metadata: dict):
+    """データを書き換えてから発注する戦略（他のテストに影響しないこと）"""
+    data['Close'] = data['Close'] + 1.0
+    data.drop(columns=['Open'], inplace=True)
+    interval_strategy(data, executor, metadata, interval=70)
+
+
+def failing_strategy(data: pd.DataFrame, executor: TradeExecutor, metadata: dict):
+    """エラーになる戦略"""
+    raise RuntimeError("戦略の不具合")
+
+
+def make_series(use_cache: bool = False):
+    series = [{'strategy_func': partial(interval_strategy, interval=interval, sl_pips=sl, tp_pips=tp),
+               'test_name': f'parallel_i{interval}_sl{sl}',
+               'strategy_config': {'interval': interval, 'sl_pips': sl, 'tp_pips': tp},
+               'years': YEARS, 'auto_save': False, 'use_cache': use_cache}
+              for interval, sl, tp in [(30, 15, 20), (50, 20, 30), (80, 30, 45), (120, 40, 60)]]
+    # ラムダ（子プロセスに渡せない戦略はプロセス内で実行）
+    series.append({'strategy_func': lambda data, executor, metadata: interval_strategy(data, executor, metadata, 45),
+                   'test_name': 'parallel_lambda', 'years': YEARS, 'auto_save': False, 'use_cache': use_cache})
+    return series
+
+
+def count_setups(runner: AutoTestRunner) -> dict:
+    """テスト環境のセットアップ（データの読み込み）の回数を数える"""
+    counts = {'setup': 0}
+    helper = runner.test_helper
+    for name in ('setup_basic_backtest', 'setup_enhanced_backtest'):
+        original = getattr(helper, name)
+
+        def counted(*args, original=original, **kwargs):
+            counts['setup'] += 1
+            return original(*args, **kwargs)
+        setattr(helper, name, counted)
+    return counts
+
+
+def test_parity(cache_dir: str) -> bool:
+    """逐次実行と並列実行の統計の一致・データの読み込み回数"""
+    runner = AutoTestRunner()
+    runner.result_cache.root = cache_dir
+    counts = count_setups(runner)
+
+    start = time.perf_counter()
+    sequential = runner.run_test_series(make_series(), 'sequential')
+    sequential_time = time.perf_counter() - start
+    sequential_setups = counts['setup']
+
+    counts['setup'] = 0
+    series = make_series()
+    series.insert(2, {'strategy_func': mutating_strategy, 'test_name': 'parallel_mutating',
+                      'years': YEARS, 'auto_save': False, 'use_cache': False})
+    series.append({'strategy_func': failing_strategy, 'test_name': 'parallel_failing',
+                   'years': YEARS, 'auto_save': False, 'use_cache': False})
+    start = time.perf_counter()
+    parallel = runner.run_test_series(series, 'parallel', parallel=True, max_workers=4)
+    parallel_time = time.perf_counter() - start
+
+    same = all(parallel.get(name) == stats for name, stats in sequential.items())
+    isolated = 'parallel_mutating' in parallel and 'parallel_failing' not in parallel
+    ok = same and isolated and counts['setup'] == 1 and sequential_setups == len(sequential)
+
+    print(f"\n  逐次 {sequential_time:.1f}秒（データ読み込み {sequential_setups}回）"
+          f" → 並列 {parallel_time:.1f}秒（データ読み込み {counts['setup']}回、CPU {os.cpu_count()}個）")
+    print(f"  統計の一致: {same}  書き換え・エラーの分離: {isolated}")
+    return ok
+
+
+def test_cached_series(cache_dir: str) -> bool:
+    """2回目の並列実行はキャッシュした結果を使う"""
+    runner = AutoTestRunner()
+    runner.result_cache.root = cache_dir
+    counts = count_setups(runner)
+
+    first = runner.run_test_series(make_series(use_cache=True), 'cached', parallel=True)
+    first_setups = counts['setup']
+    counts['setup'] = 0
+    start = time.perf_counter()
+    second = runner.run_test_series(make_series(use_cache=True), 'cached', parallel=True)
+    second_time = time.perf_counter() - start
+
+    ok = first == second and first_setups == 1 and counts['setup'] == 0
+    print(f"\n  2回目 {second_time:.2f}秒（データ読み込み {counts['setup']}回）  統計の一致: {first == second}")
+    return ok
+
+
+def test_shared_frame_units(cache_dir: str) -> bool:
+    """ナノ秒以外の単位・タイムゾーン付きのインデックスの共有と復元"""
+    base = pd.date_range('2024-01-01', periods=100, freq='15min', name='Datetime')
+    results = {}
+    for unit in ('s', 'ms', 'us', 'ns'):
+        for tz in (None, 'Asia/Tokyo'):
+            index = base.as_unit(unit) if tz is None else base.tz_localize(tz).as_unit(unit)
+            data = pd.DataFrame({'Close': np.linspace(150, 151, 100), 'Volume': np.arange(100)}, index=index)
+            try:
+                with SharedFrame(data) as shared:
+                    restored = attach_frame(shared.spec)
+                pd.testing.assert_frame_equal(restored, data)
+                results[f"{unit}{'+tz' if tz else ''}"] = True
+            except (AssertionError, ValueError):
+                results[f"{unit}{'+tz' if tz else ''}"] = False
+
+    print(f"  単位・タイムゾーンごとの復元: {results}")
+    return all(results.values())
+
+
+def test_parallel_test_series():
+    """テストシリーズの並列実行テスト"""
+
+    print("=" * 60)
+    print("テストシリーズ 並列実行テスト")
+    print("=" * 60)
+
+    results = []
+    for name, test in [('逐次実行との一致', test_parity),
+                       ('キャッシュ', test_cached_series),
+                       ('共有メモリのインデックス', test_shared_frame_units)]:
+        cache_dir = tempfile.mkdtemp()
+        try:
+            print(f"\n{name}:")
+            results.append(test(cache_dir))
+        finally:
+            shutil.rmtree(cache_dir)
+
+    print("\n" + "=" * 60)
+    print("結果: " + ("全て成功" if all(results) else "失敗あり"))
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = test_parallel_test_series()
+    sys.exit(0 if success else 1)
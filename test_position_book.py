@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+ポジションブックテスト
+列指向のポジションブックとそのビュー（Position）が従来のオブジェクト版と同じ値を返し、
+決済済みポジションが大量にある場合（ブックを指定せずに作成した場合も含む）の
+メモリ使用量が小さいことを確認する
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from backtest_test_helpers import LegacyPosition
+from src.backtest.custom_backtest_engine import CustomBacktestEngine
+from src.backtest.position import Position, PositionStatus
+from src.backtest.position_book import PositionBook
+from src.backtest.trade_executor import TradeExecutor
+
+
+def make_trades(count: int, seed: int = 0) -> dict:
+    """検証用の取引（エントリー・決済の列）"""
+    rng = np.random.default_rng(seed)
+    entry_ns = pd.Timestamp('2024-01-01').value + np.arange(count, dtype=np.int64) * 300 * 10**9
+    return {
+        'entry_ns': entry_ns,
+        'exit_ns': entry_ns + rng.integers(1, 60, count) * 60 * 10**9,
+        'direction': rng.choice([1, -1], count),
+        'entry_price': 150 + rng.normal(size=count),
+        'sl_price': 149 + rng.normal(size=count),
+        'tp_price': 151 + rng.normal(size=count),
+        'exit_price': 150 + rng.normal(size=count),
+        'strategy': rng.choice(['scalping', 'bollinger_rsi'], count).tolist(),
+        'lot_size': rng.choice([0.01, 0.02], count),
+    }
+
+
+def open_and_close(cls, trades: dict, **kwargs) -> list:
+    """
+    取引をPositionとして開いて決済する
+
+    バックテストのループと同様に、時刻・価格はバーごとに新しいオブジェクトとして渡す
+    """
+    statuses = [PositionStatus.CLOSED_TAKE_PROFIT, PositionStatus.CLOSED_STOP_LOSS]
+    positions = []
+    for i in range(len(trades['entry_ns'])):
+        position = cls(pd.Timestamp(int(trades['entry_ns'][i])), int(trades['direction'][i]),
+                       float(trades['entry_price'][i]), float(trades['sl_price'][i]),
+                       float(trades['tp_price'][i]), trades['strategy'][i], float(trades['lot_size'][i]),
+                       **kwargs)
+        position.close_position(pd.Timestamp(int(trades['exit_ns'][i])), float(trades['exit_price'][i]),
+                                statuses[i % 2])
+        positions.append(position)
+    return positions
+
+
+def test_view_parity() -> bool:
+    """ビューの属性・to_dict・to_frameと従来のPositionの比較"""
+    trades = make_trades(500)
+    legacy = open_and_close(LegacyPosition, trades)
+    book = PositionBook(capacity=16)
+    views = open_and_close(Position, trades, book=book)
+
+    same_dicts = all(l.to_dict() == v.to_dict() for l, v in zip(legacy, views))
+    expected = pd.DataFrame([position.to_dict() for position in legacy])
+    frame = Position.to_frame(book, book.closed_row_array())
+    same_frame = frame.equals(expected)
+
+    # 未決済のポジション・単独で作成したポジション
+    open_legacy = LegacyPosition(pd.Timestamp('2024-01-01'), -1, 150.0, 150.5, 149.5, 'scalping')
+    open_view = Position(pd.Timestamp('2024-01-01'), -1, 150.0, 150.5, 149.5, 'scalping')
+    same_open = (open_legacy.to_dict() == open_view.to_dict() and
+                 open_view.calculate_profit(149.8) == (149.8 - 150.0) * -1 * 100 * 0.01 * 1000 * 0.01)
+
+
+    # 単独で作成したポジションは時刻の種類・タイムゾーンごとの共有ブックに入る
+    tokyo = Position(pd.Timestamp('2024-01-01 09:00', tz='Asia/Tokyo'), 1, 150.0, 149.5, 150.5, 'scalping')
+    bar = Position(120, 1, 150.0, 149.5, 150.5, 'scalping')
+    same_times = (tokyo.entry_time == pd.Timestamp('2024-01-01 09:00', tz='Asia/Tokyo') and bar.entry_time == 120 and
+                  open_view.entry_time == pd.Timestamp('2024-01-01') and
+                  len({id(tokyo.book), id(bar.book), id(open_view.book)}) == 3)
+
+    ok = same_dicts and same_frame and same_open and same_times
+    print(f"  to_dict: {same_dicts}  to_frame: {same_frame}  未決済: {same_open}  単独の時刻: {same_times}")
+    return ok
+
+
+def test_engine_parity() -> bool:
+    """バックテストエンジンの取引履歴（ブックから作成）と各ポジションのto_dictの比較"""
+    rng = np.random.default_rng(3)
+    n = 5000
+    index = pd.date_range('2024-01-01', periods=n, freq='1min')
+    close = 150 + np.cumsum(rng.normal(0, 0.01, n))
+    signal = rng.choice([0, 0, 0, 0, 1, -1], n)
+    data = pd.DataFrame({
+        'Open': close, 'High': close + 0.01, 'Low': close - 0.01, 'Close': close,
+        'signal': signal, 'entry_price': close,
+        'sl_price': close - signal * 0.015, 'tp_price': close + signal * 0.03,
+        'strategy': 'scalping'
+    }, index=index)
+
+    engine = CustomBacktestEngine(data, initial_balance=100000, max_positions=5)
+    result = engine.run()
+    expected = pd.DataFrame([position.to_dict() for position in engine.closed_positions])
+
+    ok = len(result['trades']) > 100 and result['trades'].equals(expected)
+    print(f"  CustomBacktestEngine: 取引 {len(result['trades'])}件  to_dictとの一致: {ok}")
+    return ok
+
+
+def test_executor_statistics() -> bool:
+    """TradeExecutorの統計・月別パフォーマンスと従来の計算の比較"""
+    rng = np.random.default_rng(5)
+    n = 20000
+    prices = 150 + np.cumsum(rng.normal(0, 0.02, n))
+    timestamps = pd.date_range('2024-01-01', periods=n, freq='5min')
+    executor = TradeExecutor(initial_balance=1e9, max_positions=10)
+
+    for i in range(n):
+        price = float(prices[i])
+        executor.check_positions(price, timestamps[i])
+        if executor.positions and rng.random() < 0.02:
+            executor.close_position_by_signal(next(iter(executor.positions)), price, timestamps[i])
+        signal = int(rng.choice([1, -1, 0, 0]))
+        if signal:
+            executor.open_position(signal, price, 0.1, 5, 5, timestamps[i], 'test')
+
+    stats = executor.get_statistics()
+    winning = [p.pnl_amount for p in executor.closed_positions if p.pnl_amount > 0]
+    losing = [p.pnl_amount for p in executor.closed_positions if p.pnl_amount < 0]
+    expected = {'avg_win': np.mean(winning), 'avg_loss': np.mean(losing),
+                'profit_factor': sum(winning) / abs(sum(losing))}
+    same_stats = all(np.isclose(stats[key], value, rtol=1e-12) for key, value in expected.items())
+
+    # 従来のget_monthly_performance（取引履歴の辞書から作成）
+    df = pd.DataFrame(list(executor.trade_history))
+    df['month'] = pd.to_datetime(df['exit_time']).dt.to_period('M')
+    monthly = df.groupby('month').agg({'pnl_amount': 'sum', 'position_id': 'count', 'pnl_pips': 'sum'}).rename(
+        columns={'position_id': 'trades', 'pnl_amount': 'profit', 'pnl_pips': 'total_pips'})
+    monthly['wins'] = df[df['pnl_amount'] > 0].groupby('month').size()
+    monthly['win_rate'] = (monthly['wins'] / monthly['trades'] * 100).fillna(0)
+    same_monthly = executor.get_monthly_performance().equals(monthly)
+
+    history_only_tp_sl = all(record['exit_reason'] in ('tp', 'sl') for record in executor.trade_history)
+    ok = same_stats and same_monthly and history_only_tp_sl
+    print(f"  決済 {len(executor.closed_positions)}件（TP/SL {len(executor.trade_history)}件）"
+          f"  統計: {same_stats}  月別: {same_monthly}")
+    return ok
+
+
+def test_memory(count: int = 100000) -> bool:
+    """決済済みポジション10万件のメモリ使用量"""
+    trades = make_trades(count)
+    usage = {}
+    timings = {}
+    for label in ['従来', 'ブック']:
+        tracemalloc.start()
+        start = time.perf_counter()
+        if label == '従来':
+            kept = open_and_close(LegacyPosition, trades)
+        else:
+            # 決済済みポジションはブックの行としてのみ残る
+            kept = PositionBook()
+            open_and_close(Position, trades, book=kept)
+        timings[label] = time.perf_counter() - start
+        usage[label] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del kept
+
+    ratio = usage['ブック'] / usage['従来']
+    print(f"  {count}件: 従来 {usage['従来'] / 1024 / 1024:.1f}MB → ブック {usage['ブック'] / 1024 / 1024:.1f}MB"
+          f"（{ratio:.0%}）  作成時間 {timings['従来']:.2f}秒 → {timings['ブック']:.2f}秒")
+    return ratio < 0.5
+
+
+def test_standalone_memory(count: int = 10000) -> bool:
+    """ブックを指定せずに作成したポジション（スクリプトの独自ループ）1万件のメモリ使用量"""
+    trades = make_trades(count, seed=1)
+    usage = {}
+    timings = {}
+    for label, cls in [('従来', LegacyPosition), ('ブック省略', Position)]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        kept = open_and_close(cls, trades)
+        timings[label] = time.perf_counter() - start
+        usage[label] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        if label == 'ブック省略':
+            shared = len({id(position.book) for position in kept}) == 1
+        del kept
+
+    ratio = usage['ブック省略'] / usage['従来']
+    print(f"  {count}件: 従来 {usage['従来'] / 1024 / 1024:.1f}MB → ブック省略 {usage['ブック省略'] / 1024 / 1024:.1f}MB"
+          f"（{ratio:.0%}）  作成時間 {timings['従来']:.2f}秒 → {timings['ブック省略']:.2f}秒  共有ブック: {shared}")
+    return shared and ratio < 1.0 and timings['ブック省略'] < timings['従来'] * 5
+
+
+def test_position_book():
+    """ポジションブックテスト"""
+
+    print("=" * 60)
+    print("ポジションブックテスト")
+    print("=" * 60)
+
+    results = []
+    print("\n従来のPositionとの比較:")
+    results.append(test_view_parity())
+    results.append(test_engine_parity())
+    results.append(test_executor_statistics())
+
+    print("\nメモリ使用量:")
+    results.append(test_memory())
+    results.append(test_standalone_memory())
+
+    print("\n" + "=" * 60)
+    print("結果: " + ("全て成功" if all(results) else "失敗あり"))
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = test_position_book()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+感情分析キャッシュの追記型ストアテスト
+追記ログからの復元・コンパクション・異常終了時の書きかけ行の扱いと、
+1件ごとにキャッシュ全体を書き直す従来方式との書き込み量の差を確認する
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.sentiment.claude_sentiment_analyzer import ClaudeSentimentAnalyzer
+from src.sentiment.sentiment_log import SentimentLog
+
+
+def make_analysis(i: int) -> dict:
+    """検証用の感情分析結果"""
+    return {
+        'sentiment_score': round((i % 21 - 10) / 10, 1),
+        'usd_impact': 0.2,
+        'jpy_impact': -0.1,
+        'timeframe': 'short',
+        'confidence': 0.6,
+        'key_factors': ['FRB政策', '金利動向'],
+        'timestamp': f"2024-03-{1 + i % 28:02d}T{i % 24:02d}:00:00"
+    }
+
+
+def add_items(analyzer: ClaudeSentimentAnalyzer, start: int, count: int):
+    """ニュースを追加（保存メッセージは表示しない）"""
+    with redirect_stdout(StringIO()):
+        for i in range(start, start + count):
+            analyzer.add_sentiment_analysis(f"テストニュース{i}: 米金利見通し", make_analysis(i))
+
+
+def test_reload(directory: str) -> bool:
+    """従来形式のスナップショットに追記したキャッシュの復元"""
+    path = os.path.join(directory, 'sentiment_cache.json')
+    legacy = {'2024-01-01T09:00:00': {'score': 0.5, 'confidence': 0.7}}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(legacy, f)
+
+    analyzer = ClaudeSentimentAnalyzer(path)
+    add_items(analyzer, 0, 50)
+    snapshot_unchanged = json.load(open(path, encoding='utf-8')) == legacy
+
+    reloaded = ClaudeSentimentAnalyzer(path)
+    same = reloaded.sentiment_cache == analyzer.sentiment_cache and len(reloaded.sentiment_cache) == 51
+
+    analyzer.compact_sentiment_cache()
+    compacted = (json.load(open(path, encoding='utf-8')) == analyzer.sentiment_cache and
+                 os.path.getsize(os.path.join(directory, 'sentiment_cache.jsonl')) == 0)
+
+    ok = snapshot_unchanged and same and compacted
+    print(f"  追記中はスナップショットを書き換えない: {snapshot_unchanged}  再読み込みで一致: {same}"
+          f"  コンパクション後のJSON: {compacted}")
+    return ok
+
+
+def test_torn_write(directory: str) -> bool:
+    """異常終了でログの末尾に書きかけの行が残った場合"""
+    path = os.path.join(directory, 'sentiment_cache.json')
+    analyzer = ClaudeSentimentAnalyzer(path)
+    add_items(analyzer, 0, 10)
+    expected = dict(analyzer.sentiment_cache)
+
+    with open(os.path.join(directory, 'sentiment_cache.jsonl'), 'a', encoding='utf-8') as f:
+        f.write('{"key": "123", "value": {"sentiment_score": 0.')
+
+    with redirect_stdout(StringIO()):
+        recovered = ClaudeSentimentAnalyzer(path)
+    recovered_ok = recovered.sentiment_cache == expected
+
+    # 切り捨て後の追記は次の読み込みで正しく読める
+    add_items(recovered, 100, 1)
+    reloaded = ClaudeSentimentAnalyzer(path)
+    appended_ok = reloaded.sentiment_cache == recovered.sentiment_cache and len(reloaded.sentiment_cache) == 11
+
+    # スナップショットの書き込み途中で異常終了した場合（一時ファイルのみ残る）
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        f.write('{"broken": ')
+    snapshot_ok = ClaudeSentimentAnalyzer(path).sentiment_cache == reloaded.sentiment_cache
+
+    ok = recovered_ok and appended_ok and snapshot_ok
+    print(f"  書きかけの行を破棄: {recovered_ok}  破棄後の追記: {appended_ok}"
+          f"  書きかけのスナップショットの影響なし: {snapshot_ok}")
+    return ok
+
+
+def test_write_volume(directory: str, items: int = 500) -> bool:
+    """n件追加したときの書き込み量（従来方式との比較）"""
+    path = os.path.join(directory, 'sentiment_cache.json')
+    store = SentimentLog(path, fsync=False)
+
+    # 書き込み量を数えるため、コンパクションのたびにスナップショットの大きさを加算する
+    written = {'bytes': 0, 'compactions': 0}
+    compact = store.compact
+
+    def counting_compact(cache):
+        compact(cache)
+        written['bytes'] += os.path.getsize(path)
+        written['compactions'] += 1
+
+    store.compact = counting_compact
+    analyzer = ClaudeSentimentAnalyzer(path)
+    analyzer._store = store
+
+    start = time.time()
+    add_items(analyzer, 0, items)
+    new_time = time.time() - start
+    written['bytes'] += os.path.getsize(store.log_path)
+
+    # 従来方式: 1件ごとにキャッシュ全体をindent付きで書き直す
+    legacy_path = os.path.join(directory, 'legacy_cache.json')
+    cache = {}
+    legacy_bytes = 0
+    start = time.time()
+    for key, value in analyzer.sentiment_cache.items():
+        cache[key] = value
+        with open(legacy_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+        legacy_bytes += os.path.getsize(legacy_path)
+    legacy_time = time.time() - start
+
+    final_size = os.path.getsize(legacy_path)
+    ok = written['bytes'] < 5 * final_size and written['bytes'] * 10 < legacy_bytes
+    print(f"  {items}件追加: 従来 {legacy_bytes / 1024 / 1024:.1f}MB・{legacy_time:.2f}秒"
+          f" → 追記ログ {written['bytes'] / 1024 / 1024:.2f}MB・{new_time:.2f}秒"
+          f"（コンパクション{written['compactions']}回, 最終サイズ {final_size / 1024:.0f}KB）")
+    return ok
+
+
+def test_sentiment_log():
+    """感情分析キャッシュの追記型ストアテスト"""
+
+    print("=" * 60)
+    print("感情分析キャッシュ 追記型ストアテスト")
+    print("=" * 60)
+
+    results = []
+    for name, test in [('復元・コンパクション', test_reload),
+                       ('異常終了からの復旧', test_torn_write),
+                       ('書き込み量', test_write_volume)]:
+        directory = tempfile.mkdtemp()
+        try:
+            print(f"\n{name}:")
+            results.append(test(directory))
+        finally:
+            shutil.rmtree(directory)
+
+    print("\n" + "=" * 60)
+    print("結果: " + ("全て成功" if all(results) else "失敗あり"))
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = test_sentiment_log()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+感情分析の時刻索引テスト
+索引による検索が従来のキャッシュ全走査と同じ結果になり、バックテストの
+全バーに対する一括取得が高速であることを確認する
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.sentiment.claude_sentiment_analyzer import ClaudeSentimentAnalyzer
+
+
+def reference_recent_sentiments(cache: dict, target_timestamp: pd.Timestamp, hours_back: int = 12):
+    """従来実装（キャッシュ全体を走査）"""
+    relevant_sentiments = []
+    cutoff_time = target_timestamp - timedelta(hours=hours_back)
+
+    for timestamp_str, sentiment_data in cache.items():
+        try:
+            if timestamp_str.lstrip('-').isdigit():
+                timestamp_source = sentiment_data.get('timestamp') or sentiment_data.get('added_timestamp')
+                if timestamp_source:
+                    sentiment_timestamp = pd.to_datetime(timestamp_source)
+                else:
+                    continue
+            else:
+                sentiment_timestamp = pd.to_datetime(timestamp_str)
+
+            if cutoff_time <= sentiment_timestamp < target_timestamp:
+                relevant_sentiments.append({
+                    'timestamp': sentiment_timestamp,
+                    'score': sentiment_data.get('sentiment_score', sentiment_data.get('score', 0.0)),
+                    'confidence': sentiment_data.get('confidence', 0.0),
+                    'news_count': sentiment_data.get('news_count', 1)
+                })
+        except Exception:
+            continue
+
+    relevant_sentiments.sort(key=lambda x: x['timestamp'])
+    return relevant_sentiments
+
+
+def reference_sentiment_at_time(cache: dict, target_timestamp: pd.Timestamp) -> float:
+    """従来実装のget_sentiment_at_time"""
+    recent_sentiments = reference_recent_sentiments(cache, target_timestamp, hours_back=24)
+    if not recent_sentiments:
+        return 0.0
+    return recent_sentiments[-1]['score']
+
+
+def make_cache(n: int, seed: int = 0) -> dict:
+    """数値キー・時刻キー・added_timestampのみ・同時刻を含む検証用キャッシュ"""
+    rng = np.random.default_rng(seed)
+    base = pd.Timestamp('2024-01-01')
+    cache = {}
+
+    for i in range(n):
+        timestamp = base + pd.Timedelta(minutes=int(rng.integers(0, 60 * 24 * 60)))
+        entry = {
+            'sentiment_score': round(float(rng.uniform(-1, 1)), 3),
+            'confidence': round(float(rng.uniform(0, 1)), 3),
+        }
+        kind = i % 4
+        if kind == 0:
+            cache[timestamp.isoformat()] = {'score': entry['sentiment_score'], 'confidence': entry['confidence'],
+                                            'news_count': int(rng.integers(1, 5))}
+        elif kind == 1:
+            cache[str(rng.integers(-2**62, 2**62))] = {**entry, 'added_timestamp': timestamp.isoformat()}
+        else:
+            cache[str(rng.integers(-2**62, 2**62))] = {**entry, 'timestamp': timestamp.isoformat()}
+
+    # 同時刻のエントリ（追加順が後のものが最新として扱われる）
+    cache[str(123456789)] = {'sentiment_score': 0.9, 'confidence': 0.5, 'timestamp': '2024-01-10T12:00:00'}
+    cache[str(987654321)] = {'sentiment_score': -0.9, 'confidence': 0.5, 'timestamp': '2024-01-10T12:00:00'}
+    # 時刻のないエントリは無視される
+    cache[str(555)] = {'sentiment_score': 0.5}
+    return cache
+
+
+def test_parity(analyzer: ClaudeSentimentAnalyzer, cache: dict) -> bool:
+    """索引による検索と従来実装の比較"""
+    rng = np.random.default_rng(1)
+    targets = [pd.Timestamp('2024-01-01') + pd.Timedelta(minutes=int(m))
+               for m in rng.integers(-60, 60 * 24 * 62, 100)]
+    targets.append(pd.Timestamp('2024-01-10T12:00:01'))
+
+    ok = True
+    for target in targets:
+        expected = reference_recent_sentiments(cache, target, 12)
+        actual = analyzer.get_recent_sentiments(target, 12)
+        same = len(expected) == len(actual) and all(
+            e['timestamp'] == a['timestamp'] and e['score'] == a['score'] and
+            e['confidence'] == a['confidence'] and e['news_count'] == a['news_count']
+            for e, a in zip(expected, actual)
+        )
+        ok = ok and same and analyzer.get_sentiment_at_time(target) == reference_sentiment_at_time(cache, target)
+
+    print(f"  get_recent_sentiments / get_sentiment_at_time: {len(targets)}時刻 {'一致' if ok else '不一致'}")
+    return ok
+
+
+def test_series(analyzer: ClaudeSentimentAnalyzer, cache: dict) -> bool:
+    """全バーの一括取得と従来実装（1バーずつ）の比較・速度"""
+    index = pd.date_range('2024-01-01', periods=400, freq='15min')
+
+    start = time.time()
+    expected = np.array([reference_sentiment_at_time(cache, t) for t in index])
+    reference_time = time.time() - start
+
+    start = time.time()
+    per_bar = np.array([analyzer.get_sentiment_at_time(t) for t in index])
+    per_bar_time = time.time() - start
+
+    start = time.time()
+    series = analyzer.get_sentiment_series(index)
+    series_time = time.time() - start
+
+    ok = np.array_equal(series.to_numpy(), expected) and np.array_equal(per_bar, expected)
+    ok = ok and series.index.equals(index)
+    print(f"  {len(index)}バー: 全走査 {reference_time:.2f}秒 → 索引(1バーずつ) {per_bar_time:.3f}秒"
+          f" → 一括 {series_time * 1000:.2f}ms  {'一致' if ok else '不一致'}")
+
+    # 秒単位・タイムゾーン付きのインデックスも同じ時刻として扱う
+    seconds = analyzer.get_sentiment_series(index.as_unit('s'))
+    tokyo = analyzer.get_sentiment_series(index.tz_localize('UTC').tz_convert('Asia/Tokyo').as_unit('s'))
+    same_units = np.array_equal(seconds.to_numpy(), expected) and np.array_equal(tokyo.to_numpy(), expected)
+    print(f"  秒単位・タイムゾーン付きのインデックス: {'一致' if same_units else '不一致'}")
+    return ok and same_units
+
+
+def test_insert(cache_path: str) -> bool:
+    """追加したエントリが索引に反映される"""
+    analyzer = ClaudeSentimentAnalyzer(cache_path)
+    target = pd.Timestamp('2024-03-05T10:00:00')
+    before = analyzer.get_sentiment_at_time(target)
+
+    analyzer.add_sentiment_analysis("テストニュース: 日銀が利上げを決定",
+                                    {'sentiment_score': -0.77, 'confidence': 0.8,
+                                     'timestamp': '2024-03-05T09:59:00'})
+    after = analyzer.get_sentiment_at_time(target)
+
+    # sentiment_cacheを直接変更した場合も索引を作り直す
+    analyzer.sentiment_cache['2024-03-05T09:59:30'] = {'score': 0.42}
+    direct = analyzer.get_sentiment_at_time(target)
+
+    ok = after == -0.77 and direct == 0.42 and before != after
+    print(f"  追加・直接変更の反映: {'OK' if ok else 'NG'}")
+    return ok
+
+
+def test_sentiment_time_index():
+    """感情分析の時刻索引テスト"""
+
+    print("=" * 60)
+    print("感情分析 時刻索引テスト")
+    print("=" * 60)
+
+    cache = make_cache(400)
+    cache_path = os.path.join(tempfile.mkdtemp(), 'sentiment_cache.json')
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+
+    results = []
+    try:
+        analyzer = ClaudeSentimentAnalyzer(cache_path)
+        print(f"\nキャッシュ: {len(cache)}件")
+
+        print("\n従来実装との比較:")
+        results.append(test_parity(analyzer, cache))
+        results.append(test_series(analyzer, cache))
+
+        print("\n索引の更新:")
+        results.append(test_insert(cache_path))
+    finally:
+        shutil.rmtree(os.path.dirname(cache_path))
+
+    print("\n" + "=" * 60)
+    print("結果: " + ("全て成功" if all(results) else "失敗あり"))
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = test_sentiment_time_index()
+    sys.exit(0 if success else 1)
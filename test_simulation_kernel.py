@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+共通シミュレーションカーネルのテスト
+BacktestEngine / CustomBacktestEngine（src・ルート） / EnhancedBacktestEngine / TradeExecutor が
+カーネル上のアダプターになった後も、従来の各エンジンのバーごとのループ（iloc）と
+同じ取引・残高・資産推移になることと、実行時間を確認する
+"""
+
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from backtest_test_helpers import LegacyBarEngine, LegacyExecutor, make_signal_data
+from custom_backtest_engine import CustomBacktestEngine as RootCustomBacktestEngine
+from enhanced_backtest_engine import EnhancedBacktestEngine
+from src.backtest.backtest_engine import BacktestEngine
+from src.backtest.custom_backtest_engine import CustomBacktestEngine
+from src.backtest.trade_executor import TradeExecutor
+
+TOLERANCE = 1e-6
+
+
+class StrategyStub:
+    """パターン統計の更新を記録する戦略"""
+
+    def __init__(self):
+        self.updates = []
+
+    def update_consecutive_stats(self, is_win, pattern_types):
+        self.updates.append(is_win)
+
+
+def compare_trades(engine, legacy) -> bool:
+    """決済済みポジションと残高の比較"""
+    new = list(engine.closed_positions)
+    if len(new) != len(legacy.closed_positions) or len(new) == 0:
+        return False
+    for a, b in zip(new, legacy.closed_positions):
+        same = (a.entry_time == b.entry_time and a.exit_time == b.exit_time and a.direction == b.direction and
+                a.entry_price == b.entry_price and a.exit_price == b.exit_price and a.status == b.status and
+                a.strategy == b.strategy and a.lot_size == b.lot_size and
+                abs(a.profit_jpy - b.profit_jpy) < TOLERANCE)
+        if not same:
+            return False
+    return abs(engine.balance - legacy.balance) < TOLERANCE
+
+
+def compare_equity(equity_curve: pd.DataFrame, legacy, columns) -> bool:
+    """資産推移の比較"""
+    expected = pd.DataFrame(legacy.equity_curve).set_index('time')
+    new = equity_curve.set_index('time') if 'time' in equity_curve.columns else equity_curve
+    return (new.index.equals(expected.index) and
+            all(np.allclose(new[column].to_numpy(float), expected[column].to_numpy(float), rtol=0, atol=TOLERANCE)
+                for column in columns))
+
+
+def test_backtest_engine(data: pd.DataFrame) -> bool:
+    """BacktestEngine（シグナル生成済みのデータで実行）とsrcのCustomBacktestEngine"""
+    engine = BacktestEngine(data, initial_balance=200000, lot_size=0.01, max_positions=3)
+    engine._simulate()
+    legacy = LegacyBarEngine(data, 200000, 0.01, 3).run()
+    same = (compare_trades(engine, legacy) and engine.ignored_signals == legacy.ignored_signals and
+            compare_equity(engine.get_equity_curve(), legacy, ['balance', 'equity', 'open_positions']))
+    trade_log = engine.get_trade_log()
+    same = same and len(trade_log) == len(legacy.closed_positions)
+    print(f"  BacktestEngine: 取引 {len(engine.closed_positions)}件  無視 {engine.ignored_signals}件  一致: {same}")
+
+    # srcのCustomBacktestEngineは基底クラスに (data, 残高, max_positions, spread) を位置引数で渡す
+    # （lot_size=max_positions, max_positions=spread_pips として動作する従来の挙動を維持）
+    with redirect_stdout(StringIO()):
+        custom = CustomBacktestEngine(data, initial_balance=2000000, max_positions=5)
+        result = custom.run()
+    legacy = LegacyBarEngine(data, 2000000, 5, 0.2).run()
+    same_custom = (compare_trades(custom, legacy) and result['ignored_signals'] == legacy.ignored_signals and
+                   len(result['trades']) == len(legacy.closed_positions) and
+                   compare_equity(result['equity_curve'], legacy, ['balance', 'equity', 'open_positions']))
+    print(f"  CustomBacktestEngine（src）: 取引 {len(result['trades'])}件  一致: {same_custom}")
+    return same and same_custom
+
+
+def test_root_custom_engine(data: pd.DataFrame) -> bool:
+    """ルートのCustomBacktestEngine（position_size列・戦略のパターン統計の更新）"""
+    stub, legacy_stub = StrategyStub(), StrategyStub()
+    engine = RootCustomBacktestEngine(data, initial_balance=200000, max_positions=3, strategy_instance=stub)
+    results = engine.run()
+    legacy = LegacyBarEngine(data, 200000, 0.01, 3, lot_rule='position_size',
+                             strategy_instance=legacy_stub).run()
+
+    same = (compare_trades(engine, legacy) and results['trades'] == len(legacy.closed_positions) and
+            stub.updates == legacy_stub.updates and
+            compare_equity(results['equity_curve'], legacy, ['balance', 'equity', 'open_positions']))
+    print(f"  CustomBacktestEngine（ルート）: 取引 {results['trades']}件  勝率 {results['win_rate']:.1f}%"
+          f"  パターン統計の更新 {len(stub.updates)}回  一致: {same}")
+    return same
+
+
+def test_enhanced_engine(data: pd.DataFrame) -> bool:
+    """EnhancedBacktestEngine（勝率に応じたロットサイズ）"""
+    ok = True
+    for threshold in [80.0, 30.0]:
+        engine = EnhancedBacktestEngine(data, initial_balance=1000000, max_positions=5,
+                                        win_rate_threshold=threshold)
+        results = engine.run()
+        legacy = LegacyBarEngine(data, 1000000, 0.01, 5, lot_rule='win_rate', win_rate_threshold=threshold).run()
+
+        increased = sum(1 for pos in legacy.closed_positions if pos.lot_size not in (0.01,))
+        same = (compare_trades(engine, legacy) and
+                results['position_limit_reached_count'] == legacy.position_limit_reached_count and
+                engine.current_win_rate == legacy.current_win_rate and
+                compare_equity(results['equity_curve'], legacy, ['balance', 'equity', 'open_positions', 'win_rate']))
+        print(f"  EnhancedBacktestEngine（閾値{threshold:.0f}%）: 取引 {results['trades']}件"
+              f"  増量ロット {increased}件  上限到達 {results['position_limit_reached_count']}回  一致: {same}")
+        ok = ok and same
+    return ok
+
+
+def test_trade_executor() -> bool:
+    """TradeExecutor（現在価格でのTP/SL判定・証拠金制限・シグナル決済）"""
+    rng = np.random.default_rng(7)
+    n = 20000
+    prices = 150 + np.cumsum(rng.normal(0, 0.03, n))
+    timestamps = pd.date_range('2024-01-01', periods=n, freq='5min')
+    executor = TradeExecutor(initial_balance=3000000, max_positions=10)
+    legacy = LegacyExecutor(3000000, 10)
+
+    same_decisions = True
+    for i in range(n):
+        price = float(prices[i])
+        executor.check_positions(price, timestamps[i])
+        legacy.check_positions(price)
+        if executor.positions and rng.random() < 0.05:
+            position_id = next(iter(executor.positions))
+            executor.close_position_by_signal(position_id, price, timestamps[i])
+            legacy._close(position_id, price, 'signal')
+        signal = int(rng.choice([1, -1, 0, 0]))
+        lot_size = float(rng.choice([0.01, 0.05, 0.1]))
+        sl_pips, tp_pips = float(rng.uniform(5, 30)), float(rng.uniform(5, 30))
+        opened = executor.open_position(signal, price, lot_size, sl_pips, tp_pips, timestamps[i])
+        legacy_opened = legacy.open_position(signal, price, lot_size, sl_pips, tp_pips)
+        same_decisions &= (opened is None) == (legacy_opened is None)
+
+    closed = [(pos.position_id, pos.exit_reason, pos.pnl_amount) for pos in executor.closed_positions]
+    same_closed = (len(closed) == len(legacy.closed) and
+                   all(a[:2] == b[:2] and abs(a[2] - b[2]) < TOLERANCE for a, b in zip(closed, legacy.closed)))
+    same_balance = abs(executor.balance - legacy.balance) < TOLERANCE
+    stats = executor.get_statistics()
+    ok = same_decisions and same_closed and same_balance and stats['total_trades'] == legacy.next_position_id - 1
+    print(f"  TradeExecutor: 新規 {stats['total_trades']}件  決済 {len(closed)}件"
+          f"  残高 {executor.balance:,.0f}円  一致: {ok}")
+    return ok
+
+
+def test_speed(data: pd.DataFrame) -> bool:
+    """従来のバーごとのループとカーネルの実行時間"""
+    start = time.perf_counter()
+    LegacyBarEngine(data, 1000000, 0.01, 5, lot_rule='win_rate').run()
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    EnhancedBacktestEngine(data, initial_balance=1000000, max_positions=5).run()
+    new_time = time.perf_counter() - start
+
+    print(f"  {len(data)}バー: 従来 {legacy_time:.2f}秒 → カーネル {new_time:.2f}秒"
+          f"（{legacy_time / new_time:.0f}倍）")
+    return new_time < legacy_time
+
+
+def test_simulation_kernel():
+    """共通シミュレーションカーネルのテスト"""
+
+    print("=" * 60)
+    print("共通シミュレーションカーネルテスト")
+    print("=" * 60)
+
+    data = make_signal_data(6000)
+    sized_data = make_signal_data(6000, seed=1, position_size=[0.01, 0.02, 0.05])
+    # EnhancedBacktestEngineはposition_sizeが欠損のバーで勝率に応じたロットサイズを使う
+    partly_sized_data = make_signal_data(6000, seed=1, position_size=[0.01, 0.02, np.nan])
+
+    results = []
+    print("\n従来のエンジンとの一致:")
+    results.append(test_backtest_engine(data))
+    results.append(test_root_custom_engine(sized_data))
+    results.append(test_enhanced_engine(partly_sized_data))
+    results.append(test_trade_executor())
+
+    print("\n実行時間:")
+    results.append(test_speed(make_signal_data(20000, seed=2)))
+
+    print("\n" + "=" * 60)
+    print("結果: " + ("全て成功" if all(results) else "失敗あり"))
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = test_simulation_kernel()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+ストリーミング指標パリティテスト
+src/indicators/streaming.pyの逐次計算が既存の一括計算と一致することを確認する
+
+比較対象:
+- DataProcessor.add_technical_indicators（ta: ボリンジャーバンド、RSI）
+- MultiTimeframeDataManager.calculate_indicators（pandas rolling: BB、RSI、ATR、ADX、SMA）
+- ta / TA-Lib / pandas の一括計算（EMA、MACD、ATR、ADX、移動最大・最小）
+"""
+
+import pandas as pd
+import numpy as np
+import os
+import sys
+import time
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ta.trend import MACD as TaMACD
+from ta.volatility import AverageTrueRange
+
+from src.data.data_processor import DataProcessor
+from src.data.multi_timeframe_data_manager import MultiTimeframeDataManager
+from src.indicators.streaming import (
+    SMA, EMA, RollingStd, Bollinger, RSI, ATR, ADX, MACD, RollingMax, RollingMin
+)
+
+# TA-Lib（オプション）
+try:
+    import talib
+    TALIB_AVAILABLE = True
+except ImportError:
+    TALIB_AVAILABLE = False
+
+TOLERANCE = 1e-8
+
+
+def run_streaming(indicator, *arrays, output=None) -> np.ndarray:
+    """指標を1本ずつ更新し、各時点の値を配列で返す"""
+    columns = [np.asarray(a, dtype=float).tolist() for a in arrays]
+    values = []
+    for row in zip(*columns):
+        result = indicator.update(*row)
+        values.append(result if output is None else output(indicator))
+    return np.asarray(values, dtype=float)
+
+
+def check(name: str, expected, actual, start: int = 0) -> bool:
+    """一括計算の結果と逐次計算の結果を比較する"""
+    expected = np.asarray(expected, dtype=float)[start:]
+    actual = np.asarray(actual, dtype=float)[start:]
+
+    same_nan = np.array_equal(np.isnan(expected), np.isnan(actual))
+    valid = ~np.isnan(expected) & ~np.isnan(actual)
+    max_diff = np.max(np.abs(expected[valid] - actual[valid])) if valid.any() else 0.0
+    ok = same_nan and max_diff <= TOLERANCE
+
+    status = "OK" if ok else "NG"
+    print(f"  [{status}] {name:<28} 最大誤差: {max_diff:.2e}" +
+          ("" if same_nan else "  (NaN位置が不一致)"))
+    return ok
+
+
+def load_test_data(year: int = 2024) -> pd.DataFrame:
+    """15分足データを読み込む"""
+    data_path = f"data/processed/15min/{year}/USDJPY_15min_{year}.csv"
+    df = pd.read_csv(data_path, index_col='Datetime', parse_dates=True)
+    return df[['Open', 'High', 'Low', 'Close', 'Volume']]
+
+
+def test_streaming_indicators():
+    """ストリーミング指標と一括計算の一致確認"""
+
+    print("=" * 60)
+    print("ストリーミング指標パリティテスト")
+    print("=" * 60)
+
+    df = load_test_data()
+    close = df['Close'].to_numpy()
+    high = df['High'].to_numpy()
+    low = df['Low'].to_numpy()
+    print(f"データ: {len(df)}レコード\n")
+
+    results = []
+
+    # DataProcessor.add_technical_indicators（ta）
+    print("DataProcessor.add_technical_indicators:")
+    batch = DataProcessor(df).add_technical_indicators(df.copy())
+    bollinger = Bollinger(20, 2.0, ddof=0)
+    results.append(check("bb_upper", batch['bb_upper'],
+                         run_streaming(bollinger, close, output=lambda b: b.upper)))
+    bollinger = Bollinger(20, 2.0, ddof=0)
+    results.append(check("bb_middle", batch['bb_middle'],
+                         run_streaming(bollinger, close, output=lambda b: b.middle)))
+    bollinger = Bollinger(20, 2.0, ddof=0)
+    results.append(check("bb_lower", batch['bb_lower'],
+                         run_streaming(bollinger, close, output=lambda b: b.lower)))
+    results.append(check("rsi", batch['rsi'], run_streaming(RSI(14), close)))
+
+    # MultiTimeframeDataManager.calculate_indicators（pandas rolling）
+    print("\nMultiTimeframeDataManager.calculate_indicators:")
+    batch = MultiTimeframeDataManager().calculate_indicators({'15min': df.copy()})['15min']
+    bollinger = Bollinger(20, 2.0, ddof=1)
+    results.append(check("bb_upper", batch['bb_upper'],
+                         run_streaming(bollinger, close, output=lambda b: b.upper)))
+    bollinger = Bollinger(20, 2.0, ddof=1)
+    results.append(check("bb_lower", batch['bb_lower'],
+                         run_streaming(bollinger, close, output=lambda b: b.lower)))
+    results.append(check("rsi", batch['rsi'], run_streaming(RSI(14, smoothing='sma'), close)))
+    results.append(check("sma_50", batch['sma_50'], run_streaming(SMA(50), close)))
+    results.append(check("sma_200", batch['sma_200'], run_streaming(SMA(200), close)))
+    results.append(check("atr", batch['atr'],
+                         run_streaming(ATR(14, smoothing='sma'), high, low, close)))
+    adx = ADX(14, smoothing='sma')
+    results.append(check("plus_di", batch['plus_di'],
+                         run_streaming(adx, high, low, close, output=lambda a: a.plus_di), start=13))
+    results.append(check("adx", batch['adx'],
+                         run_streaming(ADX(14, smoothing='sma'), high, low, close)))
+
+    # ta / pandas
+    print("\nta / pandas:")
+    expected = AverageTrueRange(df['High'], df['Low'], df['Close'], window=14).average_true_range()
+    results.append(check("ATR (ta)", expected, run_streaming(ATR(14), high, low, close), start=13))
+    expected = df['Close'].ewm(span=20, min_periods=20, adjust=False).mean()
+    results.append(check("EMA (pandas)", expected, run_streaming(EMA(20), close)))
+    expected = df['Close'].rolling(20).std()
+    results.append(check("RollingStd (pandas)", expected, run_streaming(RollingStd(20), close)))
+    macd = TaMACD(df['Close'], window_slow=26, window_fast=12, window_sign=9)
+    results.append(check("MACD (ta)", macd.macd(),
+                         run_streaming(MACD(), close, output=lambda m: m.macd)))
+    results.append(check("MACD signal (ta)", macd.macd_signal(),
+                         run_streaming(MACD(), close, output=lambda m: m.signal)))
+    results.append(check("RollingMax (pandas)", df['High'].rolling(20).max(),
+                         run_streaming(RollingMax(20), high)))
+    results.append(check("RollingMin (pandas)", df['Low'].rolling(20).min(),
+                         run_streaming(RollingMin(20), low)))
+
+    # TA-Lib
+    if TALIB_AVAILABLE:
+        print("\nTA-Lib:")
+        results.append(check("RSI", talib.RSI(close, timeperiod=14),
+                             run_streaming(RSI(14, smoothing='talib'), close)))
+        results.append(check("ATR", talib.ATR(high, low, close, timeperiod=14),
+                             run_streaming(ATR(14, smoothing='talib'), high, low, close)))
+        results.append(check("ADX", talib.ADX(high, low, close, timeperiod=14),
+                             run_streaming(ADX(14, smoothing='talib'), high, low, close)))
+        results.append(check("EMA", talib.EMA(close, timeperiod=20),
+                             run_streaming(EMA(20, seed='sma'), close)))
+        results.append(check("SMA", talib.SMA(close, timeperiod=20), run_streaming(SMA(20), close)))
+    else:
+        print("\nTA-Lib未インストールのためスキップ")
+
+    # 欠損（NaN）を含む系列: NaNがウィンドウにある間はNaN、外れたら回復する
+    print("\n欠損を含む系列:")
+    small = pd.Series([1, 2, 3, 4, np.nan, 5, 6, 7, 8, 9], dtype=float)
+    results.append(check("RollingStd (短い系列)", small.rolling(3).std(),
+                         run_streaming(RollingStd(3), small)))
+    gapped = df['Close'].copy()
+    gapped.iloc[[100, 500, 501, 502, 503, 504, 2000]] = np.nan
+    gap = gapped.to_numpy()
+    results.append(check("SMA (pandas)", gapped.rolling(20).mean(), run_streaming(SMA(20), gap)))
+    results.append(check("EMA (pandas, ignore_na)",
+                         gapped.ewm(span=20, min_periods=20, adjust=False, ignore_na=True).mean(),
+                         run_streaming(EMA(20), gap)))
+    results.append(check("RollingStd (pandas)", gapped.rolling(20).std(), run_streaming(RollingStd(20), gap)))
+    results.append(check("Bollinger upper (pandas)",
+                         gapped.rolling(20).mean() + 2 * gapped.rolling(20).std(ddof=0),
+                         run_streaming(Bollinger(20, 2.0), gap, output=lambda b: b.upper)))
+    results.append(check("RollingMax (pandas)", gapped.rolling(20).max(), run_streaming(RollingMax(20), gap)))
+    results.append(check("RollingMin (pandas)", gapped.rolling(20).min(), run_streaming(RollingMin(20), gap)))
+
+    # 一括初期化と逐次更新の一致
+    print("\n一括初期化:")
+    split = len(close) // 2
+    rsi = RSI.from_history(close[:split], window=14)
+    resumed = run_streaming(rsi, close[split:])
+    full = run_streaming(RSI(14), close)
+    results.append(check("from_history + update", full[split:], resumed))
+
+    # 速度
+    start = time.time()
+    indicator = ADX(14)
+    for h, l, c in zip(high.tolist(), low.tolist(), close.tolist()):
+        indicator.update(h, l, c)
+    elapsed = time.time() - start
+    print(f"\nADX逐次更新: {elapsed / len(close) * 1e6:.1f}マイクロ秒/本")
+
+    print("\n" + "=" * 60)
+    print("結果: " + ("全て一致" if all(results) else "不一致あり"))
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = test_streaming_indicators()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+ストリーミング戦略テスト
+on_bar()による逐次シグナルが一括計算のgenerate_signals()と一致することを確認する
+"""
+
+import pandas as pd
+import numpy as np
+import os
+import sys
+import time
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.data.data_processor import DataProcessor
+from src.strategies.bollinger_rsi import BollingerRsiStrategy
+from src.strategies.tokyo_london import TokyoLondonStrategy
+from src.strategies.streaming_strategy import (
+    StreamingBollingerRsiStrategy,
+    StreamingTokyoLondonStrategy,
+    FrameStrategyAdapter
+)
+
+SIGNAL_COLUMNS = ['signal', 'entry_price', 'sl_price', 'tp_price']
+
+
+def load_test_data(year: int = 2024) -> pd.DataFrame:
+    """15分足データを読み込み、一括計算の指標と東京レンジを付与する"""
+    data_path = f"data/processed/15min/{year}/USDJPY_15min_{year}.csv"
+    df = pd.read_csv(data_path, index_col='Datetime', parse_dates=True)
+    df = df[['Open', 'High', 'Low', 'Close', 'Volume']]
+
+    processor = DataProcessor(df)
+    df = processor.add_technical_indicators(df)
+    df = processor.get_tokyo_session_range(df)
+    return df
+
+
+def compare_signals(name: str, batch: pd.DataFrame, streaming: pd.DataFrame) -> bool:
+    """シグナルカラムを比較して結果を表示する"""
+    ok = True
+    for col in SIGNAL_COLUMNS:
+        a = batch[col].astype(float).to_numpy()
+        b = streaming[col].astype(float).to_numpy()
+        if not np.allclose(a, b, equal_nan=True, atol=1e-9):
+            mismatches = np.where(~np.isclose(a, b, equal_nan=True, atol=1e-9))[0]
+            print(f"  {col}: 不一致 {len(mismatches)}件 (最初: {batch.index[mismatches[0]]})")
+            ok = False
+
+    n_signals = int((batch['signal'] != 0).sum())
+    print(f"{name}: シグナル数 {n_signals} - {'一致' if ok else '不一致'}")
+    return ok
+
+
+def test_streaming_strategy():
+    """ストリーミング戦略と一括計算戦略の一致確認"""
+
+    print("=" * 60)
+    print("ストリーミング戦略テスト")
+    print("=" * 60)
+
+    df = load_test_data()
+    print(f"データ: {len(df)}レコード ({df.index[0]} - {df.index[-1]})")
+
+    results = []
+
+    # ボリンジャーバンド＋RSI
+    start = time.time()
+    batch = BollingerRsiStrategy().generate_signals(df.copy())
+    batch_time = time.time() - start
+
+    start = time.time()
+    streaming = StreamingBollingerRsiStrategy().run(df[['Open', 'High', 'Low', 'Close']])
+    streaming_time = time.time() - start
+
+    results.append(compare_signals("ボリンジャーバンド＋RSI", batch, streaming))
+    print(f"  一括: {batch_time:.2f}秒 / ストリーミング: {streaming_time:.2f}秒")
+
+    # 東京レンジ・ロンドンブレイクアウト
+    batch = TokyoLondonStrategy().generate_signals(df.copy())
+    streaming = StreamingTokyoLondonStrategy().run(df[['Open', 'High', 'Low', 'Close']])
+    results.append(compare_signals("東京レンジ・ロンドンブレイクアウト", batch, streaming))
+
+    # アダプタ経由（直近1000本で確認）
+    subset = df.iloc[-1000:][['Open', 'High', 'Low', 'Close', 'Volume']]
+    processor = DataProcessor(pd.DataFrame())
+    prepared = processor.add_technical_indicators(subset.copy())
+    batch = BollingerRsiStrategy().generate_signals(prepared.copy())
+
+    adapter = FrameStrategyAdapter(
+        BollingerRsiStrategy(),
+        lookback=200,
+        prepare=processor.add_technical_indicators
+    )
+    streaming = adapter.run(subset)
+    results.append(compare_signals("アダプタ（ボリンジャーバンド＋RSI）", batch.iloc[200:], streaming.iloc[200:]))
+
+    print("\n" + "=" * 60)
+    print("結果: " + ("全て一致" if all(results) else "不一致あり"))
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = test_streaming_strategy()
+    sys.exit(0 if success else 1)
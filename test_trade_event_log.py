@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+取引イベントログテスト
+バックテスト中の新規注文・決済・無視したシグナルをリングバッファに記録してまとめて書き出すこと、
+ログレベルが無効な場合は整形しないこと、バイナリのイベントログを読み込めることと、
+シグナルごとに整形・出力する従来のログとの実行時間を確認する
+"""
+
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from backtest_test_helpers import make_signal_data
+from enhanced_backtest_engine import EnhancedBacktestEngine
+from src.backtest import trade_event_log
+from src.backtest.trade_event_log import TradeEventLog
+from src.backtest.trade_executor import TradeExecutor
+
+
+# シグナルの多い15分足（損切り・利確幅は固定、戦略は1つ）
+DENSE_SIGNALS = {'signals': (0, 1, -1), 'stops': (0.1, 0.15), 'strategies': ('scalping',)}
+
+
+def make_logger(directory: str, name: str, level: int) -> logging.Logger:
+    """ファイルに出力するロガー"""
+    logger = logging.getLogger(f'trade_event_test.{name}')
+    logger.handlers.clear()
+    logger.propagate = False
+    logger.setLevel(level)
+    handler = logging.FileHandler(os.path.join(directory, f'{name}.log'), mode='w')
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    logger.addHandler(handler)
+    return logger
+
+
+def legacy_logging_run(data: pd.DataFrame, logger: logging.Logger):
+    """従来のログ（シグナルごとにバーを取り出して整形し、1件ずつ出力）"""
+    engine = EnhancedBacktestEngine(data, initial_balance=1000000, max_positions=5)
+    engine.run()
+    for i in np.flatnonzero(data['signal'].to_numpy() != 0):
+        current_time = data.index[i]
+        current_bar = data.iloc[i]
+        logger.info(f"シグナル検出: {current_time}, 値: {current_bar['signal']}, 必要なカラム: "
+                    f"entry_price={current_bar.get('entry_price', 'なし')}, sl_price={current_bar.get('sl_price', 'なし')}, "
+                    f"tp_price={current_bar.get('tp_price', 'なし')}, strategy={current_bar.get('strategy', 'なし')}")
+    return engine
+
+
+def test_engine_events(directory: str) -> bool:
+    """エンジンのイベント（テキスト・バイナリ）と件数の一致"""
+    data = make_signal_data(20000, **DENSE_SIGNALS)
+    binary_path = os.path.join(directory, 'events.bin')
+    logger = make_logger(directory, 'events', logging.INFO)
+    event_log = TradeEventLog(logger, logging.INFO, capacity=1024, binary_path=binary_path)
+
+    engine = EnhancedBacktestEngine(data, initial_balance=1000000, max_positions=5, event_log=event_log)
+    results = engine.run()
+
+    events = TradeEventLog.read_events(binary_path)
+    counts = events['kind'].value_counts()
+    opened = len(engine.closed_positions) + len(engine.open_positions)
+    signals = int((data['signal'] != 0).sum())
+    same_counts = (counts.get(trade_event_log.OPEN, 0) == opened and
+                   counts.get(trade_event_log.CLOSE, 0) == results['trades'] and
+                   counts.get(trade_event_log.IGNORED, 0) == signals - opened)
+
+    # 決済イベントの損益はブックの値と同じ
+    closes = events[events['kind'] == trade_event_log.CLOSE]
+    same_profit = np.array_equal(closes['value'].to_numpy(),
+                                 engine.position_book.column('profit_jpy', closes['row'].to_numpy()))
+
+    with open(os.path.join(directory, 'events.log'), encoding='utf-8') as f:
+        text = f.read()
+    batches = text.count('取引イベント')
+    lines = text.count('新規: ') + text.count('決済(') + text.count('シグナル無視: ')
+    same_text = lines == len(events) and batches == -(-len(events) // 1024)
+
+    ok = same_counts and same_profit and same_text
+    print(f"  イベント {len(events)}件（新規 {opened}件・決済 {results['trades']}件・無視 {signals - opened}件）"
+          f"  バイナリ: {same_counts and same_profit}  テキスト {batches}回に分けて{lines}行: {same_text}")
+    return ok
+
+
+def test_level_gating(directory: str) -> bool:
+    """ログレベルが無効な場合は整形しない・直近のイベントはリングバッファに残る"""
+    logger = make_logger(directory, 'gated', logging.WARNING)
+    event_log = TradeEventLog(logger, logging.INFO, capacity=100)
+    formatted = []
+    original_format = event_log.format_event
+    event_log.format_event = lambda event: formatted.append(1) or original_format(event)
+
+    executor = TradeExecutor(initial_balance=1e9, max_positions=5, event_log=event_log)
+    timestamps = pd.date_range('2024-01-01', periods=2000, freq='5min')
+    prices = 150 + np.cumsum(np.random.default_rng(1).normal(0, 0.05, 2000))
+    for timestamp, price in zip(timestamps, prices):
+        executor.check_positions(float(price), timestamp)
+        executor.open_position(1, float(price), 0.1, 10, 10, timestamp)
+    event_log.flush()
+
+    recent = event_log.recent_events()
+    closed_rows = executor.closed_positions.row_array()
+    ok = (not formatted and os.path.getsize(os.path.join(directory, 'gated.log')) == 0 and
+          len(recent) == 100 and event_log.event_count > 100 and
+          recent['row'].iloc[-1] in set(closed_rows) | {p.row for p in executor.positions.values()})
+    print(f"  INFO無効: 整形 {len(formatted)}件  記録 {event_log.event_count}件  直近 {len(recent)}件を保持: {ok}")
+    return ok
+
+
+def test_speed(directory: str) -> bool:
+    """シグナルごとに出力する従来のログとの実行時間"""
+    data = make_signal_data(20000, seed=2, **DENSE_SIGNALS)
+
+    legacy_logger = make_logger(directory, 'legacy', logging.INFO)
+    start = time.perf_counter()
+    legacy_logging_run(data, legacy_logger)
+    legacy_time = time.perf_counter() - start
+
+    timings = {}
+    for label, level in [('INFO有効', logging.INFO), ('INFO無効', logging.WARNING)]:
+        logger = make_logger(directory, label, level)
+        start = time.perf_counter()
+        EnhancedBacktestEngine(data, initial_balance=1000000, max_positions=5,
+                               event_log=TradeEventLog(logger, logging.INFO)).run()
+        timings[label] = time.perf_counter() - start
+
+    print(f"  {len(data)}バー: 従来のログ {legacy_time:.2f}秒 → イベントログ INFO有効 {timings['INFO有効']:.2f}秒"
+          f" / INFO無効 {timings['INFO無効']:.2f}秒")
+    return timings['INFO有効'] < legacy_time
+
+
+def test_trade_event_log():
+    """取引イベントログテスト"""
+
+    print("=" * 60)
+    print("取引イベントログテスト")
+    print("=" * 60)
+
+    results = []
+    for name, test in [('エンジンのイベント', test_engine_events),
+                       ('ログレベル・リングバッファ', test_level_gating),
+                       ('実行時間', test_speed)]:
+        directory = tempfile.mkdtemp()
+        try:
+            print(f"\n{name}:")
+            results.append(test(directory))
+        finally:
+            shutil.rmtree(directory)
+
+    print("\n" + "=" * 60)
+    print("結果: " + ("全て成功" if all(results) else "失敗あり"))
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = test_trade_event_log()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+TradeExecutorの証拠金・評価額の集計値テスト
+保有ポジションの集計値（Σロット・Σロット×方向・Σロット×方向×エントリー価格）から
+計算した使用証拠金・未実現損益が、全ポジションを合計する従来の計算と一致することと、
+保有数によらず一定時間で計算できることを確認する
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.backtest.trade_executor import TradeExecutor
+
+TOLERANCE = 1e-6
+
+
+def reference_used_margin(executor: TradeExecutor, price: float) -> float:
+    """従来の計算（全ポジションの必要証拠金の合計）"""
+    return sum(executor.calculate_required_margin(pos.lot_size, price)
+               for pos in executor.positions.values())
+
+
+def reference_unrealized_pnl(executor: TradeExecutor, price: float) -> float:
+    """従来の計算（全ポジションの未実現損益の合計）"""
+    return sum(pos.get_unrealized_pnl(price) for pos in executor.positions.values())
+
+
+def reference_can_open(executor: TradeExecutor, lot_size: float, price: float) -> bool:
+    """従来のcan_open_position"""
+    if len(executor.positions) >= executor.max_positions:
+        return False
+    required_margin = executor.calculate_required_margin(lot_size, price)
+    used_margin = reference_used_margin(executor, price)
+    if used_margin + required_margin > executor.initial_balance * 0.80:
+        return False
+    return executor.balance - used_margin >= required_margin
+
+
+def reference_max_lot(executor: TradeExecutor, price: float) -> float:
+    """従来のcalculate_max_lot_size"""
+    available = executor.initial_balance * 0.80 - reference_used_margin(executor, price)
+    if available <= 0:
+        return 0.0
+    return max(0.0, round(available / (100000 * price * executor.margin_rate), 2))
+
+
+def simulate(executor: TradeExecutor, bars: int, seed: int = 0):
+    """ランダムな売買で開閉を繰り返し、各バーで従来の計算と比較する"""
+    rng = np.random.default_rng(seed)
+    prices = 150 + np.cumsum(rng.normal(0, 0.05, bars))
+    timestamps = pd.date_range('2024-01-01', periods=bars, freq='15min')
+
+    max_error = 0.0
+    decisions_match = True
+    for i in range(bars):
+        price = float(prices[i])
+        timestamp = timestamps[i]
+
+        executor.check_positions(price, timestamp)
+        if executor.positions and rng.random() < 0.1:
+            position_id = int(rng.choice(list(executor.positions)))
+            executor.close_position_by_signal(position_id, price, timestamp)
+
+        lot_size = float(rng.choice([0.01, 0.02, 0.05, 0.1]))
+        expected_can_open = reference_can_open(executor, lot_size, price)
+        decisions_match &= executor.can_open_position(lot_size, price) == expected_can_open
+        decisions_match &= executor.calculate_max_lot_size(price) == reference_max_lot(executor, price)
+
+        max_error = max(max_error,
+                        abs(executor.get_used_margin(price) - reference_used_margin(executor, price)),
+                        abs(executor.get_unrealized_pnl(price) - reference_unrealized_pnl(executor, price)))
+
+        if rng.random() < 0.5:
+            executor.open_position(int(rng.choice([1, -1])), price, lot_size,
+                                   stop_loss_pips=float(rng.uniform(5, 40)),
+                                   take_profit_pips=float(rng.uniform(5, 40)),
+                                   timestamp=timestamp)
+
+    return max_error, decisions_match
+
+
+def test_parity() -> bool:
+    """開閉を繰り返したときの集計値と従来の合計の一致"""
+    ok = True
+    for max_positions in [10, 200]:
+        executor = TradeExecutor(initial_balance=3000000 * 100, max_positions=max_positions)
+        max_error, decisions_match = simulate(executor, 3000)
+        equity = executor.update_equity(150.0)
+        expected_equity = executor.balance + reference_unrealized_pnl(executor, 150.0)
+
+        same = max_error < TOLERANCE and decisions_match and abs(equity - expected_equity) < TOLERANCE
+        print(f"  最大保有数{max_positions:4d}: 取引 {executor.total_trades}件  最大誤差 {max_error:.2e}円"
+              f"  判定の一致: {decisions_match}")
+        ok = ok and same
+    return ok
+
+
+def test_constant_time() -> bool:
+    """保有ポジション数と証拠金チェック・評価額更新の時間"""
+    rows = []
+    for count in [10, 100, 1000]:
+        executor = TradeExecutor(initial_balance=1e12, max_positions=count + 1)
+        timestamp = pd.Timestamp('2024-01-01')
+        for i in range(count):
+            executor.open_position(1 if i % 2 else -1, 150.0, 0.1, 1000, 1000, timestamp)
+
+        calls = 2000
+        start = time.perf_counter()
+        for _ in range(calls):
+            executor.can_open_position(0.1, 150.0)
+            executor.calculate_max_lot_size(150.0)
+            executor.update_equity(150.0)
+        new_time = (time.perf_counter() - start) / calls
+
+        start = time.perf_counter()
+        for _ in range(calls // 10):
+            reference_can_open(executor, 0.1, 150.0)
+            reference_max_lot(executor, 150.0)
+            reference_unrealized_pnl(executor, 150.0)
+        reference_time = (time.perf_counter() - start) / (calls // 10)
+
+        rows.append((count, reference_time, new_time))
+        print(f"  保有{count:5d}件: 従来 {reference_time * 1e6:9.1f}μs → 集計値 {new_time * 1e6:6.1f}μs（1バーあたり）")
+
+    # 保有数が100倍になっても集計値による計算時間はほぼ変わらない
+    return rows[-1][2] < rows[0][2] * 3
+
+
+def test_trade_executor_margin():
+    """TradeExecutorの証拠金・評価額の集計値テスト"""
+
+    print("=" * 60)
+    print("TradeExecutor 証拠金・評価額 集計値テスト")
+    print("=" * 60)
+
+    results = []
+    print("\n従来の計算との一致:")
+    results.append(test_parity())
+
+    print("\n計算時間:")
+    results.append(test_constant_time())
+
+    print("\n" + "=" * 60)
+    print("結果: " + ("全て成功" if all(results) else "失敗あり"))
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = test_trade_executor_margin()
+    sys.exit(0 if success else 1)
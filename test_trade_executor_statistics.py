@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+TradeExecutorの統計の集計値テスト
+決済のたびに更新する集計値（損益の合計・件数・連勝連敗・ピークとドローダウン）から計算した
+get_statisticsが決済済みポジションを集計する従来の計算と一致することと、
+取引数によらず一定時間で取得できることを確認する
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.backtest.trade_executor import TradeExecutor
+
+TOLERANCE = 1e-9
+
+
+def reference_statistics(executor: TradeExecutor) -> dict:
+    """従来のget_statistics（決済済みポジションの損益リストから計算）"""
+    winning_pnl = [pos.pnl_amount for pos in executor.closed_positions if pos.pnl_amount > 0]
+    losing_pnl = [pos.pnl_amount for pos in executor.closed_positions if pos.pnl_amount < 0]
+
+    avg_win = np.mean(winning_pnl) if winning_pnl else 0
+    avg_loss = np.mean(losing_pnl) if losing_pnl else 0
+    total_wins = sum(winning_pnl) if winning_pnl else 0
+    total_losses = abs(sum(losing_pnl)) if losing_pnl else 1
+    return {
+        'avg_win': avg_win,
+        'avg_loss': avg_loss,
+        'profit_factor': total_wins / total_losses if total_losses > 0 else 0,
+        'win_rate': executor.winning_trades / executor.total_trades * 100 if executor.total_trades else 0,
+    }
+
+
+def reference_equity_drawdown(equity_history) -> float:
+    """評価額の履歴から計算した最大ドローダウン（%）"""
+    equity = pd.Series(list(equity_history))
+    peak = equity.expanding().max()
+    return float(((peak - equity) / peak).max() * 100)
+
+
+def simulate(executor: TradeExecutor, bars: int, seed: int = 0, check_every: int = 0) -> bool:
+    """ランダムな売買で開閉を繰り返す（check_everyごとに従来の計算と比較）"""
+    rng = np.random.default_rng(seed)
+    prices = 150 + np.cumsum(rng.normal(0, 0.05, bars))
+    timestamps = pd.date_range('2024-01-01', periods=bars, freq='15min')
+
+    same = True
+    for i in range(bars):
+        price = float(prices[i])
+        executor.check_positions(price, timestamps[i])
+        if executor.positions and rng.random() < 0.05:
+            executor.close_position_by_signal(next(iter(executor.positions)), price, timestamps[i])
+        if rng.random() < 0.3:
+            executor.open_position(int(rng.choice([1, -1])), price, float(rng.choice([0.01, 0.1, 1.0])),
+                                   stop_loss_pips=float(rng.uniform(5, 30)),
+                                   take_profit_pips=float(rng.uniform(5, 30)),
+                                   timestamp=timestamps[i])
+        executor.update_equity(price)
+
+        if check_every and i % check_every == 0:
+            stats = executor.get_statistics()
+            expected = reference_statistics(executor)
+            same &= all(abs(stats[key] - value) <= TOLERANCE * max(1.0, abs(value))
+                        for key, value in expected.items())
+    return same
+
+
+def test_parity() -> bool:
+    """集計値による統計と従来の計算の一致"""
+    executor = TradeExecutor(initial_balance=3000000, max_positions=20)
+    same_progress = simulate(executor, 20000, check_every=500)
+
+    stats = executor.get_statistics()
+    expected = reference_statistics(executor)
+    same_final = all(abs(stats[key] - value) <= TOLERANCE * max(1.0, abs(value)) for key, value in expected.items())
+
+    expected_drawdown = reference_equity_drawdown(executor.equity_history)
+    same_drawdown = abs(stats['max_equity_drawdown'] - expected_drawdown) < TOLERANCE
+    same_series = abs(executor.get_drawdown_series().max() * 100 - expected_drawdown) < TOLERANCE
+
+    # 残高の履歴は従来どおりpd.Seriesにできる
+    balance_series = pd.Series(executor.balance_history)
+    same_length = len(balance_series) == len(executor.equity_history) == 20001
+
+    print(f"  決済 {len(executor.closed_positions)}件  勝率 {stats['win_rate']:.1f}%"
+          f"  PF {stats['profit_factor']:.3f}  進捗時の一致: {same_progress}  最終の一致: {same_final}")
+    print(f"  評価額の最大ドローダウン {stats['max_equity_drawdown']:.3f}%（pandasで計算 {expected_drawdown:.3f}%）"
+          f"  残高最大ドローダウン {stats['max_drawdown']:.3f}%")
+    return same_progress and same_final and same_drawdown and same_series and same_length
+
+
+def test_constant_time() -> bool:
+    """取引数とget_statisticsの時間"""
+    rows = []
+    for bars in [2000, 40000]:
+        executor = TradeExecutor(initial_balance=1e9, max_positions=20)
+        simulate(executor, bars, seed=1)
+
+        calls = 2000
+        start = time.perf_counter()
+        for _ in range(calls):
+            executor.get_statistics()
+        new_time = (time.perf_counter() - start) / calls
+
+        start = time.perf_counter()
+        for _ in range(20):
+            reference_statistics(executor)
+        reference_time = (time.perf_counter() - start) / 20
+
+        rows.append(new_time)
+        print(f"  決済 {len(executor.closed_positions):6d}件: 従来 {reference_time * 1e3:8.2f}ms"
+              f" → 集計値 {new_time * 1e6:6.1f}μs（1回あたり）")
+
+    # 取引数が20倍になっても集計値による計算時間はほぼ変わらない
+    return rows[-1] < rows[0] * 3
+
+
+def test_trade_executor_statistics():
+    """TradeExecutorの統計の集計値テスト"""
+
+    print("=" * 60)
+    print("TradeExecutor 統計 集計値テスト")
+    print("=" * 60)
+
+    results = []
+    print("\n従来の計算との一致:")
+    results.append(test_parity())
+
+    print("\n計算時間:")
+    results.append(test_constant_time())
+
+    print("\n" + "=" * 60)
+    print("結果: " + ("全て成功" if all(results) else "失敗あり"))
+    print("=" * 60)
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = test_trade_executor_statistics()
+    sys.exit(0 if success else 1)